@@ -0,0 +1,40 @@
+from fastapi import APIRouter, HTTPException
+
+from backend.app.services.async_core import run_db
+from backend.app.services.backups import get_backup_status, list_backups, request_backup, verify_backup
+
+router = APIRouter()
+
+
+def _backup_path(name: str) -> str:
+    # Only names listed in the backup folder, never arbitrary paths
+    for backup in list_backups():
+        if backup["name"] == name:
+            return backup["path"]
+    raise HTTPException(status_code=404, detail="Backup not found")
+
+
+@router.get("/backups")
+async def backups():
+    """Backups on disk, newest first, and the state of the backup thread."""
+    return await run_db(get_backup_status)
+
+
+@router.post("/backups", status_code=202)
+async def create_backup():
+    """Start a backup in the background; poll GET /backups for the result.
+
+    The database stays writable while it is copied.
+    """
+    request_backup()
+    return {"status": "scheduled"}
+
+
+@router.post("/backups/{name}/verify")
+async def verify(name: str):
+    """Run SQLite's integrity check on a backup."""
+    path = await run_db(_backup_path, name)
+    try:
+        return {"status": "ok", **await run_db(verify_backup, path)}
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
@@ -0,0 +1,82 @@
+import hashlib
+from collections import OrderedDict
+from typing import Optional
+
+from fastapi import Request
+
+from backend.app.config.settings import RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_MAX_BYTES
+
+
+def make_etag(generation: int, request: Request, variant: str = "") -> str:
+    """Strong ETag for a read at a world generation: the generation plus a
+    digest of the path, query parameters and response variant."""
+    params = "&".join(f"{key}={value}" for key, value in sorted(request.query_params.multi_items()))
+    digest = hashlib.sha1(f"{request.url.path}?{params}#{variant}".encode("utf-8")).hexdigest()[:16]
+    return f'"{generation}-{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match already names etag."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    return etag in [tag[2:] if tag.startswith("W/") else tag for tag in candidates]
+
+
+class ResponseCache:
+    """Serialized response bodies of the current world generation.
+
+    Bodies are keyed by ETag, which already carries the generation, and
+    the whole cache is dropped as soon as a newer generation is seen, so
+    it never holds more than one world's worth of responses. Least
+    recently used bodies go first once either limit is reached.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, max_bytes: int = RESPONSE_CACHE_MAX_BYTES) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.generation: Optional[int] = None
+        self.bodies: "OrderedDict[str, bytes]" = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _sync(self, generation: int) -> bool:
+        """Move to a newer generation; False for a request that read an older one."""
+        if self.generation is not None and generation < self.generation:
+            return False
+        if generation != self.generation:
+            self.generation = generation
+            self.bodies.clear()
+            self.size = 0
+        return True
+
+    def get(self, generation: int, etag: str) -> Optional[bytes]:
+        body = self.bodies.get(etag) if self._sync(generation) else None
+        if body is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.bodies.move_to_end(etag)
+        return body
+
+    def put(self, generation: int, etag: str, body: bytes) -> None:
+        if not self._sync(generation) or len(body) > self.max_bytes or etag in self.bodies:
+            return
+        self.bodies[etag] = body
+        self.size += len(body)
+        while len(self.bodies) > self.max_entries or self.size > self.max_bytes:
+            _, evicted = self.bodies.popitem(last=False)
+            self.size -= len(evicted)
+
+    def stats(self) -> dict:
+        return {
+            "generation": self.generation,
+            "entries": len(self.bodies),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses
+        }
@@ -1,10 +1,56 @@
 import pdb
-from fastapi import APIRouter, HTTPException, Query
+import os
+import asyncio
+import json
+import tempfile
+from urllib.parse import quote
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel, Field
-from typing import List, Optional
-from backend.app.services.core import add_lore_to_db, get_all_lore_from_db, get_filtered_lore
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional
+from backend.app.config.settings import (
+    BATCH_GENERATION_CONCURRENCY,
+    JOB_MAX_ATTEMPTS,
+    EMBEDDING_MIGRATION_MODEL,
+    EMBEDDING_MIGRATION_DIMENSIONS,
+    LORE_PAGE_DEFAULT_LIMIT,
+    LORE_PAGE_MAX_LIMIT
+)
+from backend.app.utils.serialization import dumps, ndjson_line
+from backend.app.api.conditional import ResponseCache, make_etag, etag_matches
+from backend.app.services.jobs import submit_jobs, get_job, get_batch_status, cancel_jobs
+from backend.app.services.resilience import get_resilience_metrics
+from backend.app.services.core import (
+    get_world_summaries,
+    get_embedding_status,
+    get_embedding_migration,
+    start_embedding_migration,
+    cancel_embedding_migration,
+    get_lore_page,
+    get_world_generation,
+    EntryConflictError,
+    SPACE_MIN_SCORE
+)
+from backend.app.services.embedding_worker import notify_pending_embeddings
+from backend.app.services.bulk_import import abulk_import
+from backend.app.services.exporters import EXPORT_FORMATS, aiter_export
+from backend.app.services.snapshots import export_snapshot, import_snapshot
+from backend.app.services.async_core import (
+    run_db,
+    aadd_lore_to_db,
+    apatch_lore_entry,
+    aget_filtered_lore,
+    aiter_lore,
+    aiter_export_entries,
+    asearch_lore,
+    agenerate_empty_fields,
+    astream_field_content,
+    astream_text_from_lore
+)
 
 router = APIRouter()
+_list_cache = ResponseCache()
 
 class LoreEntry(BaseModel):
     title: str = Field(..., min_length=1)
@@ -23,37 +69,480 @@ class LoreEntry(BaseModel):
         }
     }
 
-@router.post("/add")
+class LoreEntryPatch(BaseModel):
+    title: Optional[str] = Field(None, min_length=1)
+    content: Optional[str] = None
+    tags: Optional[List[str]] = None
+    template: Optional[str] = None
+    fields: Optional[Dict[str, Any]] = None
+
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "fields": {"Motivation": "Keep the grid alive"},
+                "tags": ["engineer"]
+            }
+        }
+    }
+
+class FieldGenerationRequest(BaseModel):
+    entry_title: str = Field(..., min_length=1)
+    field_name: str = Field(..., min_length=1)
+    template_type: str = Field(..., min_length=1)
+    current_content: str = ""
+    user_prompt: Optional[str] = None
+    tags: List[str] = Field(default_factory=list)
+    generation_style: str = "Default"
+    use_world_summary: Optional[bool] = None
+
+class LorePromptRequest(BaseModel):
+    prompt: str = Field(..., min_length=1)
+
+class BatchGenerationRequest(BaseModel):
+    titles: List[str] = Field(..., min_length=1)
+    fields: Optional[List[str]] = None
+    generation_style: str = "Default"
+    user_prompt: Optional[str] = None
+    overwrite: bool = False
+    apply: bool = False
+    max_concurrency: int = Field(BATCH_GENERATION_CONCURRENCY, ge=1, le=32)
+
+class JobRequest(BaseModel):
+    kind: Literal["fill_entry", "embed_entry", "refresh_summaries", "migrate_embeddings"]
+    payloads: List[Dict[str, Any]] = Field(..., min_length=1)
+    max_attempts: int = Field(JOB_MAX_ATTEMPTS, ge=1, le=10)
+
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "kind": "fill_entry",
+                "payloads": [{"title": "Example Entry", "generation_style": "Default"}]
+            }
+        }
+    }
+
+class EmbeddingMigrationRequest(BaseModel):
+    model: str = Field(EMBEDDING_MIGRATION_MODEL, min_length=1)
+    dimensions: Optional[int] = Field(EMBEDDING_MIGRATION_DIMENSIONS, ge=1)
+    # Calibrated for the new space; they replace the active thresholds at cutover
+    min_score: float = Field(..., ge=-1.0, le=1.0)
+    near_duplicate_cosine: float = Field(..., ge=-1.0, le=1.0)
+
+class _DuplexStreamingResponse(StreamingResponse):
+    """Streams without listening for a disconnect, which would read (and
+    drop) request body messages the endpoint is still consuming."""
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+
+async def _sse_events(tokens: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Wrap generated tokens as server-sent events, ending with a done event."""
+    try:
+        async for token in tokens:
+            yield f"data: {json.dumps(token)}\n\n"
+        yield "event: done\ndata: {}\n\n"
+    except Exception as e:
+        yield f"event: error\ndata: {json.dumps(str(e))}\n\n"
+
+@router.post("/add", status_code=202)
 async def add_lore(entry: LoreEntry):
+    """Save an entry at once; its embedding is computed in the background.
+    Poll status_url until the embedding status is ready."""
     try:
-        add_lore_to_db(
+        inserted = await aadd_lore_to_db(
             title=entry.title,
             content=entry.content,
             tags=entry.tags,
-            template=entry.template
+            template=entry.template,
+            defer_embedding=True
         )
-        return {"status": "success", "message": "Lore added successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if not inserted:
+        raise HTTPException(status_code=409, detail="An entry with this title already exists")
+    notify_pending_embeddings()
+    return {
+        "status": "success",
+        "message": "Lore added; embedding pending",
+        "status_url": f"/lore/entries/{quote(entry.title, safe='')}/status"
+    }
 
-@router.get("/all")
-async def get_all_lore():
+def _wants_ndjson(request: Request, format: Optional[str]) -> bool:
+    if format:
+        return format == "ndjson"
+    return "application/x-ndjson" in request.headers.get("accept", "")
+
+async def _lore_list(
+    request: Request,
+    format: Optional[str],
+    cursor: Optional[int],
+    limit: Optional[int],
+    tags: Optional[List[str]] = None,
+    entry_type: Optional[str] = None,
+    query: Optional[str] = None
+) -> Response:
+    """Entries as one JSON document, one page of one, or an NDJSON stream.
+
+    Without cursor or limit the JSON variant keeps its original unpaged
+    shape; with either it returns a page and the next_cursor to pass back.
+    The NDJSON stream starts after cursor and ends after limit entries.
+    Responses carry an ETag of the world generation and the query, are
+    answered with 304 when If-None-Match already has it, and JSON bodies
+    are served from a cache until the generation moves on.
+    """
+    ndjson = _wants_ndjson(request, format)
     try:
-        return {"status": "success", "data": get_all_lore_from_db()}
+        # Read before the data: a write in between only makes the body newer than its tag
+        generation = await run_db(get_world_generation)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    etag = make_etag(generation, request, "ndjson" if ndjson else "json")
+    headers = {"ETag": etag, "Vary": "Accept"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    if ndjson:
+        async def _lines():
+            try:
+                async for entry in aiter_lore(tags, entry_type, query, cursor, limit=limit):
+                    yield ndjson_line(entry)
+            except Exception as e:
+                yield ndjson_line({"status": "error", "detail": str(e)})
+        return StreamingResponse(_lines(), media_type="application/x-ndjson", headers=headers)
+
+    body = _list_cache.get(generation, etag)
+    if body is None:
+        try:
+            if cursor is None and limit is None:
+                data = {"status": "success", "data": await aget_filtered_lore(tags=tags, entry_type=entry_type, query=query)}
+            else:
+                page = await run_db(get_lore_page, tags, entry_type, query, cursor, limit or LORE_PAGE_DEFAULT_LIMIT)
+                data = {"status": "success", **page}
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        body = dumps(data)
+        _list_cache.put(generation, etag, body)
+    return Response(body, media_type="application/json", headers=headers)
+
+@router.post("/bulk")
+async def bulk_add(
+    request: Request,
+    skip_near_duplicates: bool = Query(False, description="Skip entries that nearly duplicate stored ones"),
+    defer_embedding: bool = Query(False, description="Save at once and embed in the background"),
+    results: Literal["all", "problems"] = Query("all", description="problems only reports skipped and failed lines")
+):
+    """Add entries from an NDJSON body, one {template, fields, linked_entries}
+    object per line, streaming back one NDJSON result per line.
+
+    Lines are validated as they arrive and stored in batches, each with one
+    embeddings request and one transaction. The body is read only as fast
+    as batches are stored. Clients that upload the whole body before
+    reading the response should ask for results=problems to keep the
+    response small. The last line has done set and the counts per status.
+    """
+    async def _lines():
+        pending = False
+        try:
+            async for result in abulk_import(request.stream(), skip_near_duplicates, defer_embedding):
+                pending = pending or result.get("status") == "pending"
+                if results == "all" or result.get("done") or result.get("status") in ("skipped", "error"):
+                    yield ndjson_line(result)
+        except Exception as e:
+            yield ndjson_line({"status": "error", "detail": str(e)})
+        if pending:
+            notify_pending_embeddings()
+    return _DuplexStreamingResponse(_lines(), media_type="application/x-ndjson")
+
+@router.get("/all")
+async def get_all_lore(
+    request: Request,
+    format: Optional[Literal["json", "ndjson"]] = Query(None, description="ndjson streams one entry per line; defaults to the Accept header"),
+    cursor: Optional[int] = Query(None, ge=0, description="next_cursor of the previous page"),
+    limit: Optional[int] = Query(None, ge=1, le=LORE_PAGE_MAX_LIMIT, description="Page size")
+):
+    """Get every lore entry, whole, paged or streamed as NDJSON."""
+    return await _lore_list(request, format, cursor, limit)
 
 @router.get("/entries")
 async def get_entries(
+    request: Request,
     tag: Optional[List[str]] = Query(None),
     type: Optional[str] = Query(None, description="Template type (Character, Location, etc.)"),
-    query: Optional[str] = Query(None, description="Search term for title and content")
+    query: Optional[str] = Query(None, description="Search term for title and content"),
+    format: Optional[Literal["json", "ndjson"]] = Query(None, description="ndjson streams one entry per line; defaults to the Accept header"),
+    cursor: Optional[int] = Query(None, ge=0, description="next_cursor of the previous page"),
+    limit: Optional[int] = Query(None, ge=1, le=LORE_PAGE_MAX_LIMIT, description="Page size")
 ):
     """Get filtered lore entries based on tags, type, and search query."""
+    return await _lore_list(request, format, cursor, limit, tags=tag, entry_type=type, query=query)
+
+@router.get("/export")
+async def export_lore(
+    format: Literal["json", "ndjson", "markdown"] = Query("json", description="Download layout")
+):
+    """Download every entry in the lorea_ftue export shape.
+
+    The body is written as entries are read, a page at a time, so the
+    download starts at once and the server's memory does not grow with
+    the size of the world.
+    """
+    layout = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        aiter_export(aiter_export_entries(), format),
+        media_type=layout.media_type,
+        headers={"Content-Disposition": f'attachment; filename="lore_entries.{layout.extension}"'}
+    )
+
+@router.get("/snapshot")
+async def download_snapshot():
+    """Download every entry with its vectors as a Parquet snapshot.
+
+    Restoring it with POST /snapshot on a server using the same embedding
+    model makes no embeddings requests.
+    """
+    fd, path = tempfile.mkstemp(suffix=".parquet")
+    os.close(fd)
+    try:
+        await run_db(export_snapshot, path)
+    except RuntimeError as e:
+        os.remove(path)
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        os.remove(path)
+        raise HTTPException(status_code=500, detail=str(e))
+    return FileResponse(
+        path,
+        media_type="application/vnd.apache.parquet",
+        filename="lore_snapshot.parquet",
+        background=BackgroundTask(os.remove, path)
+    )
+
+@router.post("/snapshot")
+async def restore_snapshot(
+    request: Request,
+    replace: bool = Query(False, description="Delete every entry before importing")
+):
+    """Import a Parquet snapshot sent as the request body.
+
+    The body is spooled to a temporary file, since Parquet is read from
+    its footer; each chunk is written from a worker thread so the disk
+    never blocks the event loop. Vectors are reused when the snapshot's
+    embedding model is the active one; otherwise entries are embedded in
+    the background.
+    """
+    with tempfile.TemporaryFile() as body:
+        async for chunk in request.stream():
+            await asyncio.to_thread(body.write, chunk)
+        body.seek(0)
+        try:
+            result = await run_db(import_snapshot, body, replace)
+        except RuntimeError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "success", **result}
+
+@router.get("/entries/{title:path}/status")
+async def entry_status(title: str):
+    """Embedding status of an entry: pending, ready or failed."""
+    status = await run_db(get_embedding_status, title)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Entry not found")
+    return {"status": "success", "data": {"title": title, "embedding_status": status}}
+
+@router.patch("/entries/{title:path}")
+async def patch_entry(title: str, patch: LoreEntryPatch):
+    """Update only the given parts of an entry. Fields are merged into the
+    stored ones, and only text that changed is re-embedded."""
+    try:
+        result = await apatch_lore_entry(
+            title,
+            new_title=patch.title,
+            content=patch.content,
+            tags=patch.tags,
+            template=patch.template,
+            fields=patch.fields
+        )
+    except EntryConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Entry not found")
+    return {"status": "success", "data": result}
+
+@router.get("/search")
+async def search(
+    q: str = Query(..., min_length=1, description="Text to find related lore for"),
+    top_k: int = Query(5, ge=1, le=50),
+    min_score: Optional[float] = Query(None, description="Similarity cutoff; defaults to the active embedding space's"),
+    max_chars: Optional[int] = Query(None, ge=1, description="Cap on total snippet characters")
+):
+    """Find related lore with scores and the matching snippet of each entry."""
     try:
         return {
             "status": "success",
-            "data": get_filtered_lore(tags=tag, entry_type=type, query=query)
+            "data": await asearch_lore(
+                q,
+                top_k=top_k,
+                min_score=SPACE_MIN_SCORE if min_score is None else min_score,
+                max_chars=max_chars
+            )
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/generate/field/stream")
+async def stream_field(request: FieldGenerationRequest):
+    """Stream generated field content as server-sent events."""
+    tokens = astream_field_content(
+        entry_title=request.entry_title,
+        field_name=request.field_name,
+        template_type=request.template_type,
+        current_content=request.current_content,
+        user_prompt=request.user_prompt,
+        tags=request.tags,
+        generation_style=request.generation_style,
+        use_world_summary=request.use_world_summary
+    )
+    return StreamingResponse(_sse_events(tokens), media_type="text/event-stream")
+
+@router.post("/generate/text/stream")
+async def stream_text(request: LorePromptRequest):
+    """Stream text generated from a lore prompt as server-sent events."""
+    return StreamingResponse(_sse_events(astream_text_from_lore(request.prompt)), media_type="text/event-stream")
+
+@router.post("/generate/batch")
+async def generate_batch(request: BatchGenerationRequest):
+    """Fill empty (or selected) fields across entries, streaming one NDJSON
+    result line per field as it finishes."""
+    async def _lines():
+        async for result in agenerate_empty_fields(
+            entry_titles=request.titles,
+            fields=request.fields,
+            generation_style=request.generation_style,
+            user_prompt=request.user_prompt,
+            overwrite=request.overwrite,
+            apply=request.apply,
+            max_concurrency=request.max_concurrency
+        ):
+            yield ndjson_line(result)
+    return StreamingResponse(_lines(), media_type="application/x-ndjson")
+
+@router.post("/jobs", status_code=202)
+async def create_jobs(request: JobRequest):
+    """Queue background jobs, one per payload; a worker process runs them."""
+    try:
+        batch = await run_db(submit_jobs, request.kind, request.payloads, request.max_attempts)
+        return {
+            "status": "success",
+            "data": {**batch, "status_url": f"/lore/jobs/batches/{batch['batch_id']}"}
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/jobs/batches/{batch_id}")
+async def job_batch_status(batch_id: str):
+    """Progress of a batch of jobs: counts per status and any failures."""
+    batch = await run_db(get_batch_status, batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return {"status": "success", "data": batch}
+
+@router.get("/jobs/{job_id}")
+async def job_status(job_id: int):
+    job = await run_db(get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job.pop("result")
+    return {"status": "success", "data": job}
+
+@router.get("/jobs/{job_id}/result")
+async def job_result(job_id: int):
+    """Result of a finished job; 409 while it is still queued or running."""
+    job = await run_db(get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] == "failed":
+        raise HTTPException(status_code=409, detail=f"Job failed: {job['error']}")
+    if job["status"] != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    return {"status": "success", "data": job["result"]}
+
+@router.get("/metrics/openai")
+async def openai_metrics():
+    """Retry, hedging and circuit breaker counters plus latency percentiles
+    for each kind of OpenAI call."""
+    return {"status": "success", "data": get_resilience_metrics()}
+
+@router.get("/summaries")
+async def world_summaries():
+    """Stored per-template and per-tag world summaries and how many of
+    their entries changed since they were written."""
+    try:
+        return {"status": "success", "data": await run_db(get_world_summaries)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/summaries/refresh", status_code=202)
+async def refresh_summaries(force: bool = Query(False, description="Rebuild every summary from scratch")):
+    """Queue a refresh of the world summaries whose entries changed enough
+    since they were written; a job worker runs the completions."""
+    try:
+        batch = await run_db(submit_jobs, "refresh_summaries", [{"force": force}])
+        return {
+            "status": "success",
+            "data": {**batch, "status_url": f"/lore/jobs/batches/{batch['batch_id']}"}
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/embeddings/migration")
+async def embedding_migration_status():
+    """Active embedding space and, while a migration runs, its target and
+    how many entries the shadow index covers."""
+    try:
+        return {"status": "success", "data": await run_db(get_embedding_migration)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/embeddings/migration", status_code=202)
+async def migrate_embeddings(request: EmbeddingMigrationRequest):
+    """Queue a re-embedding of every entry into a new model or vector size.
+
+    Retrieval keeps using the active vectors and thresholds until the
+    shadow index is complete, then switches over to the new vectors and
+    the request's thresholds in one step.
+    """
+    try:
+        migration = await run_db(
+            start_embedding_migration,
+            request.model,
+            request.dimensions,
+            min_score=request.min_score,
+            near_duplicate_cosine=request.near_duplicate_cosine
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    batch = await run_db(submit_jobs, "migrate_embeddings", [{
+        "model": request.model,
+        "dimensions": request.dimensions,
+        "min_score": request.min_score,
+        "near_duplicate_cosine": request.near_duplicate_cosine
+    }])
+    return {
+        "status": "success",
+        "data": {**migration, **batch, "status_url": "/lore/embeddings/migration"}
+    }
+
+@router.delete("/embeddings/migration")
+async def cancel_migration():
+    """Abandon a running migration and drop its shadow vectors."""
+    try:
+        await run_db(cancel_jobs, "migrate_embeddings")
+        await run_db(cancel_embedding_migration)
+        return {"status": "success"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,88 @@
+import argparse
+import json
+
+from .logging.logger import log_info
+from .services import core
+from .services.exporters import EXPORT_FORMATS
+from .services.snapshots import export_snapshot, import_snapshot
+from .services.backups import create_backup, list_backups, prune_backups, verify_backup, restore_backup
+
+
+def _compact_vectors(args: argparse.Namespace) -> None:
+    result = core.compact_vector_store()
+    log_info(f"Vector store: {json.dumps(core.get_vector_store_stats())}")
+    print(json.dumps(result))
+
+
+def _export(args: argparse.Namespace) -> None:
+    output = args.output or f"lore_entries.{EXPORT_FORMATS[args.format].extension}"
+    written = core.export_lore_to_file(output, args.format)
+    print(json.dumps({"output": output, "bytes": written}))
+
+
+def _snapshot(args: argparse.Namespace) -> None:
+    print(json.dumps({"output": args.output, **export_snapshot(args.output)}))
+
+
+def _restore(args: argparse.Namespace) -> None:
+    print(json.dumps(import_snapshot(args.path, replace=args.replace)))
+
+
+def _backup(args: argparse.Namespace) -> None:
+    result = create_backup(compress=not args.no_compress, verify=not args.no_verify)
+    result["pruned"] = prune_backups()
+    print(json.dumps(result))
+
+
+def _backups(args: argparse.Namespace) -> None:
+    print(json.dumps(list_backups(), indent=2))
+
+
+def _verify_backup(args: argparse.Namespace) -> None:
+    print(json.dumps(verify_backup(args.path)))
+
+
+def _restore_backup(args: argparse.Namespace) -> None:
+    print(json.dumps(restore_backup(args.path)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="LoreA maintenance commands.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    compact = commands.add_parser(
+        "compact-vectors",
+        help="Rewrite the shared vector store without tombstoned rows"
+    )
+    compact.set_defaults(func=_compact_vectors)
+    export = commands.add_parser("export", help="Stream every entry to a file")
+    export.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="json")
+    export.add_argument("--output", help="File to write; defaults to lore_entries.<extension>")
+    export.set_defaults(func=_export)
+    snapshot = commands.add_parser("snapshot", help="Write every entry and its vectors to a Parquet snapshot")
+    snapshot.add_argument("--output", default="lore_snapshot.parquet", help="File to write")
+    snapshot.set_defaults(func=_snapshot)
+    restore = commands.add_parser("restore", help="Import a Parquet snapshot, reusing its vectors when the model matches")
+    restore.add_argument("path", help="Snapshot to import")
+    restore.add_argument("--replace", action="store_true", help="Delete every entry before importing")
+    restore.set_defaults(func=_restore)
+    backup = commands.add_parser("backup", help="Back up the live database and apply the retention limit")
+    backup.add_argument("--no-compress", action="store_true", help="Keep the copy as a plain .db file")
+    backup.add_argument("--no-verify", action="store_true", help="Skip the integrity check of the copy")
+    backup.set_defaults(func=_backup)
+    commands.add_parser("backups", help="List backups, newest first").set_defaults(func=_backups)
+    verify = commands.add_parser("verify-backup", help="Run SQLite's integrity check on a backup")
+    verify.add_argument("path", help="Backup file (.db or .db.gz)")
+    verify.set_defaults(func=_verify_backup)
+    restore_db = commands.add_parser(
+        "restore-backup",
+        help="Replace the database with a backup and rebuild derived indexes"
+    )
+    restore_db.add_argument("path", help="Backup file (.db or .db.gz)")
+    restore_db.set_defaults(func=_restore_backup)
+    args = parser.parse_args()
+    core.init_db()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from typing import Dict, List
+from typing import Any, Dict, List
 
 LORE_TEMPLATES: Dict[str, List[str]] = {
     "Character": ["Name", "Role", "Motivation", "Relationships", "Tags"],
@@ -9,4 +9,138 @@ LORE_TEMPLATES: Dict[str, List[str]] = {
 }
 
 DEFAULT_PROJECT_TITLE = "Untitled Project"
-DEFAULT_PROJECT_DESCRIPTION = ""
\ No newline at end of file
+DEFAULT_PROJECT_DESCRIPTION = ""
+
+# Near-duplicate detection
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16  # 16 bands x 4 rows catches pairs from roughly 0.5 Jaccard upwards
+NEAR_DUPLICATE_JACCARD = 0.5
+NEAR_DUPLICATE_COSINE = 0.92  # Calibrated for text-embedding-ada-002; seeds the initial embedding space only
+
+# Chat completion parameters shared by every generation call
+GENERATION_MODEL = "gpt-4"
+GENERATION_TEMPERATURE = 0.7
+GENERATION_MAX_TOKENS = 300
+
+# Generation response cache (opt-in through the "generation_cache" setting)
+GENERATION_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+GENERATION_CACHE_MAX_ROWS = 2000
+GENERATION_CACHE_VARIANTS = 3
+
+# Embeddings
+EMBEDDING_MODEL = "text-embedding-ada-002"
+EMBEDDING_DIMENSIONS = None  # Shortened vector size for text-embedding-3 models; None keeps the native size
+
+# Async API: size of the thread pool that runs blocking SQLite work
+DB_THREAD_POOL_SIZE = 8
+
+# Batch field generation: completions in flight at once
+BATCH_GENERATION_CONCURRENCY = 4
+
+# Context assembly: token budgets for retrieved lore packed into prompts
+FIELD_CONTEXT_TOKEN_BUDGET = 800
+LORE_CONTEXT_TOKEN_BUDGET = 1500
+MIN_SNIPPET_TOKENS = 24  # Smaller leftovers are not worth a truncated snippet
+CHARS_PER_TOKEN = 4.0  # Estimate used when tiktoken is not installed
+
+# Per-field chunk embeddings
+EMBEDDING_MAX_TOKENS = 8191  # Model input limit, in tokens
+EMBEDDING_CHUNK_TOKENS = 256
+EMBEDDING_BATCH_SIZE = 256  # Inputs per embeddings request
+CHUNK_BACKFILL_BATCH_SIZE = 50  # Entries indexed and committed per step of the frontend backfill
+
+# Retrieval: entries below this cosine similarity are not used as context.
+# Calibrated for text-embedding-ada-002 and seeds the initial embedding space
+# only; each space stores its own cutoff, set when migrating to it
+RETRIEVAL_MIN_SCORE = 0.75
+
+# Background job queue
+JOB_WORKER_CONCURRENCY = 4
+JOB_MAX_ATTEMPTS = 3
+JOB_RETRY_BACKOFF_SECONDS = 5.0  # Doubled after every failed attempt
+JOB_POLL_SECONDS = 1.0
+JOB_HEARTBEAT_SECONDS = 10.0
+JOB_STALE_SECONDS = 60.0  # Running jobs without a heartbeat this long are requeued
+
+# OpenAI call resilience, per call type: per-attempt timeout and overall
+# deadline in seconds, attempts including the first, and whether to send a
+# hedged duplicate request once an attempt runs past the p95 latency
+OPENAI_CALL_POLICIES: Dict[str, Dict[str, Any]] = {
+    "embedding": {"timeout": 15.0, "deadline": 45.0, "max_attempts": 4, "hedge": True},
+    "chat": {"timeout": 60.0, "deadline": 150.0, "max_attempts": 3, "hedge": False},
+    "chat_stream": {"timeout": 30.0, "deadline": 60.0, "max_attempts": 2, "hedge": False}
+}
+RETRY_BACKOFF_BASE_SECONDS = 0.5
+RETRY_BACKOFF_MAX_SECONDS = 8.0
+CIRCUIT_BREAKER_FAILURES = 5  # Consecutive provider failures before failing fast
+CIRCUIT_BREAKER_RESET_SECONDS = 30.0
+HEDGE_MIN_SAMPLES = 20  # Latencies recorded before p95 is trusted for hedging
+LATENCY_WINDOW = 200  # Recent latencies kept per call type
+
+# World summaries: per-template and per-tag rollups used as compact context
+WORLD_SUMMARY_MIN_CHANGES = 3  # Changed entries that always trigger a refresh
+WORLD_SUMMARY_CHANGE_RATIO = 0.2  # Smaller scopes refresh once this share changes
+WORLD_SUMMARY_MIN_CLUSTER_SIZE = 3  # Entries sharing a tag before it gets a summary
+WORLD_SUMMARY_MAX_TAG_CLUSTERS = 12
+WORLD_SUMMARY_ENTRY_TOKENS = 80  # Per-entry excerpt sent when summarising
+WORLD_SUMMARY_INPUT_TOKENS = 2500  # Excerpts folded into a summary per request
+WORLD_SUMMARY_TOKEN_BUDGET = 300  # Summary text injected into a field prompt
+
+# Background embedding of entries saved with a pending embedding
+PENDING_EMBEDDING_BATCH_SIZE = 32  # Entries embedded per sweep
+PENDING_EMBEDDING_POLL_SECONDS = 30.0
+PENDING_EMBEDDING_RETRY_SECONDS = 15.0  # Wait after a failed sweep
+
+# Entry updates are written only if the entry is unchanged since it was read;
+# a concurrently edited entry is read again, up to this many times in all
+ENTRY_UPDATE_ATTEMPTS = 3
+
+# Embedding model migration: re-embedding into a shadow index, then cutting over
+EMBEDDING_MIGRATION_MODEL = "text-embedding-3-small"
+EMBEDDING_MIGRATION_DIMENSIONS = 512
+EMBEDDING_MIGRATION_BATCH_SIZE = 64  # Entries re-embedded per shadow batch
+EMBEDDING_MIGRATION_MAX_ROUNDS = 10  # Catch-up passes before giving up on a busy database
+
+# Entry list reads: rows fetched per cursor step when streaming, and page sizes
+LORE_STREAM_BATCH_SIZE = 200
+LORE_PAGE_DEFAULT_LIMIT = 100
+LORE_PAGE_MAX_LIMIT = 1000
+
+# Conditional GET: serialized list responses cached for the current world generation
+RESPONSE_CACHE_MAX_ENTRIES = 32
+RESPONSE_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+# Bulk NDJSON ingestion and streamed file imports
+BULK_BATCH_SIZE = 100  # Entries embedded and inserted per transaction
+BULK_MAX_IN_FLIGHT = 2  # Batches processed at once before reading more of the body
+BULK_MAX_LINE_BYTES = 1024 * 1024  # Longest NDJSON line or JSON array element
+IMPORT_READ_BYTES = 256 * 1024  # Bytes read from an import file per step
+
+# Latency histograms: bucket upper bounds in seconds, shared by every /metrics histogram
+METRICS_LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+# Memory-mapped vector store next to the database, shared by every process;
+# when disabled (or unusable) retrieval reads vectors from SQLite per query
+VECTOR_STORE_ENABLED = True
+
+# Parquet snapshots: entries (with their vectors) read or written per batch
+SNAPSHOT_BATCH_SIZE = 5000
+
+# SQLite journal mode set by init_db: in WAL mode readers, backups and the
+# writer do not block each other; "delete" restores SQLite's default
+SQLITE_JOURNAL_MODE = "wal"
+
+# Online backups with the SQLite backup API
+BACKUP_DIR = None  # None keeps them in a backups folder beside the database
+BACKUP_PAGES_PER_STEP = 256  # Pages copied per step; writers get the lock between steps
+BACKUP_STEP_PAUSE_SECONDS = 0.005
+BACKUP_MAX_RESTARTS = 3  # Restarts caused by concurrent writes before copying in one step
+BACKUP_INTERVAL_SECONDS = 6 * 60 * 60  # Scheduled backups; 0 only backs up on request
+BACKUP_RETENTION = 10  # Newest backups kept
+BACKUP_COMPRESS = True
+
+# Frontend entry catalog: filter results kept per world generation
+CATALOG_FILTER_CACHE_SIZE = 32
@@ -0,0 +1,516 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Union
+
+import numpy as np
+import numpy.typing as npt
+from openai import AsyncOpenAI
+
+from ..config.settings import (
+    DB_THREAD_POOL_SIZE,
+    EMBEDDING_BATCH_SIZE,
+    ENTRY_UPDATE_ATTEMPTS,
+    GENERATION_MODEL,
+    GENERATION_TEMPERATURE,
+    GENERATION_MAX_TOKENS,
+    BATCH_GENERATION_CONCURRENCY,
+    LORE_STREAM_BATCH_SIZE
+)
+from ..logging.logger import log_info, log_error, log_warning
+from ..utils.openai_logger import log_openai_interaction
+from . import core
+from .resilience import acall_with_resilience
+from .metrics import EMBEDDING_SECONDS, EMBEDDING_INPUTS, CHAT_SECONDS, record_chat_usage, atimed_stream
+
+# core loads .env on import, so the key is available here
+async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+
+# SQLite work is blocking; a bounded pool keeps it off the event loop
+# without letting a burst of requests open unlimited connections.
+_db_executor = ThreadPoolExecutor(max_workers=DB_THREAD_POOL_SIZE, thread_name_prefix="lore-db")
+
+
+async def run_db(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking database function on the DB thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_db_executor, partial(func, *args, **kwargs))
+
+
+def shutdown_db_executor() -> None:
+    """Wait for queued database work and stop the pool."""
+    _db_executor.shutdown(wait=True)
+
+
+async def aembed_text(text: str, space: Optional[Dict[str, Any]] = None) -> npt.NDArray[np.float32]:
+    """Async counterpart of core.embed_text."""
+    cleaned_text = core._prepare_embedding_input(text)
+    args = core._embedding_args(space or await run_db(core.get_embedding_space))
+    EMBEDDING_INPUTS.inc()
+    with EMBEDDING_SECONDS.time(kind="single"):
+        response = await acall_with_resilience("embedding", lambda timeout: async_client.embeddings.create(
+            input=cleaned_text,
+            encoding_format="float",
+            timeout=timeout,
+            **args
+        ))
+    return np.array(response.data[0].embedding, dtype=np.float32)
+
+
+async def aembed_texts(texts: List[str], space: Optional[Dict[str, Any]] = None) -> List[npt.NDArray[np.float32]]:
+    """Async counterpart of core.embed_texts."""
+    cleaned = [core._prepare_embedding_input(text) for text in texts]
+    args = core._embedding_args(space or await run_db(core.get_embedding_space))
+    vectors = []
+    for start in range(0, len(cleaned), EMBEDDING_BATCH_SIZE):
+        batch = cleaned[start:start + EMBEDDING_BATCH_SIZE]
+        EMBEDDING_INPUTS.inc(len(batch))
+        with EMBEDDING_SECONDS.time(kind="batch"):
+            response = await acall_with_resilience("embedding", lambda timeout: async_client.embeddings.create(
+                input=batch,
+                encoding_format="float",
+                timeout=timeout,
+                **args
+            ))
+        for item in sorted(response.data, key=lambda d: d.index):
+            vectors.append(np.array(item.embedding, dtype=np.float32))
+    return vectors
+
+
+async def arank_lore(
+    prompt: str,
+    top_k: int = 5,
+    min_score: Union[float, str, None] = core.SPACE_MIN_SCORE,
+    cache_query: bool = False
+) -> List[Dict[str, Any]]:
+    """Async counterpart of core._rank_lore."""
+    space = await run_db(core.get_embedding_space)
+    if min_score == core.SPACE_MIN_SCORE:
+        min_score = (await run_db(core.get_embedding_thresholds))["min_score"]
+    prompt_embedding = await run_db(core._cached_query_embedding, prompt, space) if cache_query else None
+    if prompt_embedding is None:
+        prompt_embedding = await aembed_text(prompt, space)
+        if cache_query:
+            await run_db(core._store_query_embedding, prompt, space, prompt_embedding)
+    return await run_db(core._score_lore, prompt_embedding, top_k, min_score, space["model"])
+
+
+async def aget_relevant_lore(prompt: str, top_k: int = 5, min_score: Optional[float] = None) -> List[str]:
+    return [entry["content"] for entry in await arank_lore(prompt, top_k, min_score)]
+
+
+async def asearch_lore(
+    prompt: str,
+    top_k: int = 5,
+    min_score: Union[float, str, None] = core.SPACE_MIN_SCORE,
+    max_chars: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Async counterpart of core.search_lore."""
+    return core._search_results(await arank_lore(prompt, top_k, min_score), max_chars)
+
+
+async def aadd_lore_to_db(
+    title: str,
+    content: str | Dict[str, Any],
+    tags: List[str] | str,
+    template: Optional[str] = None,
+    linked_entries: Optional[List[str]] = None,
+    skip_near_duplicates: bool = False,
+    defer_embedding: bool = False
+) -> bool:
+    """Async counterpart of core.add_lore_to_db."""
+    log_info(f"Adding lore entry: {title}")
+    try:
+        row = await run_db(core._prepare_lore_row, title, content, tags, template, linked_entries)
+        if row is None:
+            return False
+        space = await run_db(core.get_embedding_space)
+        embedding_vector = None
+        if not defer_embedding:
+            vectors = await aembed_texts([row["content"]] + [c["embed_input"] for c in row["chunks"]], space)
+            for chunk, vector in zip(row["chunks"], vectors[1:]):
+                chunk["embedding"] = vector
+            embedding_vector = vectors[0]
+        inserted = await run_db(core._insert_lore_row, row, embedding_vector, skip_near_duplicates, space)
+        if inserted:
+            log_info(f"Successfully added lore entry: {title}" + (" (embedding pending)" if defer_embedding else ""))
+        return inserted
+    except Exception as e:
+        log_error(f"Failed to add lore entry: {title} - {str(e)}")
+        raise
+
+
+async def apatch_lore_entry(
+    title: str,
+    new_title: Optional[str] = None,
+    content: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    template: Optional[str] = None,
+    fields: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
+    """Async counterpart of core.patch_lore_entry.
+
+    The read and the conditional write run on the DB thread pool and the
+    re-embedding in between on the event loop.
+    """
+    log_info(f"Patching lore entry: {title}")
+    try:
+        build_changes = core._patch_changes(new_title, content, tags, template, fields)
+        for _ in range(ENTRY_UPDATE_ATTEMPTS):
+            plan = await run_db(core._prepare_entry_update, title, build_changes)
+            if plan is None:
+                return None
+            vectors = await aembed_texts(plan["inputs"], plan["space"]) if plan["inputs"] else []
+            result = await run_db(core._write_entry_update, plan, vectors)
+            if result is not None:
+                return result
+            log_warning(f"Lore entry '{title}' changed while it was being updated; reading it again")
+        raise core.EntryConflictError(f"Lore entry '{title}' kept changing; the update was not saved")
+    except Exception as e:
+        log_error(f"Failed to patch lore entry: {title} - {str(e)}")
+        raise
+
+
+async def aget_all_lore_from_db() -> List[Dict[str, Any]]:
+    return await run_db(core.get_all_lore_from_db)
+
+
+async def aiter_lore(
+    tags: Optional[List[str]] = None,
+    entry_type: Optional[str] = None,
+    query: Optional[str] = None,
+    cursor: Optional[int] = None,
+    page_size: int = LORE_STREAM_BATCH_SIZE,
+    limit: Optional[int] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """Yield matching entries in id order, reading one page at a time from
+    cursor (see core.get_lore_page) on, and stop after limit entries.
+
+    Each page is its own short query keyed on the last id seen, so a slow
+    consumer never holds a database connection or read transaction open
+    between pages.
+    """
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = page_size if remaining is None else min(page_size, remaining)
+        page = await run_db(core.get_lore_page, tags, entry_type, query, cursor, size)
+        for entry in page["data"]:
+            yield entry
+        if remaining is not None:
+            remaining -= len(page["data"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return
+
+
+async def aiter_export_entries(page_size: int = LORE_STREAM_BATCH_SIZE) -> AsyncIterator[Dict[str, Any]]:
+    """Async counterpart of core.iter_export_entries. Like aiter_lore it
+    reads keyset pages (core.get_export_page), so a slow download never
+    holds a database connection open."""
+    cursor = None
+    while True:
+        page = await run_db(core.get_export_page, cursor, page_size)
+        for entry in page["data"]:
+            yield entry
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return
+
+
+async def aget_filtered_lore(
+    tags: Optional[List[str]] = None,
+    entry_type: Optional[str] = None,
+    query: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    return await run_db(core.get_filtered_lore, tags=tags, entry_type=entry_type, query=query)
+
+
+async def _achat_completion(system_prompt: str, user_prompt: str, stream: bool = False):
+    started = time.perf_counter()
+    response = await acall_with_resilience("chat_stream" if stream else "chat", lambda timeout: async_client.chat.completions.create(
+        model=GENERATION_MODEL,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ],
+        temperature=GENERATION_TEMPERATURE,
+        max_tokens=GENERATION_MAX_TOKENS,
+        stream=stream,
+        timeout=timeout
+    ))
+    if stream:
+        return atimed_stream(response, started)
+    CHAT_SECONDS.observe(time.perf_counter() - started, mode="complete")
+    record_chat_usage(response)
+    return response
+
+
+async def _aiter_completion_tokens(stream) -> AsyncIterator[str]:
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+async def _afield_context(
+    entry_title: str,
+    current_content: str,
+    use_cache: Optional[bool]
+) -> tuple[List[Dict[str, Any]], bool]:
+    """Retrieve a field's related lore asynchronously. Returns the ranked
+    entries and whether generation caching is on for the request."""
+    caching = await run_db(core._generation_cache_enabled, use_cache)
+    ranked = await arank_lore(
+        core._field_retrieval_query(entry_title, current_content), top_k=core.FIELD_CONTEXT_TOP_K, cache_query=caching
+    )
+    return ranked, caching
+
+
+async def _agenerate_field(
+    entry_title: str,
+    field_name: str,
+    template_type: str,
+    current_content: str,
+    user_prompt: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    generation_style: str = "Default",
+    use_cache: Optional[bool] = None,
+    regenerate: bool = False,
+    ranked: Optional[List[Dict[str, Any]]] = None,
+    use_world_summary: Optional[bool] = None
+) -> str:
+    """Async counterpart of core._generate_field."""
+    world_summary = await run_db(core._world_summary_context, template_type, tags, use_world_summary)
+    if ranked is None:
+        ranked, use_cache = await _afield_context(entry_title, current_content, use_cache)
+    cache_key = await run_db(
+        core._field_cache_key, entry_title, field_name, template_type, current_content, user_prompt, tags,
+        generation_style, world_summary, ranked, use_cache
+    )
+    cached = await run_db(core._get_cached_generation, cache_key, regenerate)
+    if cached is not None:
+        return cached
+    system_prompt, final_prompt = core._build_field_prompts(
+        entry_title, field_name, template_type, current_content, user_prompt, tags, generation_style,
+        ranked=ranked, world_summary=world_summary
+    )
+
+    response = await _achat_completion(system_prompt, final_prompt)
+    content = core._strip_field_prefix(response.choices[0].message.content, field_name).strip()
+    log_openai_interaction(
+        entry_title=entry_title,
+        field_name=field_name,
+        system_prompt=system_prompt,
+        user_prompt=final_prompt,
+        response=content
+    )
+    await run_db(core._store_generation, cache_key, content)
+    return content
+
+
+async def agenerate_field_content(
+    entry_title: str,
+    field_name: str,
+    template_type: str,
+    current_content: str,
+    user_prompt: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    generation_style: str = "Default",
+    use_cache: Optional[bool] = None,
+    regenerate: bool = False,
+    use_world_summary: Optional[bool] = None
+) -> str:
+    """Async counterpart of core.generate_field_content."""
+    if await run_db(core.get_setting, "dev_mode") == "true":
+        return core._dev_mode_field_content(entry_title, field_name, user_prompt, generation_style)
+    return await _agenerate_field(
+        entry_title, field_name, template_type, current_content, user_prompt, tags, generation_style,
+        use_cache=use_cache, regenerate=regenerate, use_world_summary=use_world_summary
+    )
+
+
+async def agenerate_empty_fields(
+    entry_titles: List[str],
+    fields: Optional[List[str]] = None,
+    generation_style: str = "Default",
+    user_prompt: Optional[str] = None,
+    overwrite: bool = False,
+    apply: bool = False,
+    max_concurrency: int = BATCH_GENERATION_CONCURRENCY
+) -> AsyncIterator[Dict[str, Any]]:
+    """Async counterpart of core.generate_empty_fields.
+
+    A semaphore caps retrievals and completions in flight at
+    max_concurrency. Closing the iterator early cancels the tasks still
+    running.
+    """
+    dev_mode = await run_db(core.get_setting, "dev_mode") == "true"
+    semaphore = asyncio.Semaphore(max_concurrency)
+    work = []
+    for title in entry_titles:
+        entry = await run_db(core.get_entry_by_title, title)
+        targets = core._fields_to_fill(entry, fields, overwrite) if entry else []
+        if targets:
+            work.append((entry, targets))
+    work = iter(work)
+    pending = {}
+    generated = {}
+    rankings = {}
+    tasks = {}
+
+    async def _rank(entry: Dict[str, Any]) -> List[Dict[str, Any]]:
+        async with semaphore:
+            return await arank_lore(core._entry_retrieval_query(entry), top_k=core.FIELD_CONTEXT_TOP_K)
+
+    async def _generate(entry: Dict[str, Any], field: str, ranked: Optional[List[Dict[str, Any]]]) -> str:
+        async with semaphore:
+            if dev_mode:
+                return core._dev_mode_field_content(entry["title"], field, user_prompt, generation_style)
+            return await _agenerate_field(
+                entry["title"], field, entry["template"], entry["fields"].get(field) or "",
+                user_prompt, entry["tags"], generation_style, ranked=ranked
+            )
+
+    async def _finish(entry: Dict[str, Any], field: str, task: asyncio.Future) -> Dict[str, Any]:
+        try:
+            content = task.result()
+            generated[entry["title"]][field] = content
+            result = {"title": entry["title"], "field": field, "status": "success", "content": content}
+        except Exception as e:
+            log_error(f"Failed to generate {field} for {entry['title']}: {str(e)}")
+            result = {"title": entry["title"], "field": field, "status": "error", "error": str(e)}
+        pending[entry["title"]] -= 1
+        if apply and pending[entry["title"]] == 0 and generated[entry["title"]]:
+            await apatch_lore_entry(entry["title"], fields=generated[entry["title"]])
+        return result
+
+    def _submit_fields(entry: Dict[str, Any], targets: List[str], ranked: Optional[List[Dict[str, Any]]]) -> None:
+        for field in targets:
+            tasks[asyncio.ensure_future(_generate(entry, field, ranked))] = (entry, field)
+
+    try:
+        while True:
+            # As in core.generate_empty_fields, start the next entry only
+            # while there is room under the concurrency cap
+            while len(rankings) + len(tasks) < max_concurrency:
+                entry, targets = next(work, (None, None))
+                if entry is None:
+                    break
+                pending[entry["title"]] = len(targets)
+                generated[entry["title"]] = {}
+                if dev_mode:
+                    _submit_fields(entry, targets, None)
+                else:
+                    rankings[asyncio.ensure_future(_rank(entry))] = (entry, targets)
+            if not rankings and not tasks:
+                return
+            done, _ = await asyncio.wait([*rankings, *tasks], return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task in rankings:
+                    entry, targets = rankings.pop(task)
+                    if task.exception() is None:
+                        _submit_fields(entry, targets, task.result())
+                    else:
+                        for field in targets:
+                            yield await _finish(entry, field, task)
+                    continue
+                entry, field = tasks.pop(task)
+                yield await _finish(entry, field, task)
+    finally:
+        for task in [*rankings, *tasks]:
+            task.cancel()
+
+
+async def astream_field_content(
+    entry_title: str,
+    field_name: str,
+    template_type: str,
+    current_content: str,
+    user_prompt: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    generation_style: str = "Default",
+    use_cache: Optional[bool] = None,
+    regenerate: bool = False,
+    use_world_summary: Optional[bool] = None
+) -> AsyncIterator[str]:
+    """Async counterpart of core.stream_field_content."""
+    if await run_db(core.get_setting, "dev_mode") == "true":
+        yield core._dev_mode_field_content(entry_title, field_name, user_prompt, generation_style)
+        return
+
+    world_summary = await run_db(core._world_summary_context, template_type, tags, use_world_summary)
+    ranked, caching = await _afield_context(entry_title, current_content, use_cache)
+    cache_key = await run_db(
+        core._field_cache_key, entry_title, field_name, template_type, current_content, user_prompt, tags,
+        generation_style, world_summary, ranked, caching
+    )
+    cached = await run_db(core._get_cached_generation, cache_key, regenerate)
+    if cached is not None:
+        yield cached
+        return
+    system_prompt, final_prompt = core._build_field_prompts(
+        entry_title, field_name, template_type, current_content, user_prompt, tags, generation_style,
+        ranked=ranked, world_summary=world_summary
+    )
+
+    stream = await _achat_completion(system_prompt, final_prompt, stream=True)
+    stripper = core._FieldPrefixStripper(field_name)
+    parts = []
+    async for token in _aiter_completion_tokens(stream):
+        text = stripper.feed(token)
+        if text:
+            parts.append(text)
+            yield text
+    tail = stripper.flush()
+    if tail:
+        parts.append(tail)
+        yield tail
+
+    content = "".join(parts).strip()
+    log_openai_interaction(
+        entry_title=entry_title,
+        field_name=field_name,
+        system_prompt=system_prompt,
+        user_prompt=final_prompt,
+        response=content
+    )
+    await run_db(core._store_generation, cache_key, content)
+
+
+async def astream_text_from_lore(
+    prompt: str,
+    lore_entries: Optional[List[str]] = None,
+    use_cache: Optional[bool] = None,
+    regenerate: bool = False
+) -> AsyncIterator[str]:
+    """Async counterpart of core.stream_text_from_lore."""
+    log_info("Streaming text from lore prompt")
+    try:
+        caching = await run_db(core._generation_cache_enabled, use_cache)
+        ranked = await arank_lore(prompt, cache_query=caching) if lore_entries is None else None
+        cache_key = await run_db(core._lore_cache_key, prompt, lore_entries, ranked, caching)
+        cached = await run_db(core._get_cached_generation, cache_key, regenerate)
+        if cached is not None:
+            yield cached
+            return
+        final_prompt = core._build_lore_prompt(prompt, lore_entries, ranked=ranked)
+
+        stream = await _achat_completion(core.LORE_SYSTEM_PROMPT, final_prompt, stream=True)
+        parts = []
+        async for token in _aiter_completion_tokens(stream):
+            parts.append(token)
+            yield token
+        content = "".join(parts).strip()
+        log_openai_interaction(
+            entry_title="Lore prompt",
+            field_name="Response",
+            system_prompt=core.LORE_SYSTEM_PROMPT,
+            user_prompt=final_prompt,
+            response=content
+        )
+        await run_db(core._store_generation, cache_key, content)
+        log_info("Successfully streamed text from lore")
+    except Exception as e:
+        log_error(f"Failed to stream text from lore: {str(e)}")
+        raise
@@ -0,0 +1,368 @@
+import gzip
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Optional: without it two processes may back up at the same moment
+    fcntl = None
+
+from ..config.settings import (
+    BACKUP_DIR,
+    BACKUP_PAGES_PER_STEP,
+    BACKUP_STEP_PAUSE_SECONDS,
+    BACKUP_MAX_RESTARTS,
+    BACKUP_INTERVAL_SECONDS,
+    BACKUP_RETENTION,
+    BACKUP_COMPRESS
+)
+from ..logging.logger import log_info, log_error, log_warning
+from . import core
+from .embedding_worker import notify_pending_embeddings
+from .world_generation import current_generation
+
+_NAME = re.compile(r"^lore-(\d{8}-\d{6})(-[\w-]+)?\.db(\.gz)?$")
+
+_wake = threading.Event()
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+_thread_lock = threading.Lock()
+_status: Dict[str, Any] = {"running": False, "last": None, "error": None}
+
+
+class _Restarted(Exception):
+    """Writers kept changing the database while it was copied page by page."""
+
+
+def backup_dir() -> str:
+    """Folder backups are written to, by default beside the database."""
+    return BACKUP_DIR or os.path.join(os.path.dirname(os.path.abspath(core.DB_PATH)), "backups")
+
+
+@contextmanager
+def _exclusive(directory: str) -> Iterator[bool]:
+    """Hold the backup folder's lock if no other process does; yields
+    whether it was taken."""
+    if fcntl is None:
+        yield True
+        return
+    with open(os.path.join(directory, ".lock"), "a") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _copy_database(source: sqlite3.Connection, target: sqlite3.Connection, progress: Optional[Callable[[int, int], None]] = None) -> None:
+    """Copy a database with the online backup API, BACKUP_PAGES_PER_STEP
+    pages at a time.
+
+    In WAL mode the copy reads one snapshot, pinned by a read transaction
+    on the source, so writers are never blocked and nothing restarts.
+    With a rollback journal the source is only locked while a step runs,
+    and writers get the lock during the pause after it; but a write from
+    another connection restarts the copy, so after BACKUP_MAX_RESTARTS
+    restarts the rest is done in one step, holding the read lock until it
+    is finished.
+    """
+    pinned = source.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal"
+    if pinned:
+        source.execute("BEGIN")
+        source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+    state = {"remaining": None, "restarts": 0}
+
+    def _step(status: int, remaining: int, total: int) -> None:
+        if state["remaining"] is not None and remaining > state["remaining"]:
+            state["restarts"] += 1
+            if state["restarts"] > BACKUP_MAX_RESTARTS:
+                raise _Restarted()
+        state["remaining"] = remaining
+        if progress:
+            progress(total - remaining, total)
+        time.sleep(BACKUP_STEP_PAUSE_SECONDS)
+
+    try:
+        source.backup(target, pages=BACKUP_PAGES_PER_STEP, progress=_step)
+    except _Restarted:
+        log_warning(f"Backup restarted {state['restarts']} times by concurrent writes; copying the rest in one step")
+        source.backup(target)
+    finally:
+        if pinned:
+            source.rollback()
+
+
+def _check_database(path: str) -> Dict[str, Any]:
+    """Integrity check of a plain database file; returns its entry count."""
+    with sqlite3.connect(f"file:{path}?mode=ro", uri=True) as conn:
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA integrity_check")
+        problems = [row[0] for row in cursor.fetchall()]
+        if problems != ["ok"]:
+            raise ValueError(f"Backup failed its integrity check: {'; '.join(problems[:5])}")
+        cursor.execute("SELECT COUNT(*) FROM lore")
+        entries = cursor.fetchone()[0]
+    conn.close()
+    return {"entries": entries}
+
+
+@contextmanager
+def _plain_copy(path: str) -> Iterator[str]:
+    """Path of a backup as a plain database, decompressing .gz files to a
+    temporary file beside it."""
+    if not path.endswith(".gz"):
+        yield path
+        return
+    plain = path[:-3] + ".partial"
+    try:
+        with gzip.open(path, "rb") as compressed, open(plain, "wb") as out:
+            shutil.copyfileobj(compressed, out, 1024 * 1024)
+        yield plain
+    finally:
+        if os.path.exists(plain):
+            os.remove(plain)
+
+
+def verify_backup(path: str) -> Dict[str, Any]:
+    """Decompress a backup if needed and run SQLite's integrity check on it.
+
+    Raises ValueError if the file is damaged; returns its entry count.
+    """
+    try:
+        with _plain_copy(path) as plain:
+            return _check_database(plain)
+    except (OSError, EOFError, zlib.error, sqlite3.DatabaseError) as e:
+        raise ValueError(f"Backup {os.path.basename(path)} is unreadable: {str(e)}")
+
+
+def _backup_path(directory: str, label: Optional[str], compress: bool) -> str:
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    suffix = f"-{label}" if label else ""
+    extension = ".db.gz" if compress else ".db"
+    path = os.path.join(directory, f"lore-{stamp}{suffix}{extension}")
+    counter = 2
+    while os.path.exists(path):
+        path = os.path.join(directory, f"lore-{stamp}{suffix}-{counter}{extension}")
+        counter += 1
+    return path
+
+
+def create_backup(
+    compress: bool = BACKUP_COMPRESS,
+    verify: bool = True,
+    label: Optional[str] = None,
+    progress: Optional[Callable[[int, int], None]] = None
+) -> Dict[str, Any]:
+    """Copy the live database into the backup folder while it stays in use.
+
+    The copy is made page by page (see _copy_database), checked with
+    SQLite's integrity check when verify is set, and gzipped when compress
+    is set. The finished file only appears under its final name once all
+    of that succeeded. progress is called with (pages copied, total pages).
+    Returns the file's path, size, entry count and timings.
+
+    Only the finished file is synced to disk: syncing the uncompressed
+    copy and then deleting it makes the filesystem stall the live
+    database's own commits for seconds on large worlds.
+    """
+    directory = backup_dir()
+    os.makedirs(directory, exist_ok=True)
+    path = _backup_path(directory, label, compress)
+    plain = path[:-3] + ".partial" if compress else path + ".partial"
+    started = time.perf_counter()
+    try:
+        with core.get_db_connection() as source:
+            target = sqlite3.connect(plain)
+            try:
+                target.execute("PRAGMA synchronous = OFF")
+                _copy_database(source, target, progress)
+                # The copy inherits a WAL source's journal mode; keep it one self-contained file
+                target.execute("PRAGMA journal_mode = DELETE")
+            finally:
+                target.close()
+        copied = time.perf_counter()
+        result: Dict[str, Any] = {"entries": None}
+        if verify:
+            result = _check_database(plain)
+        if compress:
+            with open(plain, "rb") as raw, open(path + ".partial", "wb") as out:
+                with gzip.GzipFile(fileobj=out, mode="wb", compresslevel=6) as compressed:
+                    shutil.copyfileobj(raw, compressed, 1024 * 1024)
+                os.fsync(out.fileno())
+            os.remove(plain)
+            os.replace(path + ".partial", path)
+        else:
+            with open(plain, "rb") as raw:
+                os.fsync(raw.fileno())
+            os.replace(plain, path)
+    except BaseException:
+        for leftover in (plain, path + ".partial"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+        raise
+    result.update({
+        "path": path,
+        "bytes": os.path.getsize(path),
+        "verified": verify,
+        "copy_seconds": round(copied - started, 3),
+        "total_seconds": round(time.perf_counter() - started, 3),
+        "created_at": time.time()
+    })
+    log_info(f"Backed up {result['entries'] if verify else 'the'} entries to {path} in {result['total_seconds']}s")
+    return result
+
+
+def list_backups() -> List[Dict[str, Any]]:
+    """Backups in the backup folder, newest first."""
+    directory = backup_dir()
+    if not os.path.isdir(directory):
+        return []
+    backups = []
+    for name in os.listdir(directory):
+        if not _NAME.match(name):
+            continue
+        stat = os.stat(os.path.join(directory, name))
+        backups.append({
+            "name": name,
+            "path": os.path.join(directory, name),
+            "bytes": stat.st_size,
+            "created_at": stat.st_mtime,
+            "compressed": name.endswith(".gz")
+        })
+    return sorted(backups, key=lambda backup: (backup["created_at"], backup["name"]), reverse=True)
+
+
+def prune_backups(keep: int = BACKUP_RETENTION) -> List[str]:
+    """Delete all but the newest keep backups; returns the deleted names."""
+    removed = []
+    for backup in list_backups()[keep:]:
+        os.remove(backup["path"])
+        removed.append(backup["name"])
+    if removed:
+        log_info(f"Removed {len(removed)} old backups")
+    return removed
+
+
+def restore_backup(path: str) -> Dict[str, Any]:
+    """Replace the live database with a backup and rebuild what derives from it.
+
+    The backup is verified first and the current database is backed up
+    (labelled pre-restore) so the restore can be undone. The copy goes
+    through the backup API into the open database, so other processes
+    see the restored world on their next read. Afterwards the schema is
+    migrated, the world generation is moved past its pre-restore value
+    so no cache keeps serving the replaced world, missing near-duplicate
+    signatures are recomputed, the shared vector store is rebuilt and
+    pending entries are handed to the background embedder.
+    """
+    checked = verify_backup(path)
+    safety = create_backup(label="pre-restore")
+    previous_generation = core.get_world_generation()
+    with _plain_copy(path) as plain:
+        with sqlite3.connect(f"file:{plain}?mode=ro", uri=True) as source, core.get_db_connection() as target:
+            source.backup(target, pages=BACKUP_PAGES_PER_STEP)
+        source.close()
+    core.init_db()
+    with core.get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            'UPDATE world_generation SET generation = MAX(generation, ?) + 1 WHERE id = 1',
+            (previous_generation,)
+        )
+        generation = current_generation(cursor)
+        conn.commit()
+    core.rebuild_near_duplicate_index()
+    if core.VECTOR_STORE_ENABLED:
+        try:
+            core.compact_vector_store()
+        except OSError as e:
+            log_warning(f"Could not rebuild the vector store after the restore; searches will rebuild it: {str(e)}")
+    pending = core.count_pending_embeddings()
+    if pending:
+        notify_pending_embeddings()
+    log_info(f"Restored {checked['entries']} entries from {path}")
+    return {"entries": checked["entries"], "generation": generation, "pending": pending, "pre_restore_backup": safety["path"]}
+
+
+def _backup_due() -> bool:
+    if BACKUP_INTERVAL_SECONDS <= 0:
+        return False
+    backups = list_backups()
+    return not backups or time.time() - backups[0]["created_at"] >= BACKUP_INTERVAL_SECONDS
+
+
+def _run_backup() -> None:
+    directory = backup_dir()
+    os.makedirs(directory, exist_ok=True)
+    with _exclusive(directory) as acquired:
+        if not acquired:
+            log_info("Another process is backing up; skipping")
+            return
+        _status.update(running=True, error=None)
+        try:
+            _status["last"] = create_backup()
+            prune_backups()
+        except Exception as e:
+            _status["error"] = str(e)
+            log_error(f"Backup failed: {str(e)}")
+        finally:
+            _status["running"] = False
+
+
+def _run() -> None:
+    while not _stop.is_set():
+        requested = _wake.is_set()
+        _wake.clear()
+        if requested or _backup_due():
+            _run_backup()
+        # Wake at least every minute to see whether a backup fell due
+        _wake.wait(min(BACKUP_INTERVAL_SECONDS, 60) if BACKUP_INTERVAL_SECONDS > 0 else None)
+
+
+def request_backup() -> None:
+    """Ask the backup thread to take a backup now; returns at once."""
+    _wake.set()
+
+
+def get_backup_status() -> Dict[str, Any]:
+    """Whether a backup is running, the last one this process took, its
+    last error and the backups on disk."""
+    return {**_status, "backups": list_backups()}
+
+
+def start_backup_scheduler() -> None:
+    """Start the backup thread unless it is already running.
+
+    It takes a backup whenever requested and, if BACKUP_INTERVAL_SECONDS
+    is set, whenever the newest backup on disk is that old. A lock in the
+    backup folder keeps processes sharing a database from backing up at
+    the same time.
+    """
+    global _thread
+    with _thread_lock:
+        if _thread is not None and _thread.is_alive():
+            return
+        _stop.clear()
+        _thread = threading.Thread(target=_run, name="lore-backups", daemon=True)
+        _thread.start()
+    log_info("Backup scheduler started")
+
+
+def stop_backup_scheduler(timeout: float = 5.0) -> None:
+    """Ask the backup thread to stop and wait up to timeout seconds for it;
+    a backup already being copied is finished in the background."""
+    _stop.set()
+    _wake.set()
+    if _thread is not None:
+        _thread.join(timeout)
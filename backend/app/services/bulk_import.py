@@ -0,0 +1,344 @@
+import asyncio
+import codecs
+import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from ..config.settings import (
+    LORE_TEMPLATES,
+    BULK_BATCH_SIZE,
+    BULK_MAX_IN_FLIGHT,
+    BULK_MAX_LINE_BYTES,
+    IMPORT_READ_BYTES
+)
+from ..logging.logger import log_info, log_error, log_warning
+from . import core
+from .async_core import aembed_texts, run_db
+
+
+def validate_entry(obj: Any) -> Dict[str, Any]:
+    """Check one entry in the lorea_ftue shape ({template, fields,
+    linked_entries}) and turn it into a core.add_lore_batch entry.
+
+    Raises ValueError describing the first problem found.
+    """
+    if not isinstance(obj, dict):
+        raise ValueError("Entry must be a JSON object")
+    template = obj.get("template")
+    if template not in LORE_TEMPLATES:
+        raise ValueError(f"Unknown template: {template!r}")
+    fields = obj.get("fields")
+    if not isinstance(fields, dict):
+        raise ValueError("fields must be an object")
+    name = fields.get("Name")
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError("fields.Name is required")
+    unknown = [field for field in fields if field not in LORE_TEMPLATES[template]]
+    if unknown:
+        raise ValueError(f"Fields not in the {template} template: {', '.join(unknown)}")
+    for field, value in fields.items():
+        if field == "Tags":
+            if not isinstance(value, list) or not all(isinstance(tag, str) for tag in value):
+                raise ValueError("fields.Tags must be a list of strings")
+        elif not isinstance(value, str):
+            raise ValueError(f"fields.{field} must be a string")
+    linked = obj.get("linked_entries")
+    if linked is not None and (not isinstance(linked, list) or not all(isinstance(title, str) for title in linked)):
+        raise ValueError("linked_entries must be a list of strings")
+    return {
+        "title": name,
+        "content": fields,
+        "tags": fields.get("Tags", []),
+        "template": template,
+        "linked_entries": linked
+    }
+
+
+class _LineSplitter:
+    """Split a byte stream into (line number, line) pairs, skipping blank lines.
+
+    Only the unfinished last line is buffered between chunks; a line
+    longer than max_line_bytes raises ValueError instead of growing the
+    buffer without bound.
+    """
+
+    def __init__(self, max_line_bytes: int = BULK_MAX_LINE_BYTES) -> None:
+        self.max_line_bytes = max_line_bytes
+        self.pending = b""
+        self.line_no = 0
+
+    def feed(self, chunk: bytes) -> List[Tuple[int, bytes]]:
+        lines = (self.pending + chunk).split(b"\n")
+        self.pending = lines.pop()
+        complete = []
+        for line in lines:
+            self.line_no += 1
+            if line.strip():
+                complete.append((self.line_no, line))
+        if len(self.pending) > self.max_line_bytes:
+            raise ValueError(f"Line {self.line_no + 1} is longer than {self.max_line_bytes} bytes")
+        return complete
+
+    def finish(self) -> List[Tuple[int, bytes]]:
+        return [(self.line_no + 1, self.pending)] if self.pending.strip() else []
+
+
+class _JsonArrayParser:
+    """Parse the elements of one top-level JSON array as its bytes arrive.
+
+    Only the element being read is buffered, so memory follows the largest
+    element rather than the file. Elements are numbered from 1. Malformed
+    JSON raises ValueError; unlike NDJSON there is no next line to resume at.
+    """
+
+    def __init__(self, max_element_bytes: int = BULK_MAX_LINE_BYTES) -> None:
+        self.max_element_bytes = max_element_bytes
+        self.text = codecs.getincrementaldecoder("utf-8-sig")()
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.state = "open"  # open, first, value, separator or closed
+        self.count = 0
+
+    def feed(self, chunk: bytes, final: bool = False) -> List[Tuple[int, Any]]:
+        buffer = self.buffer + self.text.decode(chunk, final)
+        elements = []
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                pos += 1
+            if pos == len(buffer):
+                break
+            char = buffer[pos]
+            if self.state == "open":
+                if char != "[":
+                    raise ValueError("Expected a JSON array of entries")
+                self.state, pos = "first", pos + 1
+            elif self.state == "closed":
+                raise ValueError(f"Unexpected data after the closing bracket at entry {self.count}")
+            elif char == "]" and self.state in ("first", "separator"):
+                self.state, pos = "closed", pos + 1
+            elif self.state == "separator":
+                if char != ",":
+                    raise ValueError(f"Expected ',' or ']' after entry {self.count}")
+                self.state, pos = "value", pos + 1
+            else:
+                try:
+                    element, end = self.decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError as e:
+                    if final:
+                        raise ValueError(f"Entry {self.count + 1} is not valid JSON: {e.msg}")
+                    if len(buffer) - pos > self.max_element_bytes:
+                        raise ValueError(f"Entry {self.count + 1} is longer than {self.max_element_bytes} bytes or not valid JSON")
+                    break
+                if end == len(buffer) and not final and not isinstance(element, (dict, list, str)):
+                    break  # A number or literal may continue in the next chunk
+                self.count += 1
+                elements.append((self.count, element))
+                self.state, pos = "separator", end
+        self.buffer = buffer[pos:]
+        if final and self.state != "closed":
+            raise ValueError("The JSON array is not closed")
+        return elements
+
+
+async def iter_ndjson_lines(
+    chunks: AsyncIterator[bytes],
+    max_line_bytes: int = BULK_MAX_LINE_BYTES
+) -> AsyncIterator[Tuple[int, bytes]]:
+    """Split a byte stream into (line number, line) pairs, skipping blank lines."""
+    splitter = _LineSplitter(max_line_bytes)
+    async for chunk in chunks:
+        for line in splitter.feed(chunk):
+            yield line
+    for line in splitter.finish():
+        yield line
+
+
+def iter_file_entries(
+    f: BinaryIO,
+    format: Optional[str] = None,
+    read_bytes: int = IMPORT_READ_BYTES
+) -> Iterator[Tuple[int, Any, int]]:
+    """Read a JSON array or NDJSON file incrementally.
+
+    Yields (position, element, bytes read so far); position is the line
+    for NDJSON and the element number for a JSON array. An NDJSON line
+    that is not valid JSON is yielded as its ValueError so the rest of the
+    file still imports. format ('json' or 'ndjson') is sniffed from the
+    first character when not given.
+    """
+    chunk = f.read(read_bytes)
+    while format is None:
+        head = chunk[len(codecs.BOM_UTF8):] if chunk.startswith(codecs.BOM_UTF8) else chunk
+        head = head.lstrip(b" \t\r\n")
+        partial_bom = len(chunk) < len(codecs.BOM_UTF8) and codecs.BOM_UTF8.startswith(chunk)
+        more = f.read(read_bytes) if not head or partial_bom else b""
+        if more:
+            chunk += more
+        else:
+            format = "json" if head[:1] == b"[" else "ndjson"
+    total = len(chunk)
+    parser = _JsonArrayParser() if format == "json" else _LineSplitter()
+
+    def _parsed(elements: List[Tuple[int, Any]]) -> Iterator[Tuple[int, Any, int]]:
+        for position, element in elements:
+            if format == "ndjson":
+                try:
+                    element = json.loads(element)
+                except ValueError as e:
+                    element = e
+            yield position, element, total
+
+    while chunk:
+        yield from _parsed(parser.feed(chunk))
+        chunk = f.read(read_bytes)
+        total += len(chunk)
+    yield from _parsed(parser.feed(b"", final=True) if format == "json" else parser.finish())
+
+
+def import_file(
+    f: BinaryIO,
+    format: Optional[str] = None,
+    skip_near_duplicates: bool = True,
+    defer_embedding: bool = False,
+    batch_size: int = BULK_BATCH_SIZE,
+    max_in_flight: int = BULK_MAX_IN_FLIGHT
+) -> Iterator[Dict[str, Any]]:
+    """Import a JSON array or NDJSON file of entries, yielding progress.
+
+    Entries are validated as they are parsed and stored batch_size at a
+    time through core.add_lore_batch on one background thread, so the next
+    batch is parsed while the previous one is embedded; reading pauses
+    while max_in_flight batches wait. Each progress report holds
+    bytes_read, entries (parsed so far), counts per status and the errors
+    found since the previous report, as {position, title, detail}.
+    """
+    counts = {"inserted": 0, "pending": 0, "skipped": 0, "error": 0}
+    progress = {"bytes_read": 0, "entries": 0, "counts": counts, "errors": []}
+    in_flight = deque()
+    batch: List[Tuple[int, Dict[str, Any]]] = []
+
+    def _collect(future, lines) -> None:
+        try:
+            results = future.result()
+        except Exception as e:
+            log_error(f"Import batch of {len(lines)} entries failed: {str(e)}")
+            results = [{"title": entry["title"], "status": "error", "detail": str(e)} for _, entry in lines]
+        for (position, _), result in zip(lines, results):
+            counts[result["status"]] += 1
+            if result["status"] == "error":
+                progress["errors"].append({"position": position, "title": result["title"], "detail": result["detail"]})
+
+    def _report() -> Dict[str, Any]:
+        report = {**progress, "counts": dict(counts)}
+        progress["errors"] = []
+        return report
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="lore-import") as executor:
+        for position, element, bytes_read in iter_file_entries(f, format):
+            progress["bytes_read"] = bytes_read
+            progress["entries"] += 1
+            try:
+                if isinstance(element, Exception):
+                    raise element
+                batch.append((position, validate_entry(element)))
+            except ValueError as e:
+                counts["error"] += 1
+                progress["errors"].append({"position": position, "title": None, "detail": str(e)})
+                if len(progress["errors"]) >= batch_size:
+                    yield _report()
+            if len(batch) < batch_size:
+                continue
+            while len(in_flight) >= max_in_flight:
+                _collect(*in_flight.popleft())
+            in_flight.append((executor.submit(core.add_lore_batch, [entry for _, entry in batch], skip_near_duplicates, defer_embedding), batch))
+            batch = []
+            yield _report()
+        if batch:
+            in_flight.append((executor.submit(core.add_lore_batch, [entry for _, entry in batch], skip_near_duplicates, defer_embedding), batch))
+        while in_flight:
+            _collect(*in_flight.popleft())
+            yield _report()
+    log_info(f"File import finished: {counts}")
+    yield {**_report(), "done": True}
+
+
+async def abulk_import(
+    chunks: AsyncIterator[bytes],
+    skip_near_duplicates: bool = False,
+    defer_embedding: bool = False,
+    batch_size: int = BULK_BATCH_SIZE,
+    max_in_flight: int = BULK_MAX_IN_FLIGHT
+) -> AsyncIterator[Dict[str, Any]]:
+    """Import an NDJSON stream of entries, yielding one result per line.
+
+    Lines are validated as they arrive and invalid ones get an 'error'
+    result at once. Valid entries are added batch_size at a time, as
+    core.add_lore_batch does, but only the title check and the insert run
+    on the DB thread pool; the embeddings request runs on the event loop.
+    At most max_in_flight batches run at once and the stream is not read
+    further while that many are in flight, so a sender faster than
+    embedding is held back instead of buffered. Results carry their line
+    number and come out as batches finish. A final result with done set
+    holds the counts per status.
+    """
+    counts = {"inserted": 0, "pending": 0, "skipped": 0, "error": 0}
+    in_flight = set()
+    batch: List[Tuple[int, Dict[str, Any]]] = []
+
+    async def _add_batch(entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        batch = await run_db(core._prepare_lore_batch, entries)
+        vectors = None
+        if batch["rows"] and not defer_embedding:
+            try:
+                vectors = core._attach_lore_batch_vectors(
+                    batch, await aembed_texts(core._lore_batch_inputs(batch), batch["space"])
+                )
+            except Exception as e:
+                log_warning(f"Batch embedding failed, saving {len(batch['rows'])} entries with pending embeddings: {str(e)}")
+        return await run_db(core._insert_lore_batch, batch, vectors, skip_near_duplicates)
+
+    async def _run(lines: List[Tuple[int, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        try:
+            results = await _add_batch([entry for _, entry in lines])
+        except Exception as e:
+            log_error(f"Bulk batch of {len(lines)} entries failed: {str(e)}")
+            results = [{"title": entry["title"], "status": "error", "detail": str(e)} for _, entry in lines]
+        return [{"line": line_no, **result} for (line_no, _), result in zip(lines, results)]
+
+    def _finished(tasks) -> List[Dict[str, Any]]:
+        results = [result for task in tasks for result in task.result()]
+        for result in results:
+            counts[result["status"]] += 1
+        return results
+
+    async for line_no, line in iter_ndjson_lines(chunks):
+        try:
+            entry = validate_entry(json.loads(line))
+        except ValueError as e:
+            counts["error"] += 1
+            yield {"line": line_no, "status": "error", "detail": str(e)}
+            continue
+        batch.append((line_no, entry))
+        if len(batch) < batch_size:
+            continue
+        while len(in_flight) >= max_in_flight:
+            done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for result in _finished(done):
+                yield result
+        in_flight.add(asyncio.ensure_future(_run(batch)))
+        batch = []
+        done = {task for task in in_flight if task.done()}
+        in_flight -= done
+        for result in _finished(done):
+            yield result
+
+    if batch:
+        in_flight.add(asyncio.ensure_future(_run(batch)))
+    while in_flight:
+        done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+        for result in _finished(done):
+            yield result
+    log_info(f"Bulk import finished: {counts}")
+    yield {"done": True, "counts": counts}
@@ -0,0 +1,132 @@
+import json
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ..config.settings import CATALOG_FILTER_CACHE_SIZE
+from . import core
+
+
+def _like_pattern(text: str) -> "re.Pattern[str]":
+    """The pattern SQLite's LIKE '%text%' matches: % and _ are wildcards and
+    only ASCII letters fold case."""
+    parts = [".*" if char == "%" else "." if char == "_" else re.escape(char) for char in text]
+    return re.compile("".join(parts), re.IGNORECASE | re.ASCII | re.DOTALL)
+
+
+class EntryCatalog:
+    """Every entry of one world generation, indexed by title, template and tag.
+
+    A catalog never changes after it is built, so one instance can be
+    shared by every reader at once; a newer generation gets a new catalog.
+    The entry dicts are shared too and must not be modified.
+    """
+
+    def __init__(self, entries: List[Dict[str, Any]], generation: int) -> None:
+        self.generation = generation
+        self.entries = entries
+        self.by_title: Dict[str, Dict[str, Any]] = {}
+        # Positions in entries, in id order; templates keep the order they first appear in
+        self._by_template: Dict[str, List[int]] = {}
+        self._by_tag: Dict[str, List[int]] = {}
+        self._search_text: List[str] = []
+        # The tag list as SQLite renders it, which get_filtered_lore matches tags against
+        self._tag_text: List[str] = []
+        for position, entry in enumerate(entries):
+            self.by_title[entry["title"]] = entry
+            self._by_template.setdefault(entry["template"], []).append(position)
+            for tag in dict.fromkeys(entry["tags"]):
+                self._by_tag.setdefault(tag, []).append(position)
+            self._search_text.append(f"{entry['title']}\n{entry['content']}".lower())
+            self._tag_text.append(json.dumps(entry["tags"], separators=(",", ":")))
+        self.tags = sorted(self._by_tag)
+        self._filtered: "OrderedDict[Tuple[Any, ...], Dict[str, List[Dict[str, Any]]]]" = OrderedDict()
+        self._filtered_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, title: str) -> Optional[Dict[str, Any]]:
+        return self.by_title.get(title)
+
+    def template_of(self, title: str) -> Optional[str]:
+        entry = self.by_title.get(title)
+        return entry["template"] if entry else None
+
+    def titles(self, template: str) -> List[str]:
+        return [self.entries[position]["title"] for position in self._by_template.get(template, [])]
+
+    def filter_by_template(
+        self,
+        tags: Optional[Sequence[str]] = None,
+        entry_type: Optional[str] = None,
+        query: Optional[str] = None
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Entries carrying every tag, of the type and containing the query
+        in their title or content (case-insensitively), grouped by template.
+
+        Tags match the way get_filtered_lore's LIKE does: anywhere in the
+        entry's tag list, so "coas" finds entries tagged "coast". Results are
+        kept for the CATALOG_FILTER_CACHE_SIZE most recent filters, since
+        every rerun of the page asks for the same one again.
+        """
+        key = (tuple(sorted(tags or ())), entry_type or None, query or None)
+        with self._filtered_lock:
+            if key in self._filtered:
+                self._filtered.move_to_end(key)
+                return self._filtered[key]
+        positions: Optional[set] = None
+        for tag in key[0]:
+            pattern = _like_pattern(tag)
+            tagged = {position for position, text in enumerate(self._tag_text) if pattern.search(text)}
+            positions = tagged if positions is None else positions & tagged
+        if entry_type:
+            typed = set(self._by_template.get(entry_type, ()))
+            positions = typed if positions is None else positions & typed
+        candidates = sorted(positions) if positions is not None else range(len(self.entries))
+        if query:
+            needle = query.lower()
+            candidates = [position for position in candidates if needle in self._search_text[position]]
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        for position in candidates:
+            entry = self.entries[position]
+            grouped.setdefault(entry["template"], []).append(entry)
+        with self._filtered_lock:
+            self._filtered[key] = grouped
+            while len(self._filtered) > CATALOG_FILTER_CACHE_SIZE:
+                self._filtered.popitem(last=False)
+        return grouped
+
+
+def load_catalog() -> EntryCatalog:
+    """Read every entry into a new catalog.
+
+    The generation is read first, so a write landing during the read can
+    only make the catalog look older than its data, never newer.
+    """
+    generation = core.get_world_generation()
+    return EntryCatalog(list(core.iter_lore()), generation)
+
+
+class CatalogCache:
+    """Holds the catalog of the current world generation.
+
+    get() costs one read of the generation counter while nothing has
+    changed and reloads the catalog once after any change, however many
+    threads ask at the same time.
+    """
+
+    def __init__(self) -> None:
+        self._catalog: Optional[EntryCatalog] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> EntryCatalog:
+        generation = core.get_world_generation()
+        catalog = self._catalog
+        if catalog is not None and catalog.generation == generation:
+            return catalog
+        with self._lock:
+            if self._catalog is None or self._catalog.generation != generation:
+                self._catalog = load_catalog()
+            return self._catalog
@@ -0,0 +1,189 @@
+import math
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config.settings import CHARS_PER_TOKEN, GENERATION_MODEL, MIN_SNIPPET_TOKENS
+from .dedupe import shingles
+
+try:
+    import tiktoken
+except ImportError:  # Optional: fall back to a calibrated character estimate
+    tiktoken = None
+
+# Overlap above which a snippet adds nothing over one already packed
+_OVERLAP_THRESHOLD = 0.8
+# Weight of query word overlap when ranking snippets of the same entry
+_LEXICAL_WEIGHT = 0.1
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(GENERATION_MODEL)
+    except Exception:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with tiktoken when installed, otherwise estimate them."""
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text down to at most max_tokens, preferring a word boundary."""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    encoding = _encoding()
+    if encoding is not None:
+        truncated = encoding.decode(encoding.encode(text)[:max_tokens])
+    else:
+        truncated = text[:int(max_tokens * CHARS_PER_TOKEN)]
+    if " " in truncated:
+        truncated = truncated.rsplit(" ", 1)[0]
+    return truncated
+
+
+def split_into_chunks(text: str, max_tokens: int) -> List[str]:
+    """Split text into chunks of at most max_tokens, breaking between
+    sentences where possible."""
+    text = text.strip()
+    if count_tokens(text) <= max_tokens:
+        return [text] if text else []
+    chunks = []
+    current = ""
+    for sentence in _SENTENCE_RE.split(text):
+        candidate = f"{current} {sentence}".strip()
+        if current and count_tokens(candidate) > max_tokens:
+            chunks.append(current)
+            current = sentence.strip()
+        else:
+            current = candidate
+        # A single sentence longer than the limit is cut on word boundaries
+        while count_tokens(current) > max_tokens:
+            head = truncate_to_tokens(current, max_tokens) or current[:int(max_tokens * CHARS_PER_TOKEN)]
+            chunks.append(head)
+            current = current[len(head):].strip()
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _lexical_overlap(query_words: set, text: str) -> float:
+    if not query_words:
+        return 0.0
+    words = set(_WORD_RE.findall(text.lower()))
+    return len(query_words & words) / len(query_words)
+
+
+def entry_snippets(entry: Dict[str, Any], query: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Split a ranked entry into field-level snippets with their own scores.
+
+    Snippets take their field's own similarity when per-field vectors
+    exist, otherwise the entry's, nudged up by how many query words they
+    contain so the matching field of a relevant entry outranks the rest.
+    """
+    field_scores = entry.get("field_scores") or {}
+    query_words = set(_WORD_RE.findall(query.lower())) if query else set()
+    fields = {
+        field: value for field, value in (entry.get("fields") or {}).items()
+        if field not in ("Name", "Tags") and isinstance(value, str) and value.strip()
+    }
+    if fields:
+        parts = list(fields.items())
+    else:
+        parts = [(None, line) for line in entry["content"].split("\n") if line.strip()]
+
+    snippets = []
+    for position, (field, text) in enumerate(parts):
+        snippets.append({
+            "id": entry.get("id"),
+            "version": entry.get("version"),
+            "title": entry.get("title"),
+            "template": entry.get("template"),
+            "field": field,
+            "text": text.strip(),
+            # Position keeps the original order stable among equal scores
+            "score": field_scores.get(field, entry["score"]) + _LEXICAL_WEIGHT * _lexical_overlap(query_words, text) - position * 1e-6
+        })
+    return snippets
+
+
+def _overlaps(candidate: set, packed: List[set]) -> bool:
+    if not candidate:
+        return True
+    return any(len(candidate & other) / len(candidate) >= _OVERLAP_THRESHOLD for other in packed)
+
+
+def assemble_context(
+    ranked: List[Dict[str, Any]],
+    budget_tokens: int,
+    query: Optional[str] = None
+) -> Tuple[str, List[Tuple[int, int]]]:
+    """Pack the highest-scoring field snippets of ranked entries into a token budget.
+
+    Snippets are taken best first; text that mostly repeats an already
+    packed snippet is dropped, and the lowest-scoring material is what
+    falls off once the budget runs out. Returns the context text, grouped
+    by entry in rank order, and the (id, version) pairs of entries used.
+    """
+    snippets = [snippet for entry in ranked for snippet in entry_snippets(entry, query)]
+    snippets.sort(key=lambda s: s["score"], reverse=True)
+
+    remaining = budget_tokens
+    packed_shingles = []
+    chosen = []
+    for snippet in snippets:
+        if remaining < MIN_SNIPPET_TOKENS:
+            break
+        snippet_shingles = shingles(snippet["text"])
+        if _overlaps(snippet_shingles, packed_shingles):
+            continue
+        line = f"{snippet['field']}: {snippet['text']}" if snippet["field"] else snippet["text"]
+        cost = count_tokens(line)
+        if cost > remaining:
+            line = truncate_to_tokens(line, remaining)
+            cost = count_tokens(line)
+            if not line:
+                continue
+        remaining -= cost
+        packed_shingles.append(snippet_shingles)
+        chosen.append((snippet, line))
+
+    # Regroup by entry so each entry's fields read together under one heading
+    entry_order = []
+    lines_by_entry: Dict[Any, List[str]] = {}
+    headings = {}
+    for snippet, line in chosen:
+        key = snippet["id"] if snippet["id"] is not None else snippet["title"]
+        if key not in lines_by_entry:
+            entry_order.append(key)
+            lines_by_entry[key] = []
+            if snippet["title"]:
+                template = f" ({snippet['template']})" if snippet["template"] else ""
+                headings[key] = f"{snippet['title']}{template}"
+        lines_by_entry[key].append(line)
+
+    blocks = []
+    for key in entry_order:
+        heading = [headings[key]] if key in headings else []
+        blocks.append("\n".join(heading + lines_by_entry[key]))
+
+    context_refs = []
+    for snippet, _ in chosen:
+        ref = (snippet["id"], snippet["version"])
+        if snippet["id"] is not None and ref not in context_refs:
+            context_refs.append(ref)
+    return "\n\n".join(blocks), context_refs
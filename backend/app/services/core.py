@@ -3,25 +3,106 @@ import os
 import json
 import pdb
 import sys
-from typing import List, Dict, Any, Optional, Generator
+import time
+from typing import List, Dict, Any, Callable, Optional, Generator, Iterator, Union
 from dotenv import load_dotenv
 import numpy as np
 from openai import OpenAI
 import numpy.typing as npt
 from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 from ..logging.logger import log_info, log_error, log_warning, log_debug
 from ..utils.openai_logger import log_openai_interaction
+from ..config.settings import (
+    NEAR_DUPLICATE_JACCARD,
+    NEAR_DUPLICATE_COSINE,
+    GENERATION_MODEL,
+    GENERATION_TEMPERATURE,
+    GENERATION_MAX_TOKENS,
+    EMBEDDING_MODEL,
+    EMBEDDING_DIMENSIONS,
+    BATCH_GENERATION_CONCURRENCY,
+    LORE_TEMPLATES,
+    FIELD_CONTEXT_TOKEN_BUDGET,
+    LORE_CONTEXT_TOKEN_BUDGET,
+    EMBEDDING_MAX_TOKENS,
+    EMBEDDING_CHUNK_TOKENS,
+    EMBEDDING_BATCH_SIZE,
+    RETRIEVAL_MIN_SCORE,
+    MIN_SNIPPET_TOKENS,
+    WORLD_SUMMARY_MIN_CLUSTER_SIZE,
+    WORLD_SUMMARY_MAX_TAG_CLUSTERS,
+    WORLD_SUMMARY_ENTRY_TOKENS,
+    WORLD_SUMMARY_INPUT_TOKENS,
+    WORLD_SUMMARY_TOKEN_BUDGET,
+    PENDING_EMBEDDING_BATCH_SIZE,
+    ENTRY_UPDATE_ATTEMPTS,
+    EMBEDDING_MIGRATION_MODEL,
+    EMBEDDING_MIGRATION_DIMENSIONS,
+    EMBEDDING_MIGRATION_BATCH_SIZE,
+    EMBEDDING_MIGRATION_MAX_ROUNDS,
+    LORE_STREAM_BATCH_SIZE,
+    LORE_PAGE_DEFAULT_LIMIT,
+    VECTOR_STORE_ENABLED,
+    SQLITE_JOURNAL_MODE
+)
+from .dedupe import minhash_signature, lsh_buckets, estimate_jaccard, cosine_similarity
+from .context import assemble_context, count_tokens, split_into_chunks, truncate_to_tokens
+from .generation_cache import (
+    init_cache_table, make_cache_key, cache_lookup, cache_store, clear_cache,
+    make_query_key, query_embedding_lookup, query_embedding_store
+)
+from .job_queue import init_jobs_table
+from .world_generation import init_generation, current_generation
+from .vector_store import VectorStore, init_vector_log, load_rows
+from .exporters import export_entry, iter_export
+from .embedding_index import (
+    init_index_tables,
+    get_space,
+    get_space_thresholds,
+    set_space,
+    clear_shadow,
+    stale_shadow_rows,
+    store_shadow_entry,
+    shadow_coverage,
+    swap_in_shadow
+)
+from .resilience import call_with_resilience, is_retryable, CircuitOpenError
+from .metrics import (
+    TimedConnection,
+    EMBEDDING_SECONDS,
+    EMBEDDING_INPUTS,
+    CHAT_SECONDS,
+    RETRIEVAL_SECONDS,
+    RETRIEVAL_VECTORS,
+    LINK_SECONDS,
+    IMPORT_BATCH_SECONDS,
+    IMPORT_ENTRIES,
+    record_chat_usage,
+    timed_stream
+)
+from .world_summaries import (
+    init_summary_table,
+    get_summary,
+    list_summaries,
+    store_summary,
+    delete_summaries_except,
+    diff_entries,
+    refresh_threshold
+)
 
 DB_PATH = "data/lore.db"
 
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Retries are handled by the resilience layer, not by the SDK
+client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
 
 @contextmanager
 def get_db_connection() -> Generator[sqlite3.Connection, None, None]:
-    """Context manager for database connections."""
-    conn = sqlite3.connect(DB_PATH)
+    """Context manager for database connections; statements are timed per
+    calling function for /metrics."""
+    conn = sqlite3.connect(DB_PATH, factory=TimedConnection)
     try:
         yield conn
     finally:
@@ -44,13 +125,21 @@ def clean_duplicate_entries():
             AND id NOT IN (SELECT latest_id FROM DuplicateTitles)
         ''')
         deleted_count = cursor.rowcount
+        _prune_entry_indexes(cursor)
         conn.commit()
         return deleted_count
 
+def _ensure_column(cursor: sqlite3.Cursor, table: str, column: str, declaration: str) -> None:
+    """Add a column to an existing table if an older database lacks it."""
+    cursor.execute(f'PRAGMA table_info({table})')
+    if column not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {declaration}')
+
 def init_db():
     log_info("Initializing database...")
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
+    cursor.execute(f'PRAGMA journal_mode = {SQLITE_JOURNAL_MODE}')
     cursor.execute('''CREATE TABLE IF NOT EXISTS lore (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             title TEXT NOT NULL,
@@ -67,6 +156,51 @@ def init_db():
             value TEXT
         )
     ''')
+    # MinHash signature plus LSH band buckets for near-duplicate candidates
+    _ensure_column(cursor, 'lore', 'minhash', 'BLOB')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS lore_lsh (
+            band INTEGER NOT NULL,
+            bucket TEXT NOT NULL,
+            lore_id INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_lore_lsh_bucket ON lore_lsh (band, bucket)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_lore_lsh_lore_id ON lore_lsh (lore_id)')
+    # Bumped on every edit so cached generations notice changed context
+    _ensure_column(cursor, 'lore', 'version', 'INTEGER DEFAULT 1')
+    init_cache_table(cursor)
+    # Per-field (or per-chunk) vectors for retrieval by the matching field
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS lore_chunks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            lore_id INTEGER NOT NULL,
+            field TEXT,
+            chunk_index INTEGER NOT NULL,
+            text TEXT NOT NULL,
+            embedding BLOB NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_lore_chunks_lore_id ON lore_chunks (lore_id)')
+    init_jobs_table(cursor)
+    init_summary_table(cursor)
+    # Entries saved before their embedding exists are 'pending' until the
+    # background embedder fills them in; 'failed' ones could not be embedded
+    _ensure_column(cursor, 'lore', 'embedding_status', "TEXT DEFAULT 'ready'")
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_lore_embedding_status ON lore (embedding_status)')
+    # Vectors are tagged with the model and size that produced them, so
+    # retrieval never scores vectors from different embedding spaces together
+    for table in ('lore', 'lore_chunks'):
+        _ensure_column(cursor, table, 'embedding_model', 'TEXT')
+        _ensure_column(cursor, table, 'embedding_dim', 'INTEGER')
+    init_index_tables(cursor)
+    init_generation(cursor)
+    init_vector_log(cursor)
+    for table in ('lore', 'lore_chunks'):
+        cursor.execute(f'''
+            UPDATE {table} SET embedding_model = ?, embedding_dim = length(embedding) / 4
+            WHERE embedding_model IS NULL AND length(embedding) > 0
+        ''', (get_space(cursor, 'active')["model"],))
     conn.commit()
     conn.close()
     
@@ -75,41 +209,246 @@ def init_db():
     if (deleted_count > 0):
         log_info(f"Cleaned up {deleted_count} duplicate entries")
 
-def embed_text(text: str) -> npt.NDArray[np.float32]:
+    # Entries stored before near-duplicate indexing have no MinHash signature
+    # or LSH buckets, so insert-time checks would never see them
+    rebuild_near_duplicate_index()
+
+def _prepare_embedding_input(text: str) -> str:
+    """Validate and trim text before it is sent for embedding."""
+    if not text or not text.strip():
+        raise ValueError("Cannot embed empty text")
+    # Clean and prepare the text
+    cleaned_text = text.strip()
+    # The embedding model's limit is in tokens, not characters
+    return truncate_to_tokens(cleaned_text, EMBEDDING_MAX_TOKENS)
+
+def get_embedding_space() -> Dict[str, Any]:
+    """Model and dimensions ({model, dimensions}) of the vectors retrieval reads."""
+    try:
+        with get_db_connection() as conn:
+            space = get_space(conn.cursor(), 'active')
+    except sqlite3.OperationalError:
+        space = None
+    return space or {"model": EMBEDDING_MODEL, "dimensions": EMBEDDING_DIMENSIONS}
+
+def get_embedding_thresholds() -> Dict[str, float]:
+    """Similarity thresholds ({min_score, near_duplicate_cosine}) calibrated
+    for the active embedding space."""
+    try:
+        with get_db_connection() as conn:
+            thresholds = get_space_thresholds(conn.cursor(), 'active')
+    except sqlite3.OperationalError:
+        thresholds = None
+    return thresholds or {"min_score": RETRIEVAL_MIN_SCORE, "near_duplicate_cosine": NEAR_DUPLICATE_COSINE}
+
+# Default min_score of the retrieval functions: the cutoff calibrated for the
+# active embedding space. None still means no cutoff.
+SPACE_MIN_SCORE = "space"
+
+def _resolve_min_score(min_score: Union[float, str, None]) -> Optional[float]:
+    return get_embedding_thresholds()["min_score"] if min_score == SPACE_MIN_SCORE else min_score
+
+def _embedding_args(space: Dict[str, Any]) -> Dict[str, Any]:
+    """Model and, for shortened vectors, dimensions arguments of an embeddings request."""
+    args = {"model": space["model"]}
+    if space.get("dimensions"):
+        args["dimensions"] = space["dimensions"]
+    return args
+
+def _space_is_active(cursor: sqlite3.Cursor, space: Dict[str, Any]) -> bool:
+    """Whether vectors computed in space still belong in the live index; the
+    active space may have been cut over while they were being computed."""
+    return get_space(cursor, 'active') == {"model": space["model"], "dimensions": space.get("dimensions")}
+
+def embed_text(text: str, space: Optional[Dict[str, Any]] = None) -> npt.NDArray[np.float32]:
     """Generate embeddings for input text using OpenAI's API.
     
     Args:
         text: Input text to embed. Must be non-empty.
+        space: Embedding model and dimensions to use; defaults to the
+            active space.
         
     Returns:
         numpy.ndarray: Embedding vector as float32 array
         
     Raises:
         ValueError: If text is empty or invalid
-        OpenAIError: If API request fails
+        OpenAIError: If API request fails after the embedding retry policy
+        CircuitOpenError: If embedding calls are failing and the circuit is open
     """
-    if not text or not text.strip():
-        raise ValueError("Cannot embed empty text")
-        
-    try:
-        # Clean and prepare the text
-        cleaned_text = text.strip()
-        # OpenAI has a token limit for embeddings
-        if len(cleaned_text) > 8191:
-            cleaned_text = cleaned_text[:8191]
-            
-        response = client.embeddings.create(
+    cleaned_text = _prepare_embedding_input(text)
+    args = _embedding_args(space or get_embedding_space())
+    EMBEDDING_INPUTS.inc()
+    with EMBEDDING_SECONDS.time(kind="single"):
+        response = call_with_resilience("embedding", lambda timeout: client.embeddings.create(
             input=cleaned_text,
-            model="text-embedding-ada-002",
-            encoding_format="float"  # Explicitly specify format
-        )
-        
-        # New API returns embedding directly
-        embedding_data = response.data[0].embedding
-        return np.array(embedding_data, dtype=np.float32)
-        
-    except Exception as e:
-        raise ValueError(f"Embedding generation failed: {str(e)}")
+            encoding_format="float",  # Explicitly specify format
+            timeout=timeout,
+            **args
+        ))
+
+    # New API returns embedding directly
+    embedding_data = response.data[0].embedding
+    return np.array(embedding_data, dtype=np.float32)
+
+def embed_texts(texts: List[str], space: Optional[Dict[str, Any]] = None) -> List[npt.NDArray[np.float32]]:
+    """Embed many texts with as few API requests as possible.
+
+    Inputs are sent EMBEDDING_BATCH_SIZE at a time; results keep the order
+    of texts. space defaults to the active embedding space.
+    """
+    cleaned = [_prepare_embedding_input(text) for text in texts]
+    args = _embedding_args(space or get_embedding_space())
+    vectors = []
+    for start in range(0, len(cleaned), EMBEDDING_BATCH_SIZE):
+        batch = cleaned[start:start + EMBEDDING_BATCH_SIZE]
+        EMBEDDING_INPUTS.inc(len(batch))
+        with EMBEDDING_SECONDS.time(kind="batch"):
+            response = call_with_resilience("embedding", lambda timeout: client.embeddings.create(
+                input=batch,
+                encoding_format="float",
+                timeout=timeout,
+                **args
+            ))
+        for item in sorted(response.data, key=lambda d: d.index):
+            vectors.append(np.array(item.embedding, dtype=np.float32))
+    return vectors
+
+def _entry_chunks(title: str, fields: Dict[str, Any], content: str) -> List[Dict[str, Any]]:
+    """Split an entry into per-field chunks for embedding.
+
+    Entries without template fields are chunked from their content.
+    Each chunk's embedding input is prefixed with the title and field
+    name so it stays anchored to the entry it came from.
+    """
+    parts = [
+        (field, value) for field, value in fields.items()
+        if field not in ("Name", "Tags") and isinstance(value, str) and value.strip()
+    ] or [(None, content)]
+    chunks = []
+    for field, text in parts:
+        for index, chunk in enumerate(split_into_chunks(text, EMBEDDING_CHUNK_TOKENS)):
+            label = f"{field}: {chunk}" if field else chunk
+            chunks.append({
+                "field": field,
+                "chunk_index": index,
+                "text": chunk,
+                "embed_input": f"{title}\n{label}"
+            })
+    return chunks
+
+def _write_chunks(
+    cursor: sqlite3.Cursor,
+    lore_id: int,
+    chunks: List[Dict[str, Any]],
+    model: str,
+    fields: Optional[List[Optional[str]]] = None
+) -> None:
+    """Replace the stored chunks of an entry, or only those of the given
+    fields, tagging their vectors with the model that produced them."""
+    if fields is None:
+        cursor.execute('DELETE FROM lore_chunks WHERE lore_id = ?', (lore_id,))
+    else:
+        for field in fields:
+            cursor.execute('DELETE FROM lore_chunks WHERE lore_id = ? AND field IS ?', (lore_id, field))
+    cursor.executemany(
+        '''INSERT INTO lore_chunks (lore_id, field, chunk_index, text, embedding, embedding_model, embedding_dim)
+           VALUES (?, ?, ?, ?, ?, ?, ?)''',
+        [(lore_id, c["field"], c["chunk_index"], c["text"], c["embedding"].tobytes(), model, len(c["embedding"])) for c in chunks]
+    )
+
+def _embed_entry(content: str, chunks: List[Dict[str, Any]], space: Dict[str, Any]) -> npt.NDArray[np.float32]:
+    """Embed an entry and its chunks in one batch; chunk vectors are stored on the chunks."""
+    vectors = embed_texts([content] + [c["embed_input"] for c in chunks], space)
+    for chunk, vector in zip(chunks, vectors[1:]):
+        chunk["embedding"] = vector
+    return vectors[0]
+
+def backfill_chunk_embeddings(limit: Optional[int] = None) -> int:
+    """Create per-field chunk embeddings for up to limit entries that have
+    none yet, with one embeddings pass and one transaction.
+
+    Returns the number of entries processed; callers working through a
+    large world call it again until it returns 0.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        query = '''
+            SELECT id, title, content, fields FROM lore
+            WHERE id NOT IN (SELECT DISTINCT lore_id FROM lore_chunks)
+            AND embedding_status IS NOT 'pending'
+        '''
+        if limit:
+            query += f' LIMIT {int(limit)}'
+        cursor.execute(query)
+        rows = cursor.fetchall()
+
+    pending = []
+    for lore_id, title, content, fields_json in rows:
+        chunks = _entry_chunks(title, json.loads(fields_json) if fields_json else {}, content)
+        pending.append((lore_id, chunks))
+    space = get_embedding_space()
+    vectors = embed_texts([c["embed_input"] for _, chunks in pending for c in chunks], space)
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        if not _space_is_active(cursor, space):
+            log_warning("Embedding space changed during the chunk backfill; discarding the batch")
+            return 0
+        position = 0
+        for lore_id, chunks in pending:
+            for chunk in chunks:
+                chunk["embedding"] = vectors[position]
+                position += 1
+            _write_chunks(cursor, lore_id, chunks, space["model"])
+        conn.commit()
+    if rows:
+        log_info(f"Embedded fields of {len(rows)} entries")
+    return len(rows)
+
+def count_entries_missing_chunks() -> int:
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT COUNT(*) FROM lore
+            WHERE id NOT IN (SELECT DISTINCT lore_id FROM lore_chunks)
+            AND embedding_status IS NOT 'pending'
+        ''')
+        return cursor.fetchone()[0]
+
+def _mark_pending(cursor: sqlite3.Cursor, lore_id: int) -> None:
+    """Queue an entry for the background embedder, dropping its chunk vectors."""
+    cursor.execute("UPDATE lore SET embedding_status = 'pending' WHERE id = ?", (lore_id,))
+    cursor.execute('DELETE FROM lore_chunks WHERE lore_id = ?', (lore_id,))
+
+def refresh_entry_embeddings(title: str) -> bool:
+    """Re-embed an entry and its chunks from the stored text.
+
+    Returns False when no entry has the title.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT id, content, fields FROM lore WHERE title = ?', (title,))
+        row = cursor.fetchone()
+    if not row:
+        return False
+    lore_id, content, fields_json = row
+    chunks = _entry_chunks(title, json.loads(fields_json) if fields_json else {}, content)
+    space = get_embedding_space()
+    embedding = _embed_entry(content, chunks, space)
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        if not _space_is_active(cursor, space):
+            # Cut over meanwhile; let the background embedder redo it in the new space
+            _mark_pending(cursor, lore_id)
+        else:
+            cursor.execute(
+                "UPDATE lore SET embedding = ?, embedding_model = ?, embedding_dim = ?, embedding_status = 'ready' WHERE id = ?",
+                (embedding.tobytes(), space["model"], len(embedding), lore_id)
+            )
+            _write_chunks(cursor, lore_id, chunks, space["model"])
+        conn.commit()
+    return True
 
 def get_entry_by_title(title: str) -> Optional[Dict[str, Any]]:
     """Get a single lore entry by its title."""
@@ -130,6 +469,7 @@ def get_entry_by_title(title: str) -> Optional[Dict[str, Any]]:
             "fields": json.loads(row[4]) if row[4] else {}
         }
 
+@LINK_SECONDS.time()
 def compute_linked_entries(content: Dict[str, Any], all_titles: List[str]) -> List[str]:
     """Scan content for mentions of other entries.
     
@@ -163,288 +503,1762 @@ def compute_linked_entries(content: Dict[str, Any], all_titles: List[str]) -> Li
     
     return list(linked)
 
-def add_lore_to_db(
-    title: str, 
-    content: str | Dict[str, Any], 
-    tags: List[str] | str, 
-    template: Optional[str] = None,
-    linked_entries: Optional[List[str]] = None
-) -> None:
-    """Add a new lore entry to the database."""
-    log_info(f"Adding lore entry: {title}")
-    try:
-        # Check if entry already exists
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT id FROM lore WHERE title = ?', (title,))
-            if cursor.fetchone():
-                log_warning(f"Entry with title '{title}' already exists, skipping")
-                return
+def _index_near_duplicates(cursor: sqlite3.Cursor, lore_id: int, signature: npt.NDArray[np.uint64]) -> None:
+    """Store an entry's MinHash signature and (re)write its LSH buckets."""
+    cursor.execute('UPDATE lore SET minhash = ? WHERE id = ?', (signature.tobytes(), lore_id))
+    cursor.execute('DELETE FROM lore_lsh WHERE lore_id = ?', (lore_id,))
+    cursor.executemany(
+        'INSERT INTO lore_lsh (band, bucket, lore_id) VALUES (?, ?, ?)',
+        [(band, bucket, lore_id) for band, bucket in lsh_buckets(signature)]
+    )
 
-            # Get all existing titles for link computation
-            cursor.execute('SELECT title FROM lore')
-            all_titles = [row[0] for row in cursor.fetchall()]
-            
-            if isinstance(content, dict):
-                fields_json = json.dumps(content)
-                # Extract meaningful content for embedding
-                content_str = "\n".join(
-                    f"{k}: {v}" for k, v in content.items() 
-                    if k != "Tags" and v and str(v).strip()
-                )
-                # Use provided linked_entries or compute them
-                final_linked_entries = linked_entries if linked_entries is not None else compute_linked_entries(content, all_titles)
-            else:
-                fields_json = json.dumps({})
-                content_str = content
-                final_linked_entries = linked_entries if linked_entries is not None else []
-            
-            if not content_str.strip():
-                log_warning(f"Empty content for entry '{title}', using title as content")
-                content_str = title
-            
-            tags_json = json.dumps(tags) if isinstance(tags, list) else tags
-            embedding = embed_text(content_str).tobytes()
-            linked_json = json.dumps(final_linked_entries)
-            
+def _prune_entry_indexes(cursor: sqlite3.Cursor) -> None:
+    """Drop LSH buckets and field chunks (live and shadow) that point at deleted entries."""
+    cursor.execute('DELETE FROM lore_lsh WHERE lore_id NOT IN (SELECT id FROM lore)')
+    cursor.execute('DELETE FROM lore_chunks WHERE lore_id NOT IN (SELECT id FROM lore)')
+    cursor.execute('DELETE FROM lore_shadow WHERE lore_id NOT IN (SELECT id FROM lore)')
+    cursor.execute('DELETE FROM lore_chunks_shadow WHERE lore_id NOT IN (SELECT id FROM lore)')
+
+def _is_near_duplicate(jaccard: float, cosine: float, cosine_threshold: float) -> bool:
+    return jaccard >= NEAR_DUPLICATE_JACCARD and cosine >= cosine_threshold
+
+def _find_near_duplicates_of(
+    cursor: sqlite3.Cursor,
+    signature: npt.NDArray[np.uint64],
+    embedding: npt.NDArray[np.float32],
+    model: str,
+    exclude_id: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Find stored entries that share an LSH bucket with the signature and
+    pass both the Jaccard and the active space's cosine threshold. Only
+    vectors from the same model and size are compared."""
+    cosine_threshold = get_space_thresholds(cursor, 'active')["near_duplicate_cosine"]
+    buckets = lsh_buckets(signature)
+    clause = " OR ".join("(band = ? AND bucket = ?)" for _ in buckets)
+    params = [value for pair in buckets for value in pair]
+    cursor.execute(f'''
+        SELECT id, title, minhash, embedding FROM lore
+        WHERE id IN (SELECT lore_id FROM lore_lsh WHERE {clause})
+        AND embedding_model = ? AND embedding_dim = ?
+    ''', params + [model, len(embedding)])
+    matches = []
+    for lore_id, title, minhash_blob, emb_blob in cursor.fetchall():
+        if lore_id == exclude_id or not minhash_blob:
+            continue
+        jaccard = estimate_jaccard(signature, np.frombuffer(minhash_blob, dtype=np.uint64))
+        cosine = cosine_similarity(embedding, np.frombuffer(emb_blob, dtype=np.float32))
+        if _is_near_duplicate(jaccard, cosine, cosine_threshold):
+            matches.append({"id": lore_id, "title": title, "jaccard": jaccard, "cosine": cosine})
+    return matches
+
+def rebuild_near_duplicate_index(only_missing: bool = True) -> int:
+    """Compute MinHash signatures and LSH buckets for stored entries.
+
+    Returns the number of entries indexed.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        query = 'SELECT id, content FROM lore'
+        if only_missing:
+            query += ' WHERE minhash IS NULL'
+        cursor.execute(query)
+        rows = cursor.fetchall()
+        for lore_id, content in rows:
+            _index_near_duplicates(cursor, lore_id, minhash_signature(content))
+        _prune_entry_indexes(cursor)
+        conn.commit()
+    if rows:
+        log_info(f"Indexed {len(rows)} entries for near-duplicate detection")
+    return len(rows)
+
+def find_near_duplicates() -> List[Dict[str, Any]]:
+    """Report near-duplicate pairs across the whole database.
+
+    Candidates come from shared LSH buckets, so only entries that collide
+    in at least one band are compared instead of every pair.
+    """
+    rebuild_near_duplicate_index()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT group_concat(lore_id) FROM lore_lsh
+            GROUP BY band, bucket
+            HAVING COUNT(*) > 1
+        ''')
+        candidate_pairs = set()
+        for (ids,) in cursor.fetchall():
+            bucket_ids = sorted({int(i) for i in ids.split(",")})
+            for i, first in enumerate(bucket_ids):
+                for second in bucket_ids[i + 1:]:
+                    candidate_pairs.add((first, second))
+
+        candidate_ids = sorted({i for pair in candidate_pairs for i in pair})
+        cosine_threshold = get_space_thresholds(cursor, 'active')["near_duplicate_cosine"]
+        rows = {}
+        for start in range(0, len(candidate_ids), 500):
+            batch = candidate_ids[start:start + 500]
             cursor.execute(
-                """INSERT INTO lore 
-                   (title, content, tags, template, fields, embedding, linked_entries) 
-                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                (title, content_str, tags_json, template, fields_json, embedding, linked_json)
+                f'SELECT id, title, minhash, embedding, embedding_model FROM lore WHERE id IN ({",".join("?" * len(batch))})',
+                batch
             )
-            conn.commit()
-        log_info(f"Successfully added lore entry: {title}")
-    except Exception as e:
-        log_error(f"Failed to add lore entry: {title} - {str(e)}")
-        raise
+            for lore_id, title, minhash_blob, emb_blob, model in cursor.fetchall():
+                rows[lore_id] = (
+                    title,
+                    np.frombuffer(minhash_blob, dtype=np.uint64),
+                    np.frombuffer(emb_blob, dtype=np.float32),
+                    model
+                )
 
-def get_all_lore_from_db():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute('SELECT title, content, tags, template, fields, linked_entries FROM lore')
-    rows = cursor.fetchall()
-    conn.close()
-    return [{
-        "title": r[0],
-        "content": r[1],
-        "tags": json.loads(r[2]) if r[2] else [],
-        "template": r[3],
-        "fields": json.loads(r[4]) if r[4] else {},
-        "linked_entries": json.loads(r[5]) if r[5] else []
-    } for r in rows]
-
-def get_relevant_lore(prompt: str, top_k: int = 5) -> List[str]:
-    prompt_embedding = embed_text(prompt)
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute('SELECT content, embedding FROM lore')
-    rows = cursor.fetchall()
-    scored = []
-    for content, emb_blob in rows:
-        emb = np.frombuffer(emb_blob, dtype=np.float32)
-        similarity = np.dot(prompt_embedding, emb) / (np.linalg.norm(prompt_embedding) * np.linalg.norm(emb))
-        scored.append((similarity, content))
-    conn.close()
-    scored.sort(reverse=True)
-    return [c for _, c in scored[:top_k]]
+    report = []
+    for first, second in sorted(candidate_pairs):
+        if first not in rows or second not in rows:
+            continue
+        title_a, sig_a, emb_a, model_a = rows[first]
+        title_b, sig_b, emb_b, model_b = rows[second]
+        jaccard = estimate_jaccard(sig_a, sig_b)
+        cosine = cosine_similarity(emb_a, emb_b) if model_a == model_b else 0.0
+        if _is_near_duplicate(jaccard, cosine, cosine_threshold):
+            report.append({
+                "title": title_b,
+                "duplicate_of": title_a,
+                "jaccard": round(jaccard, 3),
+                "cosine": round(cosine, 3)
+            })
+    return report
 
-def update_lore_entry(original_title: str, new_title: str, new_content: str, new_tags: List[str], new_template: Optional[str] = None, new_fields: Optional[Dict[str, Any]] = None) -> None:
-    log_info(f"Updating lore entry: {original_title} -> {new_title}")
-    try:
-        conn = sqlite3.connect(DB_PATH)
+def _prepare_lore_row(
+    title: str,
+    content: str | Dict[str, Any],
+    tags: List[str] | str,
+    template: Optional[str] = None,
+    linked_entries: Optional[List[str]] = None
+) -> Optional[Dict[str, Any]]:
+    """Build the column values of a new entry, everything except the embedding.
+
+    Returns None when an entry with the same title already exists.
+    """
+    with get_db_connection() as conn:
         cursor = conn.cursor()
-        embedding = embed_text(new_content).tobytes()
-        fields_json = json.dumps(new_fields) if new_fields else "{}"
-        cursor.execute('''
-            UPDATE lore
-            SET title = ?, content = ?, tags = ?, template = ?, fields = ?, embedding = ?
-            WHERE title = ?
-        ''', (new_title, new_content, json.dumps(new_tags), new_template, fields_json, embedding, original_title))
+        # Check if entry already exists
+        cursor.execute('SELECT id FROM lore WHERE title = ?', (title,))
+        if cursor.fetchone():
+            log_warning(f"Entry with title '{title}' already exists, skipping")
+            return None
+
+        # Get all existing titles for link computation
+        cursor.execute('SELECT title FROM lore')
+        all_titles = [row[0] for row in cursor.fetchall()]
+
+    return _build_lore_row(title, content, tags, template, linked_entries, all_titles)
+
+def _build_lore_row(
+    title: str,
+    content: str | Dict[str, Any],
+    tags: List[str] | str,
+    template: Optional[str],
+    linked_entries: Optional[List[str]],
+    all_titles: List[str]
+) -> Dict[str, Any]:
+    """Column values and chunks of a new entry; links to all_titles are
+    computed unless linked_entries is given."""
+    if isinstance(content, dict):
+        fields_json = json.dumps(content)
+        content_str = fields_to_content(content)
+        # Use provided linked_entries or compute them
+        final_linked_entries = linked_entries if linked_entries is not None else compute_linked_entries(content, all_titles)
+    else:
+        fields_json = json.dumps({})
+        content_str = content
+        final_linked_entries = linked_entries if linked_entries is not None else []
+
+    if not content_str.strip():
+        log_warning(f"Empty content for entry '{title}', using title as content")
+        content_str = title
+
+    return {
+        "title": title,
+        "content": content_str,
+        "chunks": _entry_chunks(title, content if isinstance(content, dict) else {}, content_str),
+        "tags": json.dumps(tags) if isinstance(tags, list) else tags,
+        "template": template,
+        "fields": fields_json,
+        "linked_entries": json.dumps(final_linked_entries)
+    }
+
+def _insert_lore_row(
+    row: Dict[str, Any],
+    embedding_vector: Optional[npt.NDArray[np.float32]],
+    skip_near_duplicates: bool = False,
+    space: Optional[Dict[str, Any]] = None
+) -> bool:
+    """Insert a prepared entry with its embedding and chunk embeddings,
+    computed in the embedding space given by space.
+
+    Without an embedding_vector (or when the active space changed since it
+    was computed) the entry is stored as pending, with no chunks, for
+    embed_pending_entries to finish; the near-duplicate check then waits
+    for that too. Returns False if the entry was skipped as a duplicate.
+    """
+    with get_db_connection() as conn:
+        status, _ = _insert_row(conn.cursor(), row, embedding_vector, skip_near_duplicates, space)
         conn.commit()
-        conn.close()
-        log_info(f"Successfully updated lore entry: {new_title}")
-    except Exception as e:
-        log_error(f"Failed to update lore entry: {original_title} - {str(e)}")
-        raise
+    return status != "skipped"
 
-def generate_text_from_lore(prompt: str, lore_entries: Optional[List[str]] = None) -> str:
-    log_info("Generating text from lore prompt")
-    try:
-        if lore_entries is None:
-            lore_entries = get_relevant_lore(prompt)
-        lore_context = "\n".join(lore_entries)
-        final_prompt = f"Using the following lore context, write a response to: {prompt}\n\nLore:\n{lore_context}\n\nResponse:"
-        
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are a narrative assistant for a game studio, helping write dialogue or story events based on lore."},
-                {"role": "user", "content": final_prompt}
-            ],
-            temperature=0.7,
-            max_tokens=300
-        )
-        log_info("Successfully generated text from lore")
-        return response.choices[0].message.content
-    except Exception as e:
-        log_error(f"Failed to generate text from lore: {str(e)}")
-        raise
+def _insert_row(
+    cursor: sqlite3.Cursor,
+    row: Dict[str, Any],
+    embedding_vector: Optional[npt.NDArray[np.float32]],
+    skip_near_duplicates: bool,
+    space: Optional[Dict[str, Any]]
+) -> tuple[str, Optional[str]]:
+    """Insert one prepared entry on the caller's cursor; see _insert_lore_row.
 
-def delete_lore_entry_by_title(title: str) -> None:
-    log_info(f"Deleting lore entry: {title}")
+    Returns (status, detail): status is 'inserted', 'pending' or 'skipped',
+    and detail says why an entry was skipped or which entries it resembles.
+    """
+    # The title may have been taken while the embedding was computed
+    cursor.execute('SELECT id FROM lore WHERE title = ?', (row["title"],))
+    if cursor.fetchone():
+        log_warning(f"Entry with title '{row['title']}' already exists, skipping")
+        return "skipped", "An entry with this title already exists"
+
+    if embedding_vector is not None and not _space_is_active(cursor, space):
+        log_warning(f"Embedding space changed while embedding '{row['title']}'; saving it as pending")
+        embedding_vector = None
+    signature = minhash_signature(row["content"])
+    near_duplicates = [] if embedding_vector is None else _find_near_duplicates_of(cursor, signature, embedding_vector, space["model"])
+    detail = None
+    if near_duplicates:
+        similar = ", ".join(d["title"] for d in near_duplicates)
+        if skip_near_duplicates:
+            log_warning(f"Entry '{row['title']}' is a near-duplicate of {similar}, skipping")
+            return "skipped", f"Near-duplicate of {similar}"
+        log_warning(f"Entry '{row['title']}' looks like a near-duplicate of {similar}")
+        detail = f"Looks like a near-duplicate of {similar}"
+
+    embedded = embedding_vector is not None
+    cursor.execute(
+        """INSERT INTO lore
+           (title, content, tags, template, fields, embedding, linked_entries, embedding_status, embedding_model, embedding_dim)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        (row["title"], row["content"], row["tags"], row["template"], row["fields"],
+         embedding_vector.tobytes() if embedded else b"", row["linked_entries"],
+         "ready" if embedded else "pending",
+         space["model"] if embedded else None, len(embedding_vector) if embedded else None)
+    )
+    lore_id = cursor.lastrowid
+    _index_near_duplicates(cursor, lore_id, signature)
+    if embedded:
+        _write_chunks(cursor, lore_id, row["chunks"], space["model"])
+    return ("inserted" if embedded else "pending"), detail
+
+def add_lore_to_db(
+    title: str,
+    content: str | Dict[str, Any],
+    tags: List[str] | str,
+    template: Optional[str] = None,
+    linked_entries: Optional[List[str]] = None,
+    skip_near_duplicates: bool = False,
+    defer_embedding: bool = False
+) -> bool:
+    """Add a new lore entry to the database.
+
+    Near-duplicates of existing entries are logged, and skipped entirely
+    when skip_near_duplicates is set. With defer_embedding the entry is
+    saved at once with its embedding pending; embed_pending_entries fills
+    it in later. Returns False if the entry was skipped.
+    """
+    log_info(f"Adding lore entry: {title}")
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM lore WHERE title = ?', (title,))
-        conn.commit()
-        conn.close()
-        log_info(f"Successfully deleted lore entry: {title}")
+        row = _prepare_lore_row(title, content, tags, template, linked_entries)
+        if row is None:
+            return False
+        space = get_embedding_space()
+        embedding_vector = None if defer_embedding else _embed_entry(row["content"], row["chunks"], space)
+        inserted = _insert_lore_row(row, embedding_vector, skip_near_duplicates, space)
+        if inserted:
+            log_info(f"Successfully added lore entry: {title}" + (" (embedding pending)" if defer_embedding else ""))
+        return inserted
     except Exception as e:
-        log_error(f"Failed to delete lore entry: {title} - {str(e)}")
+        log_error(f"Failed to add lore entry: {title} - {str(e)}")
         raise
 
-def delete_settings() -> None:
-    """Delete all settings from the database."""
+@IMPORT_BATCH_SECONDS.time()
+def _prepare_lore_batch(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build the rows of a batch of new entries (see add_lore_batch).
+
+    Entries whose title is already stored, or taken by an earlier entry of
+    the batch, get their 'skipped' result here. Returns the batch: its
+    results so far, its rows as (position, row) and the embedding space.
+    """
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute('DELETE FROM settings')
-        conn.commit()
+        cursor.execute('SELECT title FROM lore')
+        stored_titles = [row[0] for row in cursor.fetchall()]
+    existing = set(stored_titles)
+    link_titles = stored_titles + [entry["title"] for entry in entries if entry["title"] not in existing]
 
-def delete_all_entries() -> None:
-    """Delete all entries from the lore database."""
+    results: List[Optional[Dict[str, Any]]] = [None] * len(entries)
+    rows = []
+    for position, entry in enumerate(entries):
+        if entry["title"] in existing:
+            results[position] = {"title": entry["title"], "status": "skipped", "detail": "An entry with this title already exists"}
+            continue
+        existing.add(entry["title"])
+        rows.append((position, _build_lore_row(
+            entry["title"], entry["content"], entry.get("tags", []), entry.get("template"),
+            entry.get("linked_entries"), link_titles
+        )))
+    return {"results": results, "rows": rows, "space": get_embedding_space()}
+
+def _lore_batch_inputs(batch: Dict[str, Any]) -> List[str]:
+    """Texts to embed for a batch: each row's content followed by its chunks."""
+    return [text for _, row in batch["rows"] for text in [row["content"]] + [c["embed_input"] for c in row["chunks"]]]
+
+def _attach_lore_batch_vectors(
+    batch: Dict[str, Any],
+    flat: List[npt.NDArray[np.float32]]
+) -> List[npt.NDArray[np.float32]]:
+    """Hand the vectors of _lore_batch_inputs back to the chunks of each row;
+    returns the entry vectors in row order."""
+    vectors = []
+    offset = 0
+    for _, row in batch["rows"]:
+        vectors.append(flat[offset])
+        for chunk in row["chunks"]:
+            offset += 1
+            chunk["embedding"] = flat[offset]
+        offset += 1
+    return vectors
+
+def _insert_lore_batch(
+    batch: Dict[str, Any],
+    vectors: Optional[List[npt.NDArray[np.float32]]],
+    skip_near_duplicates: bool = False
+) -> List[Dict[str, Any]]:
+    """Insert the rows of a batch in one transaction; without vectors the
+    entries are saved with pending embeddings."""
+    results = batch["results"]
+    rows = batch["rows"]
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute('DELETE FROM lore')
-        conn.commit()
+        try:
+            for (position, row), vector in zip(rows, vectors or [None] * len(rows)):
+                status, detail = _insert_row(cursor, row, vector, skip_near_duplicates, batch["space"])
+                results[position] = {"title": row["title"], "status": status, "detail": detail}
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    for result in results:
+        IMPORT_ENTRIES.inc(status=result["status"])
+    inserted = sum(1 for result in results if result["status"] != "skipped")
+    log_info(f"Added {inserted} of {len(results)} lore entries in one batch")
+    return results
 
-def get_setting(key: str, default: Optional[str] = None) -> Optional[str]:
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute('SELECT value FROM settings WHERE key = ?', (key,))
-    row = cursor.fetchone()
-    conn.close()
-    return row[0] if row else default
+def add_lore_batch(
+    entries: List[Dict[str, Any]],
+    skip_near_duplicates: bool = False,
+    defer_embedding: bool = False
+) -> List[Dict[str, Any]]:
+    """Add many entries with one embeddings pass and one transaction.
 
-def set_setting(key: str, value: str) -> None:
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    Each entry holds title, content (text or a fields dict), tags, template
+    and optionally linked_entries; links are otherwise computed against the
+    stored titles and those of the batch. Returns one result per entry, in
+    order, with title, status ('inserted', 'pending' or 'skipped') and
+    detail. If the embeddings request fails the batch is still saved, with
+    its embeddings pending for the background embedder.
+    """
+    batch = _prepare_lore_batch(entries)
+    vectors = None
+    if batch["rows"] and not defer_embedding:
+        try:
+            vectors = _attach_lore_batch_vectors(batch, embed_texts(_lore_batch_inputs(batch), batch["space"]))
+        except Exception as e:
+            log_warning(f"Batch embedding failed, saving {len(batch['rows'])} entries with pending embeddings: {str(e)}")
+    return _insert_lore_batch(batch, vectors, skip_near_duplicates)
+
+def _store_pending_embedding(
+    cursor: sqlite3.Cursor,
+    entry: Dict[str, Any],
+    embedding: npt.NDArray[np.float32],
+    space: Dict[str, Any]
+) -> bool:
+    """Save the embeddings of a pending entry unless it was edited, or the
+    active embedding space changed, meanwhile."""
+    if not _space_is_active(cursor, space):
+        return False
     cursor.execute('''
-        INSERT INTO settings (key, value)
-        VALUES (?, ?)
-        ON CONFLICT(key) DO UPDATE SET value=excluded.value
-    ''', (key, value))
-    conn.commit()
-    conn.close()
+        UPDATE lore SET embedding = ?, embedding_model = ?, embedding_dim = ?, embedding_status = 'ready'
+        WHERE id = ? AND embedding_status = 'pending' AND COALESCE(version, 1) = ?
+    ''', (embedding.tobytes(), space["model"], len(embedding), entry["id"], entry["version"]))
+    if cursor.rowcount == 0:
+        return False
+    _write_chunks(cursor, entry["id"], entry["chunks"], space["model"])
+    signature = minhash_signature(entry["content"])
+    near_duplicates = _find_near_duplicates_of(cursor, signature, embedding, space["model"], exclude_id=entry["id"])
+    if near_duplicates:
+        similar = ", ".join(d["title"] for d in near_duplicates)
+        log_warning(f"Entry '{entry['title']}' looks like a near-duplicate of {similar}")
+    return True
 
-def get_filtered_lore(
-    tags: Optional[List[str]] = None,
-    entry_type: Optional[str] = None,
-    query: Optional[str] = None
-) -> List[Dict[str, Any]]:
+def embed_pending_entries(batch_size: int = PENDING_EMBEDDING_BATCH_SIZE) -> int:
+    """Embed up to batch_size entries saved with a pending embedding.
+
+    The entries and their chunks go out in one batched request. If the
+    batch is rejected for a reason other than a transient provider fault,
+    entries are retried one at a time and those that still fail are marked
+    'failed' so they stop blocking the queue. Returns the number of
+    entries processed.
+    """
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        
-        base_query = '''
-            SELECT title, content, tags, template, fields, linked_entries
-            FROM lore 
-            WHERE 1=1
-        '''
-        params = []
-        
-        if tags:
-            for tag in tags:
-                base_query += " AND json_extract(tags, '$') LIKE ?"
-                params.append(f'%{tag}%')
-        
-        if entry_type:
-            base_query += " AND template = ?"
-            params.append(entry_type)
-        
-        if query:
-            base_query += " AND (title LIKE ? OR content LIKE ?)"
-            params.extend([f'%{query}%', f'%{query}%'])
-        
-        cursor.execute(base_query, params)
+        cursor.execute('''
+            SELECT id, title, content, fields, COALESCE(version, 1) FROM lore
+            WHERE embedding_status = 'pending'
+            ORDER BY id LIMIT ?
+        ''', (batch_size,))
         rows = cursor.fetchall()
-        
-        return [{
-            "title": r[0],
-            "content": r[1],
-            "tags": json.loads(r[2]) if r[2] else [],
-            "template": r[3],
-            "fields": json.loads(r[4]) if r[4] else {},
-            "linked_entries": json.loads(r[5]) if r[5] else []
-        } for r in rows]
+    if not rows:
+        return 0
 
-def get_entries_for_export() -> List[Dict[str, Any]]:
-    """Get all entries formatted for JSON export."""
+    entries = []
+    for lore_id, title, content, fields_json, version in rows:
+        entries.append({
+            "id": lore_id,
+            "title": title,
+            "content": content,
+            "version": version,
+            "chunks": _entry_chunks(title, json.loads(fields_json) if fields_json else {}, content)
+        })
+
+    space = get_embedding_space()
+    try:
+        vectors = embed_texts([text for entry in entries for text in [entry["content"]] + [c["embed_input"] for c in entry["chunks"]]], space)
+    except Exception as e:
+        if isinstance(e, CircuitOpenError) or is_retryable(e):
+            raise
+        log_warning(f"Batch embedding failed, embedding entries one by one: {str(e)}")
+        vectors = None
+
+    stored = 0
+    position = 0
+    for entry in entries:
+        if vectors is not None:
+            embedding = vectors[position]
+            for chunk in entry["chunks"]:
+                position += 1
+                chunk["embedding"] = vectors[position]
+            position += 1
+        else:
+            try:
+                embedding = _embed_entry(entry["content"], entry["chunks"], space)
+            except Exception as e:
+                if isinstance(e, CircuitOpenError) or is_retryable(e):
+                    raise
+                log_error(f"Could not embed lore entry: {entry['title']} - {str(e)}")
+                with get_db_connection() as conn:
+                    conn.execute("UPDATE lore SET embedding_status = 'failed' WHERE id = ? AND embedding_status = 'pending'", (entry["id"],))
+                    conn.commit()
+                continue
+        with get_db_connection() as conn:
+            if _store_pending_embedding(conn.cursor(), entry, embedding, space):
+                stored += 1
+            conn.commit()
+    log_info(f"Embedded {stored} pending entries")
+    return len(entries)
+
+def count_pending_embeddings() -> int:
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute('SELECT template, fields, linked_entries FROM lore')
-        rows = cursor.fetchall()
-        
-        entries = [{
-            "template": row[0],
-            "fields": json.loads(row[1]) if row[1] else {},
-            "linked_entries": json.loads(row[2]) if row[2] else []
-        } for row in rows]
-        
-        # Use json.dumps and loads to clean up any escaped Unicode
-        cleaned = json.loads(json.dumps(entries, ensure_ascii=False))
-        return cleaned
+        cursor.execute("SELECT COUNT(*) FROM lore WHERE embedding_status = 'pending'")
+        return cursor.fetchone()[0]
 
-def get_entries_for_markdown_export() -> str:
-    """Get all entries formatted as Markdown text."""
+def get_embedding_status(title: str) -> Optional[str]:
+    """'ready', 'pending' or 'failed' for an entry, None if it does not exist."""
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute('SELECT template, fields, linked_entries FROM lore')
-        rows = cursor.fetchall()
-        
-        markdown_chunks = []
-        for row in rows:
-            template = row[0]
-            fields = json.loads(row[1]) if row[1] else {}
-            linked = json.loads(row[2]) if row[2] else []
-            
-            # Start with template type as heading
-            chunk = [f"# {template}\n"]
-            # Add name as regular text
-            chunk.append(f"{fields.get('Name', 'Untitled')}\n\n")
-            
-            # Add each field
-            for field, value in fields.items():
-                if field != "Name":  # Skip name since we used it already
-                    if isinstance(value, list):  # Handle tags
-                        value = ", ".join(value)
-                    chunk.append(f"### {field}\n{value}\n\n")
-            
-            # Add linked entries section if any exist
-            if linked:
-                chunk.append("### Linked Entries\n")
-                for link in linked:
-                    chunk.append(f"- {link}\n")
-                chunk.append("\n")
-            
-            chunk.append("---\n\n")  # Add separator between entries
-            markdown_chunks.append("".join(chunk))
-        
-        return "".join(markdown_chunks)
+        cursor.execute('SELECT COALESCE(embedding_status, \'ready\') FROM lore WHERE title = ?', (title,))
+        row = cursor.fetchone()
+        return row[0] if row else None
 
-def generate_field_content(
-    entry_title: str,
-    field_name: str,
-    template_type: str,
-    current_content: str,
-    user_prompt: Optional[str] = None,
-    tags: Optional[List[str]] = None,
-    generation_style: str = "Default"
-) -> str:
-    """Generate content for a specific field using GPT-4."""
-    # Check for dev mode
-    if get_setting("dev_mode") == "true":
-        return f"[DEV MODE] Sample generated content for {field_name} of {entry_title} using [{generation_style}] style.\nPrompt: {user_prompt or 'No prompt provided'}"
-    
+def _space_record(cursor: sqlite3.Cursor, role: str) -> Optional[Dict[str, Any]]:
+    space = get_space(cursor, role)
+    return {**space, **get_space_thresholds(cursor, role)} if space else None
+
+def get_embedding_migration() -> Dict[str, Any]:
+    """The active embedding space, the migration target (None when no
+    migration is running), each with its model, dimensions and similarity
+    thresholds, and how many embedded entries the shadow index covers so far."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        target = _space_record(cursor, 'target')
+        covered, total = shadow_coverage(cursor) if target else (0, 0)
+        return {
+            "active": _space_record(cursor, 'active'),
+            "target": target,
+            "covered": covered,
+            "total": total,
+            "progress": (covered / total if total else 1.0) if target else None
+        }
+
+def start_embedding_migration(
+    model: str = EMBEDDING_MIGRATION_MODEL,
+    dimensions: Optional[int] = EMBEDDING_MIGRATION_DIMENSIONS,
+    *,
+    min_score: float,
+    near_duplicate_cosine: float
+) -> Dict[str, Any]:
+    """Start re-embedding every entry into a new embedding space.
+
+    Vectors are built in shadow tables while retrieval keeps reading the
+    active ones. Cosine scores shift between models, so the retrieval
+    cutoff and near-duplicate cosine calibrated for the new space are
+    required and take effect at the cutover. Starting the migration that
+    is already running resumes it with the given thresholds; starting a
+    different one discards the shadow vectors built so far.
+    """
+    for name, value in (("min_score", min_score), ("near_duplicate_cosine", near_duplicate_cosine)):
+        if not -1.0 <= value <= 1.0:
+            raise ValueError(f"{name} must be a cosine similarity between -1 and 1")
+    target = {"model": model, "dimensions": dimensions}
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        if get_space(cursor, 'active') == target:
+            raise ValueError(f"{model} ({dimensions or 'native'} dimensions) is already the active embedding space")
+        if get_space(cursor, 'target') != target:
+            clear_shadow(cursor)
+            log_info(f"Started embedding migration to {model} ({dimensions or 'native'} dimensions)")
+        set_space(cursor, 'target', model, dimensions, min_score, near_duplicate_cosine)
+        conn.commit()
+    return get_embedding_migration()
+
+def cancel_embedding_migration() -> None:
+    """Stop a migration and drop its shadow vectors; the active space is untouched."""
+    with get_db_connection() as conn:
+        clear_shadow(conn.cursor())
+        conn.commit()
+    log_info("Cancelled embedding migration")
+
+def build_shadow_batch(batch_size: int = EMBEDDING_MIGRATION_BATCH_SIZE) -> int:
+    """Embed up to batch_size entries into the migration target space.
+
+    Entries edited since their shadow vectors were built are picked up
+    again. Returns the number of entries processed, 0 once the shadow
+    index covers every embedded entry.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        target = get_space(cursor, 'target')
+        if target is None:
+            raise ValueError("No embedding migration is running")
+        rows = stale_shadow_rows(cursor, batch_size)
+    if not rows:
+        return 0
+
+    entries = []
+    for lore_id, title, content, fields_json, version in rows:
+        entries.append({
+            "id": lore_id,
+            "version": version,
+            "content": content,
+            "chunks": _entry_chunks(title, json.loads(fields_json) if fields_json else {}, content)
+        })
+    vectors = embed_texts([text for entry in entries for text in [entry["content"]] + [c["embed_input"] for c in entry["chunks"]]], target)
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        if get_space(cursor, 'target') != target:
+            log_warning("Embedding migration target changed; discarding the batch")
+            return 0
+        position = 0
+        for entry in entries:
+            embedding = vectors[position]
+            chunks = [
+                (c["field"], c["chunk_index"], c["text"], vectors[position + 1 + i].tobytes())
+                for i, c in enumerate(entry["chunks"])
+            ]
+            position += 1 + len(entry["chunks"])
+            store_shadow_entry(cursor, entry["id"], entry["version"], embedding.tobytes(), chunks)
+        conn.commit()
+    return len(entries)
+
+def cut_over_embedding_space() -> bool:
+    """Switch retrieval to the migration target once the shadow index is complete.
+
+    Coverage is checked and the vectors swapped in one write transaction,
+    so readers see every old vector until it commits and every new one
+    after, never a mix, and the target's thresholds become the active
+    ones. Returns False, changing nothing, while embedded entries still
+    lack up-to-date shadow vectors.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            target = get_space(cursor, 'target')
+            if target is None:
+                raise ValueError("No embedding migration is running")
+            thresholds = get_space_thresholds(cursor, 'target')
+            if None in thresholds.values():
+                raise ValueError(
+                    "The migration target has no similarity thresholds; start the migration "
+                    "again with min_score and near_duplicate_cosine calibrated for it"
+                )
+            covered, total = shadow_coverage(cursor)
+            if covered < total:
+                conn.rollback()
+                return False
+            swapped = swap_in_shadow(cursor, target["model"])
+            set_space(cursor, 'active', target["model"], target["dimensions"], **thresholds)
+            clear_shadow(cursor)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    log_info(f"Cut over {swapped} entries to {target['model']} ({target['dimensions'] or 'native'} dimensions)")
+    return True
+
+def migrate_embeddings(
+    model: str = EMBEDDING_MIGRATION_MODEL,
+    dimensions: Optional[int] = EMBEDDING_MIGRATION_DIMENSIONS,
+    max_rounds: int = EMBEDDING_MIGRATION_MAX_ROUNDS,
+    *,
+    min_score: float,
+    near_duplicate_cosine: float
+) -> Dict[str, Any]:
+    """Build the shadow index for a new embedding space and cut over to it.
+
+    Shadow vectors already built are kept, so running it again after an
+    interruption resumes the migration. Entries edited while it runs are
+    re-embedded in catch-up rounds before the cutover. Stops quietly if
+    the migration is cancelled meanwhile. min_score and
+    near_duplicate_cosine are the thresholds calibrated for the new space.
+    """
+    start_embedding_migration(model, dimensions, min_score=min_score, near_duplicate_cosine=near_duplicate_cosine)
+    for _ in range(max_rounds):
+        try:
+            while build_shadow_batch():
+                pass
+            if cut_over_embedding_space():
+                return get_embedding_migration()
+        except ValueError:
+            if get_embedding_migration()["target"] is None:
+                log_info("Embedding migration was cancelled")
+                return get_embedding_migration()
+            raise
+    raise RuntimeError("Entries kept changing during the embedding migration; run it again to resume")
+
+def get_world_generation() -> int:
+    """Counter raised by every visible change to the entries; equal values
+    mean list reads would return the same data."""
+    with get_db_connection() as conn:
+        return current_generation(conn.cursor())
+
+def get_all_lore_from_db():
+    return list(iter_lore())
+
+def _lore_filter(
+    tags: Optional[List[str]] = None,
+    entry_type: Optional[str] = None,
+    query: Optional[str] = None,
+    after_id: Optional[int] = None
+) -> tuple[str, List[Any]]:
+    """WHERE clause and parameters for the entry filters shared by the list reads."""
+    clause = "WHERE 1=1"
+    params: List[Any] = []
+    if tags:
+        for tag in tags:
+            clause += " AND json_extract(tags, '$') LIKE ?"
+            params.append(f'%{tag}%')
+    if entry_type:
+        clause += " AND template = ?"
+        params.append(entry_type)
+    if query:
+        clause += " AND (title LIKE ? OR content LIKE ?)"
+        params.extend([f'%{query}%', f'%{query}%'])
+    if after_id is not None:
+        clause += " AND id > ?"
+        params.append(after_id)
+    return clause, params
+
+def _lore_from_row(r: tuple) -> Dict[str, Any]:
+    return {
+        "title": r[1],
+        "content": r[2],
+        "tags": json.loads(r[3]) if r[3] else [],
+        "template": r[4],
+        "fields": json.loads(r[5]) if r[5] else {},
+        "linked_entries": json.loads(r[6]) if r[6] else []
+    }
+
+def iter_lore(
+    tags: Optional[List[str]] = None,
+    entry_type: Optional[str] = None,
+    query: Optional[str] = None,
+    batch_size: int = LORE_STREAM_BATCH_SIZE
+) -> Iterator[Dict[str, Any]]:
+    """Yield matching entries in id order, batch_size rows at a time.
+
+    Rows come off an open cursor rather than a fetched list, so memory
+    stays flat however large the world is. The connection is held until
+    the iterator is exhausted or closed.
+    """
+    clause, params = _lore_filter(tags, entry_type, query)
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'SELECT id, title, content, tags, template, fields, linked_entries FROM lore {clause} ORDER BY id', params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield _lore_from_row(row)
+
+def get_lore_page(
+    tags: Optional[List[str]] = None,
+    entry_type: Optional[str] = None,
+    query: Optional[str] = None,
+    cursor: Optional[int] = None,
+    limit: int = LORE_PAGE_DEFAULT_LIMIT
+) -> Dict[str, Any]:
+    """One page of matching entries in id order.
+
+    cursor is the next_cursor of the previous page (None for the first).
+    Pages are keyed on the entry id, so entries added or deleted between
+    requests never shift later pages. next_cursor is None on the last page.
+    """
+    clause, params = _lore_filter(tags, entry_type, query, after_id=cursor)
+    with get_db_connection() as conn:
+        db_cursor = conn.cursor()
+        db_cursor.execute(
+            f'SELECT id, title, content, tags, template, fields, linked_entries FROM lore {clause} ORDER BY id LIMIT ?',
+            params + [limit + 1]
+        )
+        rows = db_cursor.fetchall()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "data": [_lore_from_row(row) for row in rows],
+        "next_cursor": rows[-1][0] if more else None
+    }
+
+_vector_stores: Dict[str, VectorStore] = {}
+
+def _vector_store() -> VectorStore:
+    """The memory-mapped vector store beside the current database."""
+    path = os.path.splitext(DB_PATH)[0] + ".vectors"
+    if path not in _vector_stores:
+        _vector_stores[path] = VectorStore(path)
+    return _vector_stores[path]
+
+def _scoring_rows(cursor: sqlite3.Cursor, model: str, dim: int) -> npt.NDArray:
+    """Unit vectors to score for a space: a zero-copy view of the shared
+    store, or a per-query copy from SQLite if the store is off or unusable."""
+    if VECTOR_STORE_ENABLED:
+        try:
+            return _vector_store().rows(cursor, model, dim)
+        except (OSError, ValueError) as e:
+            log_warning(f"Vector store unavailable, scoring from the database: {str(e)}")
+    return load_rows(cursor, model, dim)
+
+def get_vector_store_stats() -> Dict[str, Any]:
+    """Size, generation and tombstone count of the shared vector store file."""
+    return _vector_store().stats()
+
+def compact_vector_store() -> Dict[str, int]:
+    """Rebuild the shared vector store for the active space without tombstones."""
+    space = get_embedding_space()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT embedding_dim FROM lore WHERE embedding_status = 'ready' AND embedding_model = ? LIMIT 1",
+            (space["model"],)
+        )
+        row = cursor.fetchone()
+        dim = space.get("dimensions") or (row[0] if row else None)
+        if not dim:
+            return {"rows_before": 0, "rows_after": 0}
+        result = _vector_store().compact(cursor, space["model"], dim)
+    log_info(f"Compacted vector store from {result['rows_before']} to {result['rows_after']} rows")
+    return result
+
+@RETRIEVAL_SECONDS.time()
+def _score_lore(
+    prompt_embedding: npt.NDArray[np.float32],
+    top_k: int = 5,
+    min_score: Optional[float] = None,
+    model: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Score stored entries against an embedded prompt, best first.
+
+    Entries with field chunks score by their best-matching chunk (max-sim)
+    and report that field and snippet; others fall back to the whole-entry
+    vector; entries still waiting for an embedding are skipped. Only
+    vectors from model (the active one by default) with the prompt's size
+    are scored. Entries below min_score are dropped rather than padded in
+    to reach top_k. Each result carries score, id, version, title, template,
+    content, fields, field_scores, field and snippet.
+    """
+    model = model or get_embedding_space()["model"]
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        rows = _scoring_rows(cursor, model, len(prompt_embedding))
+        RETRIEVAL_VECTORS.inc(len(rows))
+        if not len(rows):
+            return []
+        norm = float(np.linalg.norm(prompt_embedding)) or 1.0
+        scores = rows["vector"] @ (prompt_embedding.astype(np.float32) / norm)
+        lore_ids = np.asarray(rows["lore_id"])
+        chunk_ids = np.asarray(rows["chunk_id"])
+        is_chunk = (lore_ids >= 0) & (chunk_ids >= 0)
+        # Whole-entry vectors only count for entries without chunks in this space
+        scored = is_chunk | ((lore_ids >= 0) & (chunk_ids < 0) & ~np.isin(lore_ids, lore_ids[is_chunk]))
+        candidates = np.nonzero(scored)[0]
+        if min_score is not None:
+            candidates = candidates[scores[candidates] >= min_score]
+        order = candidates[np.argsort(-scores[candidates], kind="stable")]
+        _, first = np.unique(lore_ids[order], return_index=True)
+        best_rows = order[np.sort(first)][:top_k]
+        if not len(best_rows):
+            return []
+
+        ids = [int(lore_id) for lore_id in lore_ids[best_rows]]
+        placeholders = ",".join("?" * len(ids))
+        cursor.execute(
+            f'SELECT id, version, title, template, content, fields FROM lore WHERE id IN ({placeholders})',
+            ids
+        )
+        entries = {row[0]: row for row in cursor.fetchall()}
+        cursor.execute(
+            f'SELECT id, lore_id, field, text FROM lore_chunks WHERE lore_id IN ({placeholders}) AND embedding_model = ?',
+            ids + [model]
+        )
+        chunk_text = {row[0]: row[1:] for row in cursor.fetchall()}
+
+    chunk_scores = {}
+    for row in np.nonzero(is_chunk & np.isin(lore_ids, ids))[0]:
+        chunk_scores[int(chunk_ids[row])] = float(scores[row])
+    field_scores: Dict[int, Dict[Optional[str], float]] = {}
+    for chunk_id, (lore_id, field, _) in chunk_text.items():
+        if chunk_id in chunk_scores:
+            per_field = field_scores.setdefault(lore_id, {})
+            per_field[field] = max(chunk_scores[chunk_id], per_field.get(field, -1.0))
+
+    top = []
+    for row in best_rows:
+        lore_id, chunk_id = int(lore_ids[row]), int(chunk_ids[row])
+        # Entries deleted since the store was synced drop out; a chunk
+        # rewritten meanwhile only loses its snippet
+        if lore_id not in entries:
+            continue
+        _, field, text = chunk_text.get(chunk_id, (None, None, None))
+        top.append((lore_id, (float(scores[row]), field, text)))
+
+    results = []
+    for lore_id, (score, field, snippet) in top:
+        _, version, title, template, content, fields_json = entries[lore_id]
+        results.append({
+            "score": score,
+            "id": lore_id,
+            "version": version or 1,
+            "title": title,
+            "template": template,
+            "content": content,
+            "fields": json.loads(fields_json) if fields_json else {},
+            "field_scores": field_scores.get(lore_id, {}),
+            "field": field,
+            "snippet": snippet if snippet is not None else content
+        })
+    return results
+
+def _rank_lore(
+    prompt: str,
+    top_k: int = 5,
+    min_score: Union[float, str, None] = SPACE_MIN_SCORE,
+    cache_query: bool = False
+) -> List[Dict[str, Any]]:
+    """Score stored lore against a prompt. With cache_query set the prompt's
+    embedding is read from and saved to the query embedding cache."""
+    space = get_embedding_space()
+    prompt_embedding = _cached_query_embedding(prompt, space) if cache_query else None
+    if prompt_embedding is None:
+        prompt_embedding = embed_text(prompt, space)
+        if cache_query:
+            _store_query_embedding(prompt, space, prompt_embedding)
+    return _score_lore(prompt_embedding, top_k, _resolve_min_score(min_score), space["model"])
+
+def get_relevant_lore(prompt: str, top_k: int = 5, min_score: Optional[float] = None) -> List[str]:
+    return [entry["content"] for entry in _rank_lore(prompt, top_k, min_score)]
+
+def _search_results(ranked: List[Dict[str, Any]], max_chars: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Trim ranked entries to the public search result shape and apply a
+    cap on the total snippet characters."""
+    results = []
+    remaining = max_chars
+    for entry in ranked:
+        snippet = entry["snippet"]
+        if remaining is not None:
+            if remaining <= 0:
+                break
+            snippet = snippet[:remaining]
+            remaining -= len(snippet)
+        results.append({
+            "id": entry["id"],
+            "title": entry["title"],
+            "template": entry["template"],
+            "score": round(entry["score"], 4),
+            "field": entry["field"],
+            "snippet": snippet
+        })
+    return results
+
+def search_lore(
+    prompt: str,
+    top_k: int = 5,
+    min_score: Union[float, str, None] = SPACE_MIN_SCORE,
+    max_chars: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Find the lore most relevant to a prompt.
+
+    Returns dicts with id, title, template, score, the matched field (None
+    for whole-entry matches) and the matched snippet. Entries scoring
+    below min_score (by default the active embedding space's cutoff) are
+    left out, and max_chars caps the total snippet length across results.
+    """
+    return _search_results(_rank_lore(prompt, top_k, min_score), max_chars)
+
+def fields_to_content(fields: Dict[str, Any]) -> str:
+    """Flatten template fields into the content text that is embedded.
+
+    Tags and empty fields are left out, so retagging an entry or saving a
+    blank field does not change its text. New entries and edits both build
+    their content here, so an unchanged entry never looks edited.
+    """
+    return "\n".join(f"{k}: {v}" for k, v in fields.items() if k != "Tags" and v and str(v).strip())
+
+def _stored_chunk_texts(cursor: sqlite3.Cursor, lore_id: int) -> Dict[Optional[str], List[str]]:
+    cursor.execute('SELECT field, text FROM lore_chunks WHERE lore_id = ? ORDER BY field, chunk_index', (lore_id,))
+    stored: Dict[Optional[str], List[str]] = {}
+    for field, text in cursor.fetchall():
+        stored.setdefault(field, []).append(text)
+    return stored
+
+def _dirty_chunks(
+    stored: Dict[Optional[str], List[str]],
+    chunks: List[Dict[str, Any]],
+    title_changed: bool
+) -> tuple[List[Dict[str, Any]], List[Optional[str]]]:
+    """Pick the chunks whose embedding input changed.
+
+    Chunk inputs carry the title, so a rename dirties every field.
+    Returns the chunks to embed and the fields whose stored chunks they
+    replace, including fields that no longer have any text.
+    """
+    new_texts: Dict[Optional[str], List[str]] = {}
+    for chunk in chunks:
+        new_texts.setdefault(chunk["field"], []).append(chunk["text"])
+    dirty_fields = [
+        field for field, texts in new_texts.items()
+        if title_changed or stored.get(field) != texts
+    ]
+    dirty_fields += [field for field in stored if field not in new_texts]
+    return [c for c in chunks if c["field"] in dirty_fields], dirty_fields
+
+def _rename_links(cursor: sqlite3.Cursor, old_title: str, new_title: str) -> None:
+    """Point links to a renamed entry at its new title."""
+    cursor.execute('SELECT id, linked_entries FROM lore WHERE linked_entries LIKE ?', (f'%{json.dumps(old_title)[1:-1]}%',))
+    for lore_id, links_json in cursor.fetchall():
+        links = json.loads(links_json) if links_json else []
+        if old_title in links:
+            renamed = [new_title if link == old_title else link for link in links]
+            cursor.execute('UPDATE lore SET linked_entries = ? WHERE id = ?', (json.dumps(renamed), lore_id))
+
+class EntryConflictError(RuntimeError):
+    """Raised when an entry kept changing under an update until
+    ENTRY_UPDATE_ATTEMPTS ran out."""
+
+
+def _prepare_entry_update(
+    original_title: str,
+    build_changes: Callable[[Dict[str, Any]], Dict[str, Any]]
+) -> Optional[Dict[str, Any]]:
+    """Read an entry and plan an update to it, writing only what changed.
+
+    build_changes maps the stored title, content, tags, template and
+    fields to new values, so a patch is merged into the same read the
+    write is later checked against. The entry vector is re-embedded only
+    when the content changed and chunk vectors only for fields whose text
+    changed (entries still pending embedding are left to the background
+    embedder); links are recomputed only when field text changed. Returns
+    the plan, whose "inputs" still need embedding, or None if no entry has
+    original_title.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            'SELECT id, title, content, tags, template, fields, embedding_status, COALESCE(version, 1) FROM lore WHERE title = ?',
+            (original_title,)
+        )
+        row = cursor.fetchone()
+        if not row:
+            log_warning(f"No lore entry titled '{original_title}' to update")
+            return None
+        lore_id = row[0]
+        # The background embedder will embed the edited text of a pending entry
+        pending = row[6] == "pending"
+        stored = {
+            "title": row[1],
+            "content": row[2],
+            "tags": json.loads(row[3]) if row[3] else [],
+            "template": row[4],
+            "fields": json.loads(row[5]) if row[5] else {}
+        }
+        stored_chunks = _stored_chunk_texts(cursor, lore_id)
+        cursor.execute('SELECT title FROM lore WHERE id != ?', (lore_id,))
+        other_titles = [r[0] for r in cursor.fetchall()]
+
+    changes = build_changes(stored)
+    dirty = {column: value for column, value in changes.items() if column in stored and value != stored[column]}
+    plan = {
+        "lore_id": lore_id,
+        "original_title": original_title,
+        # Retagging keeps the version, so the write also checks the raw
+        # tags and fields it read, and the status the background embedder sets
+        "read": {"version": row[7], "tags": row[3], "fields": row[5], "embedding_status": row[6]},
+        "dirty": dirty,
+        "inputs": []
+    }
+    if not dirty:
+        return plan
+
+    new = {**stored, **dirty}
+    title_changed = "title" in dirty
+    content_changed = "content" in dirty
+    text_fields_changed = "fields" in dirty and (
+        {k: v for k, v in new["fields"].items() if k != "Tags"}
+        != {k: v for k, v in stored["fields"].items() if k != "Tags"}
+    )
+
+    # Entries never chunked are left to backfill_chunk_embeddings unless their text changed
+    embed_content = content_changed and not pending
+    chunks, chunk_fields = [], []
+    if not pending and (stored_chunks or content_changed or text_fields_changed or title_changed):
+        chunks, chunk_fields = _dirty_chunks(
+            stored_chunks, _entry_chunks(new["title"], new["fields"], new["content"]), title_changed
+        )
+    plan.update({
+        "new": new,
+        "title_changed": title_changed,
+        "content_changed": content_changed,
+        "text_fields_changed": text_fields_changed,
+        "embed_content": embed_content,
+        "chunks": chunks,
+        "chunk_fields": chunk_fields,
+        "had_chunks": bool(stored_chunks),
+        "other_titles": other_titles,
+        "inputs": ([new["content"]] if embed_content else []) + [c["embed_input"] for c in chunks],
+        "space": get_embedding_space()
+    })
+    return plan
+
+def _write_entry_update(plan: Dict[str, Any], vectors: List[npt.NDArray[np.float32]]) -> Optional[Dict[str, Any]]:
+    """Write a planned update with the vectors of its inputs, in one transaction.
+
+    The UPDATE only matches the row as _prepare_entry_update read it;
+    returns None without writing if the entry changed since.
+    """
+    dirty = plan["dirty"]
+    if not dirty:
+        log_info(f"No changes to lore entry: {plan['original_title']}")
+        return {"changed": [], "embedded_entry": False, "embedded_chunks": 0}
+    new = plan["new"]
+    space = plan["space"]
+    chunks = plan["chunks"]
+    chunk_fields = plan["chunk_fields"]
+    embed_content = plan["embed_content"]
+    for chunk, vector in zip(chunks, vectors[1:] if embed_content else vectors):
+        chunk["embedding"] = vector
+
+    columns = {}
+    if plan["title_changed"]:
+        columns["title"] = new["title"]
+    if plan["content_changed"]:
+        columns["content"] = new["content"]
+    if embed_content:
+        columns["embedding"] = vectors[0].tobytes()
+        columns["embedding_model"] = space["model"]
+        columns["embedding_dim"] = len(vectors[0])
+        columns["embedding_status"] = "ready"
+    if "tags" in dirty:
+        columns["tags"] = json.dumps(new["tags"])
+    if "template" in dirty:
+        columns["template"] = new["template"]
+    if "fields" in dirty:
+        columns["fields"] = json.dumps(new["fields"])
+    if plan["text_fields_changed"]:
+        columns["linked_entries"] = json.dumps(compute_linked_entries(new["fields"], plan["other_titles"]))
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        stale_space = bool(plan["inputs"]) and not _space_is_active(cursor, space)
+        if stale_space:
+            # Cut over while embedding: drop the vectors and let the background embedder redo them
+            for column in ("embedding", "embedding_model", "embedding_dim"):
+                columns.pop(column, None)
+            columns["embedding_status"] = "pending"
+            chunk_fields = []
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        # Tags are not part of any prompt context, so retagging keeps the version
+        if set(dirty) - {"tags", "fields"} or plan["text_fields_changed"]:
+            assignments += ", version = COALESCE(version, 1) + 1"
+        read = plan["read"]
+        cursor.execute(
+            f'''UPDATE lore SET {assignments}
+                WHERE id = ? AND COALESCE(version, 1) = ? AND tags IS ? AND fields IS ? AND embedding_status IS ?''',
+            list(columns.values()) + [plan["lore_id"], read["version"], read["tags"], read["fields"], read["embedding_status"]]
+        )
+        if cursor.rowcount == 0:
+            conn.rollback()
+            return None
+        lore_id = plan["lore_id"]
+        if plan["content_changed"]:
+            _index_near_duplicates(cursor, lore_id, minhash_signature(new["content"]))
+        if stale_space:
+            cursor.execute('DELETE FROM lore_chunks WHERE lore_id = ?', (lore_id,))
+        if chunk_fields:
+            _write_chunks(cursor, lore_id, chunks, space["model"], fields=chunk_fields if plan["had_chunks"] else None)
+        if plan["title_changed"]:
+            _rename_links(cursor, plan["original_title"], new["title"])
+        conn.commit()
+    return {
+        "changed": sorted(columns),
+        "embedded_entry": embed_content and not stale_space,
+        "embedded_chunks": 0 if stale_space else len(chunks)
+    }
+
+def _update_entry(
+    original_title: str,
+    build_changes: Callable[[Dict[str, Any]], Dict[str, Any]]
+) -> Optional[Dict[str, Any]]:
+    """Read, embed and conditionally write an entry update (see
+    _prepare_entry_update), reading again if the entry changed in between.
+
+    Returns what was done, or None if no entry has original_title.
+    Raises EntryConflictError once ENTRY_UPDATE_ATTEMPTS are used up.
+    """
+    for _ in range(ENTRY_UPDATE_ATTEMPTS):
+        plan = _prepare_entry_update(original_title, build_changes)
+        if plan is None:
+            return None
+        vectors = embed_texts(plan["inputs"], plan["space"]) if plan["inputs"] else []
+        result = _write_entry_update(plan, vectors)
+        if result is not None:
+            return result
+        log_warning(f"Lore entry '{original_title}' changed while it was being updated; reading it again")
+    raise EntryConflictError(f"Lore entry '{original_title}' kept changing; the update was not saved")
+
+def update_lore_entry(original_title: str, new_title: str, new_content: str, new_tags: List[str], new_template: Optional[str] = None, new_fields: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    log_info(f"Updating lore entry: {original_title} -> {new_title}")
+    try:
+        result = _update_entry(original_title, lambda stored: {
+            "title": new_title,
+            "content": new_content,
+            "tags": new_tags,
+            "template": new_template,
+            "fields": new_fields or {}
+        })
+        if result and result["changed"]:
+            log_info(f"Successfully updated lore entry: {new_title} ({', '.join(result['changed'])})")
+        return result
+    except Exception as e:
+        log_error(f"Failed to update lore entry: {original_title} - {str(e)}")
+        raise
+
+def _patch_changes(
+    new_title: Optional[str] = None,
+    content: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    template: Optional[str] = None,
+    fields: Optional[Dict[str, Any]] = None
+) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """The build_changes of a patch_lore_entry call (see _prepare_entry_update)."""
+    def build(stored: Dict[str, Any]) -> Dict[str, Any]:
+        changes: Dict[str, Any] = {}
+        if fields is not None:
+            changes["fields"] = {**stored["fields"], **fields}
+            if content is None:
+                # Like new entries, an entry with no field text falls back to its title
+                changes["content"] = fields_to_content(changes["fields"]) or new_title or stored["title"]
+            if tags is None and isinstance(fields.get("Tags"), list):
+                changes["tags"] = fields["Tags"]
+        for column, value in (("title", new_title), ("content", content), ("tags", tags), ("template", template)):
+            if value is not None:
+                changes[column] = value
+        return changes
+    return build
+
+def patch_lore_entry(
+    title: str,
+    new_title: Optional[str] = None,
+    content: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    template: Optional[str] = None,
+    fields: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
+    """Partially update an entry; arguments left as None keep their stored value.
+
+    fields are merged into the stored fields, and unless content is given
+    it is rebuilt from the merged fields; a Tags field also becomes the
+    entry's tags unless tags is given. Concurrent edits to the same entry
+    are not lost: the merge is redone on a fresh read if the entry changed
+    before the write. Returns the changed columns and what was
+    re-embedded, or None if no entry has the title.
+    """
+    log_info(f"Patching lore entry: {title}")
+    try:
+        return _update_entry(title, _patch_changes(new_title, content, tags, template, fields))
+    except Exception as e:
+        log_error(f"Failed to patch lore entry: {title} - {str(e)}")
+        raise
+
+FIELD_CONTEXT_TOP_K = 3
+LORE_SYSTEM_PROMPT = "You are a narrative assistant for a game studio, helping write dialogue or story events based on lore."
+
+def _chat_completion(system_prompt: str, user_prompt: str, stream: bool = False):
+    """Send a system/user prompt pair to the shared generation model.
+
+    Streams are retried only while opening; once tokens flow, a failure is
+    raised to the reader. A stream is returned as an iterator of its chunks
+    that records time to first token and total time for /metrics.
+    """
+    started = time.perf_counter()
+    response = call_with_resilience("chat_stream" if stream else "chat", lambda timeout: client.chat.completions.create(
+        model=GENERATION_MODEL,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ],
+        temperature=GENERATION_TEMPERATURE,
+        max_tokens=GENERATION_MAX_TOKENS,
+        stream=stream,
+        timeout=timeout
+    ))
+    if stream:
+        return timed_stream(response, started)
+    CHAT_SECONDS.observe(time.perf_counter() - started, mode="complete")
+    record_chat_usage(response)
+    return response
+
+def _generation_cache_enabled(use_cache: Optional[bool]) -> bool:
+    """Caching is opt-in: use_cache wins when given, otherwise the
+    "generation_cache" setting decides."""
+    return use_cache if use_cache is not None else get_setting("generation_cache") == "true"
+
+def _generation_cache_key(
+    request: Dict[str, Any],
+    ranked: Optional[List[Dict[str, Any]]],
+    use_cache: Optional[bool]
+) -> Optional[str]:
+    """Return the cache key for a generation, or None if caching is off.
+
+    The key comes from the request inputs, the ids and versions of the
+    retrieved lore in ranked and the embedding space, so editing an entry
+    the prompt does not use leaves the cached generations valid. Retrieval
+    runs before the lookup; with caching on its query embedding is cached
+    too, so a hit still costs no OpenAI call.
+    """
+    if not _generation_cache_enabled(use_cache):
+        return None
+    context = [[entry["id"], entry["version"]] for entry in ranked or []]
+    return make_cache_key(
+        GENERATION_MODEL, GENERATION_TEMPERATURE, GENERATION_MAX_TOKENS,
+        request, context, get_embedding_space()
+    )
+
+def _field_cache_key(
+    entry_title: str,
+    field_name: str,
+    template_type: str,
+    current_content: str,
+    user_prompt: Optional[str],
+    tags: Optional[List[str]],
+    generation_style: str,
+    world_summary: str,
+    ranked: List[Dict[str, Any]],
+    use_cache: Optional[bool]
+) -> Optional[str]:
+    """Cache key of a field generation; see _generation_cache_key."""
+    return _generation_cache_key({
+        "kind": "field",
+        "title": entry_title,
+        "field": field_name,
+        "template": template_type,
+        "current_content": current_content,
+        "user_prompt": user_prompt,
+        "tags": tags or [],
+        "style": generation_style,
+        "world_summary": world_summary
+    }, ranked, use_cache)
+
+def _lore_cache_key(
+    prompt: str,
+    lore_entries: Optional[List[str]],
+    ranked: Optional[List[Dict[str, Any]]],
+    use_cache: Optional[bool]
+) -> Optional[str]:
+    """Cache key of a lore-to-text generation; see _generation_cache_key."""
+    return _generation_cache_key({"kind": "lore", "prompt": prompt, "lore_entries": lore_entries}, ranked, use_cache)
+
+def _cached_query_embedding(text: str, space: Dict[str, Any]) -> Optional[npt.NDArray[np.float32]]:
+    with get_db_connection() as conn:
+        embedding = query_embedding_lookup(conn.cursor(), make_query_key(text, space))
+        conn.commit()
+    return embedding
+
+def _store_query_embedding(text: str, space: Dict[str, Any], embedding: npt.NDArray[np.float32]) -> None:
+    with get_db_connection() as conn:
+        query_embedding_store(conn.cursor(), make_query_key(text, space), embedding)
+        conn.commit()
+
+def _get_cached_generation(cache_key: Optional[str], regenerate: bool) -> Optional[str]:
+    if cache_key is None or regenerate:
+        return None
+    with get_db_connection() as conn:
+        cached = cache_lookup(conn.cursor(), cache_key)
+        conn.commit()
+    if cached is not None:
+        log_info("Serving generation from cache")
+    return cached
+
+def _store_generation(cache_key: Optional[str], response: str) -> None:
+    if cache_key is None or not response:
+        return
+    with get_db_connection() as conn:
+        cache_store(conn.cursor(), cache_key, response)
+        conn.commit()
+
+def clear_generation_cache() -> None:
+    """Delete every cached generation."""
+    with get_db_connection() as conn:
+        clear_cache(conn.cursor())
+        conn.commit()
+
+WORLD_SUMMARY_SYSTEM_PROMPT = "You maintain a compact overview of a game world's lore for its writers. Keep names, relationships and facts exact and leave out flourishes."
+
+def _summary_scopes(cursor: sqlite3.Cursor) -> List[Dict[str, Any]]:
+    """Current summary scopes: one per template in use and one per common
+    tag, each with its entries keyed by id."""
+    cursor.execute('SELECT id, title, content, tags, template, COALESCE(version, 1) FROM lore')
+    by_template: Dict[str, Dict[str, Any]] = {}
+    by_tag: Dict[str, Dict[str, Any]] = {}
+    for lore_id, title, content, tags_json, template, version in cursor.fetchall():
+        entry = {"version": version, "title": title, "content": content}
+        if template:
+            by_template.setdefault(template, {})[str(lore_id)] = entry
+        for tag in json.loads(tags_json) if tags_json else []:
+            by_tag.setdefault(tag, {})[str(lore_id)] = entry
+
+    scopes = [
+        {"scope": f"template:{template}", "kind": "template", "label": template, "entries": entries}
+        for template, entries in sorted(by_template.items())
+    ]
+    clusters = sorted(
+        (item for item in by_tag.items() if len(item[1]) >= WORLD_SUMMARY_MIN_CLUSTER_SIZE),
+        key=lambda item: (-len(item[1]), item[0])
+    )[:WORLD_SUMMARY_MAX_TAG_CLUSTERS]
+    scopes += [
+        {"scope": f"tag:{tag}", "kind": "tag", "label": tag, "entries": entries}
+        for tag, entries in clusters
+    ]
+    return scopes
+
+def _scope_heading(kind: str, label: str) -> str:
+    return f"{label} entries" if kind == "template" else f"lore tagged '{label}'"
+
+def _summarize_entries(
+    heading: str,
+    previous: Optional[str],
+    entries: List[Dict[str, Any]],
+    removed_titles: List[str]
+) -> str:
+    """Fold entries into a summary, WORLD_SUMMARY_INPUT_TOKENS of excerpts
+    per request, starting from the previous summary when there is one."""
+    batches = [[]]
+    used = 0
+    for entry in entries:
+        excerpt = f"- {entry['title']}: {truncate_to_tokens(' '.join(entry['content'].split()), WORLD_SUMMARY_ENTRY_TOKENS)}"
+        cost = count_tokens(excerpt)
+        if batches[-1] and used + cost > WORLD_SUMMARY_INPUT_TOKENS:
+            batches.append([])
+            used = 0
+        batches[-1].append(excerpt)
+        used += cost
+
+    summary = previous
+    max_words = int(WORLD_SUMMARY_TOKEN_BUDGET * 0.75)
+    for index, batch in enumerate(batches):
+        if summary:
+            parts = [f"Current overview of {heading}:\n{summary}"]
+            if batch:
+                parts.append("Update the overview with these new or changed entries:\n" + "\n".join(batch))
+        else:
+            parts = [f"Write an overview of {heading} from these entries:\n" + "\n".join(batch)]
+        if index == 0 and removed_titles:
+            parts.append("These entries no longer belong here; drop them from the overview: " + ", ".join(removed_titles))
+        parts.append(f"Reply with only the overview, under {max_words} words.")
+        user_prompt = "\n\n".join(parts)
+        response = _chat_completion(WORLD_SUMMARY_SYSTEM_PROMPT, user_prompt)
+        summary = response.choices[0].message.content.strip()
+        log_openai_interaction(
+            entry_title="World summary",
+            field_name=heading,
+            system_prompt=WORLD_SUMMARY_SYSTEM_PROMPT,
+            user_prompt=user_prompt,
+            response=summary
+        )
+    return summary
+
+def refresh_world_summaries(force: bool = False) -> Dict[str, int]:
+    """Bring the per-template and per-tag world summaries up to date.
+
+    A summary is rewritten only once enough of its entries have changed
+    (see world_summaries.refresh_threshold), and the rewrite folds just the
+    changed and removed entries into the previous text. force rebuilds
+    every summary from scratch. Returns counts of refreshed, skipped and
+    removed summaries.
+    """
+    dev_mode = get_setting("dev_mode") == "true"
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        scopes = _summary_scopes(cursor)
+        existing = {summary["scope"]: summary for summary in list_summaries(cursor)}
+
+    refreshed = 0
+    skipped = 0
+    for scope in scopes:
+        current = {
+            entry_id: {"version": entry["version"], "title": entry["title"]}
+            for entry_id, entry in scope["entries"].items()
+        }
+        stored = None if force else existing.get(scope["scope"])
+        if stored:
+            changed, removed = diff_entries(stored["entry_versions"], current)
+            if len(changed) + len(removed) < refresh_threshold(len(current)):
+                skipped += 1
+                continue
+            previous = stored["summary"]
+            removed_titles = [stored["entry_versions"][entry_id]["title"] for entry_id in removed]
+        else:
+            changed, previous, removed_titles = list(current), None, []
+
+        heading = _scope_heading(scope["kind"], scope["label"])
+        if dev_mode:
+            summary = f"[DEV MODE] Overview of {heading} covering {len(current)} entries."
+        else:
+            summary = _summarize_entries(heading, previous, [scope["entries"][entry_id] for entry_id in changed], removed_titles)
+        with get_db_connection() as conn:
+            store_summary(conn.cursor(), scope["scope"], scope["kind"], scope["label"], summary, current)
+            conn.commit()
+        refreshed += 1
+
+    with get_db_connection() as conn:
+        removed_count = delete_summaries_except(conn.cursor(), [scope["scope"] for scope in scopes])
+        conn.commit()
+    log_info(f"World summaries: {refreshed} refreshed, {skipped} up to date, {removed_count} removed")
+    return {"refreshed": refreshed, "skipped": skipped, "removed": removed_count}
+
+def get_world_summaries() -> List[Dict[str, Any]]:
+    """Stored world summaries with the number of their entries changed since
+    each was written."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        scopes = {scope["scope"]: scope for scope in _summary_scopes(cursor)}
+        summaries = list_summaries(cursor)
+    results = []
+    for summary in summaries:
+        entries = scopes.get(summary["scope"], {"entries": {}})["entries"]
+        current = {entry_id: {"version": entry["version"]} for entry_id, entry in entries.items()}
+        changed, removed = diff_entries(summary["entry_versions"], current)
+        results.append({
+            "scope": summary["scope"],
+            "kind": summary["kind"],
+            "label": summary["label"],
+            "summary": summary["summary"],
+            "entries": len(summary["entry_versions"]),
+            "pending_changes": len(changed) + len(removed),
+            "updated_at": summary["updated_at"]
+        })
+    return results
+
+def _world_summary_context(
+    template_type: Optional[str],
+    tags: Optional[List[str]],
+    use_world_summary: Optional[bool] = None
+) -> str:
+    """Stored summaries for an entry's template and tags, within
+    WORLD_SUMMARY_TOKEN_BUDGET, or "" when summaries are off.
+
+    Off by default: use_world_summary wins when given, otherwise the
+    "world_summaries" setting decides.
+    """
+    enabled = use_world_summary if use_world_summary is not None else get_setting("world_summaries") == "true"
+    if not enabled:
+        return ""
+    scopes = ([f"template:{template_type}"] if template_type else []) + [f"tag:{tag}" for tag in tags or []]
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        summaries = [summary for summary in (get_summary(cursor, scope) for scope in scopes) if summary]
+
+    parts = []
+    remaining = WORLD_SUMMARY_TOKEN_BUDGET
+    for summary in summaries:
+        text = truncate_to_tokens(f"{_scope_heading(summary['kind'], summary['label'])}: {summary['summary']}", remaining)
+        if not text:
+            break
+        parts.append(text)
+        remaining -= count_tokens(text)
+        if remaining < MIN_SNIPPET_TOKENS:
+            break
+    return "\n".join(parts)
+
+def _build_lore_prompt(
+    prompt: str,
+    lore_entries: Optional[List[str]] = None,
+    ranked: Optional[List[Dict[str, Any]]] = None
+) -> str:
+    """Assemble the user prompt for free-form generation from lore.
+
+    Retrieved (or explicitly given) lore is packed into
+    LORE_CONTEXT_TOKEN_BUDGET.
+    """
+    if lore_entries is not None:
+        # Caller-supplied lore keeps its order as the ranking
+        ranked = [{
+            "score": -position,
+            "id": None,
+            "version": None,
+            "title": None,
+            "template": None,
+            "content": text,
+            "fields": {}
+        } for position, text in enumerate(lore_entries)]
+    elif ranked is None:
+        ranked = _rank_lore(prompt)
+    lore_context, _ = assemble_context(ranked, LORE_CONTEXT_TOKEN_BUDGET, query=prompt)
+    return f"Using the following lore context, write a response to: {prompt}\n\nLore:\n{lore_context}\n\nResponse:"
+
+def _iter_completion_tokens(stream) -> Iterator[str]:
+    """Yield the text deltas of a streamed chat completion."""
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+def generate_text_from_lore(
+    prompt: str,
+    lore_entries: Optional[List[str]] = None,
+    use_cache: Optional[bool] = None,
+    regenerate: bool = False
+) -> str:
+    log_info("Generating text from lore prompt")
+    try:
+        caching = _generation_cache_enabled(use_cache)
+        ranked = _rank_lore(prompt, cache_query=caching) if lore_entries is None else None
+        cache_key = _lore_cache_key(prompt, lore_entries, ranked, caching)
+        cached = _get_cached_generation(cache_key, regenerate)
+        if cached is not None:
+            return cached
+        final_prompt = _build_lore_prompt(prompt, lore_entries, ranked=ranked)
+
+        response = _chat_completion(LORE_SYSTEM_PROMPT, final_prompt)
+        content = response.choices[0].message.content
+        _store_generation(cache_key, content)
+        log_info("Successfully generated text from lore")
+        return content
+    except Exception as e:
+        log_error(f"Failed to generate text from lore: {str(e)}")
+        raise
+
+def stream_text_from_lore(
+    prompt: str,
+    lore_entries: Optional[List[str]] = None,
+    use_cache: Optional[bool] = None,
+    regenerate: bool = False
+) -> Iterator[str]:
+    """Streaming variant of generate_text_from_lore that yields tokens as they arrive."""
+    log_info("Streaming text from lore prompt")
+    try:
+        caching = _generation_cache_enabled(use_cache)
+        ranked = _rank_lore(prompt, cache_query=caching) if lore_entries is None else None
+        cache_key = _lore_cache_key(prompt, lore_entries, ranked, caching)
+        cached = _get_cached_generation(cache_key, regenerate)
+        if cached is not None:
+            yield cached
+            return
+        final_prompt = _build_lore_prompt(prompt, lore_entries, ranked=ranked)
+
+        stream = _chat_completion(LORE_SYSTEM_PROMPT, final_prompt, stream=True)
+        parts = []
+        for token in _iter_completion_tokens(stream):
+            parts.append(token)
+            yield token
+        content = "".join(parts).strip()
+        _store_generation(cache_key, content)
+        log_openai_interaction(
+            entry_title="Lore prompt",
+            field_name="Response",
+            system_prompt=LORE_SYSTEM_PROMPT,
+            user_prompt=final_prompt,
+            response=content
+        )
+        log_info("Successfully streamed text from lore")
+    except Exception as e:
+        log_error(f"Failed to stream text from lore: {str(e)}")
+        raise
+
+def delete_lore_entry_by_title(title: str) -> None:
+    log_info(f"Deleting lore entry: {title}")
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM lore WHERE title = ?', (title,))
+        _prune_entry_indexes(cursor)
+        conn.commit()
+        conn.close()
+        log_info(f"Successfully deleted lore entry: {title}")
+    except Exception as e:
+        log_error(f"Failed to delete lore entry: {title} - {str(e)}")
+        raise
+
+def delete_settings() -> None:
+    """Delete all settings from the database."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM settings')
+        conn.commit()
+
+def delete_all_entries() -> None:
+    """Delete all entries from the lore database."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM lore')
+        cursor.execute('DELETE FROM lore_lsh')
+        cursor.execute('DELETE FROM lore_chunks')
+        cursor.execute('DELETE FROM lore_shadow')
+        cursor.execute('DELETE FROM lore_chunks_shadow')
+        conn.commit()
+
+def get_setting(key: str, default: Optional[str] = None) -> Optional[str]:
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute('SELECT value FROM settings WHERE key = ?', (key,))
+    row = cursor.fetchone()
+    conn.close()
+    return row[0] if row else default
+
+def set_setting(key: str, value: str) -> None:
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO settings (key, value)
+        VALUES (?, ?)
+        ON CONFLICT(key) DO UPDATE SET value=excluded.value
+    ''', (key, value))
+    conn.commit()
+    conn.close()
+
+def get_filtered_lore(
+    tags: Optional[List[str]] = None,
+    entry_type: Optional[str] = None,
+    query: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    return list(iter_lore(tags, entry_type, query))
+
+def iter_export_entries(
+    limit: Optional[int] = None,
+    batch_size: int = LORE_STREAM_BATCH_SIZE
+) -> Iterator[Dict[str, Any]]:
+    """Yield entries in the export shape ({template, fields, linked_entries})
+    in id order, straight off an open cursor.
+
+    The connection is held until the iterator is exhausted or closed.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        if limit is None:
+            cursor.execute('SELECT template, fields, linked_entries FROM lore ORDER BY id')
+        else:
+            cursor.execute('SELECT template, fields, linked_entries FROM lore ORDER BY id LIMIT ?', (limit,))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield export_entry(*row)
+
+def get_export_page(cursor: Optional[int] = None, limit: int = LORE_STREAM_BATCH_SIZE) -> Dict[str, Any]:
+    """One page of entries in the export shape, keyed on id like get_lore_page."""
+    with get_db_connection() as conn:
+        db_cursor = conn.cursor()
+        db_cursor.execute(
+            'SELECT id, template, fields, linked_entries FROM lore WHERE id > ? ORDER BY id LIMIT ?',
+            (cursor or 0, limit + 1)
+        )
+        rows = db_cursor.fetchall()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "data": [export_entry(*row[1:]) for row in rows],
+        "next_cursor": rows[-1][0] if more else None
+    }
+
+def export_lore(format: str = "json", limit: Optional[int] = None) -> Iterator[str]:
+    """Stream every entry (or the first limit) as JSON, NDJSON or Markdown text."""
+    return iter_export(iter_export_entries(limit), format)
+
+def export_lore_to_file(path: str, format: str = "json") -> int:
+    """Write an export to path piece by piece; returns the bytes written."""
+    written = 0
+    with open(path, "wb") as f:
+        for piece in export_lore(format):
+            written += f.write(piece.encode("utf-8"))
+    log_info(f"Exported lore as {format} to {path}")
+    return written
+
+def get_entries_for_export() -> List[Dict[str, Any]]:
+    """Get all entries formatted for JSON export."""
+    return list(iter_export_entries())
+
+def get_entries_for_markdown_export() -> str:
+    """Get all entries formatted as Markdown text."""
+    return "".join(export_lore("markdown"))
+
+def _dev_mode_field_content(entry_title: str, field_name: str, user_prompt: Optional[str], generation_style: str) -> str:
+    return f"[DEV MODE] Sample generated content for {field_name} of {entry_title} using [{generation_style}] style.\nPrompt: {user_prompt or 'No prompt provided'}"
+
+def _field_retrieval_query(entry_title: str, current_content: str) -> str:
+    """Text used to retrieve related lore for a single field."""
+    return current_content or entry_title
+
+def _build_field_prompts(
+    entry_title: str,
+    field_name: str,
+    template_type: str,
+    current_content: str,
+    user_prompt: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    generation_style: str = "Default",
+    ranked: Optional[List[Dict[str, Any]]] = None,
+    world_summary: str = ""
+) -> tuple[str, str]:
+    """Build the system and user prompts for field generation.
+
+    ranked may carry pre-computed _rank_lore results; otherwise related
+    lore is retrieved here. A world_summary from _world_summary_context
+    is placed ahead of the retrieved lore, which then gets the rest of
+    the context budget. Returns (system_prompt, user_prompt).
+    """
     # Create descriptive context from tags
     tag_context = f"Consider these descriptive elements, filter for nouns that add color and depth. Adjectives are less of a priority: {', '.join(tags)}" if tags else ""
     
@@ -466,30 +2280,116 @@ def generate_field_content(
     )
 
     # Get relevant entries for context
-    related_entries = get_relevant_lore(current_content or entry_title, top_k=3)
+    if ranked is None:
+        ranked = _rank_lore(_field_retrieval_query(entry_title, current_content), top_k=FIELD_CONTEXT_TOP_K)
+    # Pack the most relevant fields of related entries into a fixed token budget,
+    # shared with the world summary when one is used
+    retrieval_budget = max(FIELD_CONTEXT_TOKEN_BUDGET - count_tokens(world_summary), FIELD_CONTEXT_TOKEN_BUDGET // 2)
+    related_lore, _ = assemble_context(
+        ranked,
+        retrieval_budget,
+        query=" ".join(part for part in (field_name, current_content, user_prompt) if part)
+    )
     
     # Craft the user prompt with style guidance
     base_prompt = f"Write {generation_style} content for the {field_name} field of {entry_title}."
     context = f"Current content: {current_content}\n" if current_content else ""
-    context += f"Related lore:\n{chr(10).join(related_entries)}\n" if related_entries else ""
+    context += f"World overview:\n{world_summary}\n" if world_summary else ""
+    context += f"Related lore:\n{related_lore}\n" if related_lore else ""
     final_prompt = f"{base_prompt}\n{context}"
     if user_prompt:
         final_prompt += f"\nSpecific request: {user_prompt}"
-    
-    response = client.chat.completions.create(
-        model="gpt-4",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": final_prompt}
-        ],
-        temperature=0.7,
-        max_tokens=300
-    )
+    return system_prompt, final_prompt
 
-    # Clean up response to remove any field name prefixes
-    content = response.choices[0].message.content
+def _strip_field_prefix(content: str, field_name: str) -> str:
+    """Remove a leading "Field Name:" the model sometimes echoes back."""
     if ":" in content and content.split(":")[0].strip().lower() == field_name.lower():
         content = content.split(":", 1)[1].strip()
+    return content
+
+class _FieldPrefixStripper:
+    """Incremental counterpart of _strip_field_prefix for streamed tokens.
+
+    Tokens are held back only while they could still be the start of a
+    "Field Name:" prefix, then everything flows straight through.
+    """
+
+    def __init__(self, field_name: str):
+        self.field_name = field_name
+        self.prefix = f"{field_name.lower()}:"
+        self.buffer = ""
+        self.deciding = True
+        self.started = False
+
+    def feed(self, token: str) -> str:
+        if self.deciding:
+            self.buffer += token
+            if ":" not in self.buffer and self.prefix.startswith(self.buffer.lstrip().lower()):
+                return ""
+            self.deciding = False
+            if ":" in self.buffer and self.buffer.split(":")[0].strip().lower() == self.field_name.lower():
+                self.buffer = self.buffer.split(":", 1)[1]
+            token = self.buffer
+        if not self.started:
+            # Match the non-streaming path, which strips leading whitespace
+            token = token.lstrip()
+            self.started = bool(token)
+        return token
+
+    def flush(self) -> str:
+        if self.deciding:
+            self.deciding = False
+            return self.buffer.strip()
+        return ""
+
+def _strip_field_prefix_stream(tokens: Iterator[str], field_name: str) -> Iterator[str]:
+    """Strip a leading "Field Name:" from a token stream."""
+    stripper = _FieldPrefixStripper(field_name)
+    for token in tokens:
+        text = stripper.feed(token)
+        if text:
+            yield text
+    tail = stripper.flush()
+    if tail:
+        yield tail
+
+def _generate_field(
+    entry_title: str,
+    field_name: str,
+    template_type: str,
+    current_content: str,
+    user_prompt: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    generation_style: str = "Default",
+    use_cache: Optional[bool] = None,
+    regenerate: bool = False,
+    ranked: Optional[List[Dict[str, Any]]] = None,
+    use_world_summary: Optional[bool] = None
+) -> str:
+    """Generate one field without the dev mode check, optionally reusing
+    already retrieved context."""
+    world_summary = _world_summary_context(template_type, tags, use_world_summary)
+    caching = _generation_cache_enabled(use_cache)
+    if ranked is None:
+        ranked = _rank_lore(
+            _field_retrieval_query(entry_title, current_content), top_k=FIELD_CONTEXT_TOP_K, cache_query=caching
+        )
+    cache_key = _field_cache_key(
+        entry_title, field_name, template_type, current_content, user_prompt, tags, generation_style,
+        world_summary, ranked, caching
+    )
+    cached = _get_cached_generation(cache_key, regenerate)
+    if cached is not None:
+        return cached
+    system_prompt, final_prompt = _build_field_prompts(
+        entry_title, field_name, template_type, current_content, user_prompt, tags, generation_style,
+        ranked=ranked, world_summary=world_summary
+    )
+    
+    response = _chat_completion(system_prompt, final_prompt)
+
+    # Clean up response to remove any field name prefixes
+    content = _strip_field_prefix(response.choices[0].message.content, field_name)
     
     # Log the interaction
     log_openai_interaction(
@@ -500,8 +2400,199 @@ def generate_field_content(
         response=content
     )
     
+    _store_generation(cache_key, content.strip())
     return content.strip()
 
+def generate_field_content(
+    entry_title: str,
+    field_name: str,
+    template_type: str,
+    current_content: str,
+    user_prompt: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    generation_style: str = "Default",
+    use_cache: Optional[bool] = None,
+    regenerate: bool = False,
+    use_world_summary: Optional[bool] = None
+) -> str:
+    """Generate content for a specific field using GPT-4.
+
+    With caching enabled, repeat requests are answered from the cache;
+    regenerate bypasses it and stores the result as a new variant.
+    use_world_summary adds the stored template and tag summaries to the
+    prompt; it defaults to the "world_summaries" setting.
+    """
+    # Check for dev mode
+    if get_setting("dev_mode") == "true":
+        return _dev_mode_field_content(entry_title, field_name, user_prompt, generation_style)
+
+    return _generate_field(
+        entry_title, field_name, template_type, current_content, user_prompt, tags, generation_style,
+        use_cache=use_cache, regenerate=regenerate, use_world_summary=use_world_summary
+    )
+
+def _fields_to_fill(entry: Dict[str, Any], fields: Optional[List[str]] = None, overwrite: bool = False) -> List[str]:
+    """Pick the template fields of an entry that batch generation should write."""
+    candidates = [
+        field for field in LORE_TEMPLATES.get(entry["template"], [])
+        if field not in ("Name", "Tags")
+    ]
+    if fields is not None:
+        candidates = [field for field in candidates if field in fields]
+    if overwrite:
+        return candidates
+    return [field for field in candidates if not str(entry["fields"].get(field) or "").strip()]
+
+def _entry_retrieval_query(entry: Dict[str, Any]) -> str:
+    """Text used to retrieve shared context for every field of an entry."""
+    return entry["content"] or entry["title"]
+
+def _apply_generated_fields(entry: Dict[str, Any], generated: Dict[str, str]) -> None:
+    """Write batch-generated fields back to an entry in a single update."""
+    patch_lore_entry(entry["title"], fields=generated)
+
+def generate_empty_fields(
+    entry_titles: List[str],
+    fields: Optional[List[str]] = None,
+    generation_style: str = "Default",
+    user_prompt: Optional[str] = None,
+    overwrite: bool = False,
+    apply: bool = False,
+    max_concurrency: int = BATCH_GENERATION_CONCURRENCY
+) -> Iterator[Dict[str, Any]]:
+    """Generate content for the empty fields of many entries at once.
+
+    Each entry retrieves related lore once and shares it across its fields.
+    Retrieval and completions run on a pool of max_concurrency threads and
+    results are yielded as they finish, as dicts with title, field, status
+    and either content or error. With apply set, each entry is saved once
+    all of its fields have finished. Closing the iterator early cancels
+    the work not yet started and waits only for what is already running.
+    """
+    dev_mode = get_setting("dev_mode") == "true"
+    entries = [entry for entry in (get_entry_by_title(title) for title in entry_titles) if entry]
+    work = []
+    for entry in entries:
+        targets = _fields_to_fill(entry, fields, overwrite)
+        if targets:
+            work.append((entry, targets))
+    work = iter(work)
+    pending = {}
+    generated = {}
+    rankings = {}
+    futures = {}
+
+    def _submit_fields(entry: Dict[str, Any], targets: List[str], ranked: Optional[List[Dict[str, Any]]]) -> None:
+        for field in targets:
+            if dev_mode:
+                future = executor.submit(_dev_mode_field_content, entry["title"], field, user_prompt, generation_style)
+            else:
+                future = executor.submit(
+                    _generate_field, entry["title"], field, entry["template"],
+                    entry["fields"].get(field) or "", user_prompt, entry["tags"], generation_style,
+                    ranked=ranked
+                )
+            futures[future] = (entry, field)
+
+    def _finish(entry: Dict[str, Any], field: str, future) -> Dict[str, Any]:
+        try:
+            content = future.result()
+            generated[entry["title"]][field] = content
+            result = {"title": entry["title"], "field": field, "status": "success", "content": content}
+        except Exception as e:
+            log_error(f"Failed to generate {field} for {entry['title']}: {str(e)}")
+            result = {"title": entry["title"], "field": field, "status": "error", "error": str(e)}
+        pending[entry["title"]] -= 1
+        if apply and pending[entry["title"]] == 0 and generated[entry["title"]]:
+            _apply_generated_fields(entry, generated[entry["title"]])
+        return result
+
+    executor = ThreadPoolExecutor(max_workers=max_concurrency)
+    try:
+        while True:
+            # Start the next entry only while a worker is free, so its
+            # retrieval does not queue ahead of fields already ranked
+            while len(rankings) + len(futures) < max_concurrency:
+                entry, targets = next(work, (None, None))
+                if entry is None:
+                    break
+                pending[entry["title"]] = len(targets)
+                generated[entry["title"]] = {}
+                if dev_mode:
+                    _submit_fields(entry, targets, None)
+                else:
+                    ranking = executor.submit(_rank_lore, _entry_retrieval_query(entry), top_k=FIELD_CONTEXT_TOP_K)
+                    rankings[ranking] = (entry, targets)
+            if not rankings and not futures:
+                return
+            done, _ = wait([*rankings, *futures], return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in rankings:
+                    entry, targets = rankings.pop(future)
+                    if future.exception() is None:
+                        _submit_fields(entry, targets, future.result())
+                    else:
+                        # Without context none of the entry's fields can be generated
+                        for field in targets:
+                            yield _finish(entry, field, future)
+                    continue
+                entry, field = futures.pop(future)
+                yield _finish(entry, field, future)
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+def stream_field_content(
+    entry_title: str,
+    field_name: str,
+    template_type: str,
+    current_content: str,
+    user_prompt: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    generation_style: str = "Default",
+    use_cache: Optional[bool] = None,
+    regenerate: bool = False,
+    use_world_summary: Optional[bool] = None
+) -> Iterator[str]:
+    """Streaming variant of generate_field_content that yields tokens as they arrive."""
+    if get_setting("dev_mode") == "true":
+        yield _dev_mode_field_content(entry_title, field_name, user_prompt, generation_style)
+        return
+
+    world_summary = _world_summary_context(template_type, tags, use_world_summary)
+    caching = _generation_cache_enabled(use_cache)
+    ranked = _rank_lore(
+        _field_retrieval_query(entry_title, current_content), top_k=FIELD_CONTEXT_TOP_K, cache_query=caching
+    )
+    cache_key = _field_cache_key(
+        entry_title, field_name, template_type, current_content, user_prompt, tags, generation_style,
+        world_summary, ranked, caching
+    )
+    cached = _get_cached_generation(cache_key, regenerate)
+    if cached is not None:
+        yield cached
+        return
+    system_prompt, final_prompt = _build_field_prompts(
+        entry_title, field_name, template_type, current_content, user_prompt, tags, generation_style,
+        ranked=ranked, world_summary=world_summary
+    )
+
+    stream = _chat_completion(system_prompt, final_prompt, stream=True)
+
+    parts = []
+    for token in _strip_field_prefix_stream(_iter_completion_tokens(stream), field_name):
+        parts.append(token)
+        yield token
+
+    content = "".join(parts).strip()
+    log_openai_interaction(
+        entry_title=entry_title,
+        field_name=field_name,
+        system_prompt=system_prompt,
+        user_prompt=final_prompt,
+        response=content
+    )
+    _store_generation(cache_key, content)
+
 def process_template_fields(template_fields: Dict[str, Any]) -> tuple[Dict[str, Any], List[str]]:
     """Process template fields and extract tags.
     Returns tuple of (fields_dict, tags)."""
@@ -0,0 +1,66 @@
+import re
+import zlib
+import hashlib
+from typing import List, Set, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+from ..config.settings import MINHASH_PERMUTATIONS, LSH_BANDS
+
+# Mersenne-style prime just above 2**32 so (a * x + b) stays inside uint64
+_MINHASH_PRIME = np.uint64(4294967311)
+_SHINGLE_SIZE = 3
+
+# Fixed seed keeps signatures comparable across processes and restarts
+_rng = np.random.RandomState(20250401)
+_PERM_A = _rng.randint(1, 2**31 - 1, size=MINHASH_PERMUTATIONS).astype(np.uint64)
+_PERM_B = _rng.randint(0, 2**31 - 1, size=MINHASH_PERMUTATIONS).astype(np.uint64)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def shingles(text: str, size: int = _SHINGLE_SIZE) -> Set[str]:
+    """Split text into a set of lowercase word n-grams."""
+    tokens = _TOKEN_RE.findall(text.lower())
+    if len(tokens) < size:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def minhash_signature(text: str) -> npt.NDArray[np.uint64]:
+    """Compute a MinHash signature over the word shingles of text."""
+    shingle_set = shingles(text)
+    if not shingle_set:
+        return np.full(MINHASH_PERMUTATIONS, _MINHASH_PRIME, dtype=np.uint64)
+    # crc32 is stable across processes, unlike the builtin hash()
+    hashed = np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) for s in shingle_set),
+        dtype=np.uint64,
+        count=len(shingle_set)
+    )
+    permuted = (np.outer(_PERM_A, hashed) + _PERM_B[:, None]) % _MINHASH_PRIME
+    return permuted.min(axis=1)
+
+
+def lsh_buckets(signature: npt.NDArray[np.uint64]) -> List[Tuple[int, str]]:
+    """Split a signature into LSH bands and hash each band to a bucket key."""
+    rows = len(signature) // LSH_BANDS
+    buckets = []
+    for band in range(LSH_BANDS):
+        band_bytes = signature[band * rows:(band + 1) * rows].tobytes()
+        buckets.append((band, hashlib.blake2b(band_bytes, digest_size=8).hexdigest()))
+    return buckets
+
+
+def estimate_jaccard(sig_a: npt.NDArray[np.uint64], sig_b: npt.NDArray[np.uint64]) -> float:
+    """Estimate Jaccard similarity from two MinHash signatures."""
+    return float(np.mean(sig_a == sig_b))
+
+
+def cosine_similarity(a: npt.NDArray[np.float32], b: npt.NDArray[np.float32]) -> float:
+    """Cosine similarity between two vectors, 0.0 if either is empty."""
+    norm = np.linalg.norm(a) * np.linalg.norm(b)
+    if a.shape != b.shape or norm == 0:
+        return 0.0
+    return float(np.dot(a, b) / norm)
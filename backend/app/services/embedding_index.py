@@ -0,0 +1,172 @@
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config.settings import EMBEDDING_MODEL, EMBEDDING_DIMENSIONS, RETRIEVAL_MIN_SCORE, NEAR_DUPLICATE_COSINE
+
+
+def init_index_tables(cursor: sqlite3.Cursor) -> None:
+    """Create the embedding space and shadow index tables if they do not exist.
+
+    embedding_spaces holds the 'active' space that retrieval reads and, while
+    a migration runs, the 'target' space the shadow tables are built in. A
+    database without an active space is pinned to the configured model.
+    Each space carries the similarity thresholds calibrated for it, since
+    cosine scores are not comparable across models.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS embedding_spaces (
+            role TEXT PRIMARY KEY,
+            model TEXT NOT NULL,
+            dimensions INTEGER,
+            updated_at REAL NOT NULL,
+            min_score REAL,
+            near_duplicate_cosine REAL
+        )
+    ''')
+    cursor.execute('PRAGMA table_info(embedding_spaces)')
+    columns = [row[1] for row in cursor.fetchall()]
+    for column in ('min_score', 'near_duplicate_cosine'):
+        if column not in columns:
+            cursor.execute(f'ALTER TABLE embedding_spaces ADD COLUMN {column} REAL')
+    cursor.execute('''
+        INSERT OR IGNORE INTO embedding_spaces (role, model, dimensions, updated_at, min_score, near_duplicate_cosine)
+        VALUES ('active', ?, ?, ?, ?, ?)
+    ''', (EMBEDDING_MODEL, EMBEDDING_DIMENSIONS, time.time(), RETRIEVAL_MIN_SCORE, NEAR_DUPLICATE_COSINE))
+    # Spaces activated before thresholds were stored were served with the
+    # configured defaults
+    cursor.execute('''
+        UPDATE embedding_spaces SET
+            min_score = COALESCE(min_score, ?),
+            near_duplicate_cosine = COALESCE(near_duplicate_cosine, ?)
+        WHERE role = 'active'
+    ''', (RETRIEVAL_MIN_SCORE, NEAR_DUPLICATE_COSINE))
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS lore_shadow (
+            lore_id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL,
+            embedding BLOB NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS lore_chunks_shadow (
+            lore_id INTEGER NOT NULL,
+            field TEXT,
+            chunk_index INTEGER NOT NULL,
+            text TEXT NOT NULL,
+            embedding BLOB NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_lore_chunks_shadow_lore_id ON lore_chunks_shadow (lore_id)')
+
+
+def get_space(cursor: sqlite3.Cursor, role: str) -> Optional[Dict[str, Any]]:
+    cursor.execute('SELECT model, dimensions FROM embedding_spaces WHERE role = ?', (role,))
+    row = cursor.fetchone()
+    return {"model": row[0], "dimensions": row[1]} if row else None
+
+
+def get_space_thresholds(cursor: sqlite3.Cursor, role: str) -> Optional[Dict[str, Optional[float]]]:
+    """Retrieval cutoff and near-duplicate cosine ({min_score,
+    near_duplicate_cosine}) calibrated for a space, None without one."""
+    cursor.execute('SELECT min_score, near_duplicate_cosine FROM embedding_spaces WHERE role = ?', (role,))
+    row = cursor.fetchone()
+    return {"min_score": row[0], "near_duplicate_cosine": row[1]} if row else None
+
+
+def set_space(
+    cursor: sqlite3.Cursor,
+    role: str,
+    model: str,
+    dimensions: Optional[int],
+    min_score: float,
+    near_duplicate_cosine: float
+) -> None:
+    cursor.execute('''
+        INSERT OR REPLACE INTO embedding_spaces (role, model, dimensions, updated_at, min_score, near_duplicate_cosine)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (role, model, dimensions, time.time(), min_score, near_duplicate_cosine))
+
+
+def clear_shadow(cursor: sqlite3.Cursor) -> None:
+    """Forget the target space and every vector built for it."""
+    cursor.execute("DELETE FROM embedding_spaces WHERE role = 'target'")
+    cursor.execute('DELETE FROM lore_shadow')
+    cursor.execute('DELETE FROM lore_chunks_shadow')
+
+
+def stale_shadow_rows(cursor: sqlite3.Cursor, limit: int) -> List[Tuple[int, str, str, str, int]]:
+    """Embedded entries whose shadow vectors are missing or older than the entry.
+
+    Returns (id, title, content, fields, version) rows.
+    """
+    cursor.execute('''
+        SELECT l.id, l.title, l.content, l.fields, COALESCE(l.version, 1) FROM lore l
+        LEFT JOIN lore_shadow s ON s.lore_id = l.id
+        WHERE l.embedding_status = 'ready'
+        AND (s.lore_id IS NULL OR s.version != COALESCE(l.version, 1))
+        ORDER BY l.id LIMIT ?
+    ''', (limit,))
+    return cursor.fetchall()
+
+
+def store_shadow_entry(
+    cursor: sqlite3.Cursor,
+    lore_id: int,
+    version: int,
+    embedding: bytes,
+    chunks: List[Tuple[Optional[str], int, str, bytes]]
+) -> bool:
+    """Save an entry's target-space vectors unless it was edited meanwhile.
+
+    chunks are (field, chunk_index, text, embedding) tuples.
+    """
+    cursor.execute('SELECT 1 FROM lore WHERE id = ? AND COALESCE(version, 1) = ?', (lore_id, version))
+    if cursor.fetchone() is None:
+        return False
+    cursor.execute(
+        'INSERT OR REPLACE INTO lore_shadow (lore_id, version, embedding) VALUES (?, ?, ?)',
+        (lore_id, version, embedding)
+    )
+    cursor.execute('DELETE FROM lore_chunks_shadow WHERE lore_id = ?', (lore_id,))
+    cursor.executemany(
+        'INSERT INTO lore_chunks_shadow (lore_id, field, chunk_index, text, embedding) VALUES (?, ?, ?, ?, ?)',
+        [(lore_id,) + chunk for chunk in chunks]
+    )
+    return True
+
+
+def shadow_coverage(cursor: sqlite3.Cursor) -> Tuple[int, int]:
+    """(covered, total): embedded entries with up-to-date shadow vectors."""
+    cursor.execute('''
+        SELECT COUNT(*), COALESCE(SUM(s.lore_id IS NOT NULL), 0) FROM lore l
+        LEFT JOIN lore_shadow s ON s.lore_id = l.id AND s.version = COALESCE(l.version, 1)
+        WHERE l.embedding_status = 'ready'
+    ''')
+    total, covered = cursor.fetchone()
+    return covered, total
+
+
+def swap_in_shadow(cursor: sqlite3.Cursor, model: str) -> int:
+    """Replace the live entry and chunk vectors with the shadow ones.
+
+    Must run inside the caller's write transaction, after shadow_coverage
+    has reported full coverage, so readers see either every old vector or
+    every new one. Returns the number of entries swapped.
+    """
+    cursor.execute('''
+        UPDATE lore SET
+            embedding = (SELECT embedding FROM lore_shadow WHERE lore_id = lore.id),
+            embedding_model = ?,
+            embedding_dim = (SELECT length(embedding) / 4 FROM lore_shadow WHERE lore_id = lore.id)
+        WHERE id IN (SELECT lore_id FROM lore_shadow)
+    ''', (model,))
+    swapped = cursor.rowcount
+    cursor.execute('DELETE FROM lore_chunks WHERE lore_id IN (SELECT lore_id FROM lore_shadow)')
+    cursor.execute('''
+        INSERT INTO lore_chunks (lore_id, field, chunk_index, text, embedding, embedding_model, embedding_dim)
+        SELECT lore_id, field, chunk_index, text, embedding, ?, length(embedding) / 4 FROM lore_chunks_shadow
+        WHERE lore_id IN (SELECT id FROM lore)
+        ORDER BY lore_id, field, chunk_index
+    ''', (model,))
+    return swapped
@@ -0,0 +1,54 @@
+import threading
+from typing import Optional
+
+from ..config.settings import PENDING_EMBEDDING_POLL_SECONDS, PENDING_EMBEDDING_RETRY_SECONDS
+from ..logging.logger import log_info, log_error
+from . import core
+
+_wake = threading.Event()
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+_thread_lock = threading.Lock()
+
+
+def notify_pending_embeddings() -> None:
+    """Wake the background embedder after saving entries with a pending embedding."""
+    _wake.set()
+
+
+def _run() -> None:
+    while not _stop.is_set():
+        _wake.clear()
+        delay = PENDING_EMBEDDING_POLL_SECONDS
+        try:
+            while not _stop.is_set() and core.embed_pending_entries():
+                pass
+        except Exception as e:
+            # Typically the provider is down; entries stay pending until it recovers
+            log_error(f"Background embedding failed, retrying in {PENDING_EMBEDDING_RETRY_SECONDS:.0f}s: {str(e)}")
+            delay = PENDING_EMBEDDING_RETRY_SECONDS
+        _wake.wait(delay)
+
+
+def start_embedding_worker() -> None:
+    """Start the background embedder thread unless it is already running.
+
+    It embeds pending entries in batches whenever notified, and polls in
+    case another process saved some.
+    """
+    global _thread
+    with _thread_lock:
+        if _thread is not None and _thread.is_alive():
+            return
+        _stop.clear()
+        _thread = threading.Thread(target=_run, name="lore-embedder", daemon=True)
+        _thread.start()
+    log_info("Background embedder started")
+
+
+def stop_embedding_worker(timeout: float = 5.0) -> None:
+    """Ask the embedder to stop and wait up to timeout seconds for it."""
+    _stop.set()
+    _wake.set()
+    if _thread is not None:
+        _thread.join(timeout)
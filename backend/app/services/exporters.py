@@ -0,0 +1,83 @@
+import json
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, NamedTuple
+
+
+class ExportFormat(NamedTuple):
+    """How a download is laid out: text before, for and after the entries."""
+    media_type: str
+    extension: str
+    opening: str
+    entry: Callable[[Dict[str, Any], int], str]
+    closing: Callable[[int], str]
+
+
+def _json_entry(entry: Dict[str, Any], index: int) -> str:
+    # Matches json.dumps(entries, indent=2) of the whole list, one element at a time
+    body = json.dumps(entry, indent=2, ensure_ascii=False).replace("\n", "\n  ")
+    return ("\n  " if index == 0 else ",\n  ") + body
+
+
+def _ndjson_entry(entry: Dict[str, Any], index: int) -> str:
+    return json.dumps(entry, ensure_ascii=False) + "\n"
+
+
+def _markdown_entry(entry: Dict[str, Any], index: int) -> str:
+    fields = entry["fields"]
+    # Start with template type as heading, then the name as regular text
+    chunk = [f"# {entry['template']}\n", f"{fields.get('Name', 'Untitled')}\n\n"]
+    for field, value in fields.items():
+        if field != "Name":  # Skip name since we used it already
+            if isinstance(value, list):  # Handle tags
+                value = ", ".join(value)
+            chunk.append(f"### {field}\n{value}\n\n")
+    if entry["linked_entries"]:
+        chunk.append("### Linked Entries\n")
+        for link in entry["linked_entries"]:
+            chunk.append(f"- {link}\n")
+        chunk.append("\n")
+    chunk.append("---\n\n")  # Add separator between entries
+    return "".join(chunk)
+
+
+EXPORT_FORMATS: Dict[str, ExportFormat] = {
+    "json": ExportFormat("application/json", "json", "[", _json_entry, lambda count: "\n]" if count else "]"),
+    "ndjson": ExportFormat("application/x-ndjson", "ndjson", "", _ndjson_entry, lambda count: ""),
+    "markdown": ExportFormat("text/markdown", "md", "", _markdown_entry, lambda count: "")
+}
+
+
+def export_entry(template: str, fields_json: str, linked_json: str) -> Dict[str, Any]:
+    """An entry in the lorea_ftue export shape from its stored columns."""
+    return {
+        "template": template,
+        "fields": json.loads(fields_json) if fields_json else {},
+        "linked_entries": json.loads(linked_json) if linked_json else []
+    }
+
+
+def iter_export(entries: Iterable[Dict[str, Any]], format: str) -> Iterator[str]:
+    """Text of an export, one piece per entry, as entries arrive."""
+    layout = EXPORT_FORMATS[format]
+    count = 0
+    if layout.opening:
+        yield layout.opening
+    for entry in entries:
+        yield layout.entry(entry, count)
+        count += 1
+    closing = layout.closing(count)
+    if closing:
+        yield closing
+
+
+async def aiter_export(entries: AsyncIterator[Dict[str, Any]], format: str) -> AsyncIterator[str]:
+    """Async counterpart of iter_export."""
+    layout = EXPORT_FORMATS[format]
+    count = 0
+    if layout.opening:
+        yield layout.opening
+    async for entry in entries:
+        yield layout.entry(entry, count)
+        count += 1
+    closing = layout.closing(count)
+    if closing:
+        yield closing
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import numpy.typing as npt
+
+from ..config.settings import (
+    GENERATION_CACHE_TTL_SECONDS,
+    GENERATION_CACHE_MAX_ROWS,
+    GENERATION_CACHE_VARIANTS
+)
+
+
+def init_cache_table(cursor: sqlite3.Cursor) -> None:
+    """Create the generation and query embedding cache tables if they do not exist."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS generation_cache (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cache_key TEXT NOT NULL,
+            response TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_generation_cache_key ON generation_cache (cache_key)')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS query_embedding_cache (
+            query_key TEXT PRIMARY KEY,
+            embedding BLOB NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL
+        )
+    ''')
+
+
+def make_cache_key(
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    request: Dict[str, Any],
+    context: List[List[Any]],
+    embedding_space: Dict[str, Any]
+) -> str:
+    """Fingerprint everything that shapes a completion.
+
+    request holds the caller's inputs and context the [id, version] pairs
+    of the retrieved lore, so only an edit to an entry the prompt actually
+    uses (or a change of embedding_space) misses the cache.
+    """
+    payload = json.dumps({
+        "model": model,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "request": request,
+        "context": context,
+        "embedding_space": embedding_space
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def cache_lookup(cursor: sqlite3.Cursor, cache_key: str) -> Optional[str]:
+    """Return a cached response for the key, rotating through its variants.
+
+    The least recently served variant is returned so repeated clicks cycle
+    through every stored alternative before repeating one.
+    """
+    cursor.execute('''
+        SELECT id, response FROM generation_cache
+        WHERE cache_key = ? AND created_at >= ?
+        ORDER BY last_used ASC
+        LIMIT 1
+    ''', (cache_key, time.time() - GENERATION_CACHE_TTL_SECONDS))
+    row = cursor.fetchone()
+    if not row:
+        return None
+    cursor.execute('UPDATE generation_cache SET last_used = ? WHERE id = ?', (time.time(), row[0]))
+    return row[1]
+
+
+def cache_store(cursor: sqlite3.Cursor, cache_key: str, response: str) -> None:
+    """Store a response as a new variant and apply TTL, variant and size limits."""
+    now = time.time()
+    cursor.execute(
+        'INSERT INTO generation_cache (cache_key, response, created_at, last_used) VALUES (?, ?, ?, ?)',
+        (cache_key, response, now, now)
+    )
+    cursor.execute('DELETE FROM generation_cache WHERE created_at < ?', (now - GENERATION_CACHE_TTL_SECONDS,))
+    cursor.execute('''
+        DELETE FROM generation_cache
+        WHERE cache_key = ? AND id NOT IN (
+            SELECT id FROM generation_cache WHERE cache_key = ?
+            ORDER BY created_at DESC LIMIT ?
+        )
+    ''', (cache_key, cache_key, GENERATION_CACHE_VARIANTS))
+    cursor.execute('''
+        DELETE FROM generation_cache
+        WHERE id NOT IN (
+            SELECT id FROM generation_cache ORDER BY last_used DESC LIMIT ?
+        )
+    ''', (GENERATION_CACHE_MAX_ROWS,))
+
+
+def make_query_key(text: str, embedding_space: Dict[str, Any]) -> str:
+    """Fingerprint a retrieval query embedded in an embedding space."""
+    payload = json.dumps({"text": text, "embedding_space": embedding_space}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def query_embedding_lookup(cursor: sqlite3.Cursor, query_key: str) -> Optional[npt.NDArray[np.float32]]:
+    """Return the cached embedding of a retrieval query, if still fresh."""
+    cursor.execute(
+        'SELECT embedding FROM query_embedding_cache WHERE query_key = ? AND created_at >= ?',
+        (query_key, time.time() - GENERATION_CACHE_TTL_SECONDS)
+    )
+    row = cursor.fetchone()
+    if not row:
+        return None
+    cursor.execute('UPDATE query_embedding_cache SET last_used = ? WHERE query_key = ?', (time.time(), query_key))
+    return np.frombuffer(row[0], dtype=np.float32)
+
+
+def query_embedding_store(cursor: sqlite3.Cursor, query_key: str, embedding: npt.NDArray[np.float32]) -> None:
+    """Store a retrieval query's embedding and apply the TTL and size limits."""
+    now = time.time()
+    cursor.execute(
+        'INSERT OR REPLACE INTO query_embedding_cache (query_key, embedding, created_at, last_used) VALUES (?, ?, ?, ?)',
+        (query_key, embedding.astype(np.float32).tobytes(), now, now)
+    )
+    cursor.execute('DELETE FROM query_embedding_cache WHERE created_at < ?', (now - GENERATION_CACHE_TTL_SECONDS,))
+    cursor.execute('''
+        DELETE FROM query_embedding_cache
+        WHERE query_key NOT IN (
+            SELECT query_key FROM query_embedding_cache ORDER BY last_used DESC LIMIT ?
+        )
+    ''', (GENERATION_CACHE_MAX_ROWS,))
+
+
+def clear_cache(cursor: sqlite3.Cursor) -> None:
+    """Remove every cached generation and query embedding."""
+    cursor.execute('DELETE FROM generation_cache')
+    cursor.execute('DELETE FROM query_embedding_cache')
@@ -0,0 +1,211 @@
+import json
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional
+
+from ..config.settings import JOB_MAX_ATTEMPTS, JOB_RETRY_BACKOFF_SECONDS
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed")
+
+_JOB_COLUMNS = 'id, batch_id, kind, payload, status, attempts, max_attempts, result, error, created_at, updated_at'
+
+
+def init_jobs_table(cursor: sqlite3.Cursor) -> None:
+    """Create the background job table if it does not exist."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            batch_id TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL,
+            result TEXT,
+            error TEXT,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            run_after REAL NOT NULL,
+            heartbeat REAL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, run_after)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_batch ON jobs (batch_id)')
+
+
+def _job_from_row(row: tuple) -> Dict[str, Any]:
+    return {
+        "id": row[0],
+        "batch_id": row[1],
+        "kind": row[2],
+        "payload": json.loads(row[3]),
+        "status": row[4],
+        "attempts": row[5],
+        "max_attempts": row[6],
+        "result": json.loads(row[7]) if row[7] is not None else None,
+        "error": row[8],
+        "created_at": row[9],
+        "updated_at": row[10]
+    }
+
+
+def enqueue_jobs(
+    cursor: sqlite3.Cursor,
+    batch_id: str,
+    kind: str,
+    payloads: List[Dict[str, Any]],
+    max_attempts: int = JOB_MAX_ATTEMPTS
+) -> List[int]:
+    """Queue one job per payload under a shared batch id and return their ids."""
+    now = time.time()
+    job_ids = []
+    for payload in payloads:
+        cursor.execute('''
+            INSERT INTO jobs (batch_id, kind, payload, status, max_attempts, created_at, updated_at, run_after)
+            VALUES (?, ?, ?, 'queued', ?, ?, ?, ?)
+        ''', (batch_id, kind, json.dumps(payload), max_attempts, now, now, now))
+        job_ids.append(cursor.lastrowid)
+    return job_ids
+
+
+def claim_next_job(conn: sqlite3.Connection) -> Optional[Dict[str, Any]]:
+    """Atomically move the oldest runnable job to running and return it.
+
+    BEGIN IMMEDIATE takes the write lock before the job is picked, so two
+    workers polling the same database never claim the same job.
+    """
+    now = time.time()
+    cursor = conn.cursor()
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+        cursor.execute(f'''
+            SELECT {_JOB_COLUMNS} FROM jobs
+            WHERE status = 'queued' AND run_after <= ?
+            ORDER BY run_after, id
+            LIMIT 1
+        ''', (now,))
+        row = cursor.fetchone()
+        if row is None:
+            conn.commit()
+            return None
+        cursor.execute('''
+            UPDATE jobs SET status = 'running', attempts = attempts + 1, heartbeat = ?, updated_at = ?
+            WHERE id = ?
+        ''', (now, now, row[0]))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    job = _job_from_row(row)
+    job["status"] = "running"
+    job["attempts"] += 1
+    return job
+
+
+def complete_job(cursor: sqlite3.Cursor, job_id: int, result: Any) -> None:
+    now = time.time()
+    cursor.execute('''
+        UPDATE jobs SET status = 'succeeded', result = ?, error = NULL, updated_at = ?, heartbeat = NULL
+        WHERE id = ?
+    ''', (json.dumps(result), now, job_id))
+
+
+def fail_job(cursor: sqlite3.Cursor, job: Dict[str, Any], error: str) -> str:
+    """Record a failed attempt, requeueing with exponential backoff while
+    attempts remain. Returns the job's new status."""
+    now = time.time()
+    if job["attempts"] < job["max_attempts"]:
+        delay = JOB_RETRY_BACKOFF_SECONDS * (2 ** (job["attempts"] - 1))
+        cursor.execute('''
+            UPDATE jobs SET status = 'queued', error = ?, updated_at = ?, run_after = ?, heartbeat = NULL
+            WHERE id = ?
+        ''', (error, now, now + delay, job["id"]))
+        return "queued"
+    cursor.execute('''
+        UPDATE jobs SET status = 'failed', error = ?, updated_at = ?, heartbeat = NULL
+        WHERE id = ?
+    ''', (error, now, job["id"]))
+    return "failed"
+
+
+def cancel_queued_jobs(cursor: sqlite3.Cursor, kind: str) -> int:
+    """Fail queued jobs of a kind so no worker picks them up; running ones
+    are left to finish. Returns the number of jobs cancelled."""
+    cursor.execute('''
+        UPDATE jobs SET status = 'failed', error = 'Cancelled', updated_at = ?
+        WHERE kind = ? AND status = 'queued'
+    ''', (time.time(), kind))
+    return cursor.rowcount
+
+
+def touch_jobs(cursor: sqlite3.Cursor, job_ids: List[int]) -> None:
+    """Refresh the heartbeat of jobs a live worker is still running."""
+    if not job_ids:
+        return
+    placeholders = ",".join("?" * len(job_ids))
+    cursor.execute(
+        f"UPDATE jobs SET heartbeat = ? WHERE status = 'running' AND id IN ({placeholders})",
+        [time.time()] + list(job_ids)
+    )
+
+
+def requeue_stale_jobs(cursor: sqlite3.Cursor, stale_seconds: float) -> int:
+    """Recover jobs left running by a worker that died.
+
+    Jobs with attempts left go back to the queue; the rest are failed.
+    Returns the number of jobs recovered.
+    """
+    now = time.time()
+    cutoff = now - stale_seconds
+    cursor.execute('''
+        UPDATE jobs SET status = 'failed', error = 'Worker stopped while running the job', updated_at = ?, heartbeat = NULL
+        WHERE status = 'running' AND (heartbeat IS NULL OR heartbeat < ?) AND attempts >= max_attempts
+    ''', (now, cutoff))
+    failed = cursor.rowcount
+    cursor.execute('''
+        UPDATE jobs SET status = 'queued', updated_at = ?, run_after = ?, heartbeat = NULL
+        WHERE status = 'running' AND (heartbeat IS NULL OR heartbeat < ?)
+    ''', (now, now, cutoff))
+    return failed + cursor.rowcount
+
+
+def get_job(cursor: sqlite3.Cursor, job_id: int) -> Optional[Dict[str, Any]]:
+    cursor.execute(f'SELECT {_JOB_COLUMNS} FROM jobs WHERE id = ?', (job_id,))
+    row = cursor.fetchone()
+    return _job_from_row(row) if row else None
+
+
+def batch_status(cursor: sqlite3.Cursor, batch_id: str) -> Optional[Dict[str, Any]]:
+    """Summarise a batch: job counts per status plus the errors of failed jobs."""
+    cursor.execute('SELECT status, COUNT(*) FROM jobs WHERE batch_id = ? GROUP BY status', (batch_id,))
+    counts = dict(cursor.fetchall())
+    if not counts:
+        return None
+    cursor.execute('SELECT kind, MIN(created_at), MAX(updated_at) FROM jobs WHERE batch_id = ?', (batch_id,))
+    kind, created_at, updated_at = cursor.fetchone()
+    cursor.execute(
+        "SELECT id, payload, error FROM jobs WHERE batch_id = ? AND status = 'failed' ORDER BY id",
+        (batch_id,)
+    )
+    failures = [{"id": row[0], "payload": json.loads(row[1]), "error": row[2]} for row in cursor.fetchall()]
+    total = sum(counts.values())
+    finished = counts.get("succeeded", 0) + counts.get("failed", 0)
+    return {
+        "batch_id": batch_id,
+        "kind": kind,
+        "total": total,
+        "counts": {status: counts.get(status, 0) for status in JOB_STATUSES},
+        "progress": finished / total,
+        "done": finished == total,
+        "failures": failures,
+        "created_at": created_at,
+        "updated_at": updated_at
+    }
+
+
+def recent_batch_ids(cursor: sqlite3.Cursor, limit: int = 5) -> List[str]:
+    cursor.execute('''
+        SELECT batch_id FROM jobs GROUP BY batch_id
+        ORDER BY MAX(id) DESC LIMIT ?
+    ''', (limit,))
+    return [row[0] for row in cursor.fetchall()]
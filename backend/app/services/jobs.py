@@ -0,0 +1,222 @@
+import argparse
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+from ..logging.logger import log_info, log_error
+from ..config.settings import (
+    JOB_WORKER_CONCURRENCY,
+    JOB_MAX_ATTEMPTS,
+    JOB_POLL_SECONDS,
+    JOB_HEARTBEAT_SECONDS,
+    JOB_STALE_SECONDS,
+    EMBEDDING_MIGRATION_MODEL,
+    EMBEDDING_MIGRATION_DIMENSIONS
+)
+from . import core
+from . import job_queue
+
+
+def _fill_entry(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Draft the empty (or selected) fields of one entry and save them.
+
+    Fields saved by an earlier, partly failed attempt are no longer empty,
+    so a retry only drafts what is still missing.
+    """
+    if core.get_entry_by_title(payload["title"]) is None:
+        raise ValueError(f"No entry titled {payload['title']!r}")
+    results = list(core.generate_empty_fields(
+        [payload["title"]],
+        fields=payload.get("fields"),
+        generation_style=payload.get("generation_style", "Default"),
+        user_prompt=payload.get("user_prompt"),
+        overwrite=payload.get("overwrite", False),
+        apply=payload.get("apply", True),
+        max_concurrency=1
+    ))
+    errors = [f"{r['field']}: {r['error']}" for r in results if r["status"] != "success"]
+    if errors:
+        raise RuntimeError("; ".join(errors))
+    return {"fields": {r["field"]: r["content"] for r in results}}
+
+
+def _embed_entry(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Recompute the entry and chunk embeddings of one entry."""
+    if not core.refresh_entry_embeddings(payload["title"]):
+        raise ValueError(f"No entry titled {payload['title']!r}")
+    return {"title": payload["title"]}
+
+
+def _refresh_summaries(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Refresh the world summaries that enough entry changes have made stale."""
+    return core.refresh_world_summaries(force=payload.get("force", False))
+
+
+def _migrate_embeddings(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Re-embed every entry into a new embedding space and cut over to it.
+
+    The shadow index survives a failed attempt, so a retry resumes it.
+    The payload must carry the min_score and near_duplicate_cosine
+    calibrated for the new space.
+    """
+    return core.migrate_embeddings(
+        model=payload.get("model", EMBEDDING_MIGRATION_MODEL),
+        dimensions=payload.get("dimensions", EMBEDDING_MIGRATION_DIMENSIONS),
+        min_score=payload["min_score"],
+        near_duplicate_cosine=payload["near_duplicate_cosine"]
+    )
+
+
+JOB_HANDLERS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    "fill_entry": _fill_entry,
+    "embed_entry": _embed_entry,
+    "refresh_summaries": _refresh_summaries,
+    "migrate_embeddings": _migrate_embeddings
+}
+
+
+def init_jobs_db() -> None:
+    """Make sure the job table exists without running the full init_db."""
+    with core.get_db_connection() as conn:
+        job_queue.init_jobs_table(conn.cursor())
+        conn.commit()
+
+
+def submit_jobs(kind: str, payloads: List[Dict[str, Any]], max_attempts: int = JOB_MAX_ATTEMPTS) -> Dict[str, Any]:
+    """Queue one job per payload and return the batch id and job ids."""
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    batch_id = uuid.uuid4().hex
+    with core.get_db_connection() as conn:
+        job_ids = job_queue.enqueue_jobs(conn.cursor(), batch_id, kind, payloads, max_attempts)
+        conn.commit()
+    log_info(f"Queued {len(job_ids)} {kind} job(s) in batch {batch_id}")
+    return {"batch_id": batch_id, "job_ids": job_ids}
+
+
+def get_job(job_id: int) -> Optional[Dict[str, Any]]:
+    with core.get_db_connection() as conn:
+        return job_queue.get_job(conn.cursor(), job_id)
+
+
+def get_batch_status(batch_id: str) -> Optional[Dict[str, Any]]:
+    with core.get_db_connection() as conn:
+        return job_queue.batch_status(conn.cursor(), batch_id)
+
+
+def list_batches(limit: int = 5) -> List[Dict[str, Any]]:
+    """Status of the most recently submitted batches, newest first."""
+    with core.get_db_connection() as conn:
+        cursor = conn.cursor()
+        return [job_queue.batch_status(cursor, batch_id) for batch_id in job_queue.recent_batch_ids(cursor, limit)]
+
+
+def cancel_jobs(kind: str) -> int:
+    """Cancel every queued job of a kind."""
+    with core.get_db_connection() as conn:
+        cancelled = job_queue.cancel_queued_jobs(conn.cursor(), kind)
+        conn.commit()
+    if cancelled:
+        log_info(f"Cancelled {cancelled} queued {kind} job(s)")
+    return cancelled
+
+
+def _requeue_stale() -> int:
+    with core.get_db_connection() as conn:
+        recovered = job_queue.requeue_stale_jobs(conn.cursor(), JOB_STALE_SECONDS)
+        conn.commit()
+    if recovered:
+        log_info(f"Recovered {recovered} job(s) left running by a stopped worker")
+    return recovered
+
+
+def _claim() -> Optional[Dict[str, Any]]:
+    with core.get_db_connection() as conn:
+        return job_queue.claim_next_job(conn)
+
+
+def _heartbeat(job_ids: List[int]) -> None:
+    with core.get_db_connection() as conn:
+        job_queue.touch_jobs(conn.cursor(), job_ids)
+        conn.commit()
+
+
+def _run_job(job: Dict[str, Any]) -> None:
+    """Run one claimed job and record its result or failure."""
+    try:
+        handler = JOB_HANDLERS.get(job["kind"])
+        if handler is None:
+            raise ValueError(f"Unknown job kind: {job['kind']}")
+        result = handler(job["payload"])
+    except Exception as e:
+        with core.get_db_connection() as conn:
+            status = job_queue.fail_job(conn.cursor(), job, str(e))
+            conn.commit()
+        log_error(f"Job {job['id']} ({job['kind']}) attempt {job['attempts']} failed, now {status}: {str(e)}")
+        return
+    with core.get_db_connection() as conn:
+        job_queue.complete_job(conn.cursor(), job["id"], result)
+        conn.commit()
+
+
+def run_worker(
+    concurrency: int = JOB_WORKER_CONCURRENCY,
+    poll_interval: float = JOB_POLL_SECONDS,
+    stop_event: Optional[threading.Event] = None,
+    drain: bool = False
+) -> None:
+    """Process queued jobs until stop_event is set.
+
+    Up to concurrency jobs run at once. Running jobs send a heartbeat, and
+    jobs whose worker died are picked up again, so a crashed or killed
+    worker resumes where it left off on the next start. With drain set the
+    worker exits once nothing is runnable; retries still waiting out their
+    backoff stay queued.
+    """
+    init_jobs_db()
+    stop_event = stop_event or threading.Event()
+    running = {}
+    last_maintenance = 0.0
+    log_info(f"Job worker started with concurrency {concurrency}")
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="lore-job") as executor:
+        while not stop_event.is_set():
+            now = time.time()
+            if now - last_maintenance >= JOB_HEARTBEAT_SECONDS:
+                _heartbeat(list(running.values()))
+                _requeue_stale()
+                last_maintenance = now
+
+            while len(running) < concurrency:
+                job = _claim()
+                if job is None:
+                    break
+                running[executor.submit(_run_job, job)] = job["id"]
+
+            if not running:
+                if drain:
+                    break
+                stop_event.wait(poll_interval)
+                continue
+            done, _ = wait(list(running), timeout=poll_interval, return_when=FIRST_COMPLETED)
+            for future in done:
+                running.pop(future)
+    log_info("Job worker stopped")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the LoreA background job worker.")
+    parser.add_argument("--concurrency", type=int, default=JOB_WORKER_CONCURRENCY)
+    parser.add_argument("--poll-interval", type=float, default=JOB_POLL_SECONDS)
+    parser.add_argument("--drain", action="store_true", help="Exit once the queue is empty")
+    args = parser.parse_args()
+    core.init_db()
+    try:
+        run_worker(concurrency=args.concurrency, poll_interval=args.poll_interval, drain=args.drain)
+    except KeyboardInterrupt:
+        log_info("Job worker interrupted; unfinished jobs will be resumed on the next start")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+import bisect
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from ..config.settings import METRICS_LATENCY_BUCKETS
+
+# Prometheus text exposition format served by /metrics
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs: Sequence[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    """A named metric with one series per combination of label values."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.series: Dict[Tuple[str, ...], Any] = {}
+        _registry.append(self)
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def reset(self) -> None:
+        with self.lock:
+            self.series.clear()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """A value that only goes up."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        with self.lock:
+            self.series[key] = self.series.get(key, 0) + amount
+
+    def value(self, **labels: Any) -> float:
+        with self.lock:
+            return self.series.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        with self.lock:
+            series = sorted(self.series.items())
+        lines = self.header()
+        for key, value in series:
+            lines.append(f"{self.name}{_format_labels(list(zip(self.labelnames, key)))} {_format_value(value)}")
+        return lines
+
+
+class _HistogramSeries:
+    __slots__ = ("buckets", "count", "total", "maximum")
+
+    def __init__(self, size: int) -> None:
+        self.buckets = [0] * size
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+
+class Histogram(_Metric):
+    """Observations counted into fixed latency buckets.
+
+    Quantiles are estimated from the buckets the way Prometheus'
+    histogram_quantile does, interpolating inside the bucket the rank
+    falls in, so they are only as fine as the bucket bounds.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = METRICS_LATENCY_BUCKETS
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.bounds = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.bounds, value)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = _HistogramSeries(len(self.bounds))
+            series.buckets[index] += 1
+            series.count += 1
+            series.total += value
+            series.maximum = max(series.maximum, value)
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        """Observe the wall time of a block or, as a decorator, of each call.
+
+        The time is recorded whether or not the block raises; failures are
+        also counted in lore_failures_total under the histogram's name.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            FAILURES.inc(metric=self.name)
+            raise
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _quantile(self, series: _HistogramSeries, q: float) -> Optional[float]:
+        if not series.count:
+            return None
+        rank = q * series.count
+        cumulative = 0
+        for index, (bound, count) in enumerate(zip(self.bounds, series.buckets)):
+            if count and cumulative + count >= rank:
+                lower = self.bounds[index - 1] if index else 0.0
+                upper = min(bound, series.maximum)
+                if upper <= lower:
+                    return upper
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return series.maximum
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Count, mean, p50, p99 and max per series."""
+        with self.lock:
+            series = sorted(self.series.items())
+            rows = []
+            for key, data in series:
+                rows.append({
+                    "metric": self.name,
+                    "labels": ", ".join(f"{name}={value}" for name, value in zip(self.labelnames, key)),
+                    "count": data.count,
+                    "mean_seconds": data.total / data.count if data.count else None,
+                    "p50_seconds": self._quantile(data, 0.5),
+                    "p99_seconds": self._quantile(data, 0.99),
+                    "max_seconds": data.maximum
+                })
+        return rows
+
+    def render(self) -> List[str]:
+        with self.lock:
+            series = [(key, list(data.buckets), data.count, data.total) for key, data in sorted(self.series.items())]
+        lines = self.header()
+        for key, buckets, count, total in series:
+            pairs = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket in zip(self.bounds, buckets):
+                cumulative += bucket
+                lines.append(f"{self.name}_bucket{_format_labels(pairs + [('le', _format_value(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(pairs)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(pairs)} {count}")
+        return lines
+
+
+_registry: List[_Metric] = []
+
+FAILURES = Counter("lore_failures_total", "Timed operations that raised, by histogram name.", ("metric",))
+
+EMBEDDING_SECONDS = Histogram(
+    "lore_embedding_request_seconds",
+    "Embeddings API requests, including retries, by single or batch input.",
+    ("kind",)
+)
+EMBEDDING_INPUTS = Counter("lore_embedding_inputs_total", "Texts sent for embedding.")
+CHAT_FIRST_TOKEN_SECONDS = Histogram(
+    "lore_chat_time_to_first_token_seconds",
+    "Time from a streamed chat request until its first chunk arrives."
+)
+CHAT_SECONDS = Histogram(
+    "lore_chat_completion_seconds",
+    "Chat completions from request until the full response, streamed or not.",
+    ("mode",)
+)
+CHAT_TOKENS = Counter("lore_chat_tokens_total", "Chat tokens reported by the API, by prompt or completion.", ("kind",))
+RETRIEVAL_SECONDS = Histogram("lore_retrieval_scoring_seconds", "Scoring stored vectors against a prompt embedding.")
+RETRIEVAL_VECTORS = Counter("lore_retrieval_vectors_scored_total", "Entry and chunk vectors scored by retrieval.")
+SQLITE_SECONDS = Histogram(
+    "lore_sqlite_query_seconds",
+    "SQLite statements executed through the shared connections, by calling function.",
+    ("function",)
+)
+LINK_SECONDS = Histogram("lore_link_computation_seconds", "Scanning one entry's content for links to other titles.")
+IMPORT_BATCH_SECONDS = Histogram("lore_import_batch_seconds", "Batched entry imports, from link computation to commit.")
+IMPORT_ENTRIES = Counter("lore_import_entries_total", "Entries handled by batched imports, by result.", ("status",))
+
+
+def _observe_statement(started: float) -> None:
+    # Two frames up is the function that called execute on the cursor or connection
+    SQLITE_SECONDS.observe(time.perf_counter() - started, function=sys._getframe(2).f_code.co_name)
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that records each statement's execution time.
+
+    Only execute and executemany are timed; rows a SELECT leaves for
+    fetchall are read outside the measurement.
+    """
+
+    def execute(self, sql: str, parameters: Any = ()) -> "TimedCursor":
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _observe_statement(started)
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> "TimedCursor":
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _observe_statement(started)
+
+
+class TimedConnection(sqlite3.Connection):
+    """sqlite3.connect factory whose cursors are TimedCursors."""
+
+    def cursor(self, factory: Any = TimedCursor) -> sqlite3.Cursor:
+        return super().cursor(factory)
+
+    def execute(self, sql: str, parameters: Any = ()) -> sqlite3.Cursor:
+        started = time.perf_counter()
+        try:
+            return super().cursor().execute(sql, parameters)
+        finally:
+            _observe_statement(started)
+
+
+def record_chat_usage(response: Any) -> None:
+    """Count the prompt and completion tokens of a response or final stream chunk."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    for kind in ("prompt", "completion"):
+        tokens = getattr(usage, f"{kind}_tokens", None)
+        if isinstance(tokens, int):
+            CHAT_TOKENS.inc(tokens, kind=kind)
+
+
+def timed_stream(stream: Any, started: float) -> Iterator[Any]:
+    """Pass a chat stream through, recording time to first chunk and, if it
+    is read to the end, the total time. started is when the request began."""
+    first = True
+    for chunk in stream:
+        if first:
+            CHAT_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - started)
+            first = False
+        record_chat_usage(chunk)
+        yield chunk
+    CHAT_SECONDS.observe(time.perf_counter() - started, mode="stream")
+
+
+async def atimed_stream(stream: Any, started: float) -> AsyncIterator[Any]:
+    """Async counterpart of timed_stream."""
+    first = True
+    async for chunk in stream:
+        if first:
+            CHAT_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - started)
+            first = False
+        record_chat_usage(chunk)
+        yield chunk
+    CHAT_SECONDS.observe(time.perf_counter() - started, mode="stream")
+
+
+def render_metrics() -> str:
+    """Every metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def get_metrics_summary() -> List[Dict[str, Any]]:
+    """One row per histogram series with its count, mean, p50, p99 and max."""
+    return [row for metric in _registry if isinstance(metric, Histogram) for row in metric.summary()]
+
+
+def reset_metrics() -> None:
+    """Forget every observation, e.g. before measuring a change."""
+    for metric in _registry:
+        metric.reset()
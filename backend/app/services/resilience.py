@@ -0,0 +1,328 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+import numpy as np
+import openai
+
+from ..config.settings import (
+    OPENAI_CALL_POLICIES,
+    RETRY_BACKOFF_BASE_SECONDS,
+    RETRY_BACKOFF_MAX_SECONDS,
+    CIRCUIT_BREAKER_FAILURES,
+    CIRCUIT_BREAKER_RESET_SECONDS,
+    HEDGE_MIN_SAMPLES,
+    LATENCY_WINDOW
+)
+from ..logging.logger import log_warning
+
+T = TypeVar("T")
+
+# Statuses worth another attempt; other 4xx responses will not change on retry
+_RETRYABLE_STATUSES = {408, 409, 429}
+
+# Hedged duplicates run here so the caller's thread can wait on either attempt
+_hedge_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="openai-hedge")
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the provider while its circuit is open."""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether an error is a transient provider fault worth retrying."""
+    if isinstance(error, (openai.APIConnectionError, TimeoutError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in _RETRYABLE_STATUSES or error.status_code >= 500
+    return False
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the provider asked us to wait, from a Retry-After header."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff_delay(attempt: int, error: BaseException) -> float:
+    """Full-jitter exponential backoff, never shorter than a Retry-After."""
+    ceiling = min(RETRY_BACKOFF_MAX_SECONDS, RETRY_BACKOFF_BASE_SECONDS * (2 ** (attempt - 1)))
+    delay = random.uniform(0, ceiling)
+    retry_after = _retry_after(error)
+    return max(delay, retry_after) if retry_after is not None else delay
+
+
+class _CallState:
+    """Latency window, counters and circuit breaker for one call type."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.counters = {
+            name: 0 for name in
+            ("calls", "successes", "failures", "retries", "timeouts", "hedges", "hedge_wins", "rejected")
+        }
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+
+    def count(self, name: str) -> None:
+        with self.lock:
+            self.counters[name] += 1
+
+    def allow(self) -> bool:
+        """Let a call through unless the circuit is open.
+
+        Once the reset period has passed the circuit is half open: a single
+        trial call goes through and its outcome closes or reopens it.
+        """
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if self.trial_in_flight or time.monotonic() - self.opened_at < CIRCUIT_BREAKER_RESET_SECONDS:
+                self.counters["rejected"] += 1
+                return False
+            self.trial_in_flight = True
+            return True
+
+    def record_success(self, latency: float) -> None:
+        with self.lock:
+            self.latencies.append(latency)
+            self.counters["successes"] += 1
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self, provider_fault: bool) -> None:
+        with self.lock:
+            self.counters["failures"] += 1
+            self.trial_in_flight = False
+            if not provider_fault:
+                # The provider answered; a bad request says nothing about its health
+                self.consecutive_failures = 0
+                self.opened_at = None
+                return
+            self.consecutive_failures += 1
+            if self.opened_at is not None or self.consecutive_failures >= CIRCUIT_BREAKER_FAILURES:
+                self.opened_at = time.monotonic()
+
+    def release_trial(self) -> None:
+        """Free the half-open trial of a call that ended without an outcome,
+        such as a cancelled one, so a later call can make the trial."""
+        with self.lock:
+            self.trial_in_flight = False
+
+    def state(self) -> str:
+        with self.lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at < CIRCUIT_BREAKER_RESET_SECONDS:
+                return "open"
+            return "half_open"
+
+    def percentile(self, q: float, min_samples: int = 1) -> Optional[float]:
+        with self.lock:
+            if len(self.latencies) < max(min_samples, 1):
+                return None
+            return float(np.percentile(np.fromiter(self.latencies, dtype=np.float64), q))
+
+
+_states: Dict[str, _CallState] = {}
+_states_lock = threading.Lock()
+
+
+def _state(call_type: str) -> _CallState:
+    with _states_lock:
+        if call_type not in _states:
+            _states[call_type] = _CallState()
+        return _states[call_type]
+
+
+def _policy(call_type: str) -> Dict[str, Any]:
+    if call_type not in OPENAI_CALL_POLICIES:
+        raise ValueError(f"No call policy for {call_type}")
+    return OPENAI_CALL_POLICIES[call_type]
+
+
+def _hedge_delay(state: _CallState, timeout: float) -> Optional[float]:
+    """Seconds to wait before hedging, or None when there is no useful p95 yet."""
+    p95 = state.percentile(95, HEDGE_MIN_SAMPLES)
+    if p95 is None or p95 >= timeout:
+        return None
+    return p95
+
+
+def _hedged_call(request: Callable[[float], T], timeout: float, state: _CallState) -> T:
+    """Run request, starting an identical second one if the first outlives p95.
+
+    The first attempt to succeed wins; the slower one finishes in the
+    background and is discarded.
+    """
+    hedge_after = _hedge_delay(state, timeout)
+    if hedge_after is None:
+        return request(timeout)
+    primary = _hedge_executor.submit(request, timeout)
+    done, _ = wait([primary], timeout=hedge_after)
+    if done:
+        return primary.result()
+    state.count("hedges")
+    backup = _hedge_executor.submit(request, timeout - hedge_after)
+    pending = {primary, backup}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                if future is backup:
+                    state.count("hedge_wins")
+                return future.result()
+            error = future.exception()
+    raise error
+
+
+def call_with_resilience(call_type: str, request: Callable[[float], T]) -> T:
+    """Call the provider under the deadline, retry, hedge and circuit breaker
+    policy of call_type.
+
+    request receives the per-attempt timeout in seconds and should pass it
+    on to the client. Transient failures are retried with jittered backoff
+    while the deadline allows; other errors are raised at once. Raises
+    CircuitOpenError without calling request while the circuit is open.
+    """
+    policy = _policy(call_type)
+    state = _state(call_type)
+    deadline = time.monotonic() + policy["deadline"]
+    attempt = 0
+    while True:
+        attempt += 1
+        if not state.allow():
+            raise CircuitOpenError(f"OpenAI {call_type} calls are failing; retry in a few seconds")
+        timeout = min(policy["timeout"], deadline - time.monotonic())
+        state.count("calls")
+        started = time.monotonic()
+        try:
+            if policy.get("hedge"):
+                result = _hedged_call(request, timeout, state)
+            else:
+                result = request(timeout)
+        except Exception as e:
+            retryable = is_retryable(e)
+            state.record_failure(retryable)
+            if isinstance(e, (openai.APITimeoutError, TimeoutError)):
+                state.count("timeouts")
+            delay = _backoff_delay(attempt, e)
+            if not retryable or attempt >= policy["max_attempts"] or time.monotonic() + delay >= deadline:
+                raise
+            state.count("retries")
+            log_warning(f"OpenAI {call_type} attempt {attempt} failed, retrying in {delay:.2f}s: {type(e).__name__}: {str(e)}")
+            time.sleep(delay)
+            continue
+        except BaseException:
+            # Cancelled or interrupted: says nothing about the provider
+            state.release_trial()
+            raise
+        state.record_success(time.monotonic() - started)
+        return result
+
+
+async def _ahedged_call(request: Callable[[float], Awaitable[T]], timeout: float, state: _CallState) -> T:
+    """Async counterpart of _hedged_call; the losing attempt is cancelled."""
+    hedge_after = _hedge_delay(state, timeout)
+    primary = asyncio.ensure_future(asyncio.wait_for(request(timeout), timeout))
+    if hedge_after is None:
+        return await primary
+    done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+    if done:
+        return primary.result()
+    state.count("hedges")
+    remaining = timeout - hedge_after
+    backup = asyncio.ensure_future(asyncio.wait_for(request(remaining), remaining))
+    pending = {primary, backup}
+    error = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is backup:
+                        state.count("hedge_wins")
+                    return task.result()
+                error = task.exception()
+    finally:
+        for task in pending:
+            task.cancel()
+    raise error
+
+
+async def acall_with_resilience(call_type: str, request: Callable[[float], Awaitable[T]]) -> T:
+    """Async counterpart of call_with_resilience; timeouts are also enforced
+    locally so a stalled attempt is abandoned at its timeout."""
+    policy = _policy(call_type)
+    state = _state(call_type)
+    deadline = time.monotonic() + policy["deadline"]
+    attempt = 0
+    while True:
+        attempt += 1
+        if not state.allow():
+            raise CircuitOpenError(f"OpenAI {call_type} calls are failing; retry in a few seconds")
+        timeout = min(policy["timeout"], deadline - time.monotonic())
+        state.count("calls")
+        started = time.monotonic()
+        try:
+            if policy.get("hedge"):
+                result = await _ahedged_call(request, timeout, state)
+            else:
+                result = await asyncio.wait_for(request(timeout), timeout)
+        except Exception as e:
+            retryable = is_retryable(e)
+            state.record_failure(retryable)
+            if isinstance(e, (openai.APITimeoutError, TimeoutError)):
+                state.count("timeouts")
+            delay = _backoff_delay(attempt, e)
+            if not retryable or attempt >= policy["max_attempts"] or time.monotonic() + delay >= deadline:
+                raise
+            state.count("retries")
+            log_warning(f"OpenAI {call_type} attempt {attempt} failed, retrying in {delay:.2f}s: {type(e).__name__}: {str(e)}")
+            await asyncio.sleep(delay)
+            continue
+        except BaseException:
+            # Cancelled or interrupted: says nothing about the provider
+            state.release_trial()
+            raise
+        state.record_success(time.monotonic() - started)
+        return result
+
+
+def get_resilience_metrics() -> Dict[str, Dict[str, Any]]:
+    """Counters, latency percentiles and circuit state per call type."""
+    metrics = {}
+    for call_type in OPENAI_CALL_POLICIES:
+        state = _state(call_type)
+        with state.lock:
+            counters = dict(state.counters)
+            samples = len(state.latencies)
+        metrics[call_type] = {
+            **counters,
+            "circuit": state.state(),
+            "samples": samples,
+            "p50_seconds": state.percentile(50),
+            "p95_seconds": state.percentile(95),
+            "p99_seconds": state.percentile(99)
+        }
+    return metrics
+
+
+def reset_resilience_state() -> None:
+    """Forget recorded latencies, counters and open circuits."""
+    with _states_lock:
+        _states.clear()
@@ -0,0 +1,251 @@
+import json
+import time
+from typing import Any, BinaryIO, Dict, List, Optional, Union
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Optional: snapshots are unavailable without pyarrow
+    pa = None
+    pq = None
+
+from ..config.settings import SNAPSHOT_BATCH_SIZE
+from ..logging.logger import log_info, log_warning
+from . import core
+from .dedupe import minhash_signature, lsh_buckets
+from .embedding_worker import notify_pending_embeddings
+
+SNAPSHOT_VERSION = "1"
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise RuntimeError("Snapshots need pyarrow; install it from requirements.txt")
+
+
+def _schema(dim: int, metadata: Dict[str, str]) -> "pa.Schema":
+    vector = pa.list_(pa.float32(), dim)
+    chunk = pa.struct([
+        ("field", pa.string()),
+        ("chunk_index", pa.int32()),
+        ("text", pa.string()),
+        ("embedding", vector)
+    ])
+    return pa.schema([
+        ("title", pa.string()),
+        ("template", pa.string()),
+        ("content", pa.string()),
+        ("fields", pa.string()),
+        ("tags", pa.list_(pa.string())),
+        ("linked_entries", pa.list_(pa.string())),
+        ("minhash", pa.binary()),
+        ("embedding", vector),
+        ("chunks", pa.list_(chunk))
+    ], metadata=metadata)
+
+
+def _vectors(blobs: List[Optional[bytes]], dim: int) -> "pa.FixedSizeListArray":
+    """A fixed-size list column from float32 BLOBs; None becomes a null vector."""
+    present = [blob is not None for blob in blobs]
+    flat = np.frombuffer(b"".join(blob if blob is not None else bytes(4 * dim) for blob in blobs), dtype=np.float32)
+    return pa.FixedSizeListArray.from_arrays(pa.array(flat, type=pa.float32()), dim, mask=pa.array(np.logical_not(present)))
+
+
+def _vector_view(column: "pa.Array", dim: int) -> np.ndarray:
+    """(rows, dim) float32 view of a fixed-size list column, without copying
+    unless null vectors left null values in it."""
+    values = column.values.slice(column.offset * dim, len(column) * dim)
+    if values.null_count:
+        values = values.fill_null(0.0)
+    return values.to_numpy(zero_copy_only=True).reshape(len(column), dim)
+
+
+def _record_batch(cursor, rows: List[tuple], model: str, dim: int, schema: "pa.Schema") -> "pa.RecordBatch":
+    ids = [row[0] for row in rows]
+    cursor.execute(
+        'SELECT lore_id, field, chunk_index, text, embedding FROM lore_chunks '
+        'WHERE lore_id BETWEEN ? AND ? AND embedding_model = ? AND embedding_dim = ? '
+        'ORDER BY lore_id, field, chunk_index',
+        (ids[0], ids[-1], model, dim)
+    )
+    chunks_by_entry: Dict[int, List[tuple]] = {}
+    for lore_id, field, chunk_index, text, embedding in cursor.fetchall():
+        chunks_by_entry.setdefault(lore_id, []).append((field, chunk_index, text, embedding))
+    offsets = [0]
+    chunk_rows = []
+    for lore_id in ids:
+        chunk_rows.extend(chunks_by_entry.get(lore_id, []))
+        offsets.append(len(chunk_rows))
+    chunks = pa.StructArray.from_arrays([
+        pa.array([c[0] for c in chunk_rows], type=pa.string()),
+        pa.array([c[1] for c in chunk_rows], type=pa.int32()),
+        pa.array([c[2] for c in chunk_rows], type=pa.string()),
+        _vectors([c[3] for c in chunk_rows], dim)
+    ], fields=list(schema.field("chunks").type.value_type))
+    return pa.RecordBatch.from_arrays([
+        pa.array([row[1] for row in rows], type=pa.string()),
+        pa.array([row[2] for row in rows], type=pa.string()),
+        pa.array([row[3] for row in rows], type=pa.string()),
+        pa.array([row[4] or "{}" for row in rows], type=pa.string()),
+        pa.array([json.loads(row[5]) if row[5] else [] for row in rows], type=pa.list_(pa.string())),
+        pa.array([json.loads(row[6]) if row[6] else [] for row in rows], type=pa.list_(pa.string())),
+        pa.array([row[7] for row in rows], type=pa.binary()),
+        _vectors([row[8] if row[9] else None for row in rows], dim),
+        pa.ListArray.from_arrays(pa.array(offsets, type=pa.int32()), chunks)
+    ], schema=schema)
+
+
+def export_snapshot(destination: Union[str, BinaryIO], batch_size: int = SNAPSHOT_BATCH_SIZE) -> Dict[str, Any]:
+    """Write every entry, with its vectors and MinHash signature, to a Parquet
+    file, given as a path or a binary file object.
+
+    Vectors of the active embedding space are stored as fixed-size float32
+    lists, entry vectors in 'embedding' and chunk vectors inside 'chunks';
+    entries without one (pending, failed or from another space) get a null
+    vector. The space goes in the schema metadata. Rows are read and
+    written batch_size at a time. Returns the entry count and space.
+    """
+    _require_pyarrow()
+    space = core.get_embedding_space()
+    entries = 0
+    with core.get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT embedding_dim FROM lore WHERE embedding_status = 'ready' AND embedding_model = ? LIMIT 1",
+            (space["model"],)
+        )
+        row = cursor.fetchone()
+        dim = space.get("dimensions") or (row[0] if row else 1)
+        schema = _schema(dim, {
+            "lorea.snapshot_version": SNAPSHOT_VERSION,
+            "lorea.embedding_model": space["model"],
+            "lorea.embedding_dimensions": str(space.get("dimensions") or ""),
+            "lorea.vector_dim": str(dim),
+            "lorea.created_at": str(time.time())
+        })
+        rows_cursor = conn.cursor()
+        rows_cursor.execute('''
+            SELECT id, title, template, content, fields, tags, linked_entries, minhash, embedding,
+                   embedding_status = 'ready' AND embedding_model = ? AND embedding_dim = ?
+            FROM lore ORDER BY id
+        ''', (space["model"], dim))
+        with pq.ParquetWriter(destination, schema, compression="zstd") as writer:
+            while True:
+                rows = rows_cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                writer.write_batch(_record_batch(cursor, rows, space["model"], dim, schema))
+                entries += len(rows)
+    log_info(f"Wrote a snapshot of {entries} entries")
+    return {"entries": entries, "model": space["model"], "dimensions": dim}
+
+
+def import_snapshot(source: Union[str, BinaryIO], replace: bool = False, batch_size: int = SNAPSHOT_BATCH_SIZE) -> Dict[str, Any]:
+    """Restore entries from a Parquet snapshot, given as a path or a seekable
+    binary file object, in one transaction.
+
+    When the snapshot's embedding space is the active one, its entry and
+    chunk vectors are stored as they are, read from the Arrow buffers
+    without copying, and nothing is embedded. Otherwise the entries are
+    saved as pending for the background embedder. Entries whose title
+    already exists are skipped, unless replace clears the world first.
+    The shared vector store is rebuilt once at the end instead of
+    replaying every insert. Returns counts per status and whether the
+    snapshot's vectors were reused.
+    """
+    _require_pyarrow()
+    parquet = pq.ParquetFile(source)
+    metadata = {key.decode(): value.decode() for key, value in (parquet.schema_arrow.metadata or {}).items()}
+    if "lorea.snapshot_version" not in metadata:
+        raise ValueError("Not a LoreA snapshot")
+    dim = int(metadata["lorea.vector_dim"])
+    snapshot_space = {
+        "model": metadata["lorea.embedding_model"],
+        "dimensions": int(metadata["lorea.embedding_dimensions"]) if metadata["lorea.embedding_dimensions"] else None
+    }
+    space = core.get_embedding_space()
+    reuse_vectors = snapshot_space == space
+    if not reuse_vectors:
+        log_warning(f"Snapshot vectors are from {snapshot_space['model']}, not the active {space['model']}; entries will be re-embedded")
+
+    counts = {"inserted": 0, "pending": 0, "skipped": 0}
+    with core.get_db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            if replace:
+                for table in ('lore', 'lore_lsh', 'lore_chunks', 'lore_shadow', 'lore_chunks_shadow'):
+                    cursor.execute(f'DELETE FROM {table}')
+            cursor.execute('SELECT title FROM lore')
+            existing = {row[0] for row in cursor.fetchall()}
+            for batch in parquet.iter_batches(batch_size=batch_size):
+                _import_batch(cursor, batch, dim, space, reuse_vectors, existing, counts)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    if reuse_vectors and core.VECTOR_STORE_ENABLED:
+        try:
+            core.compact_vector_store()
+        except OSError as e:
+            log_warning(f"Could not rebuild the vector store after the import; searches will rebuild it: {str(e)}")
+    if counts["pending"]:
+        notify_pending_embeddings()
+    log_info(f"Imported a snapshot: {counts}")
+    return {**counts, "reused_vectors": reuse_vectors}
+
+
+def _import_batch(cursor, batch: "pa.RecordBatch", dim: int, space: Dict[str, Any], reuse_vectors: bool, existing: set, counts: Dict[str, int]) -> None:
+    titles = batch.column("title").to_pylist()
+    templates = batch.column("template").to_pylist()
+    contents = batch.column("content").to_pylist()
+    fields = batch.column("fields").to_pylist()
+    tags = batch.column("tags").to_pylist()
+    links = batch.column("linked_entries").to_pylist()
+    minhashes = batch.column("minhash").to_pylist()
+    embedding_column = batch.column("embedding")
+    vectors = _vector_view(embedding_column, dim)
+    has_vector = np.asarray(embedding_column.is_valid()) if reuse_vectors else np.zeros(len(batch), dtype=bool)
+    chunk_column = batch.column("chunks")
+    chunk_offsets = chunk_column.offsets.to_numpy()
+    chunk_values = chunk_column.values
+    chunk_fields = chunk_values.field("field").to_pylist()
+    chunk_indexes = chunk_values.field("chunk_index").to_pylist()
+    chunk_texts = chunk_values.field("text").to_pylist()
+    chunk_vectors = _vector_view(chunk_values.field("embedding"), dim)
+
+    chunk_rows = []
+    lsh_rows = []
+    for i, title in enumerate(titles):
+        if title in existing:
+            counts["skipped"] += 1
+            continue
+        existing.add(title)
+        embedded = bool(has_vector[i])
+        signature = np.frombuffer(minhashes[i], dtype=np.uint64) if minhashes[i] else minhash_signature(contents[i])
+        cursor.execute(
+            """INSERT INTO lore
+               (title, content, tags, template, fields, embedding, linked_entries, embedding_status, embedding_model, embedding_dim, minhash)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (title, contents[i], json.dumps(tags[i] or []), templates[i], fields[i] or "{}",
+             memoryview(vectors[i]) if embedded else b"", json.dumps(links[i] or []),
+             "ready" if embedded else "pending", space["model"] if embedded else None, dim if embedded else None,
+             signature.tobytes())
+        )
+        lore_id = cursor.lastrowid
+        lsh_rows.extend((band, bucket, lore_id) for band, bucket in lsh_buckets(signature))
+        if embedded:
+            for j in range(chunk_offsets[i], chunk_offsets[i + 1]):
+                chunk_rows.append((
+                    lore_id, chunk_fields[j], chunk_indexes[j], chunk_texts[j],
+                    memoryview(chunk_vectors[j]), space["model"], dim
+                ))
+        counts["inserted" if embedded else "pending"] += 1
+    cursor.executemany('INSERT INTO lore_lsh (band, bucket, lore_id) VALUES (?, ?, ?)', lsh_rows)
+    cursor.executemany(
+        '''INSERT INTO lore_chunks (lore_id, field, chunk_index, text, embedding, embedding_model, embedding_dim)
+           VALUES (?, ?, ?, ?, ?, ?, ?)''',
+        chunk_rows
+    )
@@ -0,0 +1,343 @@
+import os
+import sqlite3
+import struct
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+try:
+    import fcntl
+except ImportError:  # Optional: without it only threads of one process are serialized
+    fcntl = None
+
+# File layout: a 4 KiB header, then fixed-size rows that each start on a
+# 64-byte boundary with the float32 vector, followed by its lore id and
+# chunk id. Tombstoned rows keep their place with a lore id of -1.
+_MAGIC = b"LOREVEC1"
+_HEADER = struct.Struct("<8s32sIIQQQ")  # magic, db token, dim, model length, rows, generation, log position
+_HEADER_BYTES = 4096
+_MODEL_OFFSET = 128
+_ROW_ALIGN = 64
+_LOOKUP_BATCH = 500
+_APPEND_BATCH = 1000
+
+# Any write to a vector logs the key it touched; the store replays the log
+_VECTOR_TRIGGERS = {
+    "lore_vectors_insert": ("AFTER INSERT ON lore", ["(NEW.id, -1)"]),
+    "lore_vectors_delete": ("AFTER DELETE ON lore", ["(OLD.id, -1)"]),
+    "lore_vectors_update": (
+        "AFTER UPDATE OF embedding, embedding_status, embedding_model, embedding_dim ON lore",
+        ["(NEW.id, -1)"]
+    ),
+    "lore_chunk_vectors_insert": ("AFTER INSERT ON lore_chunks", ["(NEW.lore_id, NEW.id)"]),
+    "lore_chunk_vectors_delete": ("AFTER DELETE ON lore_chunks", ["(OLD.lore_id, OLD.id)"]),
+    "lore_chunk_vectors_update": ("AFTER UPDATE ON lore_chunks", ["(OLD.lore_id, OLD.id)", "(NEW.lore_id, NEW.id)"])
+}
+
+
+def init_vector_log(cursor: sqlite3.Cursor) -> None:
+    """Create the vector change log and the triggers that fill it.
+
+    Every insert, delete and embedding change of an entry or chunk logs
+    its key, (lore id, -1) for an entry vector and (lore id, chunk id)
+    for a chunk, whichever code path made it. The token identifies this
+    database so a store file built from another one is never trusted.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS vector_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            lore_id INTEGER NOT NULL,
+            chunk_id INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS vector_log_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            token TEXT NOT NULL
+        )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO vector_log_state (id, token) VALUES (1, lower(hex(randomblob(16))))")
+    for name, (event, keys) in _VECTOR_TRIGGERS.items():
+        inserts = "".join(f"INSERT INTO vector_changes (lore_id, chunk_id) VALUES {key};" for key in keys)
+        cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {inserts} END')
+
+
+def _log_state(cursor: sqlite3.Cursor) -> Tuple[str, int]:
+    """(database token, log position); the position survives trimming."""
+    cursor.execute('SELECT token FROM vector_log_state WHERE id = 1')
+    token = cursor.fetchone()[0]
+    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'vector_changes'")
+    row = cursor.fetchone()
+    return token, row[0] if row else 0
+
+
+def row_dtype(dim: int) -> np.dtype:
+    """Record type of one stored row for vectors of dim floats."""
+    itemsize = -(-(4 * dim + 16) // _ROW_ALIGN) * _ROW_ALIGN
+    return np.dtype({
+        "names": ["vector", "lore_id", "chunk_id"],
+        "formats": [(np.float32, (dim,)), "<i8", "<i8"],
+        "offsets": [0, 4 * dim, 4 * dim + 8],
+        "itemsize": itemsize
+    })
+
+
+def _to_rows(dim: int, keyed: List[Tuple[int, int, bytes]]) -> npt.NDArray:
+    """Rows for (lore id, chunk id, embedding BLOB) triples, vectors unit-normalized
+    so scoring is a single matrix-vector product."""
+    rows = np.zeros(len(keyed), dtype=row_dtype(dim))
+    if not keyed:
+        return rows
+    vectors = np.frombuffer(b"".join(blob for _, _, blob in keyed), dtype=np.float32).reshape(len(keyed), dim)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    rows["vector"] = vectors / norms
+    rows["lore_id"] = [lore_id for lore_id, _, _ in keyed]
+    rows["chunk_id"] = [chunk_id for _, chunk_id, _ in keyed]
+    return rows
+
+
+def load_rows(cursor: sqlite3.Cursor, model: str, dim: int) -> npt.NDArray:
+    """Every scoreable vector of a space, read straight from SQLite: chunk
+    vectors and the whole-entry vectors of embedded entries."""
+    cursor.execute(
+        'SELECT lore_id, id, embedding FROM lore_chunks WHERE embedding_model = ? AND embedding_dim = ?',
+        (model, dim)
+    )
+    keyed = cursor.fetchall()
+    cursor.execute(
+        "SELECT id, -1, embedding FROM lore WHERE embedding_status = 'ready' AND embedding_model = ? AND embedding_dim = ?",
+        (model, dim)
+    )
+    keyed += cursor.fetchall()
+    return _to_rows(dim, keyed)
+
+
+def _current_rows(
+    cursor: sqlite3.Cursor,
+    model: str,
+    dim: int,
+    entry_ids: List[int],
+    chunk_ids: List[int]
+) -> npt.NDArray:
+    """Rows for the given keys as they stand now; keys whose vector is gone,
+    pending or in another space yield nothing."""
+    keyed = []
+    for start in range(0, len(chunk_ids), _LOOKUP_BATCH):
+        batch = chunk_ids[start:start + _LOOKUP_BATCH]
+        cursor.execute(f'''
+            SELECT lore_id, id, embedding FROM lore_chunks
+            WHERE id IN ({",".join("?" * len(batch))}) AND embedding_model = ? AND embedding_dim = ?
+        ''', batch + [model, dim])
+        keyed += cursor.fetchall()
+    for start in range(0, len(entry_ids), _LOOKUP_BATCH):
+        batch = entry_ids[start:start + _LOOKUP_BATCH]
+        cursor.execute(f'''
+            SELECT id, -1, embedding FROM lore
+            WHERE id IN ({",".join("?" * len(batch))}) AND embedding_status = 'ready'
+            AND embedding_model = ? AND embedding_dim = ?
+        ''', batch + [model, dim])
+        keyed += cursor.fetchall()
+    return _to_rows(dim, keyed)
+
+
+def _read_header(f) -> Optional[Dict[str, Any]]:
+    raw = os.pread(f.fileno(), _HEADER_BYTES, 0)
+    if len(raw) < _HEADER_BYTES:
+        return None
+    magic, token, dim, model_len, rows, generation, position = _HEADER.unpack_from(raw)
+    if magic != _MAGIC or model_len > _HEADER_BYTES - _MODEL_OFFSET:
+        return None
+    return {
+        "token": token.rstrip(b"\0").decode("ascii"),
+        "dim": dim,
+        "model": raw[_MODEL_OFFSET:_MODEL_OFFSET + model_len].decode("utf-8"),
+        "rows": rows,
+        "generation": generation,
+        "position": position
+    }
+
+
+def _pack_header(header: Dict[str, Any]) -> bytes:
+    model = header["model"].encode("utf-8")
+    raw = bytearray(_HEADER_BYTES)
+    _HEADER.pack_into(
+        raw, 0, _MAGIC, header["token"].encode("ascii"), header["dim"], len(model),
+        header["rows"], header["generation"], header["position"]
+    )
+    raw[_MODEL_OFFSET:_MODEL_OFFSET + len(model)] = model
+    return bytes(raw)
+
+
+class VectorStore:
+    """Entry and chunk vectors of the active space in one memory-mapped file.
+
+    The file is derived from SQLite and can be deleted at any time. Every
+    process maps it read-only, so all of them share one copy in the page
+    cache instead of each loading its own matrix. Before reading, a process
+    replays the vector change log into the file under an exclusive lock:
+    touched keys are tombstoned in place and their current vectors
+    appended, then the header's row count, generation and log position are
+    written last. Readers remap when the generation or the file itself
+    changes. Compaction rewrites the file without tombstones and swaps it
+    in atomically.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.lock = threading.Lock()
+        self.mapped: Optional[Tuple[int, int]] = None  # (inode, generation) of the current view
+        self.view: Optional[npt.NDArray] = None
+        self.header: Optional[Dict[str, Any]] = None
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        with open(self.path + ".lock", "a+b") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _header_on_disk(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path, "rb") as f:
+                header = _read_header(f)
+                size = os.fstat(f.fileno()).st_size
+        except FileNotFoundError:
+            return None
+        if header is None or size < _HEADER_BYTES + header["rows"] * row_dtype(header["dim"]).itemsize:
+            return None
+        return header
+
+    def _usable(self, header: Optional[Dict[str, Any]], token: str, position: int, model: str, dim: int) -> bool:
+        return (
+            header is not None and header["token"] == token and header["model"] == model
+            and header["dim"] == dim and header["position"] <= position
+        )
+
+    def _write_file(self, cursor: sqlite3.Cursor, token: str, position: int, model: str, dim: int, generation: int) -> None:
+        """Build a fresh file from SQLite beside the store and swap it in."""
+        rows = load_rows(cursor, model, dim)
+        header = {"token": token, "dim": dim, "model": model, "rows": len(rows), "generation": generation, "position": position}
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(_pack_header(header))
+            f.write(rows.tobytes())
+        os.replace(temp_path, self.path)
+
+    def _apply_log(self, cursor: sqlite3.Cursor, header: Dict[str, Any], position: int) -> None:
+        """Replay logged changes after the header's position into the file."""
+        cursor.execute(
+            'SELECT DISTINCT lore_id, chunk_id FROM vector_changes WHERE seq > ? AND seq <= ?',
+            (header["position"], position)
+        )
+        changes = cursor.fetchall()
+        entry_ids = sorted({lore_id for lore_id, chunk_id in changes if chunk_id < 0})
+        chunk_ids = sorted({chunk_id for _, chunk_id in changes if chunk_id >= 0})
+        dtype = row_dtype(header["dim"])
+        with open(self.path, "r+b") as f:
+            if header["rows"]:
+                rows = np.memmap(f, dtype=dtype, mode="r+", offset=_HEADER_BYTES, shape=(header["rows"],))
+                stale = np.isin(rows["chunk_id"], chunk_ids) | (
+                    (rows["chunk_id"] < 0) & np.isin(rows["lore_id"], entry_ids)
+                )
+                rows["lore_id"][stale] = -1
+                rows.flush()
+                del rows
+            appended = _current_rows(cursor, header["model"], header["dim"], entry_ids, chunk_ids)
+            for start in range(0, len(appended), _APPEND_BATCH):
+                os.pwrite(
+                    f.fileno(), appended[start:start + _APPEND_BATCH].tobytes(),
+                    _HEADER_BYTES + (header["rows"] + start) * dtype.itemsize
+                )
+            # Rows past the old count only become visible with the new header
+            header = dict(header, rows=header["rows"] + len(appended), generation=header["generation"] + 1, position=position)
+            os.pwrite(f.fileno(), _pack_header(header), 0)
+
+    def sync(self, cursor: sqlite3.Cursor, model: str, dim: int) -> None:
+        """Bring the file up to date with the database for a space.
+
+        The file is rebuilt from scratch when it is missing, damaged, built
+        from another database or space, or ahead of the log (a restored
+        database).
+        """
+        token, position = _log_state(cursor)
+        header = self.header if self.mapped is not None else None
+        if self._usable(header, token, position, model, dim) and header["position"] == position and self._same_file():
+            return
+        with self.lock, self._exclusive():
+            header = self._header_on_disk()
+            if not self._usable(header, token, position, model, dim):
+                generation = header["generation"] + 1 if header else 1
+                self._write_file(cursor, token, position, model, dim, generation)
+            elif header["position"] < position:
+                self._apply_log(cursor, header, position)
+            self._remap()
+
+    def _same_file(self) -> bool:
+        """Whether the mapped view still shows the file on disk at its generation."""
+        try:
+            inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return False
+        return self.mapped is not None and self.mapped[0] == inode and self.header is not None
+
+    def _remap(self) -> None:
+        with open(self.path, "rb") as f:
+            header = _read_header(f)
+            inode = os.fstat(f.fileno()).st_ino
+            if header["rows"]:
+                view = np.memmap(f, dtype=row_dtype(header["dim"]), mode="r", offset=_HEADER_BYTES, shape=(header["rows"],))
+            else:
+                view = np.zeros(0, dtype=row_dtype(header["dim"]))
+        self.view, self.header, self.mapped = view, header, (inode, header["generation"])
+
+    def rows(self, cursor: sqlite3.Cursor, model: str, dim: int) -> npt.NDArray:
+        """Synced, zero-copy rows of the space; tombstoned rows have lore_id -1."""
+        self.sync(cursor, model, dim)
+        return self.view
+
+    def compact(self, cursor: sqlite3.Cursor, model: str, dim: int) -> Dict[str, int]:
+        """Rewrite the file without tombstones and trim the replayed log.
+
+        Readers keep their old mapping until their next sync notices the new
+        file. Returns the row counts before and after.
+        """
+        with self.lock, self._exclusive():
+            before = self._header_on_disk()
+            token, position = _log_state(cursor)
+            generation = before["generation"] + 1 if before else 1
+            self._write_file(cursor, token, position, model, dim, generation)
+            cursor.execute('DELETE FROM vector_changes WHERE seq <= ?', (position,))
+            cursor.connection.commit()
+            self._remap()
+        return {"rows_before": before["rows"] if before else 0, "rows_after": self.header["rows"]}
+
+    def stats(self) -> Dict[str, Any]:
+        """Header fields of the file on disk plus live and tombstoned row counts."""
+        header = self._header_on_disk()
+        if header is None:
+            return {"path": self.path, "exists": False}
+        dtype = row_dtype(header["dim"])
+        live = 0
+        if header["rows"]:
+            rows = np.memmap(self.path, dtype=dtype, mode="r", offset=_HEADER_BYTES, shape=(header["rows"],))
+            live = int(np.count_nonzero(rows["lore_id"] >= 0))
+            del rows
+        return {
+            "path": self.path,
+            "exists": True,
+            "model": header["model"],
+            "dimensions": header["dim"],
+            "generation": header["generation"],
+            "rows": header["rows"],
+            "live_rows": live,
+            "tombstones": header["rows"] - live,
+            "bytes": _HEADER_BYTES + header["rows"] * dtype.itemsize
+        }
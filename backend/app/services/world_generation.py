@@ -0,0 +1,38 @@
+import sqlite3
+
+# Columns whose changes are visible to readers; embedding bookkeeping is not
+_VISIBLE_COLUMNS = "title, content, tags, template, fields, linked_entries"
+
+
+def init_generation(cursor: sqlite3.Cursor) -> None:
+    """Create the world generation counter and the triggers that bump it.
+
+    The counter only ever grows: triggers on lore raise it for every
+    insert, delete and update of a visible column, whichever code path
+    made the change, and it lives outside the settings table so clearing
+    settings cannot rewind it.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS world_generation (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            generation INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('INSERT OR IGNORE INTO world_generation (id, generation) VALUES (1, 0)')
+    for name, event in (
+        ("insert", "INSERT"),
+        ("delete", "DELETE"),
+        ("update", f"UPDATE OF {_VISIBLE_COLUMNS}")
+    ):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS lore_generation_{name} AFTER {event} ON lore
+            BEGIN
+                UPDATE world_generation SET generation = generation + 1 WHERE id = 1;
+            END
+        ''')
+
+
+def current_generation(cursor: sqlite3.Cursor) -> int:
+    cursor.execute('SELECT generation FROM world_generation WHERE id = 1')
+    row = cursor.fetchone()
+    return row[0] if row else 0
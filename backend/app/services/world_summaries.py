@@ -0,0 +1,97 @@
+import json
+import math
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config.settings import WORLD_SUMMARY_MIN_CHANGES, WORLD_SUMMARY_CHANGE_RATIO
+
+
+def init_summary_table(cursor: sqlite3.Cursor) -> None:
+    """Create the world summary table if it does not exist.
+
+    entry_versions maps each covered entry id to the version and title it
+    had when the summary was written.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS world_summaries (
+            scope TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            label TEXT NOT NULL,
+            summary TEXT NOT NULL,
+            entry_versions TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        )
+    ''')
+
+
+def _summary_from_row(row: tuple) -> Dict[str, Any]:
+    return {
+        "scope": row[0],
+        "kind": row[1],
+        "label": row[2],
+        "summary": row[3],
+        "entry_versions": json.loads(row[4]),
+        "updated_at": row[5]
+    }
+
+
+def get_summary(cursor: sqlite3.Cursor, scope: str) -> Optional[Dict[str, Any]]:
+    cursor.execute(
+        'SELECT scope, kind, label, summary, entry_versions, updated_at FROM world_summaries WHERE scope = ?',
+        (scope,)
+    )
+    row = cursor.fetchone()
+    return _summary_from_row(row) if row else None
+
+
+def list_summaries(cursor: sqlite3.Cursor) -> List[Dict[str, Any]]:
+    cursor.execute('SELECT scope, kind, label, summary, entry_versions, updated_at FROM world_summaries ORDER BY kind DESC, label')
+    return [_summary_from_row(row) for row in cursor.fetchall()]
+
+
+def store_summary(
+    cursor: sqlite3.Cursor,
+    scope: str,
+    kind: str,
+    label: str,
+    summary: str,
+    entry_versions: Dict[str, Dict[str, Any]]
+) -> None:
+    cursor.execute('''
+        INSERT OR REPLACE INTO world_summaries (scope, kind, label, summary, entry_versions, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (scope, kind, label, summary, json.dumps(entry_versions), time.time()))
+
+
+def delete_summaries_except(cursor: sqlite3.Cursor, scopes: List[str]) -> int:
+    """Drop summaries of scopes that no longer exist."""
+    placeholders = ",".join("?" * len(scopes))
+    if scopes:
+        cursor.execute(f'DELETE FROM world_summaries WHERE scope NOT IN ({placeholders})', scopes)
+    else:
+        cursor.execute('DELETE FROM world_summaries')
+    return cursor.rowcount
+
+
+def diff_entries(
+    covered: Dict[str, Dict[str, Any]],
+    current: Dict[str, Dict[str, Any]]
+) -> Tuple[List[str], List[str]]:
+    """Compare a summary's covered entries with the scope's current ones.
+
+    Returns (changed, removed): ids that are new or have a different
+    version, and ids the summary covers that have left the scope.
+    """
+    changed = [
+        entry_id for entry_id, entry in current.items()
+        if entry_id not in covered or covered[entry_id]["version"] != entry["version"]
+    ]
+    removed = [entry_id for entry_id in covered if entry_id not in current]
+    return changed, removed
+
+
+def refresh_threshold(scope_size: int) -> int:
+    """Number of changed entries that makes a summary worth rewriting: a
+    share of the scope, capped at WORLD_SUMMARY_MIN_CHANGES."""
+    return max(1, min(WORLD_SUMMARY_MIN_CHANGES, math.ceil(WORLD_SUMMARY_CHANGE_RATIO * scope_size)))
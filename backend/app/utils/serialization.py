@@ -0,0 +1,19 @@
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # Optional: fall back to the standard library encoder
+    orjson = None
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def ndjson_line(obj: Any) -> bytes:
+    """One newline-terminated JSON document for an NDJSON stream."""
+    return dumps(obj) + b"\n"
@@ -1,6 +1,28 @@
-from fastapi import FastAPI
-from app.api import lore
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
+from app.api import lore, admin
+from backend.app.services.async_core import run_db, shutdown_db_executor
+from backend.app.services.core import init_db
+from backend.app.services.embedding_worker import start_embedding_worker, stop_embedding_worker
+from backend.app.services.backups import start_backup_scheduler, stop_backup_scheduler
+from backend.app.services.metrics import CONTENT_TYPE, render_metrics
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await run_db(init_db)
+    start_embedding_worker()
+    start_backup_scheduler()
+    yield
+    stop_backup_scheduler()
+    stop_embedding_worker()
+    shutdown_db_executor()
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(lore.router, prefix="/lore")
+app.include_router(admin.router, prefix="/admin")
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Counters and latency histograms in the Prometheus text format."""
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
@@ -3,6 +3,7 @@ import os
 import pdb
 from typing import Dict, Any, List, Optional
 import streamlit as st
+import io
 import json
 from PIL import Image
 import logging
@@ -13,22 +14,47 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from backend.app.services.core import (
     add_lore_to_db,
-    get_all_lore_from_db,
     delete_lore_entry_by_title,
     update_lore_entry,
+    patch_lore_entry,
+    fields_to_content,
     generate_text_from_lore,
     embed_text,
-    get_filtered_lore,
+    search_lore,
     get_setting,
     set_setting,
     init_db,
     delete_all_entries,
     delete_settings,
-    get_entries_for_export,
-    get_entries_for_markdown_export,
+    export_lore,
     generate_field_content,
-    process_template_fields  # Add this import
+    stream_field_content,
+    generate_empty_fields,
+    process_template_fields,  # Add this import
+    find_near_duplicates,
+    clear_generation_cache,
+    backfill_chunk_embeddings,
+    count_entries_missing_chunks,
+    refresh_world_summaries,
+    get_world_summaries,
+    get_embedding_status,
+    refresh_entry_embeddings,
+    get_embedding_migration,
+    get_vector_store_stats,
+    get_world_generation,
+    start_embedding_migration,
+    cancel_embedding_migration
 )
+from backend.app.services.jobs import submit_jobs, list_batches, cancel_jobs
+from backend.app.config.settings import EMBEDDING_MIGRATION_MODEL, EMBEDDING_MIGRATION_DIMENSIONS, CHUNK_BACKFILL_BATCH_SIZE
+from backend.app.services.resilience import get_resilience_metrics
+from backend.app.services.metrics import get_metrics_summary, reset_metrics
+from backend.app.services.exporters import EXPORT_FORMATS
+from backend.app.services.bulk_import import import_file
+from backend.app.services.snapshots import export_snapshot, import_snapshot
+from backend.app.services.catalog import CatalogCache, EntryCatalog
+from backend.app.services.backups import start_backup_scheduler, request_backup, get_backup_status
+from backend.app.services.embedding_worker import start_embedding_worker, notify_pending_embeddings
 
 favicon_path = os.path.join(os.path.dirname(__file__), "assets", "favicon.png")
 st.set_page_config(page_title="LoreA",
@@ -45,6 +71,20 @@ if ("initializedDB" not in st.session_state) or (st.session_state.initializedDB
     init_db()
     st.session_state.initializedDB = True
 
+# Embeds entries saved with a pending embedding; a no-op once running
+start_embedding_worker()
+# Takes scheduled and requested backups off the UI thread; a no-op once running
+start_backup_scheduler()
+
+@st.cache_resource
+def _entry_catalog_cache() -> CatalogCache:
+    """One catalog cache per server process, shared by every session."""
+    return CatalogCache()
+
+def get_entry_catalog() -> EntryCatalog:
+    """Every entry, indexed; reloaded only after the world has changed."""
+    return _entry_catalog_cache().get()
+
 
 
 # Initialize all session state variables BEFORE any UI elements
@@ -84,52 +124,50 @@ if "is_local" not in st.session_state:
     # Check if running locally (not on Streamlit Cloud)
     st.session_state.is_local = os.environ.get('STREAMLIT_BROWSER_GATHER_USAGE_STATS', '') != 'true'
 
-def import_entries_with_progress(entries, update_settings=False, sample_title=None, sample_desc=None):
-    """Import entries with progress tracking."""
-    total = len(entries)
+def import_entries_with_progress(source, total_bytes, update_settings=False, sample_title=None, sample_desc=None, defer_embedding=False):
+    """Import a JSON array or NDJSON file object, reporting progress by bytes
+    and entries. Returns the counts per status, or None if the import failed."""
     progress_text = st.empty()
     progress_bar = st.progress(0)
+    error_lines = st.empty()
+    errors = []
     
     try:
         # Update settings if provided
         if update_settings:
             progress_text.text("📝 Updating project settings...")
-            progress_bar.progress(0.1)
             st.session_state.project_title = sample_title
             st.session_state.project_description = sample_desc
             set_setting("project_title", sample_title)
             set_setting("project_description", sample_desc)
         
-        # Group entries by template
-        progress_text.text("🗂️ Organizing entries...")
-        progress_bar.progress(0.2)
-        entries_by_type = {}
-        for entry in entries:
-            template = entry["template"]
-            if template not in entries_by_type:
-                entries_by_type[template] = []
-            entries_by_type[template].append(entry)
-        
-        # Import entries with progress updates
-        completed = 0
-        for template, template_entries in entries_by_type.items():
-            progress_text.text(f"✨ Creating {template}s...")
-            for entry in template_entries:
-                add_lore_to_db(
-                    title=entry["fields"]["Name"],
-                    content=entry["fields"],
-                    tags=entry["fields"].get("Tags", []),
-                    template=entry["template"]
-                )
-                completed += 1
-                progress_bar.progress(0.2 + (0.8 * (completed / total)))
+        progress_text.text("✨ Creating entries...")
+        for progress in import_file(source, defer_embedding=defer_embedding):
+            counts = progress["counts"]
+            stored = counts["inserted"] + counts["pending"] + counts["skipped"] + counts["error"]
+            if total_bytes:
+                progress_bar.progress(min(progress["bytes_read"] / total_bytes, 1.0))
+            progress_text.text(
+                f"✨ {progress['bytes_read'] / 1024 / 1024:.1f} of {total_bytes / 1024 / 1024:.1f} MB read, "
+                f"{progress['entries']} entries parsed, {stored} processed"
+            )
+            if progress["errors"] and len(errors) < 20:
+                errors.extend(progress["errors"][:20 - len(errors)])
+                error_lines.caption("\n\n".join(
+                    f"⚠️ #{error['position']} {error['title'] or ''}: {error['detail']}" for error in errors
+                ))
         
-        progress_text.text("✅ Import complete!")
+        if counts["pending"]:
+            notify_pending_embeddings()
+        progress_text.text(
+            f"✅ Import complete! {counts['inserted'] + counts['pending']} added, "
+            f"{counts['skipped']} skipped, {counts['error']} failed."
+        )
         progress_bar.progress(1.0)
-        return True
+        return counts
     except Exception as e:
         progress_text.text(f"❌ Import failed: {str(e)}")
-        return False
+        return None
 
 # Now create the layout
 col1, col2 = st.columns([6, 1])
@@ -325,9 +363,9 @@ LOADING_PHRASES = [
     "📜 Unraveling ancient scrolls...",
 ]
 
-entries = get_all_lore_from_db()
+catalog = get_entry_catalog()
 expanded = False
-if(entries == []):
+if not catalog:
     st.markdown("""
         ### 🗺️ Welcome to LoreA
 
@@ -354,15 +392,14 @@ if(entries == []):
         if st.button("🪄 Load Sample World"):
             with st.spinner("📚 Loading sample world..."):
                 try:
-                    with open(ftue_path, 'r', encoding='utf-8') as f:
-                        sample_entries = json.load(f)
-                    
-                    success = import_entries_with_progress(
-                        sample_entries,
-                        update_settings=True,
-                        sample_title="Chroma",
-                        sample_desc="""In the year 2187, the city of New Carthage hangs on the edge of memory and malfunction. Synthetics drift through identity loops, rogue AIs whisper beneath flooded servers, and fractured collectives fight to reclaim agency from decaying infrastructure."""
-                    )
+                    with open(ftue_path, 'rb') as f:
+                        success = import_entries_with_progress(
+                            f,
+                            os.path.getsize(ftue_path),
+                            update_settings=True,
+                            sample_title="Chroma",
+                            sample_desc="""In the year 2187, the city of New Carthage hangs on the edge of memory and malfunction. Synthetics drift through identity loops, rogue AIs whisper beneath flooded servers, and fractured collectives fight to reclaim agency from decaying infrastructure."""
+                        )
                     
                     if success:
                         st.rerun()
@@ -389,12 +426,15 @@ with st.expander("📝 Add New Entry", expanded):
             st.error("Name is required.")
         else:
             fields_dict, tags = process_template_fields(template_fields)
+            # Save straight away; the embedding is filled in in the background
             add_lore_to_db(
                 title=fields_dict["Name"],
                 content=fields_dict,
                 tags=tags,
-                template=selected_template
+                template=selected_template,
+                defer_embedding=True
             )
+            notify_pending_embeddings()
             # Show simple success message and open editor
             st.success(f"Saved {fields_dict['Name']}")
             st.session_state.selected_category = selected_template
@@ -403,7 +443,7 @@ with st.expander("📝 Add New Entry", expanded):
             st.rerun()
 
 # Existing lore listing and features
-entries = get_all_lore_from_db()
+catalog = get_entry_catalog()
 
 # Initialize navigation state
 if "selected_category" not in st.session_state:
@@ -416,10 +456,125 @@ def change_entry(idx: int) -> None:
     st.session_state.selected_entry_idx = idx
 
 def select_entry(category: str, title: str) -> None:
-    """Helper function to handle entry selection."""
+    """Open an entry in the editor; a button callback."""
     st.session_state.selected_category = category
     st.session_state.selected_entry_title = title
-    st.rerun()
+    st.session_state.show_editor = True
+
+def close_editor() -> None:
+    st.session_state.show_editor = False
+
+def accept_suggestion(title: str, field: str) -> None:
+    """Save LoreA's suggestion into the field; a button callback."""
+    patch_lore_entry(title, fields={field: st.session_state.generated_content})
+    # The field's widget keeps what it held, so a later save would undo this
+    st.session_state[f"edit_{title}_{field}"] = st.session_state.generated_content
+    st.session_state.generated_content = None
+
+def discard_suggestion() -> None:
+    st.session_state.generated_content = None
+
+def reset_pages() -> None:
+    st.session_state.page_numbers = {}
+
+def turn_page(category: str, step: int, total_pages: int) -> None:
+    page = st.session_state.page_numbers.get(category, 0) + step
+    st.session_state.page_numbers[category] = min(max(page, 0), total_pages - 1)
+
+def filtered_entries() -> Dict[str, List[Dict[str, Any]]]:
+    """Entries matching the session's filters, grouped by template."""
+    return get_entry_catalog().filter_by_template(
+        tags=st.session_state.selected_tags if st.session_state.selected_tags else None,
+        entry_type=st.session_state.template_filter if st.session_state.template_filter != "All" else None,
+        query=st.session_state.search_query if st.session_state.search_query else None
+    )
+
+def with_loading_phrase(tokens):
+    """Show a loading phrase until the first streamed token arrives."""
+    placeholder = st.empty()
+    placeholder.caption(choice(LOADING_PHRASES))
+    for idx, token in enumerate(tokens):
+        if idx == 0:
+            placeholder.empty()
+        yield token
+    placeholder.empty()
+
+@st.fragment
+def generation_panel(title: str) -> None:
+    """Chapter picker, LoreA's suggestion and its accept/discard buttons.
+
+    Picking a chapter, asking for a tale or discarding it reruns only this
+    panel; accepting reruns the whole app, so the editor's fields and the
+    entry's card show the accepted text.
+    """
+    entry = get_entry_catalog().get(title)
+    if entry is None:
+        return
+    available_fields = [
+        field for field in LORE_TEMPLATES[entry['template']]
+        if field not in ["Name", "Tags"]
+    ]
+
+    # Field selection dropdown
+    selected_field = st.selectbox(
+        "Select a chapter to work with",
+        ["Open a chapter..."] + available_fields,  # Add default option
+        key=f"field_select_{entry['title']}"
+    )
+
+    # Only show additional controls if a valid field is selected
+    if selected_field and selected_field != "Select a field...":
+        # Add Generation Style dropdown with dynamic options
+        available_styles = FIELD_TO_STYLES.get(selected_field, ["Default"])
+        generation_style = st.selectbox(
+            "Set the tone",
+            available_styles,
+            key=f"style_{entry['title']}_{selected_field}"
+        )
+
+        current_content = entry['fields'].get(selected_field, "")
+        prompt = st.text_input(
+            "Guide LoreA (optional)",
+            key=f"prompt_{entry['title']}_{selected_field}",
+            help="Help guide LoreA's voice and tone. Want something specific? Here is where you can shape it."
+        )
+
+        # Add Inspire Me button and preview
+        col_tale, col_regen = st.columns([1, 1])
+        with col_tale:
+            tell_tale = st.button("✨ Tell Me a Tale", key=f"inspire_{entry['title']}_{selected_field}")
+        with col_regen:
+            regenerate = st.button(
+                "🔁 Regenerate",
+                key=f"regenerate_{entry['title']}_{selected_field}",
+                help="Skip saved suggestions and ask LoreA for a fresh one."
+            )
+        if tell_tale or regenerate:
+            st.markdown("#### 🪄 LoreA's Suggestion:")
+            generated = st.write_stream(with_loading_phrase(stream_field_content(
+                entry_title=entry['title'],
+                field_name=selected_field,
+                template_type=entry['template'],
+                current_content=current_content,
+                user_prompt=prompt,
+                tags=entry['tags'],
+                generation_style=generation_style,  # Pass the selected style
+                regenerate=regenerate
+            )))
+            st.session_state.generated_content = generated
+        elif st.session_state.generated_content:
+            st.markdown("#### 🪄 LoreA's Suggestion:")
+            st.markdown(st.session_state.generated_content)
+
+        if st.session_state.generated_content:
+            # Create a container with smaller columns for the buttons
+            with st.container():
+                col_gen1, col_gap, col_gen2, col_spacer = st.columns([0.4, 0.1, 0.4, 2.1])
+                with col_gen1:
+                    if st.button("✅ Use This", on_click=accept_suggestion, args=(entry['title'], selected_field)):
+                        st.rerun()
+                with col_gen2:
+                    st.button("❌ Discard", on_click=discard_suggestion)
 
 def display_entry(entry: Dict[str, Any]) -> None:
     """Display a single lore entry."""
@@ -473,7 +628,7 @@ def display_entry(entry: Dict[str, Any]) -> None:
                 update_lore_entry(
                     original_title=entry['title'],
                     new_title=new_values.get('Name', entry['title']),
-                    new_content="\n".join(f"{k}: {v}" for k, v in new_values.items()),
+                    new_content=fields_to_content(new_values),
                     new_tags=new_values.get('Tags', []),
                     new_template=entry['template'],
                     new_fields=new_values
@@ -515,73 +670,39 @@ def display_entry(entry: Dict[str, Any]) -> None:
             field for field in LORE_TEMPLATES[entry['template']]
             if field not in ["Name", "Tags"]
         ]
+
+        empty_fields = [field for field in available_fields if not str(entry['fields'].get(field) or "").strip()]
+        if empty_fields and st.button(
+            f"🪄 Fill {len(empty_fields)} Empty Chapter(s)",
+            key=f"fill_empty_{entry['title']}",
+            help="LoreA drafts every empty chapter at once, sharing the same lore context."
+        ):
+            with st.status(choice(LOADING_PHRASES), expanded=True) as status:
+                for result in generate_empty_fields([entry['title']], apply=True):
+                    if result["status"] == "success":
+                        st.write(f"✅ {result['field']}")
+                    else:
+                        st.write(f"❌ {result['field']}: {result['error']}")
+                status.update(label="Chapters drafted!", state="complete")
+            st.rerun()
         
-        # Field selection dropdown
-        selected_field = st.selectbox(
-            "Select a chapter to work with",
-            ["Open a chapter..."] + available_fields,  # Add default option
-            key=f"field_select_{entry['title']}"
-        )
-        
-        # Only show additional controls if a valid field is selected
-        if selected_field and selected_field != "Select a field...":
-            # Add Generation Style dropdown with dynamic options
-            available_styles = FIELD_TO_STYLES.get(selected_field, ["Default"])
-            generation_style = st.selectbox(
-                "Set the tone",
-                available_styles,
-                key=f"style_{entry['title']}_{selected_field}"
-            )
-            
-            current_content = entry['fields'].get(selected_field, "")
-            prompt = st.text_input(
-                "Guide LoreA (optional)",
-                key=f"prompt_{entry['title']}_{selected_field}",
-                help="Help guide LoreA's voice and tone. Want something specific? Here is where you can shape it."
-            )
-            
-            # Add Inspire Me button and preview
-            if st.button("✨ Tell Me a Tale", key=f"inspire_{entry['title']}_{selected_field}"):
-                with st.spinner(choice(LOADING_PHRASES)):
-                    generated = generate_field_content(
-                        entry_title=entry['title'],
-                        field_name=selected_field,
-                        template_type=entry['template'],
-                        current_content=current_content,
-                        user_prompt=prompt,
-                        tags=entry['tags'],
-                        generation_style=generation_style  # Pass the selected style
-                    )
-                    st.session_state.generated_content = generated
-                    st.rerun()
-                
-            if st.session_state.generated_content:
-                st.markdown("#### 🪄 LoreA's Suggestion:")
-                st.markdown(st.session_state.generated_content)
-                
-                # Create a container with smaller columns for the buttons
-                with st.container():
-                    col_gen1, col_gap, col_gen2, col_spacer = st.columns([0.4, 0.1, 0.4, 2.1])
-                    with col_gen1:
-                        if st.button("✅ Use This"):
-                            new_values = {**entry['fields']}
-                            new_values[selected_field] = st.session_state.generated_content
-                            st.session_state.generated_content = None
-                            update_lore_entry(
-                                original_title=entry['title'],
-                                new_title=entry['title'],
-                                new_content="\n".join(f"{k}: {v}" for k, v in new_values.items()),
-                                new_tags=entry['tags'],
-                                new_template=entry['template'],
-                                new_fields=new_values
-                            )
-                            st.rerun()
-                    with col_gen2:
-                        if st.button("❌ Discard"):
-                            st.session_state.generated_content = None
-                            st.rerun()
+        generation_panel(entry['title'])
 
     with col2:
+        # Related lore LoreA would draw on, with the matching chapter and score
+        st.markdown("### 🔍 Related Lore")
+        related_key = f"related_{entry['title']}"
+        if st.button("Find Related Lore", key=f"find_related_{entry['title']}", help="See which lore LoreA consults for this entry, and why."):
+            st.session_state[related_key] = search_lore(entry['content'] or entry['title'], top_k=5, max_chars=1200)
+        if related_key in st.session_state:
+            related = [r for r in st.session_state[related_key] if r['title'] != entry['title']]
+            if not related:
+                st.caption("No closely related lore yet.")
+            for result in related:
+                emoji = TEMPLATE_EMOJIS.get(result['template'], "📝")
+                st.markdown(f"**{emoji} {result['title']}** · {result['score']:.2f}")
+                st.caption(f"{result['field'] + ': ' if result['field'] else ''}{result['snippet']}")
+
         # Linked Entries section
         if entry.get('linked_entries'):
             st.markdown("### 🔗 Linked Entries")
@@ -590,22 +711,23 @@ def display_entry(entry: Dict[str, Any]) -> None:
                 with col_link1:
                     st.text(linked_title)
                 with col_link2:
-                    if st.button("View", key=f"view_{entry['title']}_{linked_title}_{idx}"):
-                        # Find target entry's category
-                        for cat, entries in entries_by_category.items():
-                            if any(e['title'] == linked_title for e in entries):
-                                select_entry(cat, linked_title)  # Use select_entry helper
+                    # Find target entry's category
+                    linked_category = get_entry_catalog().template_of(linked_title)
+                    st.button(
+                        "View",
+                        key=f"view_{entry['title']}_{linked_title}_{idx}",
+                        on_click=select_entry,
+                        args=(linked_category, linked_title),
+                        disabled=linked_category is None
+                    )
 
 
 
-# Update the entries display section
-if entries:
-    # Add visual separator
-    st.markdown("<br>", unsafe_allow_html=True)
-    st.markdown("---")
-    st.markdown("<br>", unsafe_allow_html=True)
-    st.markdown("## 📜 Lore Entries")
-    
+@st.fragment
+def entry_list() -> None:
+    """Filter bar and one tab per category; a filter change reruns only this."""
+    catalog = get_entry_catalog()
+
     # Add simple filter bar
     filter_col1, filter_col2 = st.columns([2, 1])
     with filter_col1:
@@ -615,175 +737,172 @@ if entries:
             label_visibility="collapsed")
         if search != st.session_state.search_query:
             st.session_state.search_query = search
-            st.session_state.page_numbers = {}  # Reset pagination
-            st.rerun()
+            reset_pages()
             
     with filter_col2:
-        # Collect all tags
-        all_tags = set()
-        for entry in entries:
-            all_tags.update(entry.get('tags', []))
-        if all_tags:  # Only show if there are tags
+        if catalog.tags:  # Only show if there are tags
             selected_tags = st.multiselect("🏷️",
-                options=sorted(list(all_tags)),
+                options=catalog.tags,
                 default=st.session_state.selected_tags,
                 placeholder="Filter by tags...",
                 label_visibility="collapsed")
             if selected_tags != st.session_state.selected_tags:
                 st.session_state.selected_tags = selected_tags
-                st.session_state.page_numbers = {}  # Reset pagination
-                st.rerun()
+                reset_pages()
     
-    filtered_entries = get_filtered_lore(
-        tags=st.session_state.selected_tags if st.session_state.selected_tags else None,
-        entry_type=st.session_state.template_filter if st.session_state.template_filter != "All" else None,
-        query=st.session_state.search_query if st.session_state.search_query else None
-    )
+    # Matching entries grouped by template type
+    entries_by_category = filtered_entries()
     
-    if not filtered_entries:
+    if not entries_by_category:
         st.info("No entries match your filters.")
-    else:
-        # Group entries by template type
-        entries_by_category = {}
-        for entry in filtered_entries:
-            category = entry['template']
-            if category not in entries_by_category:
-                entries_by_category[category] = []
-            entries_by_category[category].append(entry)
+        return
+    categories = list(entries_by_category.keys())
+    
+    # Create tabs for each category with entry counts
+    category_tabs = st.tabs([
+        f"{TEMPLATE_EMOJIS[cat]} {cat}s ({len(entries_by_category[cat])})" 
+        for cat in categories
+    ])
+    
+    # Display entries in respective tabs
+    for category, tab in zip(categories, category_tabs):
+        with tab:
+            category_page(category)
+
+@st.fragment
+def category_page(category: str) -> None:
+    """One page of a category's entries and its pager; turning the page
+    reruns only this tab, while opening an entry reruns the whole app to
+    show the editor."""
+    category_entries = filtered_entries().get(category, [])
+    if not category_entries:
+        st.info(f"No {category} entries found.")
+        return
+    
+    # Calculate pagination
+    entries_per_page = st.session_state.entries_per_page
+    total_pages = (len(category_entries) + entries_per_page - 1) // entries_per_page
+    page = min(st.session_state.page_numbers.get(category, 0), total_pages - 1)
+    st.session_state.page_numbers[category] = page
+    page_entries = category_entries[page * entries_per_page:(page + 1) * entries_per_page]
+    
+    # Display only the entries for current page
+    for entry in page_entries:
+        # Get appropriate summary field based on template type
+        summary_field = {
+            "Character": "Role",
+            "Location": "Description",
+            "Faction": "Goals",
+            "Event": "Summary",
+            "Item / Artifact": "Description"
+        }.get(entry['template'], "Description")
         
-        categories = list(entries_by_category.keys())
+        summary = entry['fields'].get(summary_field, "No description available.")
+        first_sentence = summary.split('.')[0] + '.' if '.' in summary else summary
         
-        # Create tabs for each category with entry counts
-        category_tabs = st.tabs([
-            f"{TEMPLATE_EMOJIS[cat]} {cat}s ({len(entries_by_category[cat])})" 
-            for cat in categories
-        ])
+        is_selected = entry['title'] == st.session_state.selected_entry_title
         
-        # Display entries in respective tabs
-        for idx, (category, tab) in enumerate(zip(categories, category_tabs)):
-            with tab:
-                category_entries = entries_by_category[category]
-                
-                # Initialize page number for this category if not exists
-                if category not in st.session_state.page_numbers:
-                    st.session_state.page_numbers[category] = 0
-                
-                # Calculate pagination
-                start_idx = st.session_state.page_numbers[category] * st.session_state.entries_per_page
-                end_idx = start_idx + st.session_state.entries_per_page
-                page_entries = category_entries[start_idx:end_idx]
-                total_pages = (len(category_entries) + st.session_state.entries_per_page - 1) // st.session_state.entries_per_page
-                
-                # Display only the entries for current page
-                for entry in page_entries:
-                    # Get appropriate summary field based on template type
-                    summary_field = {
-                        "Character": "Role",
-                        "Location": "Description",
-                        "Faction": "Goals",
-                        "Event": "Summary",
-                        "Item / Artifact": "Description"
-                    }.get(entry['template'], "Description")
-                    
-                    summary = entry['fields'].get(summary_field, "No description available.")
-                    first_sentence = summary.split('.')[0] + '.' if '.' in summary else summary
-                    
-                    is_selected = entry['title'] == st.session_state.selected_entry_title
-                    
-                    # Create card layout
-                    st.markdown(f"#### {TEMPLATE_EMOJIS[entry['template']]} {entry['title']} ({entry['template']}) {'✅' if is_selected else ''}")
-                    st.markdown(f"{summary_field}: *{first_sentence}*")
-                    if entry['tags']:
-                        st.markdown(f"🏷️ {', '.join(entry['tags'])}")
-                    
-                    # Add view button in the cards list with unique key including category
-                    if st.button("Edit Details", key=f"card_edit_{category}_{entry['title']}", type="primary"):
-                        st.session_state.selected_entry_title = entry['title']
-                        st.session_state.selected_category = category
-                        st.session_state.show_editor = True
-                        st.rerun()
- 
-                
-                if not category_entries:
-                    st.info(f"No {category} entries found.")
-                
-                # Add pagination controls after entries but before editor
-                if category_entries:  # Only show if there are entries
-                    # Calculate total pages
-                    total_pages = (len(category_entries) + st.session_state.entries_per_page - 1) // st.session_state.entries_per_page
-                    
-                    # Add custom CSS for compact buttons
-                    st.markdown("""
-                        <style>
-                            .stHorizontalBlock {
-                                gap: 0rem !important;
-                                padding: 0 !important;
-                                margin: 0 !important;
-                            }
-                            div[data-testid="column"] {
-                                padding: 0 !important;
-                                margin: 0 !important;
-                            }
-                            div[data-testid="stVerticalBlock"] > div {
-                                padding: 0 !important;
-                                margin: 0 !important;
-                            }
-                            .pagination-text {
-                                text-align: center;
-                                margin: 0;
-                                padding: 0;
-                            }
-                        </style>
-                    """, unsafe_allow_html=True)
-                    
-                    # Create compact button columns with page number display
-                    col1, col2, col3 = st.columns([1, 1, 1])
-                    with col1:
-                        prev_disabled = st.session_state.page_numbers[category] == 0
-                        if st.button("⬅️", key=f"prev_{category}", disabled=prev_disabled, use_container_width=True):
-                            st.session_state.page_numbers[category] = max(0, st.session_state.page_numbers[category] - 1)
-                            st.rerun()
-                    with col2:
-                        current_page = st.session_state.page_numbers[category] + 1
-                        st.markdown(f"<p class='pagination-text'>{current_page} of {total_pages}</p>", unsafe_allow_html=True)
-                    with col3:
-                        next_disabled = st.session_state.page_numbers[category] >= total_pages - 1
-                        if st.button("➡️", key=f"next_{category}", disabled=next_disabled, use_container_width=True):
-                            st.session_state.page_numbers[category] = min(total_pages - 1, st.session_state.page_numbers[category] + 1)
-                            st.rerun()
-            
-            # If this is the category of the selected entry, make this tab active
-            if st.session_state.selected_category == category:
-                st.session_state.active_tab = idx
+        # Create card layout
+        st.markdown(f"#### {TEMPLATE_EMOJIS[entry['template']]} {entry['title']} ({entry['template']}) {'✅' if is_selected else ''}")
+        st.markdown(f"{summary_field}: *{first_sentence}*")
+        if entry['tags']:
+            st.markdown(f"🏷️ {', '.join(entry['tags'])}")
         
-        # Display selected entry details if one is selected (moved outside the tab loop)
-        if st.session_state.selected_entry_title and st.session_state.show_editor:
-            st.markdown("## 🪶 Editor")
-            try:
-                selected_entry = next(e for e in entries if e['title'] == st.session_state.selected_entry_title)
-                
-                # Create anchor point for scrolling
-                details_anchor = st.empty()
-                st.markdown("""
-                    <div id="entry-details"></div>
-                """, unsafe_allow_html=True)
-                
-                # Add header with close button in columns with unique key
-                col1, col2 = st.columns([6, 1])
-                with col1:
-                    emoji = TEMPLATE_EMOJIS.get(selected_entry['template'], "📝")
-                    st.markdown(f"### {emoji} Editing: {selected_entry['title']} ({selected_entry['template']})")
-                with col2:
-                    if st.button("❌ Close", key=f"close_editor_{selected_entry['title']}", use_container_width=True):
-                        st.session_state.show_editor = False
-                        st.rerun()
-                
-                display_entry(selected_entry)
-            except StopIteration:
-                st.error("Selected entry not found")
-                st.session_state.show_editor = False
-                st.session_state.selected_entry_title = None
-                st.rerun()
+        # Add view button in the cards list with unique key including category
+        if st.button(
+            "Edit Details",
+            key=f"card_edit_{category}_{entry['title']}",
+            type="primary",
+            on_click=select_entry,
+            args=(category, entry['title'])
+        ):
+            st.rerun()
+    
+    # Create compact button columns with page number display
+    col1, col2, col3 = st.columns([1, 1, 1])
+    with col1:
+        st.button("⬅️", key=f"prev_{category}", disabled=page == 0, use_container_width=True,
+                  on_click=turn_page, args=(category, -1, total_pages))
+    with col2:
+        st.markdown(f"<p class='pagination-text'>{page + 1} of {total_pages}</p>", unsafe_allow_html=True)
+    with col3:
+        st.button("➡️", key=f"next_{category}", disabled=page >= total_pages - 1, use_container_width=True,
+                  on_click=turn_page, args=(category, 1, total_pages))
+
+@st.fragment
+def entry_editor() -> None:
+    """The selected entry's editor; its own buttons, including a linked
+    entry's View, rerun only the editor."""
+    if not (st.session_state.selected_entry_title and st.session_state.show_editor):
+        return
+    st.markdown("## 🪶 Editor")
+    selected_entry = get_entry_catalog().get(st.session_state.selected_entry_title)
+    if selected_entry is None:
+        st.error("Selected entry not found")
+        st.session_state.show_editor = False
+        st.session_state.selected_entry_title = None
+        return
+    
+    # Create anchor point for scrolling
+    details_anchor = st.empty()
+    st.markdown("""
+        <div id="entry-details"></div>
+    """, unsafe_allow_html=True)
+    
+    # Add header with close button in columns with unique key
+    col1, col2 = st.columns([6, 1])
+    with col1:
+        emoji = TEMPLATE_EMOJIS.get(selected_entry['template'], "📝")
+        st.markdown(f"### {emoji} Editing: {selected_entry['title']} ({selected_entry['template']})")
+        embedding_status = get_embedding_status(selected_entry['title'])
+        if embedding_status == "pending":
+            st.caption("⏳ LoreA is still indexing this entry; it will show up in related lore shortly.")
+        elif embedding_status == "failed":
+            st.caption("⚠️ LoreA could not index this entry.")
+            st.button("Retry Indexing", key=f"reindex_{selected_entry['title']}",
+                      on_click=refresh_entry_embeddings, args=(selected_entry['title'],))
+    with col2:
+        st.button("❌ Close", key=f"close_editor_{selected_entry['title']}", use_container_width=True,
+                  on_click=close_editor)
+    
+    display_entry(selected_entry)
+
+# Update the entries display section
+if catalog:
+    # Add visual separator
+    st.markdown("<br>", unsafe_allow_html=True)
+    st.markdown("---")
+    st.markdown("<br>", unsafe_allow_html=True)
+    st.markdown("## 📜 Lore Entries")
+
+    # Custom CSS for compact pagination buttons, injected once per page
+    st.markdown("""
+        <style>
+            .stHorizontalBlock {
+                gap: 0rem !important;
+                padding: 0 !important;
+                margin: 0 !important;
+            }
+            div[data-testid="column"] {
+                padding: 0 !important;
+                margin: 0 !important;
+            }
+            div[data-testid="stVerticalBlock"] > div {
+                padding: 0 !important;
+                margin: 0 !important;
+            }
+            .pagination-text {
+                text-align: center;
+                margin: 0;
+                padding: 0;
+            }
+        </style>
+    """, unsafe_allow_html=True)
+
+    # Filters, category tabs and their pages, and the editor each rerun on
+    # their own; only the panel that was touched is rendered again
+    entry_list()
+    entry_editor()
 
         # Add filter and navigation controls in an expander
         # with st.expander("🔍 Filter/Search"):
@@ -861,8 +980,118 @@ with st.expander("🛠️ Advanced Tools"):
             st.session_state.dev_mode = dev_mode
             set_setting("dev_mode", "true" if dev_mode else "false")
             st.success("Dev mode " + ("enabled" if dev_mode else "disabled"))
+        st.markdown("**OpenAI call health**")
+        st.dataframe(get_resilience_metrics())
+        st.markdown("**Latency (p50 / p99)**")
+        st.caption("Hot-path timings recorded by this app since it started or was last reset; the API serves its own at /metrics.")
+        latency_rows = get_metrics_summary()
+        if latency_rows:
+            st.dataframe(latency_rows, hide_index=True)
+        else:
+            st.caption("Nothing timed yet.")
+        if st.button("Reset Timings"):
+            reset_metrics()
+            st.rerun()
+        st.markdown("**Shared vector store**")
+        store_stats = get_vector_store_stats()
+        if store_stats["exists"]:
+            st.caption(
+                f"{store_stats['live_rows']} live and {store_stats['tombstones']} tombstoned vectors "
+                f"({store_stats['bytes'] / 1024 / 1024:.1f} MB, generation {store_stats['generation']}). "
+                "Run `make compact-vectors` to reclaim tombstoned rows."
+            )
+        else:
+            st.caption("Not built yet; the first search builds it.")
         st.markdown("---")
     
+    # Generation Section
+    st.markdown("### ⚡ Generation")
+    cache_enabled = get_setting("generation_cache") == "true"
+    use_cache = st.toggle(
+        "Reuse previous suggestions for identical requests",
+        value=cache_enabled,
+        help="Repeat requests with the same field, prompt and style are answered instantly without a new OpenAI call. Use Regenerate for a fresh suggestion."
+    )
+    if use_cache != cache_enabled:
+        set_setting("generation_cache", "true" if use_cache else "false")
+        st.success("Generation cache " + ("enabled" if use_cache else "disabled"))
+    if st.button("Clear Saved Suggestions"):
+        clear_generation_cache()
+        st.success("Saved suggestions cleared.")
+
+    summaries_enabled = get_setting("world_summaries") == "true"
+    use_summaries = st.toggle(
+        "Ground suggestions in world summaries",
+        value=summaries_enabled,
+        help="Adds a short overview of the entry's category and tags to each request, so suggestions stay consistent with the whole world using fewer tokens."
+    )
+    if use_summaries != summaries_enabled:
+        set_setting("world_summaries", "true" if use_summaries else "false")
+        st.success("World summaries " + ("enabled" if use_summaries else "disabled"))
+    if use_summaries:
+        summaries = get_world_summaries()
+        if st.button("🌍 Refresh World Summaries"):
+            with st.spinner("Summarising your world..."):
+                counts = refresh_world_summaries()
+            st.success(f"Refreshed {counts['refreshed']} summar{'y' if counts['refreshed'] == 1 else 'ies'}.")
+            summaries = get_world_summaries()
+        if not summaries:
+            st.caption("No summaries yet. Refresh to create them.")
+        for summary in summaries:
+            stale = f" ({summary['pending_changes']} changed since)" if summary["pending_changes"] else ""
+            st.markdown(f"**{summary['label']}** · {summary['entries']} entries{stale}")
+            st.caption(summary["summary"])
+    st.markdown("---")
+
+    # Batch Drafting Section
+    st.markdown("### 🪄 Batch Drafting")
+    st.caption("Let LoreA draft every empty chapter for a whole category at once. Drafts are saved directly to your entries.")
+    batch_template = st.selectbox("Category", list(LORE_TEMPLATES.keys()), key="batch_template")
+    batch_fields = st.multiselect(
+        "Chapters to fill",
+        [field for field in LORE_TEMPLATES[batch_template] if field not in ["Name", "Tags"]],
+        key="batch_fields"
+    )
+    if st.button("Draft Empty Chapters"):
+        batch_titles = catalog.titles(batch_template)
+        progress_text = st.empty()
+        completed = 0
+        failed = 0
+        for result in generate_empty_fields(batch_titles, fields=batch_fields or None, apply=True):
+            completed += 1
+            if result["status"] != "success":
+                failed += 1
+            progress_text.text(f"✨ Drafted {completed} chapter(s): {result['title']} / {result['field']}")
+        if completed:
+            st.success(f"Drafted {completed - failed} chapter(s)" + (f", {failed} failed." if failed else "."))
+        else:
+            st.info("No empty chapters found.")
+    if st.button("Queue in Background"):
+        batch_titles = catalog.titles(batch_template)
+        if batch_titles:
+            submit_jobs("fill_entry", [{"title": title, "fields": batch_fields or None} for title in batch_titles])
+            st.success(f"Queued {len(batch_titles)} entr{'y' if len(batch_titles) == 1 else 'ies'} for background drafting.")
+        else:
+            st.info("No entries in this category.")
+
+    st.markdown("#### ⏳ Background Jobs")
+    st.caption("Queued drafts are written by the background worker (`make worker`) and survive restarts.")
+    batches = list_batches(limit=5)
+    if not batches:
+        st.caption("No background jobs yet.")
+    for batch in batches:
+        counts = batch["counts"]
+        st.progress(
+            batch["progress"],
+            text=f"{batch['kind']}: {counts['succeeded']} done, {counts['running']} running, "
+                 f"{counts['queued']} queued, {counts['failed']} failed of {batch['total']}"
+        )
+        for failure in batch["failures"]:
+            st.caption(f"❌ {failure['payload'].get('title', failure['id'])}: {failure['error']}")
+    if batches and st.button("🔄 Refresh Progress"):
+        st.rerun()
+    st.markdown("---")
+
     # Data Management Section
     st.markdown("### 📤 Data Management")
     
@@ -870,69 +1099,239 @@ with st.expander("🛠️ Advanced Tools"):
     
     with tab1:
         st.markdown("#### 📥 Import Lore Entries")
-        uploaded_json = st.file_uploader("Upload JSON File", type="json")
+        uploaded_json = st.file_uploader("Upload a JSON array or NDJSON file", type=["json", "ndjson", "jsonl"])
+        defer_import_embedding = st.checkbox(
+            "Embed in the background",
+            help="Save entries at once and compute their embeddings afterwards; best for very large files."
+        )
 
-        if uploaded_json:
-            with st.spinner("📚 Processing uploaded file..."):
-                try:
-                    entries = json.load(uploaded_json)
-                    success = import_entries_with_progress(entries)
-                    if success:
-                        st.success(f"✅ Successfully imported {len(entries)} entries!")
-                except Exception as e:
-                    st.error(f"Failed to import: {e}")
+        if uploaded_json and st.button("Import File"):
+            counts = import_entries_with_progress(uploaded_json, uploaded_json.size, defer_embedding=defer_import_embedding)
+            if counts:
+                st.success(f"✅ Successfully imported {counts['inserted'] + counts['pending']} entries!")
 
         st.markdown("**Or paste JSON directly below:**")
         json_input = st.text_area("Paste JSON array of entries", height=200)
         if st.button("Import Pasted JSON"):
-            try:
-                entries = json.loads(json_input)
-                success = import_entries_with_progress(entries)
-                if success:
-                    st.success(f"Imported {len(entries)} entries.")
-            except Exception as e:
-                st.error(f"Failed to import pasted JSON: {e}")
+            pasted = json_input.encode("utf-8")
+            counts = import_entries_with_progress(io.BytesIO(pasted), len(pasted))
+            if counts:
+                st.success(f"Imported {counts['inserted'] + counts['pending']} entries.")
+
+        st.markdown("**Or restore a snapshot:**")
+        uploaded_snapshot = st.file_uploader(
+            "Upload a Parquet snapshot",
+            type=["parquet"],
+            help="Snapshots keep their embeddings, so restoring one with the same embedding model makes no API calls."
+        )
+        replace_world = st.checkbox("Replace the current world", help="Delete every entry before restoring.")
+        if uploaded_snapshot and st.button("Restore Snapshot"):
+            with st.spinner("📦 Restoring snapshot..."):
+                try:
+                    counts = import_snapshot(uploaded_snapshot, replace=replace_world)
+                except (RuntimeError, ValueError) as e:
+                    st.error(f"Could not restore the snapshot: {e}")
+                    counts = None
+            if counts:
+                st.success(f"Restored {counts['inserted'] + counts['pending']} entries, skipped {counts['skipped']}.")
+                if not counts["reused_vectors"]:
+                    st.caption("The snapshot was made with another embedding model; its entries are being embedded in the background.")
     
     with tab2:
         st.markdown("#### 📤 Export Lore Entries")
         
-        col1, col2 = st.columns(2)
+        def _prepared_download(key: str, label: str, build) -> Optional[bytes]:
+            """Bytes of a download, built only when its prepare button is
+            clicked and kept for the session until the entries change."""
+            generation = get_world_generation()
+            prepared = st.session_state.get(f"prepared_{key}")
+            if prepared is not None and prepared[0] != generation:
+                prepared = None
+            if prepared is None and st.button(label, key=f"prepare_{key}"):
+                with st.spinner("Preparing download..."):
+                    prepared = (generation, build())
+                st.session_state[f"prepared_{key}"] = prepared
+            return prepared[1] if prepared else None
+
+        def _export_bytes(format: str) -> bytes:
+            export_file = io.BytesIO()
+            for piece in export_lore(format):
+                export_file.write(piece.encode("utf-8"))
+            return export_file.getvalue()
+
+        export_columns = st.columns(3)
+        for column, (format, label) in zip(export_columns, [("json", "JSON"), ("ndjson", "NDJSON"), ("markdown", "Markdown")]):
+            with column:
+                data = _prepared_download(f"export_{format}", f"Prepare {label}", lambda format=format: _export_bytes(format))
+                if data is not None:
+                    st.download_button(
+                        label=f"Download as {label}",
+                        data=data,
+                        file_name=f"lore_entries.{EXPORT_FORMATS[format].extension}",
+                        mime=EXPORT_FORMATS[format].media_type,
+                        on_click="ignore"
+                    )
         
-        with col1:
-            # Get entries in JSON format
-            entries = get_entries_for_export()
-            export_json = json.dumps(entries, indent=2, ensure_ascii=False)
-            
-            # Create JSON download button
+        def _snapshot_bytes() -> bytes:
+            snapshot_file = io.BytesIO()
+            export_snapshot(snapshot_file)
+            return snapshot_file.getvalue()
+
+        try:
+            snapshot = _prepared_download("snapshot", "Prepare Snapshot (with embeddings)", _snapshot_bytes)
+        except RuntimeError as e:
+            st.error(f"Could not write the snapshot: {e}")
+            snapshot = None
+        if snapshot is not None:
             st.download_button(
-                label="Download as JSON",
-                data=export_json,
-                file_name="lore_entries.json",
-                mime="application/json"
-            )
-            
-        with col2:
-            # Get entries in Markdown format
-            markdown_content = get_entries_for_markdown_export()
-            
-            # Create Markdown download button
-            st.download_button(
-                label="Download as Markdown",
-                data=markdown_content,
-                file_name="lore_entries.md",
-                mime="text/markdown"
+                label="Download Snapshot (with embeddings)",
+                data=snapshot,
+                file_name="lore_snapshot.parquet",
+                mime="application/vnd.apache.parquet",
+                help="A Parquet file that restores this world elsewhere without re-embedding it.",
+                on_click="ignore"
             )
         
-        # Show preview 
+        # Show preview of the first few entries
         st.markdown("##### Preview Export Data")
         preview_tab1, preview_tab2 = st.tabs(["JSON", "Markdown"])
         with preview_tab1:
-            st.code(export_json, language="json")
+            st.code("".join(export_lore("json", limit=3)), language="json")
         with preview_tab2:
-            st.code(markdown_content, language="markdown")
+            st.code("".join(export_lore("markdown", limit=3)), language="markdown")
 
     # Add separator
     st.markdown("---")
+
+    # Backups
+    st.markdown("### 🛟 Backups")
+    backup_status = get_backup_status()
+    if backup_status["backups"]:
+        newest = backup_status["backups"][0]
+        st.caption(
+            f"{len(backup_status['backups'])} backups kept. Newest: {newest['name']} "
+            f"({newest['bytes'] / 1024 / 1024:.1f} MB). Restore one with `make restore-backup BACKUP=<file>`."
+        )
+    else:
+        st.caption("No backups yet.")
+    if backup_status["error"]:
+        st.error(f"Last backup failed: {backup_status['error']}")
+    if backup_status["running"]:
+        st.caption("A backup is running in the background.")
+    elif st.button("Back Up Now", help="Copies the database in the background; you can keep writing meanwhile."):
+        request_backup()
+        st.success("Backup started in the background.")
+    st.markdown("---")
+
+    # Field index
+    st.markdown("### 🧩 Field Index")
+    missing_chunks = count_entries_missing_chunks()
+    if missing_chunks:
+        st.caption(f"{missing_chunks} entries are only searchable as a whole. Index their fields so LoreA can pull in just the chapter that matters.")
+        if st.button("Index Entry Fields"):
+            progress_bar = st.progress(0.0, text="🧩 Indexing fields...")
+            indexed = 0
+            # Small batches keep each embeddings request and transaction short;
+            # every finished batch is saved even if a later one fails
+            while indexed < missing_chunks:
+                batch = backfill_chunk_embeddings(limit=CHUNK_BACKFILL_BATCH_SIZE)
+                if not batch:
+                    break
+                indexed += batch
+                progress_bar.progress(
+                    min(indexed / missing_chunks, 1.0),
+                    text=f"🧩 Indexed fields of {indexed} of {missing_chunks} entries..."
+                )
+            st.success(f"Indexed fields of {indexed} entries.")
+    else:
+        st.caption("Every entry's fields are indexed for retrieval.")
+    st.markdown("---")
+
+    # Embedding model migration
+    st.markdown("### 🧭 Embedding Model")
+    migration = get_embedding_migration()
+    active = migration["active"]
+    st.caption(
+        f"Retrieval uses {active['model']} ({active['dimensions'] or 'native'} dimensions), "
+        f"a {active['min_score']} similarity cutoff and a {active['near_duplicate_cosine']} near-duplicate cosine."
+    )
+    if migration["target"]:
+        target = migration["target"]
+        st.progress(
+            migration["progress"],
+            text=f"Re-embedding into {target['model']} ({target['dimensions'] or 'native'} dimensions): "
+                 f"{migration['covered']} of {migration['total']} entries"
+        )
+        st.caption(
+            "Retrieval switches over in one step once every entry is re-embedded, with a "
+            f"{target['min_score']} similarity cutoff and a {target['near_duplicate_cosine']} near-duplicate cosine."
+        )
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("🔄 Refresh Migration"):
+                st.rerun()
+        with col2:
+            if st.button("Cancel Migration"):
+                cancel_jobs("migrate_embeddings")
+                cancel_embedding_migration()
+                st.rerun()
+    else:
+        col1, col2 = st.columns(2)
+        with col1:
+            migration_model = st.text_input("Model", value=EMBEDDING_MIGRATION_MODEL)
+        with col2:
+            migration_dimensions = st.selectbox(
+                "Dimensions",
+                [256, 512, 1024, 1536, None],
+                index=[256, 512, 1024, 1536, None].index(EMBEDDING_MIGRATION_DIMENSIONS),
+                format_func=lambda d: "Native" if d is None else str(d)
+            )
+        st.caption("Shorter vectors make retrieval faster and the database smaller.")
+        col1, col2 = st.columns(2)
+        with col1:
+            migration_min_score = st.number_input(
+                "Similarity Cutoff", min_value=-1.0, max_value=1.0, value=None, step=0.01,
+                help="Lowest cosine similarity retrieval uses as context, calibrated for the new model"
+            )
+        with col2:
+            migration_near_duplicate_cosine = st.number_input(
+                "Near-Duplicate Cosine", min_value=-1.0, max_value=1.0, value=None, step=0.01,
+                help="Cosine similarity above which overlapping entries count as near-duplicates in the new model"
+            )
+        st.caption("Scores differ between models, so both thresholds replace the current ones at the switch-over.")
+        thresholds_set = migration_min_score is not None and migration_near_duplicate_cosine is not None
+        if st.button("Migrate in Background", disabled=not thresholds_set):
+            try:
+                start_embedding_migration(
+                    migration_model,
+                    migration_dimensions,
+                    min_score=migration_min_score,
+                    near_duplicate_cosine=migration_near_duplicate_cosine
+                )
+                submit_jobs("migrate_embeddings", [{
+                    "model": migration_model,
+                    "dimensions": migration_dimensions,
+                    "min_score": migration_min_score,
+                    "near_duplicate_cosine": migration_near_duplicate_cosine
+                }])
+                st.rerun()
+            except ValueError as e:
+                st.info(str(e))
+    st.markdown("---")
+
+    # Near-duplicate report
+    st.markdown("### 🧬 Near-Duplicate Check")
+    st.caption("Finds entries whose content and meaning overlap enough to crowd out other lore during generation.")
+    if st.button("Scan for Near-Duplicates"):
+        with st.spinner("🔍 Comparing entries..."):
+            duplicates = find_near_duplicates()
+        if duplicates:
+            st.warning(f"Found {len(duplicates)} likely duplicate pair(s).")
+            st.dataframe(duplicates, use_container_width=True)
+        else:
+            st.success("No near-duplicates found.")
+
+    st.markdown("---")
     
     # Danger Zone Section
     st.markdown("### ⚠️ Danger Zone")
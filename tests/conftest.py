@@ -0,0 +1,134 @@
+import hashlib
+import os
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+from backend.app.api import admin, conditional, lore
+from backend.app.services import async_core, core
+from backend.app.services.resilience import reset_resilience_state
+
+FAKE_DIMENSIONS = 64
+FAKE_COMPLETION = "Role: A wary engineer who keeps the grid alive."
+
+CHARACTERS = {
+    "Kaelin Dross": "Chief engineer of the tidal turbines beneath the drowned city",
+    "Mira Vell": "Cartographer charting the salt flats beyond the northern wall",
+    "Oren Hale": "Engineer who repairs the turbines of the upper city",
+}
+
+
+def fake_vector(text, dimensions=None):
+    """Bag-of-words vector: texts sharing words point the same way."""
+    vector = np.zeros(dimensions or FAKE_DIMENSIONS, dtype=np.float32)
+    for word in text.lower().split():
+        vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % len(vector)] += 1
+    return vector
+
+
+class FakeOpenAI:
+    """Records every embeddings and chat request instead of calling OpenAI."""
+
+    def __init__(self):
+        self.embedding_requests = []
+        self.chat_requests = []
+        self.completion = FAKE_COMPLETION
+        self.embeddings = SimpleNamespace(create=self._embed)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._complete))
+
+    @property
+    def embedded_texts(self):
+        return [text for request in self.embedding_requests for text in request["input"]]
+
+    def _embed(self, input, model, encoding_format="float", dimensions=None, **kwargs):
+        items = input if isinstance(input, list) else [input]
+        self.embedding_requests.append({"input": items, "model": model, "dimensions": dimensions})
+        return SimpleNamespace(data=[
+            SimpleNamespace(embedding=fake_vector(text, dimensions).tolist(), index=i)
+            for i, text in enumerate(items)
+        ])
+
+    def _complete(self, model, messages, stream=False, **kwargs):
+        self.chat_requests.append({"model": model, "messages": messages, "stream": stream})
+        text = self.completion
+        if stream:
+            pieces = [text[:5], text[5:12], text[12:]]
+            return iter([SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=p))]) for p in pieces])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))], usage=None)
+
+
+class FakeAsyncOpenAI:
+    """Async face of a FakeOpenAI, sharing its request log."""
+
+    def __init__(self, fake):
+        self.embeddings = SimpleNamespace(create=self._embed)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._complete))
+        self._fake = fake
+
+    async def _embed(self, **kwargs):
+        return self._fake.embeddings.create(**kwargs)
+
+    async def _complete(self, stream=False, **kwargs):
+        response = self._fake.chat.completions.create(stream=stream, **kwargs)
+        if not stream:
+            return response
+
+        async def chunks():
+            for chunk in response:
+                yield chunk
+        return chunks()
+
+
+@pytest.fixture
+def openai_fake(monkeypatch):
+    fake = FakeOpenAI()
+    monkeypatch.setattr(core, "client", fake)
+    monkeypatch.setattr(async_core, "async_client", FakeAsyncOpenAI(fake))
+    reset_resilience_state()
+    yield fake
+    reset_resilience_state()
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch, openai_fake):
+    """A fresh, initialized database in tmp_path with OpenAI faked out."""
+    monkeypatch.setattr(core, "DB_PATH", str(tmp_path / "lore.db"))
+    monkeypatch.setattr(core, "_vector_stores", {})
+    core.init_db()
+    return core.DB_PATH
+
+
+@pytest.fixture
+def add_entry(db):
+    """Add a Character entry to the fresh database: add_entry(name, Role=...).
+
+    defer saves it with a pending embedding instead of embedding it.
+    """
+    def add(name, defer=False, **fields):
+        return core.add_lore_to_db(name, {"Name": name, **fields, "Tags": []}, [], "Character", defer_embedding=defer)
+    return add
+
+
+@pytest.fixture
+def characters(add_entry):
+    """The CHARACTERS entries, embedded; two of them share most words."""
+    for name, role in CHARACTERS.items():
+        add_entry(name, Role=role)
+
+
+@pytest.fixture
+def api(db, monkeypatch):
+    """A test client for the lore and admin routes on the fresh database."""
+    monkeypatch.setattr(lore, "_list_cache", conditional.ResponseCache())
+    app = FastAPI()
+    app.include_router(lore.router, prefix="/lore")
+    app.include_router(admin.router, prefix="/admin")
+    with TestClient(app) as client:
+        yield client
@@ -0,0 +1,74 @@
+import asyncio
+import json
+import threading
+
+from backend.app.services import core
+from backend.app.services.async_core import run_db
+
+FIELDS = {
+    "Name": "Kaelin Dross",
+    "Role": "Chief engineer of the tidal turbines",
+    "Motivation": "Keep the lights on in the lower districts",
+    "Tags": ["engineer"]
+}
+
+
+def test_database_work_runs_on_the_db_pool():
+    thread_name = asyncio.run(run_db(lambda: threading.current_thread().name))
+
+    assert thread_name.startswith("lore-db")
+
+
+def test_add_returns_before_the_embedding_is_ready(api, openai_fake):
+    response = api.post("/lore/add", json={"title": "Kaelin Dross", "content": "Chief engineer", "tags": ["engineer"]})
+
+    assert response.status_code == 202
+    assert openai_fake.embedding_requests == []
+    status_url = response.json()["status_url"]
+    assert api.get(status_url).json()["data"]["embedding_status"] == "pending"
+
+    core.embed_pending_entries()
+
+    assert api.get(status_url).json()["data"]["embedding_status"] == "ready"
+
+
+def test_adding_a_taken_title_conflicts(api):
+    entry = {"title": "Kaelin Dross", "content": "Chief engineer"}
+    api.post("/lore/add", json=entry)
+
+    assert api.post("/lore/add", json=entry).status_code == 409
+
+
+def test_patch_merges_fields(api):
+    core.add_lore_to_db("Kaelin Dross", FIELDS, ["engineer"], "Character")
+
+    response = api.patch("/lore/entries/Kaelin Dross", json={"fields": {"Motivation": "Bring the turbines back"}})
+
+    assert response.status_code == 200
+    fields = core.get_entry_by_title("Kaelin Dross")["fields"]
+    assert fields["Motivation"] == "Bring the turbines back"
+    assert fields["Role"] == FIELDS["Role"]
+    assert api.patch("/lore/entries/Nobody", json={"tags": []}).status_code == 404
+
+
+def test_search_reports_scores(api):
+    core.add_lore_to_db("Kaelin Dross", FIELDS, ["engineer"], "Character")
+
+    response = api.get("/lore/search", params={"q": "engineer of the tidal turbines", "min_score": 0})
+
+    [result] = response.json()["data"]
+    assert result["title"] == "Kaelin Dross"
+    assert 0 < result["score"] <= 1
+
+
+def test_field_stream_sends_tokens_then_done(api, openai_fake):
+    core.add_lore_to_db("Kaelin Dross", FIELDS, ["engineer"], "Character")
+
+    response = api.post("/lore/generate/field/stream", json={
+        "entry_title": "Kaelin Dross", "field_name": "Role", "template_type": "Character"
+    })
+
+    events = [event for event in response.text.split("\n\n") if event]
+    tokens = [json.loads(event[len("data: "):]) for event in events if event.startswith("data: ")]
+    assert "".join(tokens) == "A wary engineer who keeps the grid alive."
+    assert events[-1].startswith("event: done")
@@ -0,0 +1,93 @@
+import os
+import threading
+
+import pytest
+
+from backend.app.services import backups, core
+
+
+def test_backups_are_verified_and_compressed(db, add_entry):
+    add_entry("Kaelin Dross", defer=True, Role="Kaelin Dross keeps the lamps lit")
+
+    compressed = backups.create_backup()
+    plain = backups.create_backup(compress=False, label="manual")
+
+    assert compressed["path"].endswith(".db.gz") and compressed["entries"] == 1
+    assert os.path.basename(plain["path"]).endswith("-manual.db")
+    assert backups.verify_backup(compressed["path"]) == {"entries": 1}
+    assert not [name for name in os.listdir(backups.backup_dir()) if name.endswith(".partial")]
+
+
+def test_backup_is_consistent_while_writers_commit(db, monkeypatch, add_entry):
+    for i in range(30):
+        add_entry(f"Keeper {i}", defer=True, Role=f"Keeper {i} keeps the lamps lit")
+    monkeypatch.setattr(backups, "BACKUP_PAGES_PER_STEP", 1)
+    stop = threading.Event()
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            add_entry(f"Writer {i}", defer=True, Role=f"Writer {i} keeps the lamps lit")
+            i += 1
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        result = backups.create_backup(compress=False)
+    finally:
+        stop.set()
+        thread.join()
+
+    assert result["entries"] >= 30
+    assert backups.verify_backup(result["path"])["entries"] == result["entries"]
+
+
+def test_damaged_backups_fail_verification(db):
+    result = backups.create_backup()
+    with open(result["path"], "r+b") as f:
+        f.seek(20)
+        f.write(b"\0" * 64)
+
+    with pytest.raises(ValueError):
+        backups.verify_backup(result["path"])
+
+
+def test_prune_keeps_the_newest(db):
+    paths = [backups.create_backup(verify=False)["path"] for _ in range(3)]
+    for age, path in enumerate(reversed(paths)):
+        os.utime(path, (1000 - age, 1000 - age))
+
+    removed = backups.prune_backups(keep=2)
+
+    assert removed == [os.path.basename(paths[0])]
+    assert [backup["path"] for backup in backups.list_backups()] == paths[:0:-1]
+
+
+def test_restore_replaces_the_world_and_rebuilds_indexes(db, add_entry):
+    add_entry("Kaelin Dross", Role="Kaelin Dross keeps the lamps lit")
+    add_entry("Mira Vell", Role="Mira Vell keeps the lamps lit")
+    saved = backups.create_backup()
+    core.delete_lore_entry_by_title("Mira Vell")
+    add_entry("Oren Hale", defer=True, Role="Oren Hale keeps the lamps lit")
+    generation = core.get_world_generation()
+
+    result = backups.restore_backup(saved["path"])
+
+    assert sorted(entry["title"] for entry in core.get_all_lore_from_db()) == ["Kaelin Dross", "Mira Vell"]
+    assert result["generation"] > generation and result["pending"] == 0
+    assert os.path.exists(result["pre_restore_backup"])
+    assert backups.verify_backup(result["pre_restore_backup"])["entries"] == 2
+    titles = [r["title"] for r in core.search_lore("lamps lit", min_score=0)]
+    assert sorted(titles) == ["Kaelin Dross", "Mira Vell"]
+
+
+def test_admin_routes_list_and_verify_backups(api):
+    name = os.path.basename(backups.create_backup()["path"])
+
+    listed = api.get("/admin/backups").json()
+    verified = api.post(f"/admin/backups/{name}/verify")
+    unknown = api.post("/admin/backups/lore-19990101-000000.db/verify")
+
+    assert [backup["name"] for backup in listed["backups"]] == [name]
+    assert verified.json()["status"] == "ok"
+    assert unknown.status_code == 404
@@ -0,0 +1,138 @@
+import asyncio
+import json
+import threading
+import time
+
+from backend.app.services import async_core, core
+
+
+def test_only_empty_fields_are_generated(db, add_entry):
+    add_entry("Kaelin Dross", Role="Chief engineer of the tidal turbines", Motivation="", Relationships="")
+
+    results = list(core.generate_empty_fields(["Kaelin Dross"]))
+
+    assert sorted(r["field"] for r in results) == ["Motivation", "Relationships"]
+    assert all(r["status"] == "success" for r in results)
+    assert core.get_entry_by_title("Kaelin Dross")["fields"]["Motivation"] == ""
+
+
+def test_apply_saves_every_generated_field(db, openai_fake, add_entry):
+    add_entry("Kaelin Dross", Role="Chief engineer of the tidal turbines")
+    openai_fake.completion = "Keeps the grid alive."
+
+    list(core.generate_empty_fields(["Kaelin Dross"], apply=True))
+
+    fields = core.get_entry_by_title("Kaelin Dross")["fields"]
+    assert fields["Role"] == "Chief engineer of the tidal turbines"
+    assert fields["Motivation"] == fields["Relationships"] == "Keeps the grid alive."
+
+
+def test_context_is_retrieved_once_per_entry(db, openai_fake, add_entry):
+    add_entry("Kaelin Dross", Role="Chief engineer of the tidal turbines")
+    add_entry("Mira Vell", Role="Cartographer of the salt flats")
+    before = len(openai_fake.embedding_requests)
+
+    list(core.generate_empty_fields(["Kaelin Dross", "Mira Vell"]))
+
+    assert len(openai_fake.embedding_requests) - before == 2
+    assert len(openai_fake.chat_requests) == 4
+
+
+def test_completions_in_flight_are_bounded(db, openai_fake, add_entry):
+    for name in ("Kaelin Dross", "Mira Vell", "Oren Hale"):
+        add_entry(name)
+    complete = openai_fake.chat.completions.create
+    lock = threading.Lock()
+    in_flight = [0]
+    peak = [0]
+
+    def slow_complete(**kwargs):
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.05)
+        with lock:
+            in_flight[0] -= 1
+        return complete(**kwargs)
+
+    openai_fake.chat.completions.create = slow_complete
+    results = list(core.generate_empty_fields(["Kaelin Dross", "Mira Vell", "Oren Hale"], max_concurrency=2))
+
+    assert len(results) == 9
+    assert peak[0] == 2
+
+
+def test_first_result_arrives_before_later_entries_are_ranked(db, openai_fake, add_entry):
+    for name in ("Kaelin Dross", "Mira Vell", "Oren Hale"):
+        add_entry(name)
+    before = len(openai_fake.embedding_requests)
+
+    results = core.generate_empty_fields(["Kaelin Dross", "Mira Vell", "Oren Hale"], max_concurrency=1)
+    first = next(results)
+    results.close()
+
+    assert first["title"] == "Kaelin Dross"
+    assert len(openai_fake.embedding_requests) - before == 1
+
+
+def test_closing_early_cancels_queued_completions(db, openai_fake, add_entry):
+    add_entry("Kaelin Dross")
+    complete = openai_fake.chat.completions.create
+
+    def slow_complete(**kwargs):
+        time.sleep(0.05)
+        return complete(**kwargs)
+
+    openai_fake.chat.completions.create = slow_complete
+    results = core.generate_empty_fields(["Kaelin Dross"], max_concurrency=1)
+    next(results)
+    results.close()
+
+    assert len(openai_fake.chat_requests) < 3
+
+
+def test_async_batch_ranks_lazily_and_cancels_on_close(db, openai_fake, add_entry):
+    for name in ("Kaelin Dross", "Mira Vell"):
+        add_entry(name)
+    complete = openai_fake.chat.completions.create
+
+    def slow_complete(**kwargs):
+        time.sleep(0.01)
+        return complete(**kwargs)
+
+    openai_fake.chat.completions.create = slow_complete
+    before = len(openai_fake.embedding_requests)
+
+    async def first_then_close():
+        results = async_core.agenerate_empty_fields(["Kaelin Dross", "Mira Vell"], max_concurrency=1)
+        first = await results.__anext__()
+        embeddings = len(openai_fake.embedding_requests) - before
+        await results.aclose()
+        await asyncio.sleep(0.1)
+        return first, embeddings
+
+    first, embeddings = asyncio.run(first_then_close())
+
+    assert first["title"] == "Kaelin Dross"
+    assert embeddings == 1
+    assert len(openai_fake.chat_requests) == 1
+
+
+def test_batch_endpoint_streams_one_line_per_field(api, add_entry):
+    add_entry("Kaelin Dross", Role="Chief engineer of the tidal turbines")
+
+    response = api.post("/lore/generate/batch", json={"titles": ["Kaelin Dross"], "apply": True})
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(line["field"] for line in lines) == ["Motivation", "Relationships"]
+    assert core.get_entry_by_title("Kaelin Dross")["fields"]["Motivation"]
+
+
+def test_batch_endpoint_writes_non_ascii_as_utf8(api, openai_fake, add_entry):
+    add_entry("Kaelin Dross", Role="Chief engineer of the tidal turbines")
+    openai_fake.completion = "Bewacht die Schleusen am Fluss Ærø"
+
+    response = api.post("/lore/generate/batch", json={"titles": ["Kaelin Dross"], "fields": ["Motivation"]})
+
+    assert "Ærø".encode("utf-8") in response.content
+    assert json.loads(response.text)["content"] == openai_fake.completion
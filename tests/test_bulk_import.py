@@ -0,0 +1,122 @@
+import asyncio
+import json
+
+import pytest
+
+from backend.app.services import bulk_import, core
+
+
+def _entry(name, **fields):
+    return {"template": "Character", "fields": {"Name": name, "Role": f"{name} keeps watch", "Tags": ["watch"], **fields}}
+
+
+def _body(*lines):
+    return "".join((line if isinstance(line, str) else json.dumps(line)) + "\n" for line in lines)
+
+
+async def _chunks(data, size=7):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def _import(lines, **kwargs):
+    async def collect():
+        return [result async for result in bulk_import.abulk_import(_chunks(_body(*lines).encode()), **kwargs)]
+    return asyncio.run(collect())
+
+
+def test_validate_entry_reports_the_first_problem():
+    assert bulk_import.validate_entry(_entry("Kaelin"))["tags"] == ["watch"]
+    for bad, message in [
+        ([], "JSON object"),
+        ({"template": "Dragon", "fields": {"Name": "X"}}, "Unknown template"),
+        ({"template": "Character", "fields": {"Role": "X"}}, "Name is required"),
+        ({"template": "Character", "fields": {"Name": "X", "Mood": "Grim"}}, "not in the Character template"),
+        ({"template": "Character", "fields": {"Name": "X", "Tags": "watch"}}, "Tags must be a list"),
+        ({"template": "Character", "fields": {"Name": "X"}, "linked_entries": "Y"}, "linked_entries")
+    ]:
+        with pytest.raises(ValueError, match=message):
+            bulk_import.validate_entry(bad)
+
+
+def test_lines_are_split_across_chunks_and_capped():
+    splitter = bulk_import._LineSplitter(max_line_bytes=8)
+    assert splitter.feed(b'{"a"') == []
+    assert splitter.feed(b':1}\n\n{"b":2}\n') == [(1, b'{"a":1}'), (3, b'{"b":2}')]
+    with pytest.raises(ValueError, match="Line 4"):
+        splitter.feed(b"x" * 9)
+
+
+def test_results_carry_line_numbers_and_counts(db, openai_fake):
+    results = _import([_entry("Kaelin"), "not json", _entry("Mira"), _entry("Kaelin")])
+
+    by_line = {result["line"]: result["status"] for result in results if "line" in result}
+    assert by_line == {1: "inserted", 2: "error", 3: "inserted", 4: "skipped"}
+    assert results[-1] == {"done": True, "counts": {"inserted": 2, "pending": 0, "skipped": 1, "error": 1}}
+    assert core.get_embedding_status("Mira") == "ready"
+
+
+def test_each_batch_makes_one_embeddings_request(db, openai_fake):
+    _import([_entry(f"Watcher {i}") for i in range(5)], batch_size=2)
+
+    assert len(openai_fake.embedding_requests) == 3
+
+
+def test_failed_embeddings_leave_the_batch_pending(db, openai_fake):
+    def unavailable(**kwargs):
+        raise ValueError("Embeddings unavailable")
+
+    openai_fake.embeddings.create = unavailable
+    results = _import([_entry("Kaelin"), _entry("Mira")])
+
+    assert results[-1]["counts"]["pending"] == 2
+    assert core.get_embedding_status("Kaelin") == "pending"
+
+
+def test_reading_waits_while_batches_are_in_flight(db, monkeypatch):
+    running = peak = 0
+    prepare, insert = core._prepare_lore_batch, core._insert_lore_batch
+
+    def started(*args):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        return prepare(*args)
+
+    def finished(*args):
+        nonlocal running
+        try:
+            return insert(*args)
+        finally:
+            running -= 1
+
+    monkeypatch.setattr(core, "_prepare_lore_batch", started)
+    monkeypatch.setattr(core, "_insert_lore_batch", finished)
+    results = _import([_entry(f"Watcher {i}") for i in range(8)], batch_size=1, max_in_flight=2)
+
+    assert peak <= 2
+    assert results[-1]["counts"]["inserted"] == 8
+
+
+def test_batches_embed_on_the_event_loop_not_the_db_pool(db, openai_fake, monkeypatch):
+    monkeypatch.setattr(core, "embed_texts", None)  # Nothing may embed on the DB pool
+
+    results = _import([_entry("Kaelin"), _entry("Mira")])
+
+    assert results[-1]["counts"]["inserted"] == 2
+    assert len(openai_fake.embedding_requests) == 1
+    assert core.get_embedding_status("Kaelin") == "ready"
+
+
+def test_bulk_endpoint_streams_problems_only(api):
+    response = api.post(
+        "/lore/bulk",
+        params={"results": "problems", "defer_embedding": True},
+        content=_body(_entry("Kaelin"), {"template": "Character", "fields": {}}),
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line.get("line") for line in lines] == [2, None]
+    assert lines[-1]["counts"] == {"inserted": 0, "pending": 1, "skipped": 0, "error": 1}
+    assert core.get_embedding_status("Kaelin") == "pending"
@@ -0,0 +1,104 @@
+import threading
+
+from backend.app.services import catalog, core
+
+ENTRIES = [
+    ("Kaelin Dross", "Character", ["engineer", "city"], "Keeps the tidal turbines turning"),
+    ("Saltmarsh", "Location", ["coast"], "Flooded flats beyond the wall"),
+    ("Mira Vell", "Character", ["explorer", "coast"], "Charts the salt flats"),
+    ("Tidewatch", "Faction", ["city"], "Guards the turbines of the city")
+]
+
+
+def _populate():
+    for title, template, tags, text in ENTRIES:
+        core.add_lore_to_db(title, {"Name": title, "Role": text, "Tags": tags}, tags, template, defer_embedding=True)
+
+
+def _grouped_titles(grouped):
+    return {template: [entry["title"] for entry in entries] for template, entries in grouped.items()}
+
+
+def test_indexes_by_title_template_and_tag(db):
+    _populate()
+
+    world = catalog.load_catalog()
+
+    assert len(world) == 4
+    assert world.template_of("Saltmarsh") == "Location"
+    assert world.get("Nobody") is None
+    assert world.titles("Character") == ["Kaelin Dross", "Mira Vell"]
+    assert world.tags == ["city", "coast", "engineer", "explorer"]
+
+
+def test_filters_match_the_database(db):
+    _populate()
+    world = catalog.load_catalog()
+
+    for tags, entry_type, query in [
+        (["coast"], None, None),
+        (["city", "engineer"], None, None),
+        (None, "Character", "salt"),
+        (None, None, "TURBINES"),
+        (["coast"], "Location", None)
+    ]:
+        expected = {}
+        for entry in core.get_filtered_lore(tags=tags, entry_type=entry_type, query=query):
+            expected.setdefault(entry["template"], []).append(entry["title"])
+        assert _grouped_titles(world.filter_by_template(tags, entry_type, query)) == expected
+
+
+def test_tags_match_like_the_database(db):
+    _populate()
+    world = catalog.load_catalog()
+
+    for tags in (["coas"], ["CITY"], ["eng_neer"], ["%"], ["r\",\"c"], ["coast", "plor"], ["nowhere"]):
+        expected = {}
+        for entry in core.get_filtered_lore(tags=tags):
+            expected.setdefault(entry["template"], []).append(entry["title"])
+        assert _grouped_titles(world.filter_by_template(tags)) == expected
+    assert _grouped_titles(world.filter_by_template(["coas"])) == {"Location": ["Saltmarsh"], "Character": ["Mira Vell"]}
+
+
+def test_repeated_filters_are_memoized(db):
+    _populate()
+    world = catalog.load_catalog()
+
+    assert world.filter_by_template(["city"], None, "tide") is world.filter_by_template(["city"], None, "tide")
+
+
+def test_cache_reloads_only_when_the_generation_moves(db, monkeypatch):
+    _populate()
+    loads = []
+    load = catalog.load_catalog
+    monkeypatch.setattr(catalog, "load_catalog", lambda: loads.append(1) or load())
+    cache = catalog.CatalogCache()
+
+    first = cache.get()
+    assert cache.get() is first
+    core.embed_pending_entries()
+    assert cache.get() is first
+
+    core.patch_lore_entry("Saltmarsh", fields={"Role": "Drained flats"})
+    second = cache.get()
+
+    assert second is not first and len(loads) == 2
+    assert "drained" in second.get("Saltmarsh")["content"].lower()
+
+
+def test_concurrent_readers_share_one_reload(db, monkeypatch):
+    _populate()
+    loads = []
+    load = catalog.load_catalog
+    monkeypatch.setattr(catalog, "load_catalog", lambda: loads.append(1) or load())
+    cache = catalog.CatalogCache()
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(cache.get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert all(result is results[0] for result in results)
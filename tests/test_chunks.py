@@ -0,0 +1,57 @@
+import sqlite3
+
+from backend.app.services import core
+
+KAELIN = {
+    "Name": "Kaelin Dross",
+    "Role": "Chief engineer of the tidal turbines",
+    "Motivation": "Wants the lower districts to keep their lights",
+    "Relationships": "",
+    "Tags": ["engineer"]
+}
+
+
+def _chunk_fields(db, title):
+    with sqlite3.connect(db) as conn:
+        rows = conn.execute(
+            "SELECT field FROM lore_chunks WHERE lore_id = (SELECT id FROM lore WHERE title = ?)", (title,)
+        ).fetchall()
+    return sorted(field for (field,) in rows)
+
+
+def test_each_filled_field_gets_its_own_chunk(db):
+    core.add_lore_to_db("Kaelin Dross", KAELIN, ["engineer"], "Character")
+
+    assert _chunk_fields(db, "Kaelin Dross") == ["Motivation", "Role"]
+
+
+def test_entries_without_fields_are_chunked_from_content(db):
+    core.add_lore_to_db("Drowned City", "A city under the tide, lit by turbines.", [])
+
+    assert _chunk_fields(db, "Drowned City") == [None]
+
+
+def test_search_reports_the_best_matching_field(db):
+    core.add_lore_to_db("Kaelin Dross", KAELIN, ["engineer"], "Character")
+
+    [result] = core.search_lore("lower districts lights", min_score=0)
+
+    assert result["field"] == "Motivation"
+    assert result["snippet"] == KAELIN["Motivation"]
+
+
+def test_backfill_works_through_limited_batches(db, openai_fake):
+    for name in ("Kaelin Dross", "Mira Vell", "Oren Hale"):
+        core.add_lore_to_db(name, dict(KAELIN, Name=name), [], "Character")
+    with sqlite3.connect(db) as conn:
+        conn.execute("DELETE FROM lore_chunks")
+    openai_fake.embedding_requests.clear()
+
+    assert core.count_entries_missing_chunks() == 3
+    assert core.backfill_chunk_embeddings(limit=2) == 2
+    assert core.count_entries_missing_chunks() == 1
+    assert core.backfill_chunk_embeddings(limit=2) == 1
+    assert core.backfill_chunk_embeddings(limit=2) == 0
+
+    assert len(openai_fake.embedding_requests) == 2
+    assert _chunk_fields(db, "Oren Hale") == ["Motivation", "Role"]
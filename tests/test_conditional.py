@@ -0,0 +1,84 @@
+from backend.app.api import conditional, lore
+from backend.app.services import core
+
+
+def test_unchanged_world_answers_304(api, add_entry):
+    add_entry("Kaelin Dross", defer=True, Role="Engineer")
+    first = api.get("/lore/all")
+    etag = first.headers["etag"]
+
+    again = api.get("/lore/all", headers={"If-None-Match": etag})
+    weak = api.get("/lore/all", headers={"If-None-Match": f'"stale", W/{etag}'})
+
+    assert again.status_code == weak.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+
+
+def test_every_visible_write_changes_the_etag(api, add_entry):
+    add_entry("Kaelin Dross", defer=True, Role="Engineer")
+    etags = [api.get("/lore/all").headers["etag"]]
+
+    add_entry("Mira Vell", defer=True, Role="Engineer")
+    etags.append(api.get("/lore/all").headers["etag"])
+    core.patch_lore_entry("Mira Vell", fields={"Role": "Cartographer"})
+    etags.append(api.get("/lore/all").headers["etag"])
+    core.delete_lore_entry_by_title("Mira Vell")
+    etags.append(api.get("/lore/all").headers["etag"])
+
+    assert len(set(etags)) == 4
+    assert api.get("/lore/all", headers={"If-None-Match": etags[0]}).status_code == 200
+
+
+def test_background_embedding_does_not_invalidate_clients(api, add_entry):
+    add_entry("Kaelin Dross", defer=True, Role="Engineer")
+    generation = core.get_world_generation()
+
+    core.embed_pending_entries()
+
+    assert core.get_embedding_status("Kaelin Dross") == "ready"
+    assert core.get_world_generation() == generation
+
+
+def test_queries_and_variants_get_their_own_etags(api, add_entry):
+    add_entry("Kaelin Dross", defer=True, Role="Engineer")
+
+    etags = {
+        api.get("/lore/all").headers["etag"],
+        api.get("/lore/all", params={"limit": 1}).headers["etag"],
+        api.get("/lore/all", params={"format": "ndjson"}).headers["etag"],
+        api.get("/lore/entries", params={"query": "Kaelin"}).headers["etag"]
+    }
+
+    assert len(etags) == 4
+
+
+def test_json_bodies_are_served_from_the_cache(api, add_entry):
+    add_entry("Kaelin Dross", defer=True, Role="Engineer")
+
+    first = api.get("/lore/all")
+    second = api.get("/lore/all")
+
+    assert first.content == second.content
+    assert lore._list_cache.stats()["hits"] == 1
+    add_entry("Mira Vell", defer=True, Role="Engineer")
+    assert "Mira Vell" in api.get("/lore/all").text
+    assert lore._list_cache.stats()["entries"] == 1
+
+
+def test_response_cache_limits_and_generations():
+    cache = conditional.ResponseCache(max_entries=2, max_bytes=10)
+    cache.put(1, "a", b"aaaa")
+    cache.put(1, "b", b"bbbb")
+    cache.get(1, "a")
+    cache.put(1, "c", b"cccc")
+
+    assert list(cache.bodies) == ["a", "c"]
+    cache.put(1, "big", b"x" * 11)
+    assert "big" not in cache.bodies
+
+    cache.put(2, "d", b"dd")
+    assert list(cache.bodies) == ["d"]
+    # A slow request that read an older generation must not repopulate it
+    cache.put(1, "a", b"aaaa")
+    assert cache.get(1, "a") is None and list(cache.bodies) == ["d"]
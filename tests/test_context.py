@@ -0,0 +1,77 @@
+from backend.app.services.context import (
+    assemble_context,
+    count_tokens,
+    split_into_chunks,
+    truncate_to_tokens
+)
+
+SENTENCE = "The tidal turbines hum beneath the drowned city while the wardens count the hours."
+
+
+def _ranked(title, score, **fields):
+    return {
+        "score": score, "id": hash(title) % 1000, "version": 1, "title": title,
+        "template": "Character", "content": "", "fields": fields
+    }
+
+
+def test_truncate_to_tokens_cuts_on_a_word_boundary():
+    text = " ".join([SENTENCE] * 10)
+
+    truncated = truncate_to_tokens(text, 20)
+
+    assert count_tokens(truncated) <= 20
+    assert text.startswith(truncated)
+    assert text[len(truncated)] == " "
+
+
+def test_split_into_chunks_respects_the_limit_and_keeps_the_text():
+    text = " ".join([SENTENCE] * 12)
+
+    chunks = split_into_chunks(text, 40)
+
+    assert len(chunks) > 1
+    assert all(count_tokens(chunk) <= 40 for chunk in chunks)
+    assert " ".join(chunks).split() == text.split()
+
+
+def test_context_fits_the_budget_and_drops_the_weakest_lore():
+    ranked = [
+        _ranked(f"Entry {i}", 0.9 - i * 0.05, Role=f"Entry {i} role. " + " ".join([SENTENCE] * 3) + f" Marker{i}.")
+        for i in range(8)
+    ]
+
+    context, refs = assemble_context(ranked, 200)
+
+    lines = [line for line in context.splitlines() if line.startswith("Role:")]
+    assert sum(count_tokens(line) for line in lines) <= 200
+    assert "Entry 0 role" in context
+    assert "Entry 7 role" not in context
+    assert refs[0] == (ranked[0]["id"], 1)
+
+
+def test_repeated_snippets_are_packed_once():
+    ranked = [
+        _ranked("Kaelin Dross", 0.9, Role=SENTENCE),
+        _ranked("Kaelin's shadow", 0.8, Role=SENTENCE),
+        _ranked("Mira Vell", 0.7, Role="Cartographer charting the salt flats beyond the northern wall.")
+    ]
+
+    context, refs = assemble_context(ranked, 500)
+
+    assert context.count(SENTENCE) == 1
+    assert "Cartographer" in context
+    assert len(refs) == 2
+
+
+def test_query_words_pick_the_matching_field_first():
+    ranked = [_ranked(
+        "Kaelin Dross", 0.9,
+        Role="Chief engineer of the tidal turbines.",
+        Motivation="Wants the lower districts to keep their lights."
+    )]
+
+    context, _ = assemble_context(ranked, 30, query="lower districts lights")
+
+    assert "Motivation:" in context
+    assert "Role:" not in context
@@ -0,0 +1,129 @@
+import sqlite3
+
+import pytest
+
+from backend.app.config.settings import NEAR_DUPLICATE_COSINE, RETRIEVAL_MIN_SCORE
+from backend.app.services import core
+from tests.test_near_duplicates import KAELIN, MIRA, _near_copy
+
+
+def _set_active_thresholds(db, min_score=None, near_duplicate_cosine=None):
+    with sqlite3.connect(db) as conn:
+        conn.execute(
+            "UPDATE embedding_spaces SET min_score = COALESCE(?, min_score),"
+            " near_duplicate_cosine = COALESCE(?, near_duplicate_cosine) WHERE role = 'active'",
+            (min_score, near_duplicate_cosine)
+        )
+
+
+def _populate():
+    core.add_lore_to_db("Kaelin Dross", KAELIN, ["engineer"], "Character")
+    core.add_lore_to_db("Mira Vell", MIRA, ["explorer"], "Character")
+
+
+def test_initial_space_uses_the_configured_thresholds(db):
+    assert core.get_embedding_thresholds() == {
+        "min_score": RETRIEVAL_MIN_SCORE,
+        "near_duplicate_cosine": NEAR_DUPLICATE_COSINE
+    }
+
+
+def test_search_defaults_to_the_active_space_cutoff(db):
+    _populate()
+    query = "engineer of the tidal turbines"
+    best = core.search_lore(query, min_score=None)[0]["score"]
+
+    _set_active_thresholds(db, min_score=best + 0.01)
+    assert core.search_lore(query) == []
+
+    _set_active_thresholds(db, min_score=best - 0.01)
+    assert [r["title"] for r in core.search_lore(query)] == ["Kaelin Dross"]
+
+
+def test_near_duplicates_use_the_active_space_cosine(db):
+    _populate()
+    copy = _near_copy(KAELIN, "Kaelin Dross (engineer)")
+    core.add_lore_to_db(copy["Name"], copy, ["engineer"], "Character")
+    assert core.find_near_duplicates()
+
+    _set_active_thresholds(db, near_duplicate_cosine=1.0)
+    assert core.find_near_duplicates() == []
+
+
+def test_migration_requires_thresholds_for_the_new_space(db):
+    with pytest.raises(TypeError):
+        core.start_embedding_migration("text-embedding-3-small", 32)
+    with pytest.raises(ValueError):
+        core.start_embedding_migration("text-embedding-3-small", 32, min_score=1.5, near_duplicate_cosine=0.8)
+
+
+def test_cutover_activates_the_target_thresholds(db, openai_fake):
+    _populate()
+
+    migration = core.migrate_embeddings("text-embedding-3-small", 32, min_score=0.3, near_duplicate_cosine=0.8)
+
+    assert migration["active"] == {
+        "model": "text-embedding-3-small",
+        "dimensions": 32,
+        "min_score": 0.3,
+        "near_duplicate_cosine": 0.8
+    }
+    assert core.get_embedding_thresholds() == {"min_score": 0.3, "near_duplicate_cosine": 0.8}
+    assert openai_fake.embedding_requests[-1]["dimensions"] == 32
+
+
+def test_resuming_a_migration_updates_its_thresholds(db):
+    _populate()
+    core.start_embedding_migration("text-embedding-3-small", 32, min_score=0.3, near_duplicate_cosine=0.8)
+    core.build_shadow_batch()
+
+    migration = core.start_embedding_migration("text-embedding-3-small", 32, min_score=0.4, near_duplicate_cosine=0.85)
+
+    assert migration["covered"] == migration["total"] == 2
+    assert migration["target"]["min_score"] == 0.4
+    assert core.get_embedding_thresholds()["min_score"] == RETRIEVAL_MIN_SCORE
+
+
+def test_target_without_thresholds_is_not_cut_over(db):
+    _populate()
+    core.start_embedding_migration("text-embedding-3-small", 32, min_score=0.3, near_duplicate_cosine=0.8)
+    while core.build_shadow_batch():
+        pass
+    # A migration started before thresholds were stored per space
+    with sqlite3.connect(db) as conn:
+        conn.execute("UPDATE embedding_spaces SET min_score = NULL WHERE role = 'target'")
+
+    with pytest.raises(ValueError):
+        core.cut_over_embedding_space()
+    assert core.get_embedding_space()["model"] == core.EMBEDDING_MODEL
+
+
+def test_init_db_adds_thresholds_to_legacy_spaces(tmp_path, monkeypatch, openai_fake):
+    path = tmp_path / "legacy.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE embedding_spaces (role TEXT PRIMARY KEY, model TEXT NOT NULL,"
+            " dimensions INTEGER, updated_at REAL NOT NULL)"
+        )
+        conn.execute("INSERT INTO embedding_spaces VALUES ('active', 'text-embedding-3-small', 256, 0)")
+    monkeypatch.setattr(core, "DB_PATH", str(path))
+    monkeypatch.setattr(core, "_vector_stores", {})
+
+    core.init_db()
+
+    assert core.get_embedding_space() == {"model": "text-embedding-3-small", "dimensions": 256}
+    assert core.get_embedding_thresholds()["min_score"] == RETRIEVAL_MIN_SCORE
+
+
+def test_migration_endpoint_requires_thresholds(api):
+    response = api.post("/lore/embeddings/migration", json={"model": "text-embedding-3-small", "dimensions": 32})
+    assert response.status_code == 422
+
+    response = api.post("/lore/embeddings/migration", json={
+        "model": "text-embedding-3-small",
+        "dimensions": 32,
+        "min_score": 0.3,
+        "near_duplicate_cosine": 0.8
+    })
+    assert response.status_code == 202
+    assert response.json()["data"]["target"]["min_score"] == 0.3
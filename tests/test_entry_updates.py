@@ -0,0 +1,129 @@
+import asyncio
+import sqlite3
+
+from backend.app.services import async_core, core
+
+KAELIN = {
+    "Name": "Kaelin Dross",
+    "Role": "Chief engineer of the tidal turbines",
+    "Motivation": "",
+    "Relationships": "Owes the dock smugglers a favour",
+    "Tags": ["engineer"]
+}
+
+
+def _row(db, title):
+    with sqlite3.connect(db) as conn:
+        return conn.execute("SELECT content, tags, version FROM lore WHERE title = ?", (title,)).fetchone()
+
+
+def test_new_and_edited_entries_build_the_same_content(db):
+    core.add_lore_to_db("Kaelin Dross", KAELIN, ["engineer"], "Character")
+
+    assert _row(db, "Kaelin Dross")[0] == core.fields_to_content(KAELIN)
+    assert "Motivation" not in core.fields_to_content(KAELIN)
+    assert "engineer\"" not in core.fields_to_content(KAELIN)
+
+
+def test_tags_only_patch_makes_no_embedding_call(db, openai_fake):
+    core.add_lore_to_db("Kaelin Dross", KAELIN, ["engineer"], "Character")
+    content, _, version = _row(db, "Kaelin Dross")
+    openai_fake.embedding_requests.clear()
+
+    result = core.patch_lore_entry("Kaelin Dross", fields={"Tags": ["engineer", "smuggler"]})
+
+    assert openai_fake.embedding_requests == []
+    assert result["changed"] == ["fields", "tags"]
+    assert _row(db, "Kaelin Dross") == (content, '["engineer", "smuggler"]', version)
+    assert core.get_entry_by_title("Kaelin Dross")["tags"] == ["engineer", "smuggler"]
+
+
+def test_explicit_tags_win_over_the_tags_field(db):
+    core.add_lore_to_db("Kaelin Dross", KAELIN, ["engineer"], "Character")
+
+    core.patch_lore_entry("Kaelin Dross", tags=["mechanic"], fields={"Tags": ["engineer", "smuggler"]})
+
+    assert core.get_entry_by_title("Kaelin Dross")["tags"] == ["mechanic"]
+
+
+def test_saving_unchanged_editor_values_changes_nothing(db, openai_fake):
+    core.add_lore_to_db("Kaelin Dross", KAELIN, ["engineer"], "Character")
+    openai_fake.embedding_requests.clear()
+
+    result = core.update_lore_entry(
+        "Kaelin Dross", "Kaelin Dross", core.fields_to_content(KAELIN), ["engineer"], "Character", dict(KAELIN)
+    )
+
+    assert result["changed"] == []
+    assert openai_fake.embedding_requests == []
+
+
+def test_filling_one_field_embeds_only_that_field(db, openai_fake):
+    core.add_lore_to_db("Kaelin Dross", KAELIN, ["engineer"], "Character")
+    openai_fake.embedding_requests.clear()
+
+    result = core.patch_lore_entry("Kaelin Dross", fields={"Motivation": "Keep the lights on"})
+
+    assert result["embedded_entry"] and result["embedded_chunks"] == 1
+    [request] = openai_fake.embedding_requests
+    assert request["input"][0] == _row(db, "Kaelin Dross")[0]
+    assert request["input"][1] == "Kaelin Dross\nMotivation: Keep the lights on"
+
+
+def test_interleaved_patches_to_different_fields_both_land(db, monkeypatch):
+    core.add_lore_to_db("Kaelin Dross", KAELIN, ["engineer"], "Character")
+    embed_texts = core.embed_texts
+    interleaved = []
+
+    def embed_with_a_patch_in_between(texts, space=None):
+        # A second patch commits while the first is embedding its text
+        if not interleaved:
+            interleaved.append(True)
+            core.patch_lore_entry("Kaelin Dross", fields={"Motivation": "Keep the lights on"})
+        return embed_texts(texts, space)
+
+    monkeypatch.setattr(core, "embed_texts", embed_with_a_patch_in_between)
+    core.patch_lore_entry("Kaelin Dross", fields={"Role": "Harbour master"})
+
+    fields = core.get_entry_by_title("Kaelin Dross")["fields"]
+    assert fields["Role"] == "Harbour master"
+    assert fields["Motivation"] == "Keep the lights on"
+    assert "Keep the lights on" in _row(db, "Kaelin Dross")[0]
+
+
+def test_a_write_is_dropped_if_the_entry_changed_since_it_was_read(db):
+    core.add_lore_to_db("Kaelin Dross", KAELIN, ["engineer"], "Character")
+    plan = core._prepare_entry_update("Kaelin Dross", core._patch_changes(fields={"Role": "Harbour master"}))
+    core.patch_lore_entry("Kaelin Dross", fields={"Tags": ["engineer", "smuggler"]})
+
+    assert core._write_entry_update(plan, core.embed_texts(plan["inputs"], plan["space"])) is None
+    assert core.get_entry_by_title("Kaelin Dross")["fields"]["Role"] == KAELIN["Role"]
+
+
+def test_async_patches_embed_on_the_event_loop_and_merge_interleaved_edits(db, openai_fake, monkeypatch):
+    core.add_lore_to_db("Kaelin Dross", KAELIN, ["engineer"], "Character")
+    monkeypatch.setattr(core, "embed_texts", None)  # Nothing may embed on the DB pool
+    aembed_texts = async_core.aembed_texts
+    interleaved = []
+
+    async def embed_with_a_patch_in_between(texts, space=None):
+        if not interleaved:
+            interleaved.append(True)
+            await async_core.apatch_lore_entry("Kaelin Dross", fields={"Motivation": "Keep the lights on"})
+        return await aembed_texts(texts, space)
+
+    monkeypatch.setattr(async_core, "aembed_texts", embed_with_a_patch_in_between)
+    asyncio.run(async_core.apatch_lore_entry("Kaelin Dross", fields={"Role": "Harbour master"}))
+
+    fields = core.get_entry_by_title("Kaelin Dross")["fields"]
+    assert fields["Role"] == "Harbour master"
+    assert fields["Motivation"] == "Keep the lights on"
+
+
+def test_patch_endpoint_returns_409_when_the_entry_keeps_changing(api, monkeypatch):
+    core.add_lore_to_db("Kaelin Dross", KAELIN, ["engineer"], "Character")
+    monkeypatch.setattr(core, "_write_entry_update", lambda plan, vectors: None)
+
+    response = api.patch("/lore/entries/Kaelin Dross", json={"fields": {"Role": "Harbour master"}})
+
+    assert response.status_code == 409
@@ -0,0 +1,60 @@
+import json
+
+from backend.app.services import core
+
+ENTRIES = [
+    ("Kaelin Dross", {"Name": "Kaelin Dross", "Role": "Ingénieur des turbines — ночной смотритель", "Tags": ["engineer"]}),
+    ("Mira Vell", {"Name": "Mira Vell", "Role": "Cartographer of the salt flats", "Tags": []})
+]
+
+
+def _populate():
+    for title, fields in ENTRIES:
+        core.add_lore_to_db(title, fields, fields["Tags"], "Character", defer_embedding=True)
+
+
+def test_streamed_json_matches_the_whole_document(db):
+    _populate()
+
+    text = "".join(core.export_lore("json"))
+
+    assert text == json.dumps(core.get_entries_for_export(), indent=2, ensure_ascii=False)
+    assert [entry["fields"]["Name"] for entry in json.loads(text)] == ["Kaelin Dross", "Mira Vell"]
+    assert "".join(core.export_lore("json", limit=1)).count('"template"') == 1
+
+
+def test_empty_world_exports_valid_documents(db):
+    assert json.loads("".join(core.export_lore("json"))) == []
+    assert "".join(core.export_lore("ndjson")) == ""
+
+
+def test_ndjson_and_markdown_have_one_entry_each(db):
+    _populate()
+
+    lines = "".join(core.export_lore("ndjson")).splitlines()
+    markdown = core.get_entries_for_markdown_export()
+
+    assert [json.loads(line)["fields"]["Name"] for line in lines] == ["Kaelin Dross", "Mira Vell"]
+    assert markdown.count("# Character\n") == 2
+    assert "### Tags\nengineer" in markdown
+
+
+def test_file_export_reports_real_bytes(db, tmp_path):
+    _populate()
+    path = tmp_path / "lore.json"
+
+    written = core.export_lore_to_file(str(path), "json")
+
+    assert written == path.stat().st_size
+    assert written > len(path.read_text(encoding="utf-8"))
+    assert json.loads(path.read_bytes()) == core.get_entries_for_export()
+
+
+def test_export_route_streams_a_download(api):
+    _populate()
+
+    response = api.get("/lore/export", params={"format": "ndjson"})
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert 'filename="lore_entries.ndjson"' in response.headers["content-disposition"]
+    assert response.content == "".join(core.export_lore("ndjson")).encode("utf-8")
@@ -0,0 +1,83 @@
+import codecs
+import io
+import json
+
+import pytest
+
+from backend.app.services import bulk_import, core
+
+
+def _entry(name):
+    return {"template": "Location", "fields": {"Name": name, "Description": f"{name} by the sea", "Tags": ["coast"]}}
+
+
+def _entries(data, format=None, read_bytes=5):
+    return [(position, element) for position, element, _ in bulk_import.iter_file_entries(io.BytesIO(data), format, read_bytes)]
+
+
+def test_json_arrays_parse_across_small_reads():
+    data = codecs.BOM_UTF8 + json.dumps([_entry("Saltmarsh"), _entry("Ébrel"), 12, "x"], ensure_ascii=False).encode()
+
+    parsed = _entries(data, read_bytes=3)
+
+    assert parsed == [(1, _entry("Saltmarsh")), (2, _entry("Ébrel")), (3, 12), (4, "x")]
+
+
+def test_ndjson_is_sniffed_and_bad_lines_are_kept_as_errors():
+    data = b"\n" + json.dumps(_entry("Saltmarsh")).encode() + b"\n{broken\n"
+
+    parsed = _entries(data)
+
+    assert parsed[0] == (2, _entry("Saltmarsh"))
+    assert parsed[1][0] == 3 and isinstance(parsed[1][1], ValueError)
+
+
+@pytest.mark.parametrize("data, message", [
+    (b'{"not": "an array"}', "Expected a JSON array"),
+    (b'[{"a": 1} {"b": 2}]', "Expected ','"),
+    (b'[{"a": 1}', "not closed"),
+    (b'[{"a": 1}] []', "after the closing bracket"),
+])
+def test_malformed_json_arrays_stop_with_a_position(data, message):
+    with pytest.raises(ValueError, match=message):
+        _entries(data, "json")
+
+
+def test_elements_are_capped():
+    parser = bulk_import._JsonArrayParser(max_element_bytes=16)
+    with pytest.raises(ValueError, match="longer than 16 bytes"):
+        parser.feed(b'[{"name": "' + b"x" * 32)
+
+
+def test_import_file_reports_progress_and_errors(db, openai_fake):
+    entries = [_entry(f"Cove {i}") for i in range(5)]
+    entries.insert(2, {"template": "Dragon", "fields": {"Name": "Nope"}})
+    data = json.dumps(entries).encode()
+
+    reports = list(bulk_import.import_file(io.BytesIO(data), batch_size=2))
+
+    final = reports[-1]
+    assert final["done"] and final["bytes_read"] == len(data) and final["entries"] == 6
+    assert final["counts"] == {"inserted": 5, "pending": 0, "skipped": 0, "error": 1}
+    errors = [error for report in reports for error in report["errors"]]
+    assert errors == [{"position": 3, "title": None, "detail": "Unknown template: 'Dragon'"}]
+    assert len(openai_fake.embedding_requests) == 3
+
+
+def test_import_file_can_defer_embeddings(db, openai_fake):
+    data = "\n".join(json.dumps(_entry(f"Cove {i}")) for i in range(3)).encode()
+
+    reports = list(bulk_import.import_file(io.BytesIO(data), defer_embedding=True))
+
+    assert reports[-1]["counts"]["pending"] == 3
+    assert openai_fake.embedding_requests == []
+    assert core.count_pending_embeddings() == 3
+
+
+def test_import_file_skips_existing_titles(db):
+    core.add_lore_to_db("Cove 0", _entry("Cove 0")["fields"], ["coast"], "Location", defer_embedding=True)
+    data = json.dumps([_entry("Cove 0"), _entry("Cove 1")]).encode()
+
+    reports = list(bulk_import.import_file(io.BytesIO(data), defer_embedding=True))
+
+    assert reports[-1]["counts"] == {"inserted": 0, "pending": 1, "skipped": 1, "error": 0}
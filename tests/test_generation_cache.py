@@ -0,0 +1,104 @@
+import asyncio
+
+from backend.app.services import async_core, core
+
+FIELDS = {
+    "Name": "Kaelin Dross",
+    "Role": "",
+    "Motivation": "Keep the lights on in the lower districts",
+    "Relationships": "Owes the dock smugglers a favour",
+    "Tags": ["engineer"]
+}
+
+
+def _generate(**kwargs):
+    return core.generate_field_content("Kaelin Dross", "Role", "Character", "", tags=["engineer"], **kwargs)
+
+
+def _generate_motivation():
+    # Current content close enough to Kaelin's own Motivation to retrieve it
+    return core.generate_field_content(
+        "Kaelin Dross", "Motivation", "Character", FIELDS["Motivation"], tags=["engineer"], use_cache=True
+    )
+
+
+def test_cache_hit_skips_retrieval_and_completion(db, openai_fake):
+    core.add_lore_to_db("Kaelin Dross", FIELDS, ["engineer"], "Character")
+    first = _generate(use_cache=True)
+    embeddings, chats = len(openai_fake.embedding_requests), len(openai_fake.chat_requests)
+
+    assert _generate(use_cache=True) == first
+    assert len(openai_fake.embedding_requests) == embeddings
+    assert len(openai_fake.chat_requests) == chats
+
+
+def test_cache_is_off_unless_enabled(db, openai_fake):
+    core.add_lore_to_db("Kaelin Dross", FIELDS, ["engineer"], "Character")
+    _generate()
+    _generate()
+
+    assert len(openai_fake.chat_requests) == 2
+
+    core.set_setting("generation_cache", "true")
+    _generate()
+    _generate()
+
+    assert len(openai_fake.chat_requests) == 3
+
+
+def test_regenerate_bypasses_the_cache(db, openai_fake):
+    core.add_lore_to_db("Kaelin Dross", FIELDS, ["engineer"], "Character")
+    _generate(use_cache=True)
+    _generate(use_cache=True, regenerate=True)
+
+    assert len(openai_fake.chat_requests) == 2
+
+
+def test_editing_retrieved_lore_invalidates_cached_generations(db, openai_fake):
+    core.add_lore_to_db("Kaelin Dross", FIELDS, ["engineer"], "Character")
+    _generate_motivation()
+    core.patch_lore_entry("Kaelin Dross", fields={"Relationships": "Settled the debt with the dock smugglers"})
+    _generate_motivation()
+
+    assert len(openai_fake.chat_requests) == 2
+
+
+def test_lore_to_text_cache_hit_skips_retrieval(db, openai_fake):
+    core.add_lore_to_db("Kaelin Dross", FIELDS, ["engineer"], "Character")
+    core.generate_text_from_lore("A storm reaches the turbines", use_cache=True)
+    embeddings = len(openai_fake.embedding_requests)
+
+    streamed = "".join(core.stream_text_from_lore("A storm reaches the turbines", use_cache=True))
+
+    assert streamed == openai_fake.completion
+    assert len(openai_fake.embedding_requests) == embeddings
+    assert len(openai_fake.chat_requests) == 1
+
+
+def test_async_cache_hit_skips_retrieval(db, openai_fake):
+    core.add_lore_to_db("Kaelin Dross", FIELDS, ["engineer"], "Character")
+
+    async def generate_twice():
+        first = await async_core.agenerate_field_content("Kaelin Dross", "Role", "Character", "", use_cache=True)
+        embeddings = len(openai_fake.embedding_requests)
+        tokens = [token async for token in async_core.astream_field_content(
+            "Kaelin Dross", "Role", "Character", "", use_cache=True
+        )]
+        return first, "".join(tokens), embeddings
+
+    first, second, embeddings = asyncio.run(generate_twice())
+
+    assert first == second
+    assert len(openai_fake.embedding_requests) == embeddings
+    assert len(openai_fake.chat_requests) == 1
+
+
+def test_editing_unrelated_lore_keeps_cached_generations(db, openai_fake):
+    core.add_lore_to_db("Kaelin Dross", FIELDS, ["engineer"], "Character")
+    core.add_lore_to_db("Saltmarsh", {"Name": "Saltmarsh", "Description": "Flooded reed beds", "Tags": []}, [], "Location")
+    _generate_motivation()
+    core.patch_lore_entry("Saltmarsh", fields={"Description": "Drained reed beds"})
+
+    _generate_motivation()
+
+    assert len(openai_fake.chat_requests) == 1
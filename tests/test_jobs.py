@@ -0,0 +1,70 @@
+import sqlite3
+import time
+
+from backend.app.services import core, job_queue, jobs
+
+
+def test_worker_fills_entries_and_reports_the_batch(db, openai_fake, add_entry):
+    add_entry("Kaelin Dross")
+    openai_fake.completion = "Keeps the grid alive."
+    batch = jobs.submit_jobs("fill_entry", [{"title": "Kaelin Dross"}])
+
+    jobs.run_worker(concurrency=2, poll_interval=0.01, drain=True)
+
+    status = jobs.get_batch_status(batch["batch_id"])
+    assert status["done"] and status["counts"]["succeeded"] == 1
+    assert core.get_entry_by_title("Kaelin Dross")["fields"]["Role"] == "Keeps the grid alive."
+    assert jobs.get_job(batch["job_ids"][0])["result"]["fields"]["Motivation"] == "Keeps the grid alive."
+
+
+def test_a_job_is_claimed_once(db):
+    jobs.submit_jobs("embed_entry", [{"title": "Kaelin Dross"}])
+
+    with core.get_db_connection() as first, core.get_db_connection() as second:
+        claimed = job_queue.claim_next_job(first)
+        assert claimed["status"] == "running" and claimed["attempts"] == 1
+        assert job_queue.claim_next_job(second) is None
+
+
+def test_failed_jobs_are_retried_until_attempts_run_out(db, monkeypatch):
+    monkeypatch.setattr(job_queue, "JOB_RETRY_BACKOFF_SECONDS", 0)
+    batch = jobs.submit_jobs("embed_entry", [{"title": "Nobody"}], max_attempts=2)
+
+    jobs.run_worker(poll_interval=0.01, drain=True)
+
+    job = jobs.get_job(batch["job_ids"][0])
+    assert job["status"] == "failed" and job["attempts"] == 2
+    [failure] = jobs.get_batch_status(batch["batch_id"])["failures"]
+    assert "Nobody" in failure["error"]
+
+
+def test_retries_wait_out_their_backoff(db):
+    batch = jobs.submit_jobs("embed_entry", [{"title": "Nobody"}], max_attempts=3)
+
+    jobs.run_worker(poll_interval=0.01, drain=True)
+
+    job = jobs.get_job(batch["job_ids"][0])
+    assert job["status"] == "queued" and job["attempts"] == 1
+
+
+def test_jobs_of_a_dead_worker_are_resumed(db, add_entry):
+    add_entry("Kaelin Dross")
+    batch = jobs.submit_jobs("embed_entry", [{"title": "Kaelin Dross"}])
+    with core.get_db_connection() as conn:
+        job_queue.claim_next_job(conn)
+    with sqlite3.connect(db) as conn:
+        conn.execute("UPDATE jobs SET heartbeat = ?", (time.time() - 3600,))
+
+    jobs.run_worker(poll_interval=0.01, drain=True)
+
+    job = jobs.get_job(batch["job_ids"][0])
+    assert job["status"] == "succeeded" and job["attempts"] == 2
+
+
+def test_cancel_fails_only_queued_jobs_of_the_kind(db):
+    embed = jobs.submit_jobs("embed_entry", [{"title": "A"}, {"title": "B"}])
+    fill = jobs.submit_jobs("fill_entry", [{"title": "C"}])
+
+    assert jobs.cancel_jobs("embed_entry") == 2
+    assert jobs.get_batch_status(embed["batch_id"])["counts"]["failed"] == 2
+    assert jobs.get_batch_status(fill["batch_id"])["counts"]["queued"] == 1
@@ -0,0 +1,113 @@
+import asyncio
+import json
+
+from backend.app.services import async_core, core
+
+
+def _populate(count=5):
+    for i in range(count):
+        template = "Location" if i % 2 else "Character"
+        core.add_lore_to_db(
+            f"Entry {i}", {"Name": f"Entry {i}", "Description": f"Place number {i}", "Tags": []},
+            ["odd" if i % 2 else "even"], template, defer_embedding=True
+        )
+
+
+def test_unpaged_json_keeps_its_shape(api):
+    _populate()
+
+    response = api.get("/lore/all")
+
+    assert response.headers["content-type"] == "application/json"
+    body = response.json()
+    assert set(body) == {"status", "data"}
+    assert [entry["title"] for entry in body["data"]] == [f"Entry {i}" for i in range(5)]
+
+
+def test_pages_follow_next_cursor_to_the_end(api):
+    _populate()
+
+    titles, cursor = [], None
+    while True:
+        params = {"limit": 2} if cursor is None else {"limit": 2, "cursor": cursor}
+        page = api.get("/lore/all", params=params).json()
+        titles += [entry["title"] for entry in page["data"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert titles == [f"Entry {i}" for i in range(5)]
+
+
+def test_entries_added_between_pages_do_not_shift_later_pages(db):
+    _populate(4)
+    first = core.get_lore_page(limit=2)
+    core.delete_lore_entry_by_title("Entry 0")
+    core.add_lore_to_db("Late", {"Name": "Late", "Tags": []}, [], "Character", defer_embedding=True)
+
+    second = core.get_lore_page(cursor=first["next_cursor"], limit=2)
+
+    assert [entry["title"] for entry in second["data"]] == ["Entry 2", "Entry 3"]
+    assert second["next_cursor"] is not None
+
+
+def test_ndjson_streams_one_entry_per_line(api):
+    _populate()
+
+    by_format = api.get("/lore/all", params={"format": "ndjson"})
+    by_accept = api.get("/lore/all", headers={"Accept": "application/x-ndjson"})
+
+    assert by_format.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in by_format.text.splitlines()]
+    assert [entry["title"] for entry in lines] == [f"Entry {i}" for i in range(5)]
+    assert by_accept.text == by_format.text
+
+
+def test_ndjson_stream_honours_cursor_and_limit(api):
+    _populate()
+    cursor = api.get("/lore/all", params={"limit": 1}).json()["next_cursor"]
+
+    limited = api.get("/lore/all", params={"format": "ndjson", "limit": 2}).text.splitlines()
+    after = api.get("/lore/all", params={"format": "ndjson", "cursor": cursor, "limit": 2}).text.splitlines()
+
+    assert [json.loads(line)["title"] for line in limited] == ["Entry 0", "Entry 1"]
+    assert [json.loads(line)["title"] for line in after] == ["Entry 1", "Entry 2"]
+
+
+def test_async_stream_stops_after_limit(db):
+    _populate()
+
+    async def collect():
+        return [entry["title"] async for entry in async_core.aiter_lore(page_size=2, limit=3)]
+
+    assert asyncio.run(collect()) == ["Entry 0", "Entry 1", "Entry 2"]
+
+
+def test_entries_route_filters_every_form(api):
+    _populate()
+
+    whole = api.get("/lore/entries", params={"type": "Location"}).json()["data"]
+    page = api.get("/lore/entries", params={"type": "Location", "limit": 1}).json()
+    stream = api.get("/lore/entries", params={"tag": "even", "format": "ndjson"}).text.splitlines()
+
+    assert [entry["title"] for entry in whole] == ["Entry 1", "Entry 3"]
+    assert [entry["title"] for entry in page["data"]] == ["Entry 1"]
+    assert [json.loads(line)["title"] for line in stream] == ["Entry 0", "Entry 2", "Entry 4"]
+
+
+def test_async_stream_reads_keyset_pages(db, monkeypatch):
+    _populate()
+    pages = []
+    get_page = core.get_lore_page
+
+    def recording_page(*args):
+        pages.append(args[3])
+        return get_page(*args)
+
+    monkeypatch.setattr(core, "get_lore_page", recording_page)
+
+    async def collect():
+        return [entry["title"] async for entry in async_core.aiter_lore(page_size=2)]
+
+    assert asyncio.run(collect()) == [f"Entry {i}" for i in range(5)]
+    assert len(pages) == 3 and pages[0] is None
@@ -0,0 +1,77 @@
+import pytest
+
+from backend.app.services import core, metrics
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics(monkeypatch):
+    monkeypatch.setattr(metrics, "_registry", list(metrics._registry))
+    metrics.reset_metrics()
+    yield
+    metrics.reset_metrics()
+
+
+def test_quantiles_interpolate_inside_buckets():
+    histogram = metrics.Histogram("test_seconds", "Test.", buckets=(0.1, 1.0))
+    for value in [0.05] * 50 + [0.5] * 49 + [0.9]:
+        histogram.observe(value)
+
+    [row] = histogram.summary()
+
+    assert row["count"] == 100
+    assert row["p50_seconds"] == pytest.approx(0.1)
+    assert 0.1 < row["p99_seconds"] <= 0.9
+    assert row["max_seconds"] == 0.9
+
+
+def test_histograms_render_cumulative_buckets():
+    histogram = metrics.Histogram("test_seconds", "Test.", ("kind",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, kind="a")
+    histogram.observe(5.0, kind="a")
+
+    lines = histogram.render()
+
+    assert lines[:2] == ["# HELP test_seconds Test.", "# TYPE test_seconds histogram"]
+    assert 'test_seconds_bucket{kind="a",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{kind="a",le="1"} 1' in lines
+    assert 'test_seconds_bucket{kind="a",le="+Inf"} 2' in lines
+    assert 'test_seconds_count{kind="a"} 2' in lines
+
+
+def test_labels_must_match_the_metric():
+    counter = metrics.Counter("test_total", "Test.", ("status",))
+    with pytest.raises(ValueError):
+        counter.inc(kind="a")
+
+
+def test_timed_blocks_count_failures():
+    histogram = metrics.Histogram("test_seconds", "Test.")
+    with pytest.raises(RuntimeError):
+        with histogram.time():
+            raise RuntimeError("boom")
+
+    assert histogram.summary()[0]["count"] == 1
+    assert metrics.FAILURES.value(metric="test_seconds") == 1
+
+
+def test_hot_paths_are_instrumented(db):
+    core.add_lore_to_db("Kaelin Dross", {"Name": "Kaelin Dross", "Role": "Engineer", "Tags": []}, [], "Character")
+    core.search_lore("engineer", min_score=0)
+
+    names = {(row["metric"], row["labels"]) for row in metrics.get_metrics_summary()}
+
+    assert ("lore_retrieval_scoring_seconds", "") in names
+    assert ("lore_embedding_request_seconds", "kind=batch") in names
+    assert ("lore_sqlite_query_seconds", "function=_score_lore") in names
+    assert metrics.RETRIEVAL_VECTORS.value() >= 1
+    assert metrics.EMBEDDING_INPUTS.value() >= 2
+
+
+def test_render_metrics_includes_every_registered_metric():
+    metrics.IMPORT_ENTRIES.inc(status="inserted")
+
+    text = metrics.render_metrics()
+
+    assert 'lore_import_entries_total{status="inserted"} 1' in text
+    assert "# TYPE lore_chat_completion_seconds histogram" in text
+    assert text.endswith("\n")
@@ -0,0 +1,78 @@
+import sqlite3
+
+import numpy as np
+
+from backend.app.services import core
+from backend.app.services.dedupe import estimate_jaccard, lsh_buckets, minhash_signature
+
+KAELIN = {
+    "Name": "Kaelin Dross",
+    "Role": "Chief engineer of the drowned city, keeping the tidal turbines turning through every storm season",
+    "Motivation": "Wants the lower districts to keep their lights after the council cut their share of power",
+    "Relationships": "Owes a favour to the smugglers of the eastern docks and distrusts the council wardens",
+    "Tags": ["engineer"]
+}
+MIRA = {
+    "Name": "Mira Vell",
+    "Role": "Cartographer charting the salt flats beyond the northern wall",
+    "Motivation": "Searching for the caravan that vanished with her brother",
+    "Relationships": "Apprenticed to the old guild of surveyors",
+    "Tags": ["explorer"]
+}
+
+
+def _near_copy(fields, name):
+    copy = dict(fields, Name=name)
+    copy["Relationships"] = copy["Relationships"].replace("wardens", "guards")
+    return copy
+
+
+def test_similar_texts_share_an_lsh_bucket():
+    first = minhash_signature(core.fields_to_content(KAELIN))
+    second = minhash_signature(core.fields_to_content(_near_copy(KAELIN, "Kaelin Dross")))
+    unrelated = minhash_signature(core.fields_to_content(MIRA))
+
+    assert estimate_jaccard(first, second) >= 0.5
+    assert set(lsh_buckets(first)) & set(lsh_buckets(second))
+    assert not set(lsh_buckets(first)) & set(lsh_buckets(unrelated))
+
+
+def test_near_duplicate_is_skipped_on_insert(db):
+    assert core.add_lore_to_db("Kaelin Dross", KAELIN, ["engineer"], "Character")
+    assert core.add_lore_to_db("Mira Vell", MIRA, ["explorer"], "Character")
+
+    copy = _near_copy(KAELIN, "Kaelin Dross (engineer)")
+    assert not core.add_lore_to_db(copy["Name"], copy, ["engineer"], "Character", skip_near_duplicates=True)
+    assert core.get_entry_by_title(copy["Name"]) is None
+
+
+def test_find_near_duplicates_reports_pairs(db):
+    core.add_lore_to_db("Kaelin Dross", KAELIN, ["engineer"], "Character")
+    core.add_lore_to_db("Mira Vell", MIRA, ["explorer"], "Character")
+    copy = _near_copy(KAELIN, "Kaelin Dross (engineer)")
+    core.add_lore_to_db(copy["Name"], copy, ["engineer"], "Character")
+
+    report = core.find_near_duplicates()
+
+    assert [(r["title"], r["duplicate_of"]) for r in report] == [("Kaelin Dross (engineer)", "Kaelin Dross")]
+
+
+def test_init_db_indexes_legacy_entries(db):
+    core.add_lore_to_db("Kaelin Dross", KAELIN, ["engineer"], "Character")
+    # Simulate a database written before signatures were stored
+    with sqlite3.connect(db) as conn:
+        conn.execute("UPDATE lore SET minhash = NULL")
+        conn.execute("DELETE FROM lore_lsh")
+
+    core.init_db()
+
+    with sqlite3.connect(db) as conn:
+        (minhash,) = conn.execute("SELECT minhash FROM lore").fetchone()
+        buckets = conn.execute("SELECT COUNT(*) FROM lore_lsh").fetchone()[0]
+    assert minhash is not None and buckets > 0
+    assert np.array_equal(
+        np.frombuffer(minhash, dtype=np.uint64),
+        minhash_signature(core.get_entry_by_title("Kaelin Dross")["content"])
+    )
+    copy = _near_copy(KAELIN, "Kaelin Dross (engineer)")
+    assert not core.add_lore_to_db(copy["Name"], copy, ["engineer"], "Character", skip_near_duplicates=True)
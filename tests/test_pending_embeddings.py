@@ -0,0 +1,81 @@
+import time
+
+import pytest
+
+from backend.app.services import core, embedding_worker, resilience
+
+
+def test_pending_entries_are_saved_without_calling_openai(db, openai_fake, add_entry):
+    add_entry("Kaelin Dross", defer=True, Role="Chief engineer of the tidal turbines")
+
+    assert openai_fake.embedding_requests == []
+    assert core.get_embedding_status("Kaelin Dross") == "pending"
+    assert core.search_lore("tidal turbines", min_score=0) == []
+
+
+def test_pending_entries_are_embedded_in_one_batch(db, openai_fake, add_entry):
+    add_entry("Kaelin Dross", defer=True, Role="Chief engineer of the tidal turbines")
+    add_entry("Mira Vell", defer=True, Role="Cartographer of the salt flats")
+
+    assert core.embed_pending_entries() == 2
+
+    assert len(openai_fake.embedding_requests) == 1
+    assert core.count_pending_embeddings() == 0
+    assert core.get_embedding_status("Mira Vell") == "ready"
+    assert core.search_lore("tidal turbines", min_score=0)[0]["field"] == "Role"
+
+
+def test_entries_that_cannot_be_embedded_are_marked_failed(db, openai_fake, add_entry):
+    add_entry("Kaelin Dross", defer=True, Role="Chief engineer of the tidal turbines")
+    add_entry("Mira Vell", defer=True, Role="Cartographer poison of the salt flats")
+    embed = openai_fake.embeddings.create
+
+    def reject_poison(input, **kwargs):
+        if any("poison" in text for text in (input if isinstance(input, list) else [input])):
+            raise ValueError("Input rejected")
+        return embed(input=input, **kwargs)
+
+    openai_fake.embeddings.create = reject_poison
+    core.embed_pending_entries()
+
+    assert core.get_embedding_status("Kaelin Dross") == "ready"
+    assert core.get_embedding_status("Mira Vell") == "failed"
+
+
+def test_transient_failures_leave_entries_pending(db, openai_fake, monkeypatch, add_entry):
+    monkeypatch.setattr(resilience, "_backoff_delay", lambda attempt, error: 0.0)
+    add_entry("Kaelin Dross", defer=True, Role="Chief engineer of the tidal turbines")
+
+    def stalled(**kwargs):
+        raise TimeoutError("stalled")
+
+    openai_fake.embeddings.create = stalled
+    with pytest.raises(TimeoutError):
+        core.embed_pending_entries()
+
+    assert core.get_embedding_status("Kaelin Dross") == "pending"
+
+
+def test_edits_to_pending_entries_are_embedded_later(db, openai_fake, add_entry):
+    add_entry("Kaelin Dross", defer=True, Role="Chief engineer of the tidal turbines")
+
+    core.patch_lore_entry("Kaelin Dross", fields={"Role": "Retired engineer"})
+
+    assert openai_fake.embedding_requests == []
+    core.embed_pending_entries()
+    assert "Retired engineer" in openai_fake.embedded_texts[0]
+    assert core.get_embedding_status("Kaelin Dross") == "ready"
+
+
+def test_background_worker_embeds_new_entries(db, add_entry):
+    add_entry("Kaelin Dross", defer=True, Role="Chief engineer of the tidal turbines")
+    embedding_worker.start_embedding_worker()
+    try:
+        embedding_worker.notify_pending_embeddings()
+        deadline = time.monotonic() + 5
+        while core.get_embedding_status("Kaelin Dross") == "pending" and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        embedding_worker.stop_embedding_worker()
+
+    assert core.get_embedding_status("Kaelin Dross") == "ready"
@@ -0,0 +1,134 @@
+import asyncio
+import time
+
+import pytest
+
+from backend.app.services import resilience
+from backend.app.services.resilience import (
+    CircuitOpenError,
+    acall_with_resilience,
+    call_with_resilience,
+    get_resilience_metrics
+)
+
+
+@pytest.fixture(autouse=True)
+def fast_breaker(monkeypatch):
+    resilience.reset_resilience_state()
+    monkeypatch.setattr(resilience, "_backoff_delay", lambda attempt, error: 0.0)
+    monkeypatch.setattr(resilience, "CIRCUIT_BREAKER_FAILURES", 2)
+    monkeypatch.setattr(resilience, "CIRCUIT_BREAKER_RESET_SECONDS", 0.05)
+    monkeypatch.setitem(resilience.OPENAI_CALL_POLICIES, "chat", {
+        "timeout": 5.0, "deadline": 10.0, "max_attempts": 3, "hedge": False
+    })
+    yield
+    resilience.reset_resilience_state()
+
+
+def _failing(error):
+    calls = []
+
+    def request(timeout):
+        calls.append(timeout)
+        raise error
+    return request, calls
+
+
+def _open_circuit():
+    request, _ = _failing(TimeoutError("stalled"))
+    with pytest.raises((TimeoutError, CircuitOpenError)):
+        call_with_resilience("chat", request)
+    assert get_resilience_metrics()["chat"]["circuit"] == "open"
+
+
+def test_transient_failures_are_retried():
+    attempts = []
+
+    def flaky(timeout):
+        attempts.append(timeout)
+        if len(attempts) < 2:
+            raise TimeoutError("stalled")
+        return "ok"
+
+    assert call_with_resilience("chat", flaky) == "ok"
+    assert get_resilience_metrics()["chat"]["retries"] == 1
+    assert get_resilience_metrics()["chat"]["circuit"] == "closed"
+
+
+def test_client_errors_are_raised_at_once_and_keep_the_circuit_closed():
+    request, calls = _failing(ValueError("bad request"))
+
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            call_with_resilience("chat", request)
+
+    assert len(calls) == 3
+    assert get_resilience_metrics()["chat"]["circuit"] == "closed"
+
+
+def test_open_circuit_fails_fast_without_calling():
+    _open_circuit()
+    request, calls = _failing(TimeoutError("stalled"))
+
+    with pytest.raises(CircuitOpenError):
+        call_with_resilience("chat", request)
+
+    assert calls == []
+    assert get_resilience_metrics()["chat"]["rejected"] >= 1
+
+
+def test_half_open_trial_success_closes_the_circuit():
+    _open_circuit()
+    time.sleep(0.06)
+
+    assert get_resilience_metrics()["chat"]["circuit"] == "half_open"
+    assert call_with_resilience("chat", lambda timeout: "ok") == "ok"
+    assert get_resilience_metrics()["chat"]["circuit"] == "closed"
+
+
+def test_half_open_trial_failure_reopens_the_circuit():
+    _open_circuit()
+    time.sleep(0.06)
+    request, calls = _failing(TimeoutError("stalled"))
+
+    with pytest.raises(CircuitOpenError):
+        call_with_resilience("chat", request)
+
+    assert len(calls) == 1
+    assert get_resilience_metrics()["chat"]["circuit"] == "open"
+
+
+def test_interrupted_trial_is_released():
+    _open_circuit()
+    time.sleep(0.06)
+    request, _ = _failing(KeyboardInterrupt())
+
+    with pytest.raises(KeyboardInterrupt):
+        call_with_resilience("chat", request)
+
+    assert call_with_resilience("chat", lambda timeout: "ok") == "ok"
+
+
+def test_cancelled_async_trial_is_released():
+    _open_circuit()
+    time.sleep(0.06)
+
+    async def scenario():
+        started = asyncio.Event()
+
+        async def hang(timeout):
+            started.set()
+            await asyncio.sleep(60)
+
+        trial = asyncio.ensure_future(acall_with_resilience("chat", hang))
+        await started.wait()
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+
+        async def answer(timeout):
+            return "ok"
+        return await acall_with_resilience("chat", answer)
+
+    assert asyncio.run(scenario()) == "ok"
+    assert get_resilience_metrics()["chat"]["circuit"] == "closed"
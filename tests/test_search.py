@@ -0,0 +1,31 @@
+from backend.app.services import core
+
+
+def test_results_are_ordered_by_score_with_snippets(db, characters):
+
+    results = core.search_lore("engineer of the tidal turbines", min_score=0)
+
+    scores = [result["score"] for result in results]
+    assert scores == sorted(scores, reverse=True)
+    assert results[0]["title"] == "Kaelin Dross"
+    assert results[0]["field"] == "Role"
+    assert results[0]["snippet"].startswith("Chief engineer")
+    assert set(results[0]) == {"id", "title", "template", "score", "field", "snippet"}
+
+
+def test_min_score_drops_weak_matches_instead_of_padding(db, characters):
+    everything = core.search_lore("engineer of the tidal turbines", min_score=0)
+    cutoff = (everything[0]["score"] + everything[1]["score"]) / 2
+
+    results = core.search_lore("engineer of the tidal turbines", top_k=5, min_score=cutoff)
+
+    assert [result["title"] for result in results] == ["Kaelin Dross"]
+
+
+def test_top_k_and_max_chars_cap_the_results(db, characters):
+
+    assert len(core.search_lore("turbines", top_k=2, min_score=0)) == 2
+
+    results = core.search_lore("engineer of the tidal turbines", min_score=0, max_chars=70)
+
+    assert sum(len(result["snippet"]) for result in results) == 70
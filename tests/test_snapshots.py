@@ -0,0 +1,130 @@
+import asyncio
+import io
+import tempfile
+
+import pytest
+
+from backend.app.services import core, snapshots
+
+ENTRIES = [
+    ("Kaelin Dross", "Chief engineer of the tidal turbines beneath the drowned city"),
+    ("Mira Vell", "Cartographer charting the salt flats beyond the northern wall")
+]
+
+
+def _populate():
+    for name, role in ENTRIES:
+        core.add_lore_to_db(name, {"Name": name, "Role": role, "Tags": ["crew"]}, ["crew"], "Character")
+
+
+def _snapshot_bytes():
+    # The way the frontend builds its download
+    snapshot_file = io.BytesIO()
+    snapshots.export_snapshot(snapshot_file)
+    return snapshot_file.getvalue()
+
+
+@pytest.fixture
+def fresh_db(tmp_path, monkeypatch):
+    """Point core at a second, empty database."""
+    def switch():
+        monkeypatch.setattr(core, "DB_PATH", str(tmp_path / "restored.db"))
+        monkeypatch.setattr(core, "_vector_stores", {})
+        core.init_db()
+    return switch
+
+
+def test_round_trip_reuses_vectors(db, openai_fake, fresh_db):
+    _populate()
+    before = core.search_lore("engineer of the tidal turbines", min_score=0)
+    data = _snapshot_bytes()
+    fresh_db()
+    openai_fake.embedding_requests.clear()
+
+    counts = snapshots.import_snapshot(io.BytesIO(data))
+
+    assert counts["inserted"] == 2 and counts["reused_vectors"]
+    assert core.get_embedding_status("Mira Vell") == "ready"
+    assert core.get_entry_by_title("Kaelin Dross")["tags"] == ["crew"]
+    assert core.search_lore("engineer of the tidal turbines", min_score=0) == before
+    # Only the query above was embedded; the restore itself made no requests
+    assert len(openai_fake.embedding_requests) == 1
+
+
+def test_snapshots_from_another_space_are_reembedded(db, fresh_db, monkeypatch):
+    _populate()
+    data = _snapshot_bytes()
+    fresh_db()
+    monkeypatch.setattr(core, "get_embedding_space", lambda: {"model": "text-embedding-3-small", "dimensions": 32})
+
+    counts = snapshots.import_snapshot(io.BytesIO(data))
+
+    assert counts["pending"] == 2 and not counts["reused_vectors"]
+    assert core.get_embedding_status("Kaelin Dross") == "pending"
+
+
+def test_existing_titles_are_skipped_unless_replacing(db):
+    _populate()
+    data = _snapshot_bytes()
+    core.delete_lore_entry_by_title("Mira Vell")
+
+    assert snapshots.import_snapshot(io.BytesIO(data))["skipped"] == 1
+    assert snapshots.import_snapshot(io.BytesIO(data), replace=True)["inserted"] == 2
+    assert len(core.get_all_lore_from_db()) == 2
+
+
+def test_other_parquet_files_are_rejected(db, tmp_path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    path = tmp_path / "other.parquet"
+    pq.write_table(pa.table({"title": ["x"]}), path)
+
+    with pytest.raises(ValueError, match="Not a LoreA snapshot"):
+        snapshots.import_snapshot(str(path))
+
+
+def test_snapshot_routes_round_trip(api):
+    _populate()
+    download = api.get("/lore/snapshot")
+    assert download.headers["content-type"] == "application/vnd.apache.parquet"
+
+    restored = api.post("/lore/snapshot", params={"replace": True}, content=download.content)
+    rejected = api.post("/lore/snapshot", content=b"not parquet at all")
+
+    assert restored.json()["inserted"] == 2
+    assert rejected.status_code == 400
+
+
+def test_snapshot_upload_is_written_off_the_event_loop(api, monkeypatch):
+    _populate()
+    download = api.get("/lore/snapshot")
+    on_loop = []
+    make_file = tempfile.TemporaryFile
+
+    class RecordingFile:
+        def __init__(self):
+            self.file = make_file()
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            self.file.close()
+
+        def write(self, chunk):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(True)
+            except RuntimeError:
+                on_loop.append(False)
+            return self.file.write(chunk)
+
+        def __getattr__(self, name):
+            return getattr(self.file, name)
+
+    monkeypatch.setattr(tempfile, "TemporaryFile", RecordingFile)
+
+    restored = api.post("/lore/snapshot", params={"replace": True}, content=download.content)
+
+    assert restored.json()["inserted"] == 2
+    assert on_loop and not any(on_loop)
@@ -0,0 +1,41 @@
+from backend.app.services import core
+
+FIELDS = {
+    "Name": "Kaelin Dross",
+    "Role": "",
+    "Motivation": "Keep the lights on in the lower districts",
+    "Relationships": "",
+    "Tags": ["engineer"]
+}
+
+
+def test_field_prefix_is_stripped_across_tokens():
+    tokens = ["Ro", "le", ":", " A wary", " engineer"]
+
+    assert "".join(core._strip_field_prefix_stream(iter(tokens), "Role")) == "A wary engineer"
+
+
+def test_text_that_only_resembles_a_prefix_is_kept():
+    tokens = ["Rol", "ling thunder", ": the storm"]
+
+    assert "".join(core._strip_field_prefix_stream(iter(tokens), "Role")) == "Rolling thunder: the storm"
+
+
+def test_stream_field_content_matches_the_blocking_call(db, openai_fake):
+    core.add_lore_to_db("Kaelin Dross", FIELDS, ["engineer"], "Character")
+
+    tokens = list(core.stream_field_content("Kaelin Dross", "Role", "Character", "", tags=["engineer"]))
+    blocking = core.generate_field_content("Kaelin Dross", "Role", "Character", "", tags=["engineer"])
+
+    assert len(tokens) > 1
+    assert "".join(tokens) == blocking == "A wary engineer who keeps the grid alive."
+    assert [request["stream"] for request in openai_fake.chat_requests] == [True, False]
+
+
+def test_stream_text_from_lore_yields_tokens(db, openai_fake):
+    core.add_lore_to_db("Kaelin Dross", FIELDS, ["engineer"], "Character")
+
+    tokens = list(core.stream_text_from_lore("Write a scene with Kaelin Dross"))
+
+    assert len(tokens) > 1
+    assert "".join(tokens) == openai_fake.completion
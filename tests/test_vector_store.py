@@ -0,0 +1,90 @@
+import os
+import sqlite3
+
+from backend.app.services import core
+from backend.app.services.vector_store import VectorStore, load_rows
+from tests.conftest import FAKE_DIMENSIONS
+
+
+def _live_keys(rows):
+    live = rows[rows["lore_id"] >= 0]
+    return sorted(zip(live["lore_id"].tolist(), live["chunk_id"].tolist()))
+
+
+def _rows(store):
+    model = core.get_embedding_space()["model"]
+    with sqlite3.connect(core.DB_PATH) as conn:
+        cursor = conn.cursor()
+        return store.rows(cursor, model, FAKE_DIMENSIONS), load_rows(cursor, model, FAKE_DIMENSIONS)
+
+
+def test_store_scores_like_the_database(db, monkeypatch, characters):
+    from_store = core.search_lore("engineer of the tidal turbines", min_score=0)
+
+    monkeypatch.setattr(core, "VECTOR_STORE_ENABLED", False)
+    from_database = core.search_lore("engineer of the tidal turbines", min_score=0)
+
+    assert from_store == from_database
+    assert os.path.exists(os.path.splitext(db)[0] + ".vectors")
+
+
+def test_edits_and_deletes_are_replayed_into_the_file(db, characters):
+    store = core._vector_store()
+    _rows(store)
+    generation = store.header["generation"]
+
+    core.patch_lore_entry("Mira Vell", fields={"Role": "Cartographer of the tidal turbines"})
+    core.delete_lore_entry_by_title("Oren Hale")
+    rows, expected = _rows(store)
+
+    assert _live_keys(rows) == _live_keys(expected)
+    assert store.header["generation"] == generation + 1
+    assert len(rows) > len(expected)
+    assert "Oren Hale" not in [r["title"] for r in core.search_lore("turbines", min_score=0)]
+
+
+def test_other_readers_pick_up_changes(db, characters, add_entry):
+    first, second = VectorStore(core._vector_store().path), VectorStore(core._vector_store().path)
+    _rows(first)
+    _rows(second)
+
+    add_entry("Tamsin Reed", Role="Lamplighter of the lower districts")
+    rows, expected = _rows(first)
+    reread, _ = _rows(second)
+
+    assert _live_keys(reread) == _live_keys(rows) == _live_keys(expected)
+
+
+def test_compaction_drops_tombstones_and_trims_the_log(db, characters):
+    core.search_lore("turbines", min_score=0)
+    core.patch_lore_entry("Mira Vell", fields={"Role": "Retired cartographer"})
+    core.search_lore("turbines", min_score=0)
+
+    result = core.compact_vector_store()
+
+    stats = core.get_vector_store_stats()
+    assert result["rows_after"] < result["rows_before"]
+    assert stats["rows"] == stats["live_rows"] == result["rows_after"]
+    with sqlite3.connect(db) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM vector_changes").fetchone()[0] == 0
+
+
+def test_damaged_or_foreign_files_are_rebuilt(db, characters):
+    store = core._vector_store()
+    _rows(store)
+    with open(store.path, "r+b") as f:
+        f.write(b"garbage!")
+
+    rebuilt = VectorStore(store.path)
+    rows, expected = _rows(rebuilt)
+    assert _live_keys(rows) == _live_keys(expected)
+
+    # A file ahead of the log belongs to a newer database than this one
+    with sqlite3.connect(db) as conn:
+        conn.execute("DELETE FROM vector_changes")
+        conn.execute("UPDATE sqlite_sequence SET seq = 0 WHERE name = 'vector_changes'")
+    reader = VectorStore(store.path)
+    rows, expected = _rows(reader)
+    assert _live_keys(rows) == _live_keys(expected)
+    assert reader.header["position"] == 0
+    assert reader.header["generation"] == rebuilt.header["generation"] + 1
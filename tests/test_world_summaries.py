@@ -0,0 +1,92 @@
+from backend.app.services import core, jobs
+
+NAMES = ["Kaelin Dross", "Mira Vell", "Oren Hale", "Talia Voss", "Brann Eld",
+         "Sela Marsh", "Ivo Crane", "Nessa Pike", "Dain Rook", "Wren Hollow"]
+
+
+def _populate():
+    for position, name in enumerate(NAMES):
+        tags = ["engineer"] if position < 3 else ["explorer"] if position < 5 else []
+        core.add_lore_to_db(name, {"Name": name, "Role": f"{name} keeps watch over the turbines", "Tags": tags}, tags, "Character")
+
+
+def _summaries():
+    return {summary["scope"]: summary for summary in core.get_world_summaries()}
+
+
+def test_templates_and_large_tag_clusters_get_summaries(db, openai_fake):
+    _populate()
+    openai_fake.completion = "Ten characters keep the drowned city running."
+
+    assert core.refresh_world_summaries()["refreshed"] == 2
+
+    summaries = _summaries()
+    assert set(summaries) == {"template:Character", "tag:engineer"}
+    assert summaries["template:Character"]["summary"] == openai_fake.completion
+    assert summaries["template:Character"]["entries"] == 10
+
+
+def test_unchanged_summaries_make_no_requests(db, openai_fake):
+    _populate()
+    core.refresh_world_summaries()
+    requests = len(openai_fake.chat_requests)
+
+    assert core.refresh_world_summaries() == {"refreshed": 0, "skipped": 2, "removed": 0}
+    assert len(openai_fake.chat_requests) == requests
+
+
+def test_summaries_wait_for_enough_changes_and_fold_in_only_those(db, openai_fake):
+    _populate()
+    core.refresh_world_summaries()
+    core.patch_lore_entry("Sela Marsh", fields={"Role": "Sela Marsh now runs the harbour"})
+
+    assert core.refresh_world_summaries()["refreshed"] == 0
+    assert _summaries()["template:Character"]["pending_changes"] == 1
+
+    core.patch_lore_entry("Ivo Crane", fields={"Role": "Ivo Crane left for the salt flats"})
+    requests = len(openai_fake.chat_requests)
+
+    assert core.refresh_world_summaries()["refreshed"] == 1
+    [request] = openai_fake.chat_requests[requests:]
+    prompt = request["messages"][1]["content"]
+    assert "Update the overview" in prompt
+    assert "Ivo Crane" in prompt and "Sela Marsh" in prompt
+    assert "Wren Hollow" not in prompt
+
+
+def test_summaries_of_vanished_scopes_are_removed(db):
+    _populate()
+    core.refresh_world_summaries()
+    core.delete_lore_entry_by_title("Oren Hale")
+
+    assert core.refresh_world_summaries()["removed"] == 1
+    assert "tag:engineer" not in _summaries()
+
+
+def test_field_prompts_carry_the_world_overview(db, openai_fake):
+    _populate()
+    openai_fake.completion = "Ten characters keep the drowned city running."
+    core.refresh_world_summaries()
+    openai_fake.completion = "A wary engineer."
+
+    core.generate_field_content("Kaelin Dross", "Motivation", "Character", "", tags=["engineer"], use_world_summary=True)
+
+    prompt = openai_fake.chat_requests[-1]["messages"][1]["content"]
+    assert "World overview:" in prompt
+    assert "Ten characters keep the drowned city running." in prompt
+
+
+def test_refresh_endpoint_queues_a_job_instead_of_calling_openai(api, openai_fake):
+    _populate()
+
+    response = api.post("/lore/summaries/refresh", params={"force": True})
+
+    assert response.status_code == 202
+    assert openai_fake.chat_requests == []
+    [job_id] = response.json()["data"]["job_ids"]
+    assert jobs.get_job(job_id)["payload"] == {"force": True}
+
+    jobs.run_worker(poll_interval=0.01, drain=True)
+
+    assert jobs.get_job(job_id)["result"]["refreshed"] == 2
+    assert api.get(response.json()["data"]["status_url"]).json()["data"]["done"]